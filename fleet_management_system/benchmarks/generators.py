@@ -0,0 +1,113 @@
+"""Synthetic navigation graphs for benchmarks, in the nav_graph.json level format"""
+import json
+import math
+import random
+from collections import deque
+from typing import Callable, Dict, List
+import numpy as np
+from src.models.nav_graph import NavigationGraph
+from src.utils.spatial_index import SpatialGrid
+
+LevelData = Dict[str, List]
+# One charger per this many vertices, spread evenly
+CHARGER_SPACING = 500
+
+
+def _level(xs: List[float], ys: List[float], edges: List[tuple], speed_limits: List[float]) -> LevelData:
+    vertices = [[x, y, {"name": f"v{i}", "is_charger": i % CHARGER_SPACING == 0}]
+                for i, (x, y) in enumerate(zip(xs, ys))]
+    lanes = []
+    for (a, b), speed_limit in zip(edges, speed_limits):
+        lanes.append([a, b, {"speed_limit": speed_limit}])
+        lanes.append([b, a, {"speed_limit": speed_limit}])
+    return {"vertices": vertices, "lanes": lanes}
+
+
+def grid_level(vertex_count: int, seed: int = 0) -> LevelData:
+    """Square 4-connected grid with unit spacing; a random tenth of the lanes are faster"""
+    rng = random.Random(seed)
+    side = max(2, math.isqrt(vertex_count))
+    xs = [float(i % side) for i in range(side * side)]
+    ys = [float(i // side) for i in range(side * side)]
+    edges = [(i, i + 1) for i in range(side * side) if i % side < side - 1]
+    edges += [(i, i + side) for i in range(side * (side - 1))]
+    return _level(xs, ys, edges, [2 if rng.random() < 0.1 else 0 for _ in edges])
+
+
+def warehouse_level(vertex_count: int, seed: int = 0, aisle_length: int = 20) -> LevelData:
+    """Parallel rack aisles joined by cross-aisles at both ends and in the middle.
+
+    Aisles are 3 units apart; cross-aisle lanes have a speed limit of 2,
+    aisle lanes are unrestricted.
+    """
+    aisles = max(2, vertex_count // aisle_length)
+    xs, ys, edges, speed_limits = [], [], [], []
+    for aisle in range(aisles):
+        for row in range(aisle_length):
+            vertex_id = aisle * aisle_length + row
+            xs.append(3.0 * aisle)
+            ys.append(float(row))
+            if row:
+                edges.append((vertex_id - 1, vertex_id))
+                speed_limits.append(0)
+            if aisle and row in (0, aisle_length // 2, aisle_length - 1):
+                edges.append((vertex_id - aisle_length, vertex_id))
+                speed_limits.append(2)
+    return _level(xs, ys, edges, speed_limits)
+
+
+def random_geometric_level(vertex_count: int, seed: int = 0, mean_degree: float = 6.0) -> LevelData:
+    """Uniform random points joined when closer than the radius giving mean_degree, largest component only"""
+    rng = np.random.default_rng(seed)
+    side = math.sqrt(vertex_count)
+    xs = rng.uniform(0, side, vertex_count)
+    ys = rng.uniform(0, side, vertex_count)
+    radius = math.sqrt(mean_degree / math.pi)
+    grid = SpatialGrid.from_arrays(xs, ys)
+    neighbors: Dict[int, List[int]] = {i: [] for i in range(vertex_count)}
+    for i, (x, y) in enumerate(zip(xs.tolist(), ys.tolist())):
+        for _, j in grid.within(x, y, radius):
+            if j > i:
+                neighbors[i].append(j)
+                neighbors[j].append(i)
+
+    # Keep the largest connected component so every pair of vertices is routable
+    component = {}
+    largest: List[int] = []
+    for root in range(vertex_count):
+        if root in component:
+            continue
+        members, queue = [root], deque([root])
+        component[root] = root
+        while queue:
+            for neighbor in neighbors[queue.popleft()]:
+                if neighbor not in component:
+                    component[neighbor] = root
+                    members.append(neighbor)
+                    queue.append(neighbor)
+        if len(members) > len(largest):
+            largest = members
+    largest.sort()
+    renumber = {old: new for new, old in enumerate(largest)}
+    edges = [(renumber[a], renumber[b]) for a in largest for b in neighbors[a] if a < b]
+    return _level([float(xs[i]) for i in largest], [float(ys[i]) for i in largest], edges, [0] * len(edges))
+
+
+GENERATORS: Dict[str, Callable[..., LevelData]] = {
+    "grid": grid_level,
+    "warehouse": warehouse_level,
+    "rgg": random_geometric_level,
+}
+
+
+def build_graph(kind: str, vertex_count: int, seed: int = 0) -> NavigationGraph:
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown graph kind '{kind}', expected one of {list(GENERATORS)}")
+    return NavigationGraph.from_level_data(GENERATORS[kind](vertex_count, seed), kind)
+
+
+def write_graph_file(path: str, kind: str, vertex_count: int, seed: int = 0):
+    """Save a generated graph as a one-level nav_graph.json style file (level name: level1)"""
+    with open(path, 'w') as f:
+        level = GENERATORS[kind](vertex_count, seed)
+        json.dump({"building_name": f"{kind}_{vertex_count}", "levels": {"level1": level}}, f)
@@ -0,0 +1,287 @@
+"""Benchmarks for path queries, traffic management and simulation ticks on synthetic maps.
+
+Usage (from fleet_management_system/):
+    python -m benchmarks.run                                   # quick suite
+    python -m benchmarks.run --graphs grid:100000 rgg:100000 --robots 10 1000 10000
+    python -m benchmarks.run --compare benchmarks/results/old.json benchmarks/results/new.json
+
+Every graph is benchmarked for path query latency, then for each fleet size
+a fleet is spawned on it and driven with random destinations for --ticks
+ticks, and for each --wave-robots size a fresh fleet is planned in one wave.
+Results are written as JSON (default benchmarks/results/<commit>.json).
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+import numpy as np
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.robot import RobotStatus
+from src.utils.logger import FleetLogger, LogLevel, shutdown_loggers
+from .generators import GENERATORS, build_graph
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+# Metrics where a larger value is better; for every other metric smaller is better
+HIGHER_IS_BETTER = ("robots_moved_per_second", "ticks_per_second")
+
+
+def percentiles(samples: List[float], prefix: str) -> Dict[str, float]:
+    """{prefix}_mean/_p50/_p95/_p99/_max in milliseconds of samples given in seconds"""
+    if not samples:
+        return {}
+    values = np.asarray(samples) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {f"{prefix}_mean": float(values.mean()), f"{prefix}_p50": float(p50), f"{prefix}_p95": float(p95),
+            f"{prefix}_p99": float(p99), f"{prefix}_max": float(values.max())}
+
+
+def measure_graph(kind: str, vertex_count: int, seed: int) -> Dict[str, float]:
+    """Build time and traced memory of a generated graph (built twice: timed, then traced)"""
+    started = time.perf_counter()
+    graph = build_graph(kind, vertex_count, seed)
+    build_seconds = time.perf_counter() - started
+    del graph
+    gc.collect()
+    tracemalloc.start()
+    graph = build_graph(kind, vertex_count, seed)
+    graph_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"vertices": len(graph.vertices), "lanes": len(graph.lanes), "build_ms": build_seconds * 1000.0,
+            "graph_memory_mb": graph_bytes / 1e6}
+
+
+def bench_paths(graph, queries: int, seed: int) -> Dict[str, float]:
+    """Latency of find_shortest_path between random vertex pairs (A*, travel time, route cache cleared)"""
+    rng = random.Random(seed)
+    count = len(graph.vertices)
+    pairs = [(rng.randrange(count), rng.randrange(count)) for _ in range(queries)]
+    started = time.perf_counter()
+    graph.find_shortest_path(*pairs[0])  # Includes building the planner's edge weights
+    first_query = time.perf_counter() - started
+    samples = []
+    for start, end in pairs[1:]:
+        graph.route_cache.invalidate()
+        started = time.perf_counter()
+        graph.find_shortest_path(start, end)
+        samples.append(time.perf_counter() - started)
+    return {"first_query_ms": first_query * 1000.0, **percentiles(samples, "path_ms")}
+
+
+def bench_fleet(graph, robots: int, ticks: int, seed: int, motion: str, time_budget: float,
+                wave_size: int) -> Dict[str, float]:
+    """Tick time, traffic management time and robot moves of a fleet driven with random destinations.
+
+    Up to wave_size free robots get a new destination before each tick, planned as one batch.
+    """
+    rng = random.Random(seed)
+    engine = SimulationEngine(graph, motion=motion)
+    count = len(graph.vertices)
+    started = time.perf_counter()
+    for vertex_id in rng.sample(range(count), min(robots, count)):
+        engine.spawn_robot(vertex_id)
+    spawn_seconds = time.perf_counter() - started
+
+    traffic_samples: List[float] = []
+    manage_traffic = engine.traffic_manager.manage_traffic
+
+    def timed_manage_traffic(*args, **kwargs):
+        traffic_started = time.perf_counter()
+        manage_traffic(*args, **kwargs)
+        traffic_samples.append(time.perf_counter() - traffic_started)
+    engine.traffic_manager.manage_traffic = timed_manage_traffic
+
+    store = engine.fleet_manager.store
+    fleet = engine.fleet_manager
+    assign_samples: List[float] = []
+    tick_samples: List[float] = []
+    moves = 0
+    budget_end = time.perf_counter() + time_budget
+    for _ in range(ticks):
+        if time.perf_counter() > budget_end:
+            break
+        free = fleet.robots_with_status(RobotStatus.IDLE, RobotStatus.TASK_COMPLETE)[:wave_size]
+        destinations = {robot.id: rng.randrange(count) for robot in free}
+        started = time.perf_counter()
+        if destinations:
+            engine.assign_tasks({r: d for r, d in destinations.items() if d != fleet.get_robot(r).current_vertex_id})
+        assign_samples.append(time.perf_counter() - started)
+        before = store.vertex[:store.count].copy()
+        started = time.perf_counter()
+        engine.step()
+        tick_samples.append(time.perf_counter() - started)
+        moves += int(np.count_nonzero(store.vertex[:store.count] != before))
+
+    tick_seconds = sum(tick_samples)
+    engine.close()
+    return {
+        "robots": store.count,
+        "ticks": len(tick_samples),
+        "spawn_ms": spawn_seconds * 1000.0,
+        **percentiles(tick_samples, "tick_ms"),
+        **percentiles(assign_samples, "assign_ms"),
+        **percentiles(traffic_samples, "traffic_ms"),
+        "ticks_per_second": len(tick_samples) / tick_seconds if tick_seconds else 0.0,
+        "robots_moved_per_second": moves / tick_seconds if tick_seconds else 0.0,
+        "deadlocks": engine.traffic_manager.deadlock_summary()['detected'],
+    }
+
+
+def bench_wave(graph, robots: int, seed: int) -> Dict[str, float]:
+    """Time to plan one wave giving every robot of a fresh fleet a random destination at once.
+
+    This is the batch planner's worst case: every robot is planned through
+    the reservation table in one tick. Destinations are distinct, as two
+    robots parked on one vertex can never both get a conflict-free route,
+    so plan_fallbacks counts robots the planner failed to fit in.
+    """
+    rng = random.Random(seed)
+    engine = SimulationEngine(graph)
+    metrics = engine.enable_metrics()
+    count = len(graph.vertices)
+    for vertex_id in rng.sample(range(count), min(robots, count)):
+        engine.spawn_robot(vertex_id)
+    fleet = engine.fleet_manager
+    robot_ids = [robot.id for robot in fleet.get_all_robots()]
+    destinations = {r: d for r, d in zip(robot_ids, rng.sample(range(count), len(robot_ids)))
+                    if d != fleet.get_robot(r).current_vertex_id}
+    started = time.perf_counter()
+    engine.assign_tasks(destinations)
+    wave_seconds = time.perf_counter() - started
+    engine.close()
+    return {
+        "robots": len(destinations),
+        "wave_ms": wave_seconds * 1000.0,
+        "plan_fallbacks": metrics.counters.get("plan_fallbacks", 0),
+    }
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3  # bytes on macOS, KiB elsewhere
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> Dict:
+    results = []
+    for spec in args.graphs:
+        kind, _, size = spec.partition(':')
+        vertex_count = int(size or 1000)
+        graph_stats = measure_graph(kind, vertex_count, args.seed)
+        graph = build_graph(kind, vertex_count, args.seed)
+        path_stats = bench_paths(graph, args.queries, args.seed)
+        print(f"{kind}:{vertex_count} ({graph_stats['vertices']} vertices, {graph_stats['lanes']} lanes): "
+              f"built in {graph_stats['build_ms']:.0f} ms, {graph_stats['graph_memory_mb']:.1f} MB; "
+              f"path p50 {path_stats.get('path_ms_p50', 0):.2f} / p95 {path_stats.get('path_ms_p95', 0):.2f} ms")
+        results.append({"benchmark": "paths", "graph": kind, "size": vertex_count, **graph_stats, **path_stats})
+
+        for robots in args.robots:
+            fleet_graph = build_graph(kind, vertex_count, args.seed)  # Fresh lanes and caches for every fleet
+            stats = bench_fleet(fleet_graph, robots, args.ticks, args.seed, args.motion, args.time_budget,
+                                args.wave_size)
+            print(f"  {stats['robots']} robots: {stats['ticks']} ticks, tick p50 {stats.get('tick_ms_p50', 0):.2f} / "
+                  f"p95 {stats.get('tick_ms_p95', 0):.2f} ms, assign p95 {stats.get('assign_ms_p95', 0):.1f} ms, "
+                  f"{stats['robots_moved_per_second']:.0f} robots moved/s")
+            results.append({"benchmark": "fleet", "graph": kind, "size": vertex_count, "motion": args.motion,
+                            **stats})
+
+        for robots in args.wave_robots:
+            wave_graph = build_graph(kind, vertex_count, args.seed)
+            stats = bench_wave(wave_graph, robots, args.seed)
+            print(f"  wave of {stats['robots']} robots planned in {stats['wave_ms']:.0f} ms, "
+                  f"{stats['plan_fallbacks']} fell back to plain paths")
+            results.append({"benchmark": "wave", "graph": kind, "size": vertex_count, **stats})
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+
+def _result_key(result: Dict) -> str:
+    key = f"{result['benchmark']} {result['graph']}:{result['size']}"
+    return key + f" x{result['robots']}" if result['benchmark'] in ("fleet", "wave") else key
+
+
+def compare(baseline_file: str, current_file: str, threshold: float):
+    """Print metrics that changed by more than threshold (a fraction) between two result files"""
+    with open(baseline_file) as f:
+        baseline = {_result_key(r): r for r in json.load(f)["results"]}
+    with open(current_file) as f:
+        current = {_result_key(r): r for r in json.load(f)["results"]}
+    regressions = 0
+    for key in sorted(baseline.keys() & current.keys()):
+        for metric, old in baseline[key].items():
+            new = current[key].get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / abs(old)
+            if abs(change) < threshold:
+                continue
+            worse = change < 0 if metric in HIGHER_IS_BETTER else change > 0
+            regressions += worse
+            print(f"{key:<28} {metric:<26} {old:>12.3f} -> {new:>12.3f} ({change:+.0%}){'  WORSE' if worse else ''}")
+    print(f"{regressions} metrics worse by more than {threshold:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark path planning, traffic management and simulation ticks')
+    parser.add_argument('--graphs', nargs='+', default=['grid:1000', 'warehouse:1000', 'rgg:1000'],
+                        help=f'Graphs as kind:vertices, kinds: {", ".join(GENERATORS)}')
+    parser.add_argument('--robots', nargs='*', type=int, default=[10, 100],
+                        help='Fleet sizes to simulate (none: path queries only)')
+    parser.add_argument('--ticks', type=int, default=100, help='Ticks per fleet run')
+    parser.add_argument('--queries', type=int, default=500, help='Path queries per graph')
+    parser.add_argument('--wave-robots', nargs='*', type=int, default=[100],
+                        help='Fleet sizes planned as one wave of simultaneous assignments (none: skip)')
+    parser.add_argument('--wave-size', type=int, default=256,
+                        help="Most robots given a new destination per tick (like the dispatcher's max_batch)")
+    parser.add_argument('--motion', choices=['discrete', 'continuous'], default='discrete')
+    parser.add_argument('--time-budget', type=float, default=120.0,
+                        help='Seconds after which a fleet run stops early (the ticks run are reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running benchmarks')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change reported by --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare, args.threshold)
+        return
+    FleetLogger.default_level = LogLevel.ERROR
+    report = run_suite(args)
+    shutdown_loggers()
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,260 @@
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import numpy as np
+from ..models.robot import Robot, RobotStatus
+from ..utils.checkpoint import sparse_dict
+from ..utils.cost_tables import CostTableCache
+from ..utils.logger import FleetLogger, LogLevel
+from .fleet_manager import FleetManager
+
+
+# Deadlock priority of robots on their way to a charger, so others give way to them
+CHARGE_TRIP_PRIORITY = 100
+
+
+class ChargerScheduler:
+    """Sends robots to charger vertices before their battery runs low.
+
+    Every charger vertex is one charging slot. A robot is due for a charge
+    once the charge left after driving to its nearest charger would fall
+    below `low_battery`. It is sent to the nearest of its `nearest_count`
+    closest chargers whose slot is free and unoccupied, or queues for the
+    one with the shortest queue and waits where it stands; idle robots
+    parked on a charger with a queue are moved aside. The closest chargers of every
+    vertex come from one multi-source Dijkstra from all chargers, redone
+    only when the graph changes. Distances are in world units, the unit
+    FleetManager.battery_drain is expressed in. The p95 wait covers the
+    latest WAIT_SAMPLE_LIMIT sessions; the mean covers every session.
+    """
+    WAIT_SAMPLE_LIMIT = 1000
+
+    def __init__(self, fleet_manager: FleetManager, low_battery: float = 0.25, charge_rate: float = 0.05,
+                 nearest_count: int = 3):
+        self.fleet_manager = fleet_manager
+        self.nav_graph = fleet_manager.nav_graph
+        self.planner = self.nav_graph.get_planner("distance", "dijkstra")
+        self.distances = CostTableCache(self.planner)
+        self.low_battery = low_battery
+        self.charge_rate = charge_rate  # Charge gained per simulated second
+        self.nearest_count = nearest_count
+        self.logger = FleetLogger()
+        self.chargers: List[int] = [v.id for v in self.nav_graph.vertices if v.is_charger]
+        self.slot_holder: Dict[int, Optional[int]] = {c: None for c in self.chargers}  # charger -> robot
+        self.queues: Dict[int, Deque[int]] = {c: deque() for c in self.chargers}
+        self.assigned: Dict[int, int] = {}  # robot id -> charger it holds or queues for
+        self.requested_tick: Dict[int, int] = {}
+        self.due: Set[int] = set()  # Robots without the charge for any job on offer
+        self._unreachable: Set[int] = set()  # Robots already reported as unable to reach a charger
+        self._nearest: Dict[int, List[Tuple[float, int]]] = {}
+        self._nearest_charger_distance = np.zeros(0)
+        self._nearest_version: Optional[int] = None
+        self.sessions = 0
+        self.wait_ticks: Deque[int] = deque(maxlen=self.WAIT_SAMPLE_LIMIT)  # From asking for a charger to plugging in
+        self.total_wait_ticks = 0
+        self.busy_slot_ticks = 0
+        self.queue_length_ticks = 0
+        self.ticks = 0
+
+    def checkpoint_state(self) -> Dict:
+        """Slots, queues and pending requests, and the usage counters; wait samples are not kept"""
+        return {
+            "low_battery": self.low_battery, "charge_rate": self.charge_rate, "nearest_count": self.nearest_count,
+            "slot_holders": [[charger, holder] for charger, holder in self.slot_holder.items() if holder is not None],
+            "queues": [[charger, list(queue)] for charger, queue in self.queues.items() if queue],
+            "assigned": sparse_dict(self.assigned),
+            "requested_tick": sparse_dict(self.requested_tick),
+            "due": sorted(self.due), "unreachable": sorted(self._unreachable),
+            "sessions": self.sessions, "total_wait_ticks": self.total_wait_ticks,
+            "busy_slot_ticks": self.busy_slot_ticks, "queue_length_ticks": self.queue_length_ticks, "ticks": self.ticks,
+        }
+
+    def restore_state(self, state: Dict):
+        for charger, holder in state["slot_holders"]:
+            self.slot_holder[charger] = holder
+        for charger, robot_ids in state["queues"]:
+            self.queues[charger].extend(robot_ids)
+        for name, table in (("assigned", self.assigned), ("requested_tick", self.requested_tick)):
+            keys, values = state[name]
+            table.update(zip(keys.tolist(), values.tolist()))
+        self.due.update(state["due"])
+        self._unreachable.update(state["unreachable"])
+        self.sessions, self.total_wait_ticks = state["sessions"], state["total_wait_ticks"]
+        self.busy_slot_ticks = state["busy_slot_ticks"]
+        self.queue_length_ticks, self.ticks = state["queue_length_ticks"], state["ticks"]
+
+    def _refresh(self):
+        if self._nearest_version == self.nav_graph.version:
+            return
+        self._nearest = self.planner.nearest_targets(self.chargers, self.nearest_count)
+        distance = np.full(len(self.nav_graph.vertices), np.inf)
+        for vertex_id, found in self._nearest.items():
+            distance[vertex_id] = found[0][0]
+        self._nearest_charger_distance = distance
+        self._nearest_version = self.nav_graph.version
+
+    def charger_distance(self, vertex_ids: np.ndarray) -> np.ndarray:
+        """Distance from each vertex to its nearest charger (inf if none is reachable)"""
+        self._refresh()
+        return self._nearest_charger_distance[vertex_ids]
+
+    def needs_charge(self, robot: Robot) -> bool:
+        """True for robots queued for or heading to a charger, or too low to take on more work"""
+        if robot.id in self.assigned or robot.id in self.due:
+            return True
+        if not self.chargers:
+            return False
+        reserve = self.charger_distance(np.array([robot.current_vertex_id]))[0] * self.fleet_manager.battery_drain
+        return robot.battery - reserve < self.low_battery
+
+    def charge_soon(self, robot_ids: List[int]):
+        """Send these robots to charge on the next update even if they are not low yet"""
+        store = self.fleet_manager.store
+        self.due.update(robot_id for robot_id in robot_ids if store.battery[robot_id] < 1.0)
+
+    def trip_charge(self, stops: List[Tuple[int, int]]) -> np.ndarray:
+        """Charge needed to drive from each pickup to its drop and on to a charger, keeping `low_battery`"""
+        drain = self.fleet_manager.battery_drain
+        if not self.chargers or not drain:
+            return np.zeros(len(stops))
+        drops = np.array([drop for _, drop in stops], dtype=np.int64)
+        trips = np.array([self.distances.costs_to(drop)[pickup] for pickup, drop in stops])
+        return (trips + self.charger_distance(drops)) * drain + self.low_battery
+
+    def charge_needed(self, robots: List[Robot], stops: List[Tuple[int, int]]) -> np.ndarray:
+        """robots x stops charge each robot needs for a (pickup, drop) job, as in trip_charge()"""
+        drain = self.fleet_manager.battery_drain
+        if not self.chargers or not drain:
+            return np.zeros((len(robots), len(stops)))
+        vertices = np.array([robot.current_vertex_id for robot in robots], dtype=np.int64)
+        to_pickup = np.column_stack([self.distances.costs_to(pickup)[vertices] for pickup, _ in stops])
+        return to_pickup * drain + self.trip_charge(stops)[None, :]
+
+    def update(self, tick: int, dt: float):
+        """Charge plugged-in robots, plug in arrivals, and send robots due for a charge"""
+        if not self.chargers:
+            return
+        self.ticks += 1
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.CHARGING):
+            robot.battery = min(1.0, robot.battery + self.charge_rate * dt)
+            if robot.battery >= 1.0:
+                robot.status = RobotStatus.IDLE
+                self.logger.log("Robot %d finished charging at vertex %d", robot.id, robot.current_vertex_id)
+                self._release(robot.id, tick)
+
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.IDLE, RobotStatus.TASK_COMPLETE):
+            charger = self.assigned.get(robot.id)
+            if charger is None:
+                if self.needs_charge(robot):
+                    self._request(robot, tick)
+            elif self.slot_holder[charger] == robot.id:
+                if robot.current_vertex_id == charger:
+                    self._plug_in(robot, tick)
+                else:
+                    # Moved aside on the way or its route failed: head for the charger again
+                    self.fleet_manager.assign_navigation_tasks({robot.id: charger})
+
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.STRANDED):
+            if robot.id in self.assigned:
+                self._abandon(robot, tick)
+
+        for charger, queue in self.queues.items():
+            if queue and self.slot_holder[charger] is None:
+                self._serve(charger, tick)
+
+        self.busy_slot_ticks += sum(1 for holder in self.slot_holder.values() if holder is not None)
+        self.queue_length_ticks += sum(len(queue) for queue in self.queues.values())
+
+    def _request(self, robot: Robot, tick: int):
+        self._refresh()
+        reach = robot.battery / self.fleet_manager.battery_drain if self.fleet_manager.battery_drain else float('inf')
+        nearest = self._nearest.get(robot.current_vertex_id, ())
+        # Farther chargers only if the battery gets there; the nearest one is always an option
+        candidates = [charger for rank, (distance, charger) in enumerate(nearest) if rank == 0 or distance <= reach]
+        if not candidates:
+            if robot.id not in self._unreachable:
+                self._unreachable.add(robot.id)
+                self.logger.log("Robot %d cannot reach any charger", robot.id, level=LogLevel.WARNING)
+            return
+        self.requested_tick[robot.id] = tick
+        self.due.discard(robot.id)
+        for charger in candidates:
+            if self.slot_holder[charger] is None and self._occupant(charger) in (None, robot.id):
+                self._send(robot, charger, tick)
+                return
+        charger = min(candidates, key=lambda c: len(self.queues[c]))
+        self.queues[charger].append(robot.id)
+        self.assigned[robot.id] = charger
+        self.logger.log("Robot %d queues for charger %d (%d waiting)", robot.id, charger, len(self.queues[charger]))
+
+    def _send(self, robot: Robot, charger: int, tick: int):
+        self.slot_holder[charger] = robot.id
+        self.assigned[robot.id] = charger
+        self._set_priority(robot.id, CHARGE_TRIP_PRIORITY)
+        if robot.current_vertex_id == charger:
+            self._plug_in(robot, tick)
+        elif self.fleet_manager.assign_navigation_tasks({robot.id: charger}):
+            self.logger.log("Robot %d heads to charger %d at %.0f%% battery", robot.id, charger, 100 * robot.battery)
+
+    def _plug_in(self, robot: Robot, tick: int):
+        robot.status = RobotStatus.CHARGING
+        self._set_priority(robot.id, 0)
+        self.sessions += 1
+        wait = tick - self.requested_tick.pop(robot.id, tick)
+        self.wait_ticks.append(wait)
+        self.total_wait_ticks += wait
+
+    def _set_priority(self, robot_id: int, priority: int):
+        if self.fleet_manager.traffic_manager:
+            self.fleet_manager.traffic_manager.set_priority(robot_id, priority)
+
+    def _release(self, robot_id: int, tick: int):
+        charger = self.assigned.pop(robot_id)
+        self.slot_holder[charger] = None
+        if self.queues[charger]:
+            self._serve(charger, tick)
+
+    def _abandon(self, robot: Robot, tick: int):
+        """A robot stranded on the way to a charger: plug it in if it made it, else give up its place"""
+        charger = self.assigned[robot.id]
+        if self.slot_holder[charger] == robot.id:
+            if robot.current_vertex_id == charger:
+                self._plug_in(robot, tick)
+                return
+            self._release(robot.id, tick)
+        else:
+            self.queues[charger].remove(robot.id)
+            del self.assigned[robot.id]
+        self.requested_tick.pop(robot.id, None)
+        self._set_priority(robot.id, 0)
+        self.logger.log("Robot %d was stranded on its way to charger %d", robot.id, charger, level=LogLevel.WARNING)
+
+    def _occupant(self, charger: int) -> Optional[int]:
+        traffic_manager = self.fleet_manager.traffic_manager
+        return traffic_manager.vertex_occupancy.get(charger) if traffic_manager else None
+
+    def _serve(self, charger: int, tick: int):
+        """Hand a free slot to the next queued robot once nobody stands on the charger"""
+        occupant = self._occupant(charger)
+        if occupant is None:
+            self._send(self.fleet_manager.get_robot(self.queues[charger].popleft()), charger, tick)
+            return
+        robot = self.fleet_manager.get_robot(occupant)
+        # A robot with nothing to do parked on the charger (e.g. one that just finished charging) makes room
+        if robot.status in (RobotStatus.IDLE, RobotStatus.TASK_COMPLETE) and robot.id not in self.assigned:
+            self.fleet_manager.traffic_manager.move_aside(robot, {charger})
+
+    def metrics(self) -> Dict[str, float]:
+        """Charging sessions, waits for a free slot, slot utilization and queue lengths"""
+        waits = np.asarray(self.wait_ticks, dtype=np.float64)
+        slot_ticks = self.ticks * len(self.chargers)
+        return {
+            "chargers": len(self.chargers),
+            "sessions": self.sessions,
+            "charging": self.fleet_manager.count_with_status(RobotStatus.CHARGING),
+            "queued": sum(len(queue) for queue in self.queues.values()),
+            "ran_flat": self.fleet_manager.battery_depleted,
+            "utilization": self.busy_slot_ticks / slot_ticks if slot_ticks else 0.0,
+            "mean_queue_length": self.queue_length_ticks / self.ticks if self.ticks else 0.0,
+            "wait_ticks_mean": self.total_wait_ticks / self.sessions if self.sessions else 0.0,
+            "wait_ticks_p95": float(np.percentile(waits, 95)) if len(waits) else 0.0,
+        }
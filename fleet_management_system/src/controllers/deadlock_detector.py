@@ -0,0 +1,171 @@
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+
+
+@dataclass
+class DeadlockRecord:
+    robots: Tuple[int, ...]  # Robots on the wait-for cycle, in wait order
+    detected_tick: int
+    resolved_tick: Optional[int] = None
+    victim: Optional[int] = None
+    resolution: str = ""  # "reroute", "backoff", or "" if the cycle broke without a robot giving way
+    attempts: int = 0  # Times a robot on the cycle gave way; the cycle may re-form after each
+
+    @property
+    def duration(self) -> Optional[int]:
+        if self.resolved_tick is None:
+            return None
+        return self.resolved_tick - self.detected_tick
+
+
+class DeadlockDetector:
+    """Wait-for graph between robots with incremental cycle detection.
+
+    A waiting robot waits on at most one robot (the one in its way), so the
+    graph is a functional graph and any cycle through a new or changed edge
+    is found by following the chain from the robot it now waits on.
+
+    A cycle between the same robots that re-forms within REOPEN_TICKS of
+    breaking is the same deadlock coming back (the robot that gave way did
+    not get far enough): its record is reopened rather than counted again,
+    so durations cover the whole jam and the resolver can escalate. Only
+    the latest HISTORY_LIMIT records are kept; totals cover every deadlock.
+    """
+    REOPEN_TICKS = 10
+    HISTORY_LIMIT = 1000
+
+    def __init__(self):
+        self.waits_for: Dict[int, int] = {}
+        self.waiting_since: Dict[int, int] = {}  # robot id -> tick it started waiting on anyone
+        self.active: Dict[int, DeadlockRecord] = {}  # robot id -> open deadlock it is part of
+        self.history: Deque[DeadlockRecord] = deque(maxlen=self.HISTORY_LIMIT)
+        # Recently broken deadlocks by their robots, oldest resolution first
+        self._recent: "OrderedDict[FrozenSet[int], DeadlockRecord]" = OrderedDict()
+        self.detected = 0
+        self.resolved = 0
+        self.total_duration = 0
+        self.longest = 0
+
+    def set_waiting_on(self, robot_id: int, blocker_id: Optional[int], tick: int) -> Optional[DeadlockRecord]:
+        """Record who robot_id waits on; returns a new deadlock if this edge closed a cycle"""
+        previous = self.waits_for.get(robot_id)
+        if previous == blocker_id:
+            return None
+        if blocker_id is None:
+            self.clear(robot_id, tick)
+            return None
+        if previous is not None:
+            self._break(robot_id, tick)
+        else:
+            self.waiting_since[robot_id] = tick
+        self.waits_for[robot_id] = blocker_id
+
+        cycle = self._cycle_through(robot_id)
+        if cycle is None or any(member in self.active for member in cycle):
+            return None
+        self._forget_before(tick - self.REOPEN_TICKS)
+        record = self._recent.pop(frozenset(cycle), None)
+        if record is not None:
+            self._reopen(record)
+            for member in record.robots:
+                self.active[member] = record
+            return None
+        record = DeadlockRecord(tuple(cycle), tick)
+        for member in cycle:
+            self.active[member] = record
+        self.history.append(record)
+        self.detected += 1
+        return record
+
+    def clear(self, robot_id: int, tick: int):
+        """The robot no longer waits on anyone"""
+        if self.waits_for.pop(robot_id, None) is not None:
+            del self.waiting_since[robot_id]
+            self._break(robot_id, tick)
+
+    def _break(self, robot_id: int, tick: int):
+        record = self.active.get(robot_id)
+        if record is None:
+            return
+        record.resolved_tick = tick
+        for member in record.robots:
+            self.active.pop(member, None)
+        self.resolved += 1
+        self.total_duration += record.duration
+        self.longest = max(self.longest, record.duration)
+        self._recent[frozenset(record.robots)] = record
+
+    def _reopen(self, record: DeadlockRecord):
+        self.resolved -= 1
+        self.total_duration -= record.duration
+        record.resolved_tick = None
+        record.victim = None
+
+    def _forget_before(self, tick: int):
+        while self._recent:
+            key, record = next(iter(self._recent.items()))
+            if record.resolved_tick >= tick:
+                return
+            del self._recent[key]
+
+    def _cycle_through(self, robot_id: int) -> Optional[List[int]]:
+        cycle = [robot_id]
+        current = self.waits_for.get(robot_id)
+        while current is not None and current != robot_id:
+            if len(cycle) > len(self.waits_for):
+                return None  # Joined a cycle that does not include robot_id
+            cycle.append(current)
+            current = self.waits_for.get(current)
+        return cycle if current == robot_id else None
+
+    def checkpoint_state(self) -> Dict:
+        """Who waits on whom and since when, the open deadlocks, the ones that may reopen and the totals"""
+        open_records = list({id(record): record for record in self.active.values()}.values())
+        return {
+            "waits_for": sorted(self.waits_for.items()),
+            "waiting_since": sorted(self.waiting_since.items()),
+            "active": [self._record_state(record) for record in open_records],
+            "recent": [self._record_state(record) for record in self._recent.values()],
+            "totals": [self.detected, self.resolved, self.total_duration, self.longest],
+        }
+
+    @staticmethod
+    def _record_state(record: DeadlockRecord) -> List:
+        return [list(record.robots), record.detected_tick, record.resolved_tick, record.victim, record.resolution,
+                record.attempts]
+
+    def restore_state(self, state: Dict):
+        self.waits_for.update(state["waits_for"])
+        self.waiting_since.update(state["waiting_since"])
+        for robots, *fields in state["recent"]:
+            record = DeadlockRecord(tuple(robots), *fields)
+            self._recent[frozenset(record.robots)] = record
+            self.history.append(record)
+        for robots, *fields in state["active"]:
+            record = DeadlockRecord(tuple(robots), *fields)
+            for member in record.robots:
+                self.active[member] = record
+            self.history.append(record)
+        self.detected, self.resolved, self.total_duration, self.longest = state["totals"]
+
+    def summary(self) -> Dict[str, float]:
+        """Totals over every deadlock seen, including those dropped from the history"""
+        return {
+            "detected": self.detected,
+            "resolved": self.resolved,
+            "mean_duration": self.total_duration / self.resolved if self.resolved else 0.0,
+            "longest": self.longest,
+        }
+
+    def report(self) -> List[Dict]:
+        """One entry per deadlock in the history window; duration is None while still unresolved"""
+        return [{
+            "robots": list(record.robots),
+            "detected_tick": record.detected_tick,
+            "resolved_tick": record.resolved_tick,
+            "duration": record.duration,
+            "victim": record.victim,
+            "resolution": record.resolution,
+            "attempts": record.attempts,
+        } for record in self.history]
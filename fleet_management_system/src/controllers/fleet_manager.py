@@ -1,43 +1,130 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, TYPE_CHECKING
 from ..models.robot import Robot
 from ..models.nav_graph import NavigationGraph
 import time
-from ..utils.logger import FleetLogger
+from ..utils.logger import FleetLogger, LogLevel
+from ..utils.event_log import EventLogWriter, EventType
 from ..models.robot import Robot, RobotStatus, Task
+from ..models.fleet_store import FleetStore
+from ..utils.helpers import calculate_distance
+
+if TYPE_CHECKING:
+    from .traffic_manager import TrafficManager
 
 class FleetManager:
-    def __init__(self, nav_graph: NavigationGraph):
+    def __init__(self, nav_graph: NavigationGraph, event_log: Optional[EventLogWriter] = None):
         self.nav_graph = nav_graph
+        self.store = FleetStore()
         self.robots: Dict[int, Robot] = {}
-        self.next_robot_id = 0
+        self._robot_list: List[Robot] = []  # Views in id order, shared by get_all_robots()
         self.logger = FleetLogger()
+        self.event_log = event_log
+        # Set by the simulation engine; plans and reserves routes for assignments
+        self.traffic_manager: Optional["TrafficManager"] = None
+        # Battery charge used per world unit travelled; 0 leaves batteries full
+        self.battery_drain = 0.0
+        self.battery_depleted = 0  # Robots that ran their battery flat and were stranded
     
     def spawn_robot(self, vertex_id: int) -> Robot:
-        robot = Robot(self.next_robot_id, vertex_id)
-        self.robots[self.next_robot_id] = robot
-        self.next_robot_id += 1
-        self.logger.log(f"Spawned robot {robot.id} at vertex {vertex_id}")
+        robot = Robot(self.store, self.store.add(vertex_id, RobotStatus.IDLE.value))
+        self.robots[robot.id] = robot
+        self._robot_list.append(robot)
+        self.logger.log("Spawned robot %d at vertex %d", robot.id, vertex_id)
+        if self.event_log:
+            self.event_log.record(EventType.SPAWN, robot.id, vertex_id)
         return robot
     
-    def assign_navigation_task(self, robot_id: int, destination_id: int, path: List[int]) -> bool:
-        """Assign navigation task to robot with provided path"""
+    def assign_navigation_task(self, robot_id: int, destination_id: int, path: Optional[List[int]] = None) -> bool:
+        """Assign navigation task to robot with provided path, or plan one when none is given"""
+        if path is None:
+            return bool(self.assign_navigation_tasks({robot_id: destination_id}))
+
         robot = self.get_robot(robot_id)
         if not robot:
             return False
-        
+        if robot.status == RobotStatus.STRANDED:
+            self.logger.log("Robot %d is stranded with a flat battery and cannot take a task", robot_id,
+                            level=LogLevel.WARNING)
+            return False
+        if self.traffic_manager:
+            self.traffic_manager.reserve_route(robot, path, self.traffic_manager.current_tick)
+        return self._apply_task(robot, destination_id, path)
+
+    def assign_navigation_tasks(self, destinations: Dict[int, int]) -> Dict[int, List[int]]:
+        """Plan conflict-free routes for a whole wave of robot -> destination requests.
+
+        Returns the paths of the robots that were assigned a task.
+        """
+        if not self.traffic_manager:
+            raise RuntimeError("Batch assignment needs a TrafficManager to plan routes")
+        requests = [(self.robots[robot_id], destination_id) for robot_id, destination_id in destinations.items()
+                    if robot_id in self.robots and self.robots[robot_id].status != RobotStatus.STRANDED]
+        paths = self.traffic_manager.plan_routes(requests, self.traffic_manager.current_tick)
+        assigned = {}
+        for robot, destination_id in requests:
+            path = paths.get(robot.id)
+            if path and self._apply_task(robot, destination_id, path):
+                assigned[robot.id] = path
+        return assigned
+
+    def _apply_task(self, robot: Robot, destination_id: int, path: List[int]) -> bool:
+        robot_id = robot.id
+        if self.traffic_manager:
+            self.traffic_manager.on_task_ended(robot_id)
         try:
             robot.assign_task(destination_id, path)
-            self.logger.log(f"Assigned robot {robot_id} path: {path}")
+            self.logger.debug("Assigned robot %d to destination %d via %s", robot_id, destination_id, path)
+            if self.event_log:
+                self.event_log.record(EventType.ASSIGN, robot_id, robot.current_vertex_id, destination_id)
             return True
         except Exception as e:
-            self.logger.log(f"Task assignment failed for robot {robot_id}: {str(e)}")
+            self.logger.log("Task assignment failed for robot %d: %s", robot_id, e, level=LogLevel.ERROR)
             return False
     
+    def checkpoint_state(self) -> Dict:
+        return {"store": self.store.checkpoint_state(), "battery_drain": self.battery_drain,
+                "battery_depleted": self.battery_depleted}
+
+    def restore_state(self, state: Dict):
+        """Replace the fleet with the robots of a checkpoint_state()"""
+        self.store.restore_state(state["store"])
+        self._robot_list = [Robot(self.store, robot_id) for robot_id in range(self.store.count)]
+        self.robots = {robot.id: robot for robot in self._robot_list}
+        self.battery_drain = state["battery_drain"]
+        self.battery_depleted = state["battery_depleted"]
+        self.logger.log("Restored %d robots", len(self._robot_list))
+        if self.event_log:
+            self._record_restored_robots()
+
+    def _record_restored_robots(self):
+        """Log restored robots as spawned where they stand, on their task, so the log replays on its own"""
+        for robot in self._robot_list:
+            vertex_id = robot.current_vertex_id
+            self.event_log.record(EventType.SPAWN, robot.id, vertex_id)
+            if robot.task is not None:
+                self.event_log.record(EventType.ASSIGN, robot.id, vertex_id, robot.task.destination_id)
+            status = robot.status
+            if status == RobotStatus.WAITING:
+                self.event_log.record(EventType.WAIT, robot.id, vertex_id, robot.get_next_vertex())
+            elif status == RobotStatus.TASK_COMPLETE:
+                self.event_log.record(EventType.TASK_COMPLETE, robot.id, vertex_id)
+            elif status == RobotStatus.STRANDED:
+                self.event_log.record(EventType.STRANDED, robot.id, vertex_id)
+
     def get_robot(self, robot_id: int) -> Optional[Robot]:
         return self.robots.get(robot_id)
     
     def get_all_robots(self) -> List[Robot]:
-        return list(self.robots.values())
+        """Every robot in id order; the list is shared, so callers must not modify it"""
+        return self._robot_list
+
+    def robots_with_status(self, *statuses: RobotStatus) -> List[Robot]:
+        """Robots in any of the given states, selected with one vectorized mask"""
+        robot_list = self._robot_list
+        return [robot_list[i] for i in self.store.ids_with_status(*(s.value for s in statuses)).tolist()]
+
+    def count_with_status(self, *statuses: RobotStatus) -> int:
+        return len(self.store.ids_with_status(*(s.value for s in statuses)))
     
     def update_robot_position(self, robot_id: int) -> bool:
         """Update a robot's position along its path"""
@@ -48,12 +135,44 @@ class FleetManager:
         next_vertex = robot.get_next_vertex()
         if next_vertex is None:
             robot.status = RobotStatus.TASK_COMPLETE
-            self.logger.log(f"Robot {robot_id} reached destination")
+            self.logger.log("Robot %d reached destination", robot_id)
+            if self.traffic_manager:
+                self.traffic_manager.on_task_ended(robot_id)
+            if self.event_log:
+                self.event_log.record(EventType.TASK_COMPLETE, robot_id, robot.current_vertex_id)
             return False
 
+        if next_vertex == robot.current_vertex_id:
+            # Planned wait step: hold position for this tick
+            robot.task.current_path_index += 1
+            return True
+
         # Update the robot's position
+        if self.event_log:
+            self.event_log.record(EventType.MOVE, robot_id, robot.current_vertex_id, next_vertex)
+        if self.battery_drain:
+            self._drain_battery(robot, next_vertex)
         robot.current_vertex_id = next_vertex
         robot.task.current_path_index += 1
 
-        self.logger.log(f"Robot {robot_id} moved to vertex {next_vertex}")
-        return True
\ No newline at end of file
+        self.logger.debug("Robot %d moved to vertex %d", robot_id, next_vertex)
+        if self.battery_drain and robot.battery <= 0.0:
+            self._strand(robot)
+        return True
+
+    def _drain_battery(self, robot: Robot, next_vertex: int):
+        start = self.nav_graph.get_vertex_by_id(robot.current_vertex_id)
+        end = self.nav_graph.get_vertex_by_id(next_vertex)
+        charge = robot.battery - calculate_distance((start.x, start.y), (end.x, end.y)) * self.battery_drain
+        robot.battery = max(charge, 0.0)
+
+    def _strand(self, robot: Robot):
+        """Stop a robot whose battery ran flat where it stands; it takes no further tasks"""
+        robot.status = RobotStatus.STRANDED
+        self.battery_depleted += 1
+        self.logger.log("Robot %d ran out of battery and is stranded at vertex %d", robot.id,
+                        robot.current_vertex_id, level=LogLevel.WARNING)
+        if self.traffic_manager:
+            self.traffic_manager.on_robot_stranded(robot)
+        if self.event_log:
+            self.event_log.record(EventType.STRANDED, robot.id, robot.current_vertex_id)
@@ -0,0 +1,382 @@
+"""Asyncio JSON-lines gateway through which external robot and WMS clients drive a SimulationEngine.
+
+Clients connect over TCP and send one JSON object per line; every request
+with an "id" is answered on a line carrying the same id:
+
+    {"id": 1, "op": "spawn", "vertex": 3}                    -> {"id": 1, "ok": true, "result": {"robot": 0}}
+    {"id": 2, "op": "assign", "robot": 0, "destination": 5}  -> {"id": 2, "ok": true, "result": {"tick": 12}}
+    {"id": 3, "op": "job", "pickup": 3, "drop": 8, "priority": 1, "deadline": 200}
+                                                              -> {"id": 3, "ok": true, "result": {"job": 0}}
+    {"id": 4, "op": "status"}                                 -> {"id": 4, "ok": true, "result": {"tick": 12, "robots": [...]}}
+    {"id": 5, "op": "status", "robot": 0}                     -> {"id": 5, "ok": true, "result": {"tick": 12, "robot": {...}}}
+    {"id": 6, "op": "subscribe"}  /  {"id": 7, "op": "unsubscribe"}
+
+Failed requests get {"id": ..., "ok": false, "error": "..."}. Vertex, robot,
+priority and deadline fields must be JSON integers; commands with missing
+or malformed fields are refused before they are queued. A subscriber
+is sent {"type": "state", "tick": ..., "version": ..., "robots": [...]} and
+from then on a {"type": "delta", ...} of the same shape holding only the
+robots that changed (engine.changes_since). Subscribing with
+"encoding": "packed" carries the robots as a base64 FleetDelta.encode()
+in "data" instead, about a fifth of the size of the JSON.
+
+The event loop runs on its own thread. Commands that change the simulation
+(spawn, assign, job) are queued and applied together at the start of the
+next tick, so a burst of assignments is planned as one dispatch wave;
+status is answered from the latest published state without touching the
+engine. Each delta is encoded once and shared by every subscriber. A
+subscriber more than SUBSCRIBER_QUEUE messages behind stops getting deltas
+and is sent one fresh state once it has caught up, so slow clients hold back
+neither the tick loop nor each other.
+"""
+import asyncio
+import base64
+import json
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, Deque, Dict, List, Optional, Set, Tuple
+from ..models.fleet_delta import FleetDelta, RobotRow
+from ..utils.logger import FleetLogger, LogLevel
+
+if TYPE_CHECKING:
+    from .simulation_engine import SimulationEngine
+
+# Operations applied on the simulation thread at the start of the next tick
+TICK_OPS = ("spawn", "assign", "job")
+# Integer fields of each operation: (name, required); vertex fields are also checked against the map
+TICK_OP_FIELDS = {
+    "spawn": (("vertex", True),),
+    "assign": (("robot", True), ("destination", True)),
+    "job": (("pickup", True), ("drop", True), ("priority", False), ("deadline", False)),
+}
+VERTEX_FIELDS = ("vertex", "destination", "pickup", "drop")
+
+
+def _is_int(value) -> bool:
+    return type(value) is int  # JSON true/false would otherwise pass as 1/0
+
+
+def _robot_json(row: RobotRow) -> Dict:
+    return {"id": row.id, "vertex": row.vertex_id, "status": row.status.name.lower(),
+            "status_text": row.status_text, "next_vertex": row.next_vertex_id,
+            "destination": row.destination_id, "battery": round(row.battery, 3), "x": round(row.x, 3),
+            "y": round(row.y, 3)}
+
+
+def _encode(message: Dict) -> bytes:
+    return json.dumps(message, separators=(',', ':')).encode('utf-8') + b"\n"
+
+
+class _Client:
+    """One connection: a single writer task drains its outbox, so replies and updates never interleave"""
+
+    def __init__(self, writer: asyncio.StreamWriter, max_pending: int):
+        self.writer = writer
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.subscribed = False
+        self.packed = False  # Subscribed with "encoding": "packed"
+        self.lagging = False  # Deltas were dropped; a full state is owed once the outbox drains
+        self.has_room = asyncio.Event()  # Cleared while the outbox is full, which pauses reading requests
+        self.has_room.set()
+        self.task = asyncio.current_task()
+        # Commands awaiting the simulation thread; reading stops while it is exhausted
+        self.pending = asyncio.Semaphore(max_pending)
+
+
+class FleetGateway:
+    """Serves spawn, assign, job, status and subscribe requests for one engine over TCP.
+
+    The engine calls back into the gateway twice per tick on its own thread:
+    the tick hook applies the queued commands and the snapshot subscription
+    hands over the published state. Neither waits on the event loop.
+    """
+
+    # Deltas and replies a subscriber may have queued before deltas are dropped for it
+    SUBSCRIBER_QUEUE = 64
+    # Queued messages at which a client's requests stop being read until it takes its replies
+    MAX_OUTBOX = 1024
+    # Simulation commands a client may have in flight before its reads are paused
+    MAX_PENDING_COMMANDS = 256
+
+    def __init__(self, engine: "SimulationEngine", port: int = 8765, host: str = "127.0.0.1"):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.logger = FleetLogger()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.clients: Set[_Client] = set()
+        # Filled by the event loop, drained on the simulation thread; deque appends and pops are atomic
+        self._commands: Deque[Tuple[_Client, Dict]] = deque()
+        self._tick = engine.tick
+        self._version = 0  # Fleet version of the state below
+        self._rows: Dict[int, RobotRow] = {}
+        self._robot_json: Dict[int, Dict] = {}
+        self._pending_delta: Optional[FleetDelta] = None
+        self._delta_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._startup_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run_loop, name="FleetGateway", daemon=True)
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.server.sockets[0].getsockname()[:2]
+
+    def start(self) -> "FleetGateway":
+        """Start serving on a background thread; returns once the port is bound"""
+        self._apply_delta(self.engine.changes_since(0))
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error:
+            raise self._startup_error
+        self.engine.add_tick_hook(self.apply_commands)
+        self.engine.subscribe_changes(self.on_changes)
+        return self
+
+    def close(self):
+        self.engine.remove_tick_hook(self.apply_commands)
+        self.engine.unsubscribe_changes(self.on_changes)
+        if self.loop and self.loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(timeout=5)
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self._serve_client, self.host, self.port, backlog=1024))
+        except OSError as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    async def _shutdown(self):
+        self.server.close()
+        tasks = [client.task for client in self.clients]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
+
+    # Event loop thread
+
+    async def _serve_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        client = _Client(writer, self.MAX_PENDING_COMMANDS)
+        self.clients.add(client)
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, ConnectionError):  # Line over the stream limit, or the peer reset
+                    break
+                if not line:
+                    break
+                if line.strip():
+                    await self._handle_line(client, line)
+                if client.outbox.qsize() >= self.MAX_OUTBOX:
+                    client.has_room.clear()
+                    await client.has_room.wait()
+        except asyncio.CancelledError:
+            pass  # The gateway is shutting down; end the connection quietly
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+
+    async def _handle_line(self, client: _Client, line: bytes):
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            self._reply(client, None, error=f"Bad request: {e}")
+            return
+        request_id, op = request.get('id'), request.get('op')
+        if op in TICK_OPS:
+            error = self._check_fields(op, request)
+            if error:
+                self._reply(client, request_id, error=error)
+                return
+            await client.pending.acquire()
+            self._commands.append((client, request))
+        elif op == "status":
+            self._status(client, request_id, request.get('robot'))
+        elif op == "subscribe":
+            encoding = request.get('encoding', 'json')
+            if encoding not in ("json", "packed"):
+                self._reply(client, request_id, error=f"Unknown encoding {encoding!r}, expected 'json' or 'packed'")
+                return
+            self._reply(client, request_id, {"tick": self._tick, "version": self._version})
+            if not client.subscribed or client.packed != (encoding == "packed"):
+                client.subscribed = True
+                client.packed = encoding == "packed"
+                client.outbox.put_nowait(self._full_state(client.packed))
+        elif op == "unsubscribe":
+            client.subscribed = False
+            self._reply(client, request_id, {})
+        else:
+            self._reply(client, request_id, error=f"Unknown op {op!r}, expected one of "
+                                                  f"{list(TICK_OPS) + ['status', 'subscribe', 'unsubscribe']}")
+
+    def _check_fields(self, op: str, request: Dict) -> Optional[str]:
+        """Why a simulation command is malformed, or None; checked before it is queued for the tick"""
+        for name, required in TICK_OP_FIELDS[op]:
+            value = request.get(name)
+            if value is None:
+                if required:
+                    return f"Missing field '{name}'"
+                continue
+            if not _is_int(value):
+                return f"Field '{name}' must be an integer, got {value!r}"
+            if name in VERTEX_FIELDS and value not in self.engine.nav_graph.adjacency:
+                return f"Unknown vertex {value}"
+        return None
+
+    def _reply(self, client: _Client, request_id, result: Optional[Dict] = None, error: Optional[str] = None):
+        message = {"id": request_id, "ok": error is None}
+        if error is None:
+            message["result"] = result
+        else:
+            message["error"] = error
+        client.outbox.put_nowait(_encode(message))
+
+    def _status(self, client: _Client, request_id, robot_id):
+        if robot_id is None:
+            self._reply(client, request_id, {"tick": self._tick, "robots": list(self._robot_json.values())})
+        elif _is_int(robot_id) and robot_id in self._robot_json:
+            self._reply(client, request_id, {"tick": self._tick, "robot": self._robot_json[robot_id]})
+        else:
+            self._reply(client, request_id, error=f"Unknown robot {robot_id}")
+
+    def _full_state(self, packed: bool) -> bytes:
+        return self._message("state", 0, list(self._rows.values()) if packed else list(self._robot_json.values()),
+                             packed)
+
+    def _message(self, kind: str, since: int, robots: List, packed: bool) -> bytes:
+        """A state or delta message; robots are RobotRows when packed, else their JSON"""
+        message = {"type": kind, "tick": self._tick, "version": self._version}
+        if packed:
+            delta = FleetDelta.from_rows(since, self._version, self._tick, robots)
+            message["data"] = base64.b64encode(delta.encode()).decode('ascii')
+        else:
+            message["robots"] = robots
+        return _encode(message)
+
+    async def _send_loop(self, client: _Client):
+        writer = client.writer
+        try:
+            while True:
+                if client.lagging and client.outbox.empty():
+                    # Caught up after dropping deltas: the current state replaces everything missed
+                    client.lagging = False
+                    if client.subscribed:
+                        client.outbox.put_nowait(self._full_state(client.packed))
+                writer.write(await client.outbox.get())
+                if client.outbox.qsize() < self.MAX_OUTBOX:
+                    client.has_room.set()
+                await writer.drain()
+        except ConnectionError:
+            writer.close()
+
+    def _deliver_replies(self, replies: List[Tuple[_Client, Dict]]):
+        for client, message in replies:
+            client.pending.release()
+            if client in self.clients:
+                client.outbox.put_nowait(_encode(message))
+
+    def _process_delta(self):
+        with self._delta_lock:
+            delta, self._pending_delta = self._pending_delta, None
+        if delta is None:
+            return
+        rows = self._apply_delta(delta)
+        messages = {}  # Encoded on first use, once per encoding
+        for client in self.clients:
+            if not client.subscribed or client.lagging:
+                continue
+            if client.outbox.qsize() >= self.SUBSCRIBER_QUEUE:
+                client.lagging = True
+                continue
+            message = messages.get(client.packed)
+            if message is None:
+                robots = rows if client.packed else [self._robot_json[row.id] for row in rows]
+                message = messages[client.packed] = self._message("delta", delta.since, robots, client.packed)
+            client.outbox.put_nowait(message)
+
+    def _apply_delta(self, delta: FleetDelta) -> List[RobotRow]:
+        """Take over the robots a delta carries; returns them"""
+        self._tick = delta.tick
+        self._version = delta.version
+        rows = list(delta.rows())
+        for row in rows:
+            self._rows[row.id] = row
+            self._robot_json[row.id] = _robot_json(row)
+        return rows
+
+    # Simulation thread
+
+    def on_changes(self, delta: FleetDelta):
+        """Hand the robots changed in a tick to the event loop, merged with any it has not got to yet"""
+        with self._delta_lock:
+            pending = self._pending_delta
+            self._pending_delta = delta if pending is None else self.engine.changes_since(pending.since)
+        if pending is None:
+            self.loop.call_soon_threadsafe(self._process_delta)
+
+    def apply_commands(self):
+        """Tick hook: apply every command received since the last tick and send the replies"""
+        if not self._commands:
+            return
+        replies = []
+        while self._commands:
+            client, request = self._commands.popleft()
+            message = {"id": request.get('id')}
+            try:
+                message["result"] = self._apply(request)
+                message["ok"] = True
+            except ValueError as e:
+                message["ok"] = False
+                message["error"] = str(e)
+            except Exception as e:
+                # A bad command must never take the tick loop down with it
+                self.logger.log("Gateway command %s failed: %r", request, e, level=LogLevel.ERROR)
+                message["ok"] = False
+                message["error"] = f"Internal error: {e}"
+            replies.append((client, message))
+        self.logger.log("Applied %d gateway commands at tick %d", len(replies), self.engine.tick,
+                        level=LogLevel.DEBUG)
+        self.loop.call_soon_threadsafe(self._deliver_replies, replies)
+
+    def _apply(self, request: Dict) -> Dict:
+        engine = self.engine
+        op = request['op']
+        if op == "spawn":
+            vertex_id = self._vertex(request['vertex'])
+            occupant = engine.traffic_manager.vertex_occupancy.get(vertex_id)
+            if occupant is not None:
+                raise ValueError(f"Vertex {vertex_id} is occupied by robot {occupant}")
+            return {"robot": engine.spawn_robot(vertex_id).id}
+        if op == "assign":
+            robot_id = request['robot']
+            if engine.fleet_manager.get_robot(robot_id) is None:
+                raise ValueError(f"Unknown robot {robot_id}")
+            # Scheduled for the tick being started, so all of this tick's assignments plan as one wave
+            engine.schedule_task(engine.tick, robot_id, self._vertex(request['destination']))
+            return {"tick": engine.tick}
+        job = engine.submit_job(request['pickup'], request['drop'], request.get('priority', 0),
+                                request.get('deadline'))
+        return {"job": job.id}
+
+    def _vertex(self, vertex_id) -> int:
+        if not _is_int(vertex_id) or vertex_id not in self.engine.nav_graph.adjacency:
+            raise ValueError(f"Unknown vertex {vertex_id}")
+        return vertex_id
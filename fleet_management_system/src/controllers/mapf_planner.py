@@ -0,0 +1,181 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+from .reservation_table import PlanConstraints, ReservationTable
+
+# (robot_id, start vertex, goal vertex)
+PlanRequest = Tuple[int, int, int]
+# (robot_id, constraint kind, constraint) where kind is "vertex" or "move"
+Branch = Tuple[int, str, tuple]
+
+
+class BatchPlanner:
+    """Plans conflict-free timed routes for many robots at once.
+
+    Small batches use Conflict-Based Search (optimal sum of path lengths);
+    larger batches, or CBS runs that exceed the node budget, fall back to
+    prioritized planning through the reservation table, retried in another
+    order when some robots do not fit. Robots outside the batch are
+    respected through their existing reservations. Returned paths are
+    reserved; robots that could not be planned are left out.
+    """
+
+    def __init__(self, reservations: ReservationTable, cbs_max_agents: int = 8, cbs_max_nodes: int = 256,
+                 priority_retries: int = 1):
+        self.reservations = reservations
+        self.cbs_max_agents = cbs_max_agents
+        self.cbs_max_nodes = cbs_max_nodes
+        self.priority_retries = priority_retries
+        self.last_method: Optional[str] = None
+
+    def plan(self, requests: List[PlanRequest], start_time: int) -> Dict[int, List[int]]:
+        for robot_id, _, _ in requests:
+            self.reservations.release_robot(robot_id)
+
+        paths = None
+        if 1 < len(requests) <= self.cbs_max_agents:
+            paths = self._conflict_based_search(requests, start_time)
+            if paths is not None:
+                self.last_method = "cbs"
+                for robot_id, path in paths.items():
+                    self.reservations.reserve_path(robot_id, path, start_time)
+        if paths is None:
+            self.last_method = "prioritized"
+            paths = self._prioritized(requests, start_time)
+        return paths
+
+    def _prioritized(self, requests: List[PlanRequest], start_time: int) -> Dict[int, List[int]]:
+        """Plan robots one at a time, longest trips first, each around the robots planned before it.
+
+        A robot can be walled in by robots planned before it and parked on
+        their goals, or have no way out of a dead-end aisle that an earlier
+        robot plans to pass through. While some robots fail, the wave is
+        planned again with the failed robots first (up to priority_retries
+        times), and whichever order fits the most robots is kept.
+        """
+        # Longest trips first: they have the fewest alternatives later on
+        def trip_length(request: PlanRequest) -> int:
+            robot_id, start_id, goal_id = request
+            return self.reservations.hop_distances_to(goal_id).get(start_id, -1)
+
+        order = sorted(requests, key=trip_length, reverse=True)
+        best = paths = self._plan_in_order(order, start_time)
+        for _ in range(self.priority_retries):
+            if len(paths) == len(requests):
+                break
+            order = [request for request in order if request[0] not in paths] + \
+                    [request for request in order if request[0] in paths]
+            for robot_id, _, _ in requests:
+                self.reservations.release_robot(robot_id)
+            paths = self._plan_in_order(order, start_time)
+            if len(paths) > len(best):
+                best = paths
+        if paths is not best:
+            for robot_id, _, _ in requests:
+                self.reservations.release_robot(robot_id)
+            for robot_id, path in best.items():
+                self.reservations.reserve_path(robot_id, path, start_time)
+        return best
+
+    def _plan_in_order(self, order: List[PlanRequest], start_time: int) -> Dict[int, List[int]]:
+        # Robots not yet planned still stand on their start vertex when the batch begins
+        for robot_id, start_id, _ in order:
+            self.reservations.reserve_vertex(start_id, start_time, start_time + 1, robot_id)
+        paths: Dict[int, List[int]] = {}
+        for robot_id, start_id, goal_id in order:
+            self.reservations.release_robot(robot_id)
+            path = self.reservations.plan(robot_id, start_id, goal_id, start_time)
+            if path:
+                self.reservations.reserve_path(robot_id, path, start_time)
+                paths[robot_id] = path
+        return paths
+
+    def _conflict_based_search(self, requests: List[PlanRequest],
+                               start_time: int) -> Optional[Dict[int, List[int]]]:
+        endpoints = {robot_id: (start_id, goal_id) for robot_id, start_id, goal_id in requests}
+        constraints = {robot_id: PlanConstraints() for robot_id in endpoints}
+        paths: Dict[int, List[int]] = {}
+        for robot_id, (start_id, goal_id) in endpoints.items():
+            path = self.reservations.plan(robot_id, start_id, goal_id, start_time)
+            if not path:
+                return None
+            paths[robot_id] = path
+
+        counter = itertools.count()
+        open_nodes = [(self._cost(paths), next(counter), constraints, paths)]
+        expanded = 0
+        while open_nodes and expanded < self.cbs_max_nodes:
+            _, _, constraints, paths = heapq.heappop(open_nodes)
+            expanded += 1
+            branches = self._first_conflict(paths, start_time)
+            if branches is None:
+                return paths
+
+            for robot_id, kind, constraint in branches:
+                child_constraints = dict(constraints)
+                robot_constraints = PlanConstraints(set(constraints[robot_id].vertices),
+                                                    set(constraints[robot_id].moves))
+                if kind == "vertex":
+                    robot_constraints.vertices.add(constraint)
+                else:
+                    robot_constraints.moves.add(constraint)
+                child_constraints[robot_id] = robot_constraints
+
+                start_id, goal_id = endpoints[robot_id]
+                path = self.reservations.plan(robot_id, start_id, goal_id, start_time,
+                                              constraints=robot_constraints)
+                if not path:
+                    continue
+                child_paths = dict(paths)
+                child_paths[robot_id] = path
+                heapq.heappush(open_nodes, (self._cost(child_paths), next(counter),
+                                            child_constraints, child_paths))
+        return None
+
+    @staticmethod
+    def _cost(paths: Dict[int, List[int]]) -> int:
+        return sum(len(path) for path in paths.values())
+
+    @staticmethod
+    def _first_conflict(paths: Dict[int, List[int]], start_time: int) -> Optional[List[Branch]]:
+        """Earliest conflict between paths as the CBS branches resolving it.
+
+        Mirrors the runtime rules: no two robots on a vertex at the same tick,
+        and no ring of robots each following the next into the vertex it is
+        leaving (a swap along a lane, or a rotation around a cycle). Following
+        a robot along an open chain is allowed. Robots stay on their final
+        vertex after their path ends. A ring of k robots gives k branches,
+        each forbidding one member's move.
+        """
+        def position(path: List[int], step: int) -> int:
+            return path[min(step, len(path) - 1)]
+
+        horizon = max(len(path) for path in paths.values())
+        robot_ids = list(paths)
+        for step in range(horizon):
+            tick = start_time + step
+            occupant: Dict[int, int] = {}
+            for robot_id in robot_ids:
+                vertex_id = position(paths[robot_id], step)
+                other = occupant.get(vertex_id)
+                if other is not None:
+                    return [(other, "vertex", (vertex_id, tick)), (robot_id, "vertex", (vertex_id, tick))]
+                occupant[vertex_id] = robot_id
+
+            moves = {robot_id: (position(paths[robot_id], step), position(paths[robot_id], step + 1))
+                     for robot_id in robot_ids}
+            for robot_id in robot_ids:
+                # Walk the chain of robots each following the next into the vertex it leaves
+                ring, follower = [], robot_id
+                while True:
+                    here, there = moves[follower]
+                    leader = occupant.get(there)
+                    if here == there or leader is None:
+                        break
+                    ring.append(follower)
+                    if leader == robot_id:
+                        return [(member, "move", (*moves[member], tick)) for member in ring]
+                    if leader in ring:
+                        break  # Leads into a ring without robot_id; found from one of its members
+                    follower = leader
+        return None
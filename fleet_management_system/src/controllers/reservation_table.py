@@ -0,0 +1,253 @@
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from ..models.nav_graph import NavigationGraph
+
+INFINITY = float('inf')
+
+
+@dataclass(frozen=True)
+class Reservation:
+    start: float
+    end: float  # Exclusive; INFINITY for a robot parked at its goal
+    robot_id: int
+
+
+@dataclass
+class PlanConstraints:
+    """Per-robot prohibitions layered on top of the reservations (used by CBS)"""
+    vertices: Set[Tuple[int, int]] = field(default_factory=set)    # (vertex, tick)
+    moves: Set[Tuple[int, int, int]] = field(default_factory=set)  # (from, to, departure tick)
+
+    def last_tick_at(self, vertex_id: int) -> int:
+        return max((tick for vertex, tick in self.vertices if vertex == vertex_id), default=-1)
+
+
+class ReservationTable:
+    """Space-time reservations of vertices and lanes, (resource, time window) -> robot.
+
+    Time is measured in simulation ticks. A robot standing on path[i] at tick t
+    holds that vertex for [t, t + 1) and, while moving to path[i + 1], holds
+    the (undirected) lane between them for the same window. The last vertex
+    of a reserved path is held indefinitely until the robot is re-planned.
+    """
+    # A* expansions allowed per tick of a search's horizon before it gives up (callers fall back to plain paths)
+    EXPANSIONS_PER_TICK = 64
+
+    def __init__(self, nav_graph: NavigationGraph):
+        self.nav_graph = nav_graph
+        self.vertex_slots: Dict[int, List[Reservation]] = {}
+        self.lane_slots: Dict[Tuple[int, int], List[Reservation]] = {}
+        # Per robot, in time order, so expired entries are dropped from the left as it moves
+        self._by_robot: Dict[int, Deque[Tuple[bool, object, Reservation]]] = {}
+        self._hop_distances: Dict[int, Dict[int, int]] = {}
+        self._traversable: Dict[int, List[int]] = {}  # vertex -> neighbours over unblocked lanes
+        self._hop_distances_version: Optional[int] = None
+
+    @staticmethod
+    def _lane_key(v1: int, v2: int) -> Tuple[int, int]:
+        return (min(v1, v2), max(v1, v2))
+
+    @staticmethod
+    def _conflict(slots: List[Reservation], start: float, end: float, robot_id: int) -> Optional[int]:
+        for reservation in slots:
+            if reservation.robot_id != robot_id and reservation.start < end and start < reservation.end:
+                return reservation.robot_id
+        return None
+
+    def vertex_conflict(self, vertex_id: int, start: float, end: float, robot_id: int) -> Optional[int]:
+        """Id of another robot holding the vertex during [start, end), if any"""
+        return self._conflict(self.vertex_slots.get(vertex_id, ()), start, end, robot_id)
+
+    def lane_conflict(self, v1: int, v2: int, start: float, end: float, robot_id: int) -> Optional[int]:
+        return self._conflict(self.lane_slots.get(self._lane_key(v1, v2), ()), start, end, robot_id)
+
+    def vertex_at(self, robot_id: int, time: float) -> Optional[int]:
+        """Vertex a robot has reserved for the tick starting at `time`, if any"""
+        for is_vertex, key, reservation in self._by_robot.get(robot_id, ()):
+            if is_vertex and reservation.start <= time < reservation.end:
+                return key
+        return None
+
+    def closes_rotation(self, robot_id: int, from_vertex: int, to_vertex: int, t: int) -> bool:
+        """True if moving from_vertex -> to_vertex during tick t closes a ring of robots following each other.
+
+        Following a robot into the vertex it leaves works at runtime because
+        the leader moves first, but in a ring (a swap, or three or more robots
+        rotating around a cycle) no robot can move first.
+        """
+        vertex, followed = to_vertex, set()
+        while True:
+            leader = self.vertex_conflict(vertex, t, t + 1, robot_id)
+            if leader is None or leader in followed:
+                return False
+            followed.add(leader)
+            vertex = self.vertex_at(leader, t + 1)
+            if vertex is None:
+                return False
+            if vertex == from_vertex:
+                return True
+
+    def reserve_vertex(self, vertex_id: int, start: float, end: float, robot_id: int):
+        reservation = Reservation(start, end, robot_id)
+        self.vertex_slots.setdefault(vertex_id, []).append(reservation)
+        self._by_robot.setdefault(robot_id, deque()).append((True, vertex_id, reservation))
+
+    def reserve_lane(self, v1: int, v2: int, start: float, end: float, robot_id: int):
+        key = self._lane_key(v1, v2)
+        reservation = Reservation(start, end, robot_id)
+        self.lane_slots.setdefault(key, []).append(reservation)
+        self._by_robot.setdefault(robot_id, deque()).append((False, key, reservation))
+
+    def reserve_path(self, robot_id: int, path: List[int], start_time: float):
+        """Reserve a timed path (one vertex per tick, repeated vertices are waits)"""
+        for index, vertex_id in enumerate(path):
+            t = start_time + index
+            if index == len(path) - 1:
+                self.reserve_vertex(vertex_id, t, INFINITY, robot_id)
+            else:
+                self.reserve_vertex(vertex_id, t, t + 1, robot_id)
+                if path[index + 1] != vertex_id:
+                    self.reserve_lane(vertex_id, path[index + 1], t, t + 1, robot_id)
+
+    def park(self, robot_id: int, vertex_id: int, start_time: float):
+        """Hold a vertex indefinitely for an idle robot"""
+        self.reserve_vertex(vertex_id, start_time, INFINITY, robot_id)
+
+    def _remove(self, is_vertex: bool, key, reservation: Reservation):
+        slots = (self.vertex_slots if is_vertex else self.lane_slots).get(key)
+        if slots is None:
+            return
+        slots.remove(reservation)
+        if not slots:
+            del (self.vertex_slots if is_vertex else self.lane_slots)[key]
+
+    def release_robot(self, robot_id: int):
+        """Drop every reservation held by a robot"""
+        for is_vertex, key, reservation in self._by_robot.pop(robot_id, ()):
+            self._remove(is_vertex, key, reservation)
+
+    def release_until(self, robot_id: int, time: float):
+        """Drop a robot's reservations that ended at or before `time`"""
+        entries = self._by_robot.get(robot_id)
+        while entries and entries[0][2].end <= time:
+            is_vertex, key, reservation = entries.popleft()
+            self._remove(is_vertex, key, reservation)
+
+    def reservation_count(self) -> int:
+        return sum(len(entries) for entries in self._by_robot.values())
+
+    def hop_distances_to(self, goal_id: int) -> Dict[int, int]:
+        """Hop distance of every vertex to goal_id (BFS), used as the A* heuristic"""
+        graph = self.nav_graph
+        if self._hop_distances_version != graph.version:
+            self._hop_distances.clear()
+            self._traversable = {v: [n for n in graph.get_neighbor_ids(v) if graph.is_traversable(v, n)]
+                                 for v in graph.adjacency}
+            self._hop_distances_version = graph.version
+        distances = self._hop_distances.get(goal_id)
+        if distances is None:
+            # Level by level, so each vertex costs one lookup in the cached adjacency
+            distances = {goal_id: 0}
+            frontier = [goal_id]
+            hops = 0
+            while frontier:
+                hops += 1
+                next_frontier = []
+                for current in frontier:
+                    for neighbor in self._traversable.get(current, ()):
+                        if neighbor not in distances:
+                            distances[neighbor] = hops
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+            self._hop_distances[goal_id] = distances
+        return distances
+
+    def plan(self, robot_id: int, start_id: int, goal_id: int, start_time: int,
+             max_duration: Optional[int] = None, constraints: Optional[PlanConstraints] = None,
+             max_expansions: Optional[int] = None) -> List[int]:
+        """Space-time A* from start_id at start_time to goal_id avoiding other robots' reservations.
+
+        The returned path has one entry per tick (waits repeat a vertex). It
+        ends at the first arrival after which the goal stays free. Returns an
+        empty list if no such path exists within max_duration ticks (by
+        default twice the hop distance plus some slack for waiting), or if
+        none was found within max_expansions expanded states (by default
+        EXPANSIONS_PER_TICK per tick of the horizon). Without the cap a
+        robot walled in by parked robots would search every vertex it can
+        reach at every tick up to the horizon before giving up.
+        """
+        hops = self.hop_distances_to(goal_id)
+        if start_id not in hops:
+            return []
+        # Another robot parked on the goal for good: no timing can work
+        goal_slots = [r for r in self.vertex_slots.get(goal_id, ()) if r.robot_id != robot_id]
+        if any(r.end == INFINITY for r in goal_slots):
+            return []
+        goal_constrained_until = constraints.last_tick_at(goal_id) if constraints else -1
+        # The robot cannot stop on the goal before other robots have passed through it for the last time;
+        # without this bound in the heuristic A* would explore every way of arriving earlier
+        goal_free_from = max([int(r.end) for r in goal_slots] + [goal_constrained_until + 1, start_time])
+        if max_duration is None:
+            # Twice the hop distance plus slack for waiting, counted from when the goal clears if that is later
+            max_duration = 2 * hops[start_id] + 32 + max(0, goal_free_from - start_time - hops[start_id])
+        horizon = max(start_time + max_duration, goal_constrained_until + 1)
+        if goal_free_from > horizon:
+            return []
+        if max_expansions is None:
+            max_expansions = self.EXPANSIONS_PER_TICK * (horizon - start_time)
+
+        def heuristic(vertex_id: int, t: int) -> int:
+            return max(hops[vertex_id], goal_free_from - t)
+
+        graph = self.nav_graph
+        start_state = (start_id, start_time)
+        previous: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start_state: None}
+        heap = [(heuristic(start_id, start_time), 0, start_id, start_time)]
+
+        expansions = 0
+        while heap and expansions < max_expansions:
+            _, _, vertex_id, t = heapq.heappop(heap)
+            if vertex_id == goal_id and t > goal_constrained_until and \
+                    self.vertex_conflict(goal_id, t, INFINITY, robot_id) is None:
+                path = []
+                state: Optional[Tuple[int, int]] = (vertex_id, t)
+                while state is not None:
+                    path.append(state[0])
+                    state = previous[state]
+                path.reverse()
+                return path
+            if t >= horizon:
+                continue
+
+            expansions += 1
+            for neighbor in [vertex_id] + graph.get_neighbor_ids(vertex_id):
+                if neighbor not in hops:
+                    continue
+                state = (neighbor, t + 1)
+                if state in previous:
+                    continue
+                if constraints and (state in constraints.vertices or
+                                    (vertex_id, neighbor, t) in constraints.moves):
+                    continue
+                if neighbor != vertex_id:
+                    if not graph.is_traversable(vertex_id, neighbor):
+                        continue
+                    # Following another robot into a vertex it leaves on the same tick is
+                    # fine (the engine moves the leader first); swapping along a lane or
+                    # rotating around a cycle is not
+                    if self.vertex_conflict(neighbor, t + 1, t + 2, robot_id) is not None:
+                        continue
+                    if self.lane_conflict(vertex_id, neighbor, t, t + 1, robot_id) is not None:
+                        continue
+                    if self.closes_rotation(robot_id, vertex_id, neighbor, t):
+                        continue
+                elif self.vertex_conflict(vertex_id, t + 1, t + 2, robot_id) is not None:
+                    continue
+                previous[state] = (vertex_id, t)
+                elapsed = t + 1 - start_time
+                # Tie-break on lower remaining distance, i.e. prefer progress over waiting
+                heapq.heappush(heap, (elapsed + heuristic(neighbor, t + 1), hops[neighbor], neighbor, t + 1))
+
+        return []
@@ -0,0 +1,117 @@
+import math
+from typing import Dict, List, Set, Tuple
+from ..models.nav_graph import NavigationGraph
+from ..utils.incremental_planner import DStarLite
+from ..utils.path_planner import DEFAULT_SPEED, congested_travel_time_cost
+
+
+class RouteRepairer:
+    """Incremental re-routing of robots around lanes that close, reopen or congest.
+
+    Each robot re-routed once keeps a D* Lite search towards its destination.
+    The repairer listens to the graph's lane changes and keeps them in a log;
+    the next time a robot's route is repaired its search is only fed the
+    lanes changed since its last repair, so re-routing hundreds of robots
+    after an aisle closes expands little beyond the closed aisle.
+    Edge costs are congested travel times (congested_travel_time_cost).
+    """
+
+    # Searches are dropped and rebuilt from scratch once this many lane changes are pending
+    MAX_CHANGE_LOG = 4096
+
+    def __init__(self, nav_graph: NavigationGraph):
+        self.nav_graph = nav_graph
+        self.searches: Dict[int, DStarLite] = {}  # robot id -> search towards its destination
+        self._applied: Dict[int, int] = {}  # robot id -> change log position its search has seen
+        self._changes: List[Tuple[int, int]] = []
+        self._log_start = 0  # Change log position of _changes[0]
+        self._toggled: Set[Tuple[int, int]] = set()  # Lanes opened or closed since take_toggled_lanes()
+        # Congested travel times of the traversable edges leaving each vertex, filled in as searches reach it
+        self._edges: Dict[int, Dict[int, float]] = {}
+        self._xs = [vertex.x for vertex in nav_graph.vertices]
+        self._ys = [vertex.y for vertex in nav_graph.vertices]
+        self._heuristic_scale = self._compute_heuristic_scale()
+        nav_graph.on_lanes_changed(self.lanes_changed)
+
+    def _compute_heuristic_scale(self) -> float:
+        speeds = [lane.speed_limit for lane in self.nav_graph.lanes if lane.speed_limit > 0]
+        return 1.0 / max(speeds + [DEFAULT_SPEED])
+
+    def _heuristic(self, v1_id: int, v2_id: int) -> float:
+        return math.hypot(self._xs[v1_id] - self._xs[v2_id], self._ys[v1_id] - self._ys[v2_id]) * self._heuristic_scale
+
+    def _edges_of(self, vertex_id: int) -> Dict[int, float]:
+        edges = self._edges.get(vertex_id)
+        if edges is None:
+            edges = {}
+            for neighbor in self.nav_graph.get_neighbor_ids(vertex_id):
+                cost = congested_travel_time_cost(self.nav_graph, vertex_id, neighbor)
+                if cost < math.inf:
+                    edges[neighbor] = cost
+            self._edges[vertex_id] = edges
+        return edges
+
+    def lanes_changed(self, lanes: List[Tuple[int, int]], traversability_changed: bool):
+        if traversability_changed:
+            self._toggled.update(lanes)
+        for v1, v2 in lanes:
+            self._edges.pop(v1, None)
+            self._edges.pop(v2, None)
+            lane = self.nav_graph.get_lane_between(v1, v2)
+            if lane and lane.speed_limit > 0 and 1.0 / lane.speed_limit < self._heuristic_scale:
+                # A lane got faster than any before it, so queued keys may overestimate; start over
+                self._heuristic_scale = 1.0 / lane.speed_limit
+                self.reset()
+        if not self.searches:
+            return
+        self._changes.extend(lanes)
+        if len(self._changes) > self.MAX_CHANGE_LOG:
+            self._trim_log()
+            if len(self._changes) > self.MAX_CHANGE_LOG:
+                self.reset()
+
+    def close(self):
+        """Stop listening to the graph, which may outlive this repairer (e.g. across sweep runs)"""
+        self.nav_graph.remove_lane_listener(self.lanes_changed)
+
+    def reset(self):
+        """Drop every search; robots get a fresh one on their next repair"""
+        self.searches.clear()
+        self._applied.clear()
+        self._log_start += len(self._changes)
+        self._changes = []
+
+    def take_toggled_lanes(self) -> Tuple[Set[Tuple[int, int]], Set[Tuple[int, int]]]:
+        """(closed, opened) lanes since the last call, as undirected (low, high) vertex pairs"""
+        closed, opened = set(), set()
+        for v1, v2 in self._toggled:
+            key = (min(v1, v2), max(v1, v2))
+            (opened if self.nav_graph.is_traversable(v1, v2) else closed).add(key)
+        self._toggled.clear()
+        return closed, opened
+
+    def route(self, robot_id: int, start: int, goal: int) -> List[int]:
+        """Cheapest route from start to goal under current lane costs, repairing the robot's search"""
+        search = self.searches.get(robot_id)
+        if search is None or search.goal != goal:
+            search = DStarLite(start, goal, self._edges_of, self._heuristic)
+            self.searches[robot_id] = search
+        else:
+            search.move_to(start)
+            search.edges_changed(set(self._changes[self._applied[robot_id] - self._log_start:]))
+        self._applied[robot_id] = self._log_start + len(self._changes)
+        search.compute_shortest_path()
+        return search.path()
+
+    def forget(self, robot_id: int):
+        """Drop a robot's search, e.g. once its task ends, so it no longer holds back the change log"""
+        self.searches.pop(robot_id, None)
+        if self._applied.pop(robot_id, None) is not None:
+            self._trim_log()  # It may have been the search holding back the oldest entries
+
+    def _trim_log(self):
+        """Drop log entries every search has already seen"""
+        oldest = min(self._applied.values(), default=self._log_start + len(self._changes))
+        if oldest > self._log_start:
+            del self._changes[:oldest - self._log_start]
+            self._log_start = oldest
@@ -0,0 +1,567 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from ..models.fleet_delta import FleetChangeTracker, FleetDelta
+from ..models.nav_graph import NavigationGraph
+from ..models.kinematics import FleetKinematics, NO_VERTEX
+from ..models.robot import Robot, RobotStatus
+from ..utils.checkpoint import CheckpointWriter
+from ..utils.event_log import EventLogWriter
+from ..utils.helpers import gc_paused
+from ..utils.logger import FleetLogger
+from ..utils.metrics import Metrics, MetricsServer
+from ..utils.path_planner import DEFAULT_SPEED
+from .fleet_manager import FleetManager
+from .traffic_manager import TrafficManager
+from .task_dispatcher import Job, TaskDispatcher
+from .charger_scheduler import ChargerScheduler
+from .gateway import FleetGateway
+
+
+@dataclass
+class RobotState:
+    """Immutable view of one robot handed to snapshot subscribers"""
+    id: int
+    vertex_id: int
+    status: RobotStatus
+    status_text: str
+    color: str
+    next_vertex_id: Optional[int] = None
+    destination_id: Optional[int] = None
+    x: float = 0.0  # Interpolated world position
+    y: float = 0.0
+
+
+@dataclass
+class SimulationSnapshot:
+    tick: int
+    robots: List[RobotState]
+    conflicts: List[Tuple[int, int]] = field(default_factory=list)  # (robot_id, blocked_vertex)
+
+
+SnapshotCallback = Callable[[SimulationSnapshot], None]
+ChangesCallback = Callable[[FleetDelta], None]
+
+
+class SimulationEngine:
+    """Advances the fleet simulation without any GUI dependency.
+
+    Owns the FleetManager and TrafficManager; front-ends observe it by
+    subscribing to SimulationSnapshot updates. With motion="discrete" a
+    robot hops one vertex per tick; with motion="continuous" it travels
+    along lanes at its speed (capped by lane speed limits) and a hop takes
+    as many ticks of dt seconds as the lane length requires.
+    """
+
+    def __init__(self, nav_graph: NavigationGraph, tick_interval: float = 0.2,
+                 event_log_file: Optional[str] = None, motion: str = "discrete", append_event_log: bool = False):
+        if motion not in ("discrete", "continuous"):
+            raise ValueError(f"Unknown motion model: {motion}")
+        self.nav_graph = nav_graph
+        self.event_log = EventLogWriter(event_log_file, append=append_event_log) if event_log_file else None
+        self.fleet_manager = FleetManager(nav_graph, self.event_log)
+        self.traffic_manager = TrafficManager(nav_graph, self.event_log)
+        # Lane queues are created on first use; pre-creating one per lane is costly on large maps
+        self.traffic_manager.continuous = motion == "continuous"
+        self.fleet_manager.traffic_manager = self.traffic_manager
+        self.dispatcher = TaskDispatcher(self.fleet_manager)
+        self.metrics = Metrics()  # Disabled until enable_metrics()
+        self.metrics_server: Optional[MetricsServer] = None
+        self.gateway: Optional[FleetGateway] = None  # Started by enable_gateway()
+        self.checkpoints: Optional[CheckpointWriter] = None  # Started by enable_checkpoints()
+        self.checkpoint_every = 0
+        self._checkpoint_tick: Optional[int] = None  # Tick of the last checkpoint handed to the writer
+        self.traffic_manager.metrics = self.metrics
+        self.chargers: Optional[ChargerScheduler] = None  # Created by enable_batteries()
+        self.motion = motion
+        self.kinematics = FleetKinematics(nav_graph)
+        self.changes = FleetChangeTracker(self.fleet_manager.store, self._positions)
+        self.tick_interval = tick_interval
+        self.tick = 0
+        self.sim_time = 0.0  # Simulated seconds
+        self._subscribers: List[SnapshotCallback] = []
+        self._change_subscribers: List[ChangesCallback] = []
+        self._published_version = 0
+        self._tick_hooks: List[Callable[[], None]] = []
+        # tick -> [(robot_id, destination, path)]; a None path is planned with the rest of the tick's wave
+        self._scheduled_tasks: Dict[int, List[Tuple[int, int, Optional[List[int]]]]] = {}
+        self._scheduled_jobs: Dict[int, List[Dict]] = {}  # tick -> job specs to submit
+        self._scheduled_lane_changes: Dict[int, List[Tuple[int, int, bool]]] = {}  # tick -> [(v1, v2, blocked)]
+        self._closed_lanes: Set[Tuple[int, int]] = set()  # Closed through set_lane_blocked(), as given
+        self._last_conflicts: List[Tuple[int, int]] = []
+        self._running = False
+        self._stepping = False  # Inside step(), which publishes once at the end of the tick
+
+    def subscribe(self, callback: SnapshotCallback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: SnapshotCallback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def subscribe_changes(self, callback: ChangesCallback):
+        """Receive, whenever a snapshot is published, a FleetDelta of the robots changed since the previous one"""
+        self._change_subscribers.append(callback)
+
+    def unsubscribe_changes(self, callback: ChangesCallback):
+        if callback in self._change_subscribers:
+            self._change_subscribers.remove(callback)
+
+    def changes_since(self, version: int) -> FleetDelta:
+        """Robots whose vertex, status, task, charge or position changed after `version`.
+
+        Pass the returned delta's version on the next call; version 0 gives
+        every robot. Unchanged robots cost nothing beyond a vectorized compare.
+        """
+        return self.changes.changes_since(version, self.tick)
+
+    @property
+    def conflicts(self) -> List[Tuple[int, int]]:
+        """(robot_id, blocked_vertex) of the robots left blocked on the last tick"""
+        return self._last_conflicts
+
+    def add_tick_hook(self, callback: Callable[[], None]):
+        """Call callback at the start of every tick, before scheduled work (e.g. to apply queued external commands)"""
+        self._tick_hooks.append(callback)
+
+    def remove_tick_hook(self, callback: Callable[[], None]):
+        if callback in self._tick_hooks:
+            self._tick_hooks.remove(callback)
+
+    def spawn_robot(self, vertex_id: int, max_speed: float = DEFAULT_SPEED) -> Robot:
+        robot = self.fleet_manager.spawn_robot(vertex_id)
+        self.traffic_manager.register_robot(robot, self.tick)
+        self.kinematics.add_robot(robot.id, vertex_id, max_speed)
+        self._publish()
+        return robot
+
+    def enable_batteries(self, battery_range: float, low_battery: float = 0.25,
+                         charge_rate: float = 0.05) -> ChargerScheduler:
+        """Drain batteries by distance (a full charge covers battery_range world units) and schedule chargers"""
+        if battery_range <= 0:
+            raise ValueError(f"Battery range must be positive, got {battery_range}")
+        self.fleet_manager.battery_drain = 1.0 / battery_range
+        self.chargers = ChargerScheduler(self.fleet_manager, low_battery, charge_rate)
+        self.dispatcher.chargers = self.chargers
+        return self.chargers
+
+    def enable_metrics(self, port: Optional[int] = None, host: str = "127.0.0.1") -> Metrics:
+        """Start timing tick phases and counting traffic events; with a port, also serve them over HTTP"""
+        self.metrics.enabled = True
+        FleetLogger.metrics = self.metrics
+        if port is not None and self.metrics_server is None:
+            self.metrics_server = MetricsServer(self.metrics, port, host)
+        return self.metrics
+
+    def enable_gateway(self, port: int = 8765, host: str = "127.0.0.1") -> FleetGateway:
+        """Accept spawn, assign, job, status and subscribe requests from TCP clients (see gateway.py)"""
+        if self.gateway is None:
+            self.gateway = FleetGateway(self, port, host).start()
+        return self.gateway
+
+    def enable_checkpoints(self, path: str, every: int = 100) -> CheckpointWriter:
+        """Checkpoint the fleet to path every `every` ticks and on close(), writing on a background thread"""
+        if every < 1:
+            raise ValueError(f"Checkpoint interval must be at least one tick, got {every}")
+        if self.checkpoints is None:
+            self.checkpoints = CheckpointWriter(path)
+        self.checkpoint_every = every
+        return self.checkpoints
+
+    def checkpoint_state(self) -> Dict:
+        """Copy of the whole fleet state between ticks, for write_checkpoint() (see utils/checkpoint.py).
+
+        Robot, path and kinematics state are copied as arrays, so taking a
+        checkpoint costs a few memory copies even for large fleets; later
+        ticks never touch the copy, which can be encoded on another thread.
+        """
+        return {
+            "tick": self.tick,
+            "sim_time": self.sim_time,
+            "motion": self.motion,
+            "vertices": len(self.nav_graph.vertices),
+            "closed_lanes": sorted(self._closed_lanes),
+            "scheduled_tasks": [[tick, robot_id, destination_id, path] for tick, tasks in self._scheduled_tasks.items()
+                                for robot_id, destination_id, path in tasks],
+            "scheduled_jobs": [[tick, spec] for tick, specs in self._scheduled_jobs.items() for spec in specs],
+            "scheduled_lane_changes": [[tick, v1_id, v2_id, blocked] for tick, changes
+                                       in self._scheduled_lane_changes.items() for v1_id, v2_id, blocked in changes],
+            "fleet": self.fleet_manager.checkpoint_state(),
+            "kinematics": self.kinematics.checkpoint_state(),
+            "traffic": self.traffic_manager.checkpoint_state(),
+            "dispatcher": self.dispatcher.checkpoint_state(),
+            "chargers": self.chargers.checkpoint_state() if self.chargers else None,
+        }
+
+    def _submit_checkpoint(self):
+        self.checkpoints.submit(self.checkpoint_state())
+        self._checkpoint_tick = self.tick
+
+    def restore_state(self, state: Dict):
+        """Resume from a checkpoint_state() (e.g. read_checkpoint()) on an engine without robots"""
+        if self.fleet_manager.robots:
+            raise ValueError("Checkpoints can only be restored into an empty fleet")
+        if state["vertices"] != len(self.nav_graph.vertices):
+            raise ValueError(f"Checkpoint is of a graph with {state['vertices']} vertices, "
+                             f"not {len(self.nav_graph.vertices)}")
+        if state["motion"] != self.motion:
+            raise ValueError(f"Checkpoint uses {state['motion']} motion, the engine {self.motion}")
+        self.tick, self.sim_time = state["tick"], state["sim_time"]
+        self._checkpoint_tick = self.tick
+        if self.event_log:
+            self.event_log.tick = self.tick
+        for v1_id, v2_id in state["closed_lanes"]:
+            self.set_lane_blocked(v1_id, v2_id)
+        for task in state["scheduled_tasks"]:
+            self.schedule_task(*task)
+        for tick, spec in state["scheduled_jobs"]:
+            self._scheduled_jobs.setdefault(tick, []).append(spec)
+        for tick, v1_id, v2_id, blocked in state["scheduled_lane_changes"]:
+            self._scheduled_lane_changes.setdefault(tick, []).append((v1_id, v2_id, blocked))
+
+        with gc_paused():  # Rebuilding reservations creates an object per reserved vertex and lane
+            fleet = state["fleet"]
+            if state["chargers"]:
+                chargers = state["chargers"]
+                self.enable_batteries(1.0 / fleet["battery_drain"], chargers["low_battery"], chargers["charge_rate"])
+                self.chargers.nearest_count = chargers["nearest_count"]
+                self.chargers.restore_state(chargers)
+            self.fleet_manager.restore_state(fleet)
+            self.kinematics.restore_state(state["kinematics"])
+            to_vertex = self.kinematics.to_vertex[:self.kinematics.count]
+            travelling = {robot_id: int(to_vertex[robot_id])
+                          for robot_id in np.flatnonzero(to_vertex != NO_VERTEX).tolist()}
+            self.traffic_manager.restore_state(state["traffic"], self.fleet_manager.get_all_robots(), travelling)
+            self.dispatcher.restore_state(state["dispatcher"])
+        self._publish()
+
+    def assign_task(self, robot_id: int, destination_id: int, path: Optional[List[int]] = None) -> bool:
+        """Assign a task, planning a reserved conflict-free route if no path is given"""
+        if self.kinematics.is_travelling(robot_id):
+            # Re-plan once the robot has reached the end of the lane it is on
+            self.schedule_task(self.tick + 1, robot_id, destination_id, path)
+            return True
+        assigned = self.fleet_manager.assign_navigation_task(robot_id, destination_id, path)
+        if assigned:
+            self._publish()
+        return assigned
+
+    def assign_tasks(self, destinations: Dict[int, int]) -> Dict[int, List[int]]:
+        """Plan one dispatch wave of robot -> destination requests together"""
+        destinations = dict(destinations)
+        for robot_id in [r for r in destinations if self.kinematics.is_travelling(r)]:
+            self.schedule_task(self.tick + 1, robot_id, destinations.pop(robot_id))
+        assigned = self.fleet_manager.assign_navigation_tasks(destinations)
+        if assigned:
+            self._publish()
+        return assigned
+
+    def schedule_task(self, tick: int, robot_id: int, destination_id: int, path: Optional[List[int]] = None):
+        """Queue a task assignment to be issued at the start of the given tick"""
+        self._scheduled_tasks.setdefault(tick, []).append((robot_id, destination_id, path))
+
+    def set_lane_blocked(self, v1_id: int, v2_id: int, blocked: bool = True) -> bool:
+        """Close or reopen the lanes between two vertices; affected robots are re-routed on the next tick"""
+        found = self.nav_graph.set_lane_blocked(v1_id, v2_id, blocked)
+        if found:
+            if blocked:
+                self._closed_lanes.add((v1_id, v2_id))
+            else:
+                self._closed_lanes.difference_update({(v1_id, v2_id), (v2_id, v1_id)})
+            self.traffic_manager.logger.log("Lane %d-%d %s", v1_id, v2_id, "closed" if blocked else "reopened")
+        return found
+
+    def submit_job(self, pickup: int, drop: int, priority: int = 0, deadline: Optional[int] = None) -> Job:
+        """Queue a pickup/drop job for the dispatcher; deadline is a tick"""
+        return self.dispatcher.submit(pickup, drop, priority, deadline, self.tick)
+
+    def step(self, dt: Optional[float] = None, end_tick: bool = True):
+        """Advance the simulation by one tick of dt seconds (default: tick_interval).
+
+        With end_tick=False the tick's metrics stay open, so the caller can time
+        further phases of it (e.g. rendering) before calling metrics.end_tick().
+        """
+        dt = self.tick_interval if dt is None else dt
+        metrics = self.metrics
+        with metrics.timer("tick"):
+            self._stepping = True
+            try:
+                for hook in self._tick_hooks:
+                    hook()
+                if self.event_log:
+                    self.event_log.tick = self.tick
+                for v1_id, v2_id, blocked in self._scheduled_lane_changes.pop(self.tick, []):
+                    self.set_lane_blocked(v1_id, v2_id, blocked)
+                with metrics.timer("dispatch"):
+                    scheduled = self._scheduled_tasks.pop(self.tick, [])
+                    planned = {robot_id: destination_id for robot_id, destination_id, path in scheduled if path is None}
+                    if planned:
+                        self.assign_tasks(planned)
+                    for robot_id, destination_id, path in scheduled:
+                        if path is not None:
+                            self.assign_task(robot_id, destination_id, path)
+                    jobs = self._scheduled_jobs.pop(self.tick, [])
+                    if jobs:
+                        self.dispatcher.submit_many(jobs, self.tick)
+                    self.dispatcher.dispatch(self.tick)
+                    if self.chargers:
+                        self.chargers.update(self.tick, dt)
+
+                with metrics.timer("manage_traffic"):
+                    self.traffic_manager.manage_traffic(self.fleet_manager, self.tick)
+
+                with metrics.timer("movement"):
+                    if self.motion == "continuous":
+                        self._last_conflicts = self._move_continuous(dt)
+                    else:
+                        self._last_conflicts = self._move_discrete()
+                self.sim_time += dt
+                self.tick += 1
+                self.traffic_manager.current_tick = self.tick
+            finally:
+                self._stepping = False
+            with metrics.timer("publish"):
+                self._publish()
+            if self.checkpoints and self.tick % self.checkpoint_every == 0:
+                with metrics.timer("checkpoint"):
+                    self._submit_checkpoint()
+        if end_tick:
+            metrics.end_tick()
+
+    def _move_discrete(self) -> List[Tuple[int, int]]:
+        """Hop every moving robot to its next vertex; returns the robots left blocked"""
+        # Robots blocked by a robot that is about to move away are retried after
+        # it has moved, so trains of robots advance together in one tick
+        check_collision = self.metrics.timed("collision_check", self.traffic_manager.check_collision)
+        pending = []
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.MOVING):
+            if robot.get_next_vertex() is None:
+                # Final vertex reached on the previous tick; mark the task complete
+                self.fleet_manager.update_robot_position(robot.id)
+                continue
+            pending.append(robot)
+
+        while pending:
+            blocked = []
+            for robot in pending:
+                if check_collision(robot.id, robot.get_next_vertex()):
+                    blocked.append(robot)
+                else:
+                    from_vertex = robot.current_vertex_id
+                    self.fleet_manager.update_robot_position(robot.id)
+                    self.traffic_manager.on_robot_moved(robot, from_vertex, self.tick)
+            if len(blocked) == len(pending):
+                break
+            pending = blocked
+
+        conflicts = []
+        for robot in pending:
+            next_vertex = robot.get_next_vertex()
+            self.traffic_manager.on_robot_blocked(robot, next_vertex, self.tick)
+            conflicts.append((robot.id, next_vertex))
+        return conflicts
+
+    def _move_continuous(self, dt: float) -> List[Tuple[int, int]]:
+        """Advance robots along their lanes by dt seconds, then start robots on their next lane.
+
+        A robot holds both ends of the lane it is on until it arrives, so
+        robots never pass through each other on a lane or at a vertex.
+        """
+        arrived = self.kinematics.advance(dt)
+        for robot_id in arrived:
+            robot = self.fleet_manager.get_robot(robot_id)
+            from_vertex = robot.current_vertex_id
+            self.fleet_manager.update_robot_position(robot_id)
+            self.traffic_manager.on_robot_moved(robot, from_vertex, self.tick)
+            self.kinematics.arrive(robot_id)
+
+        # Robots that arrived during this tick set off again on the next one, which
+        # gives robots that were waiting for the vertex they left a fair chance at it
+        arrived = set(arrived)
+        check_collision = self.metrics.timed("collision_check", self.traffic_manager.check_collision)
+        conflicts = []
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.MOVING):
+            if self.kinematics.is_travelling(robot.id) or robot.id in arrived:
+                continue
+            next_vertex = robot.get_next_vertex()
+            # Planned waits pace the tick-based schedule; in continuous time lane access is checked directly
+            while next_vertex is not None and next_vertex == robot.current_vertex_id:
+                self.fleet_manager.update_robot_position(robot.id)
+                next_vertex = robot.get_next_vertex()
+            if next_vertex is None:
+                self.fleet_manager.update_robot_position(robot.id)
+            elif check_collision(robot.id, next_vertex):
+                self.traffic_manager.on_robot_blocked(robot, next_vertex, self.tick)
+                conflicts.append((robot.id, next_vertex))
+            else:
+                self.traffic_manager.on_robot_departed(robot, next_vertex)
+                self.kinematics.depart(robot.id, robot.current_vertex_id, next_vertex)
+        return conflicts
+
+    def run(self, ticks: Optional[int] = None, rate_hz: Optional[float] = None,
+            until_idle: bool = False) -> int:
+        """Step repeatedly; rate_hz=None runs as fast as possible.
+
+        Stops after `ticks` ticks, when stop() is called, or (with until_idle)
+        once no robot is moving or waiting and no tasks are scheduled.
+        Returns the number of ticks executed.
+        """
+        interval = 1.0 / rate_hz if rate_hz else 0.0
+        executed = 0
+        self._running = True
+        next_deadline = time.perf_counter()
+        while self._running and (ticks is None or executed < ticks):
+            if until_idle and self.is_idle():
+                break
+            self.step()
+            executed += 1
+            if interval:
+                next_deadline += interval
+                delay = next_deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_deadline = time.perf_counter()
+        self._running = False
+        return executed
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        """Write a final checkpoint and flush the event log, if enabled, and stop the servers.
+
+        Lanes closed through set_lane_blocked() are reopened and traffic
+        state is cleared from the graph, so it can be reused by another engine.
+        """
+        if self.checkpoints:
+            if self._checkpoint_tick != self.tick:
+                self._submit_checkpoint()
+            self.checkpoints.close()
+            self.checkpoints = None
+        self.traffic_manager.close()
+        for v1, v2 in self._closed_lanes:
+            self.nav_graph.set_lane_blocked(v1, v2, False)
+        self._closed_lanes.clear()
+        if self.event_log:
+            self.event_log.close()
+        if self.gateway:
+            self.gateway.close()
+            self.gateway = None
+        if self.metrics_server:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if FleetLogger.metrics is self.metrics:
+            FleetLogger.metrics = None
+
+    def is_idle(self) -> bool:
+        if any(tick >= self.tick for tick in self._scheduled_tasks) or self._scheduled_jobs:
+            return False
+        if self._scheduled_lane_changes:  # A lane reopening can let a stuck robot finish
+            return False
+        if self.dispatcher.has_work():
+            return False
+        return self.fleet_manager.count_with_status(RobotStatus.MOVING, RobotStatus.WAITING) == 0
+
+    def _positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.motion == "continuous":
+            return self.kinematics.positions()
+        vertices = self.fleet_manager.store.vertex[:self.fleet_manager.store.count]
+        return self.kinematics.vertex_x[vertices], self.kinematics.vertex_y[vertices]
+
+    def robot_position(self, robot: Robot) -> Tuple[float, float]:
+        """World position of a robot, interpolated along its lane in continuous mode"""
+        if self.motion == "continuous":
+            return self.kinematics.position(robot.id)
+        vertex = self.nav_graph.get_vertex_by_id(robot.current_vertex_id)
+        return vertex.x, vertex.y
+
+    def snapshot(self) -> SimulationSnapshot:
+        robots = []
+        for robot in self.fleet_manager.get_all_robots():
+            x, y = self.robot_position(robot)
+            robots.append(RobotState(
+                id=robot.id,
+                vertex_id=robot.current_vertex_id,
+                status=robot.status,
+                status_text=robot.get_status_description(),
+                color=robot.color,
+                next_vertex_id=robot.get_next_vertex(),
+                destination_id=robot.task.destination_id if robot.task else None,
+                x=x,
+                y=y,
+            ))
+        return SimulationSnapshot(self.tick, robots, list(self._last_conflicts))
+
+    def _publish(self):
+        # Building a snapshot costs O(robots); skip it entirely when running headless,
+        # and mid-tick, where spawns and assignments are covered by the end-of-tick snapshot
+        if self._stepping:
+            return
+        if self._change_subscribers:
+            delta = self.changes_since(self._published_version)
+            self._published_version = delta.version
+            if len(delta):
+                for callback in list(self._change_subscribers):
+                    callback(delta)
+        if not self._subscribers:
+            return
+        snapshot = self.snapshot()
+        for callback in list(self._subscribers):
+            callback(snapshot)
+
+    def load_scenario(self, scenario: Dict):
+        """Spawn robots and schedule tasks described by a scenario dictionary.
+
+        Format: {"robots": [{"spawn": 13, "destination": 10}, ...],
+                 "tasks": [{"tick": 50, "robot": 0, "destination": 5}, ...],
+                 "jobs": [{"tick": 0, "pickup": 3, "drop": 8, "priority": 1, "deadline": 200}, ...],
+                 "battery": {"range": 60, "low": 0.25, "charge_rate": 0.05},
+                 "lanes": [{"tick": 40, "lane": [7, 12], "blocked": true}, ...]}
+        Robots may also give their initial "battery" charge (0 to 1). Ticks
+        already past are moved to the current tick. Every vertex, robot and
+        lane is checked before anything is loaded; ValueError names the
+        first one that does not exist.
+        """
+        self._check_scenario(scenario)
+        battery = scenario.get('battery')
+        if battery:
+            self.enable_batteries(battery['range'], battery.get('low', 0.25), battery.get('charge_rate', 0.05))
+        for robot_spec in scenario.get('robots', []):
+            robot = self.spawn_robot(robot_spec['spawn'])
+            robot.battery = robot_spec.get('battery', 1.0)
+            if robot_spec.get('destination') is not None:
+                self.schedule_task(max(robot_spec.get('tick', 0), self.tick), robot.id, robot_spec['destination'])
+        for task_spec in scenario.get('tasks', []):
+            self.schedule_task(max(task_spec.get('tick', 0), self.tick), task_spec['robot'], task_spec['destination'])
+        for job_spec in scenario.get('jobs', []):
+            self._scheduled_jobs.setdefault(max(job_spec.get('tick', 0), self.tick), []).append(job_spec)
+        for lane_spec in scenario.get('lanes', []):
+            v1_id, v2_id = lane_spec['lane']
+            self._scheduled_lane_changes.setdefault(max(lane_spec.get('tick', 0), self.tick), []).append(
+                (v1_id, v2_id, lane_spec.get('blocked', True)))
+
+    def _check_scenario(self, scenario: Dict):
+        robot_specs = scenario.get('robots', [])
+        vertices = [spec['spawn'] for spec in robot_specs]
+        vertices += [spec['destination'] for spec in robot_specs if spec.get('destination') is not None]
+        vertices += [spec['destination'] for spec in scenario.get('tasks', [])]
+        vertices += [spec[key] for spec in scenario.get('jobs', []) for key in ('pickup', 'drop')]
+        for vertex_id in vertices:
+            if vertex_id not in self.nav_graph.adjacency:
+                raise ValueError(f"Scenario names unknown vertex {vertex_id}")
+        robot_count = len(self.fleet_manager.robots) + len(robot_specs)
+        for task_spec in scenario.get('tasks', []):
+            if not 0 <= task_spec['robot'] < robot_count:
+                raise ValueError(f"Scenario task names unknown robot {task_spec['robot']}")
+        for lane_spec in scenario.get('lanes', []):
+            v1_id, v2_id = lane_spec['lane']
+            if not self.nav_graph.has_lane(v1_id, v2_id):
+                raise ValueError(f"Scenario names unknown lane {v1_id}-{v2_id}")
+
+
+def load_scenario_file(scenario_file: str) -> Dict:
+    with open(scenario_file, 'r') as f:
+        return json.load(f)
@@ -0,0 +1,332 @@
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+import numpy as np
+from ..models.robot import Robot, RobotStatus
+from ..utils.assignment import min_cost_assignment
+from ..utils.cost_tables import CostTableCache
+from ..utils.logger import FleetLogger, LogLevel
+from ..utils.metrics import RollingHistogram
+from .fleet_manager import FleetManager
+
+if TYPE_CHECKING:
+    from .charger_scheduler import ChargerScheduler
+
+# Pickup cost tables kept between dispatch waves (one float per vertex each)
+COST_CACHE_SIZE = 128
+# Nearest pickups each free robot's search costs exactly per dispatch wave; farther ones are estimated
+MATCH_CANDIDATES = 32
+# Queue latency percentiles cover this many of the most recently dispatched jobs
+LATENCY_WINDOW = 4096
+JOB_STATES = ("queued", "to_pickup", "to_drop", "done", "failed")
+# Integer Job fields a checkpoint keeps
+CHECKPOINT_JOB_FIELDS = ("id", "pickup", "drop", "priority", "deadline", "submitted_tick", "robot_id", "assigned_tick")
+
+
+@dataclass
+class Job:
+    """A pickup/drop job; ticks are simulation ticks, *_at fields are perf_counter() seconds"""
+    id: int
+    pickup: int
+    drop: int
+    priority: int = 0  # Higher is dispatched first
+    deadline: Optional[int] = None  # Tick by which the drop should be reached
+    submitted_tick: int = 0
+    submitted_at: float = 0.0
+    state: str = "queued"  # "queued", "to_pickup", "to_drop", "done" or "failed"
+    robot_id: Optional[int] = None
+    assigned_tick: Optional[int] = None
+    assigned_at: Optional[float] = None
+    completed_tick: Optional[int] = None
+
+    @property
+    def late(self) -> bool:
+        return self.deadline is not None and self.completed_tick is not None and self.completed_tick > self.deadline
+
+
+class TaskDispatcher:
+    """Queue of pickup/drop jobs assigned to free robots in batches.
+
+    Jobs wait in a heap ordered by priority, then deadline, then arrival.
+    Each dispatch wave takes as many jobs off the top as there are free
+    (IDLE or TASK_COMPLETE) robots and matches them with the Hungarian
+    method on planner travel cost to the pickup (exact to each robot's
+    nearest pickups, estimated beyond them); all legs of a wave are
+    planned together through FleetManager.assign_navigation_tasks. With a
+    charger scheduler attached, robots are only matched with jobs they have
+    the battery to finish.
+    """
+
+    def __init__(self, fleet_manager: FleetManager, cost_model: str = "time", max_batch: int = 256):
+        self.fleet_manager = fleet_manager
+        self.nav_graph = fleet_manager.nav_graph
+        self.planner = self.nav_graph.get_planner(cost_model, "dijkstra")
+        self.max_batch = max_batch
+        self.logger = FleetLogger()
+        self.jobs: Dict[int, Job] = {}  # Queued and in-progress jobs; finished ones are dropped
+        self._queue: List[Tuple[int, float, int]] = []  # (-priority, deadline, job id)
+        self._job_ids = itertools.count()
+        self.active: Dict[int, Job] = {}  # robot id -> job it is working on
+        # Set by the simulation engine when batteries are simulated; robots due for a charge get no jobs
+        self.chargers: Optional["ChargerScheduler"] = None
+        self.costs = CostTableCache(self.planner, COST_CACHE_SIZE)  # Travel cost to pickups
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.late = 0
+        self.waves = 0
+        self.wave_seconds = 0.0
+        # Time from submission to assignment of dispatched jobs
+        self.latency_ticks = RollingHistogram(LATENCY_WINDOW)
+        self.latency_seconds = RollingHistogram(LATENCY_WINDOW)
+
+    def submit(self, pickup: int, drop: int, priority: int = 0, deadline: Optional[int] = None,
+               tick: int = 0) -> Job:
+        """Queue a job; raises ValueError for vertices that are not on the map"""
+        for vertex_id in (pickup, drop):
+            if vertex_id not in self.nav_graph.adjacency:
+                raise ValueError(f"Unknown vertex {vertex_id}")
+        job = Job(next(self._job_ids), pickup, drop, priority, deadline, tick, time.perf_counter())
+        self.jobs[job.id] = job
+        self.submitted += 1
+        self._push(job)
+        return job
+
+    def submit_many(self, specs: Iterable[Dict], tick: int = 0) -> List[Job]:
+        """Queue jobs given as {"pickup", "drop", "priority"?, "deadline"?} dictionaries"""
+        return [self.submit(spec['pickup'], spec['drop'], spec.get('priority', 0), spec.get('deadline'), tick)
+                for spec in specs]
+
+    def _push(self, job: Job):
+        deadline = job.deadline if job.deadline is not None else float('inf')
+        heapq.heappush(self._queue, (-job.priority, deadline, job.id))
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def has_work(self) -> bool:
+        return bool(self._queue or self.active)
+
+    def checkpoint_state(self) -> Dict:
+        """Queued and in-progress jobs as columns, and the outcome counters.
+
+        Finished jobs and latency samples are not kept. None is stored as -1.
+        """
+        open_jobs = [self.jobs[job_id] for _, _, job_id in self._queue] + list(self.active.values())
+
+        def column(values) -> np.ndarray:
+            return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+        state = {name: column([getattr(job, name) for job in open_jobs]) for name in CHECKPOINT_JOB_FIELDS}
+        state["state"] = np.array([JOB_STATES.index(job.state) for job in open_jobs], dtype=np.int8)
+        state.update(submitted=self.submitted, completed=self.completed, failed=self.failed, late=self.late,
+                     waves=self.waves)
+        return state
+
+    def restore_state(self, state: Dict):
+        now = time.perf_counter()  # Wall-clock latencies restart from the restore
+        columns = [state[name].tolist() for name in CHECKPOINT_JOB_FIELDS]
+        for values, state_code in zip(zip(*columns), state["state"].tolist()):
+            fields = {name: None if value == -1 else value for name, value in zip(CHECKPOINT_JOB_FIELDS, values)}
+            job = Job(submitted_at=now, state=JOB_STATES[state_code],
+                      assigned_at=None if fields["assigned_tick"] is None else now, **fields)
+            self.jobs[job.id] = job
+            if job.robot_id is None:
+                self._push(job)
+            else:
+                self.active[job.robot_id] = job
+        self.submitted = state["submitted"]
+        self._job_ids = itertools.count(self.submitted)
+        self.completed, self.failed, self.late, self.waves = \
+            state["completed"], state["failed"], state["late"], state["waves"]
+
+    def dispatch(self, tick: int):
+        """Advance robots that finished a leg, then assign queued jobs to the free robots"""
+        if not self._queue and not self.active:
+            return
+        started = time.perf_counter()
+        destinations: Dict[int, int] = {}
+        self._advance_jobs(tick, destinations)
+
+        free = [robot for robot in self.fleet_manager.robots_with_status(RobotStatus.IDLE, RobotStatus.TASK_COMPLETE)
+                if robot.id not in self.active and robot.id not in destinations
+                and not (self.chargers and self.chargers.needs_charge(robot))]
+        pickups: Dict[int, Job] = {}
+        if free and self._queue:
+            pickups = self._match(free[:self.max_batch], tick)
+            for robot_id, job in pickups.items():
+                destinations[robot_id] = job.pickup
+        if not destinations:
+            return
+
+        assigned = self.fleet_manager.assign_navigation_tasks(destinations)
+        for robot_id, job in pickups.items():
+            if robot_id in assigned:
+                job.state, job.robot_id = "to_pickup", robot_id
+                job.assigned_tick, job.assigned_at = tick, time.perf_counter()
+                self.latency_ticks.add(tick - job.submitted_tick)
+                self.latency_seconds.add(job.assigned_at - job.submitted_at)
+                self.active[robot_id] = job
+            else:
+                self._push(job)
+        for robot_id, job in list(self.active.items()):
+            if robot_id in destinations and robot_id not in assigned and robot_id not in pickups:
+                self.logger.log("Job %d failed: robot %d has no route to vertex %d", job.id, robot_id,
+                                destinations[robot_id], level=LogLevel.WARNING)
+                self._finish(robot_id, job, "failed", tick)
+        self.waves += 1
+        self.wave_seconds += time.perf_counter() - started
+
+    def _advance_jobs(self, tick: int, destinations: Dict[int, int]):
+        """Robots that reached their pickup head for the drop; robots at the drop finish the job"""
+        for robot_id, job in list(self.active.items()):
+            robot = self.fleet_manager.get_robot(robot_id)
+            if robot.status == RobotStatus.STRANDED:
+                if job.state == "to_drop" and robot.current_vertex_id == job.drop:
+                    self._finish(robot_id, job, "done", tick)
+                else:
+                    self.logger.log("Job %d failed: robot %d is stranded at vertex %d", job.id, robot_id,
+                                    robot.current_vertex_id, level=LogLevel.WARNING)
+                    self._finish(robot_id, job, "failed", tick)
+                continue
+            if robot.status != RobotStatus.TASK_COMPLETE:
+                continue
+            target = job.pickup if job.state == "to_pickup" else job.drop
+            if robot.current_vertex_id != target:
+                # Moved aside by the traffic manager or re-tasked by hand: send it back to finish the leg
+                destinations[robot_id] = target
+            elif job.state == "to_pickup":
+                job.state = "to_drop"
+                destinations[robot_id] = job.drop
+            else:
+                self._finish(robot_id, job, "done", tick)
+
+    def _finish(self, robot_id: int, job: Job, state: str, tick: int):
+        del self.active[robot_id]
+        del self.jobs[job.id]
+        job.state, job.completed_tick = state, tick
+        if state == "done":
+            self.completed += 1
+            if job.late:
+                self.late += 1
+        else:
+            self.failed += 1
+
+    def _match(self, free: List[Robot], tick: int) -> Dict[int, Job]:
+        """Take the top jobs off the queue and pair them with free robots at minimum total travel cost"""
+        batch = [self.jobs[heapq.heappop(self._queue)[2]] for _ in range(min(len(free), len(self._queue)))]
+        if self.chargers:
+            batch = self._drop_out_of_range(batch, tick)
+            if not batch:
+                return {}
+        cost = self._travel_costs(free, [job.pickup for job in batch])
+
+        reachable = np.isfinite(cost)
+        stranded = ~reachable.any(axis=0)
+        if stranded.any():
+            store = self.fleet_manager.store
+            fleet_vertices = store.vertex[:store.count]
+            for column in np.flatnonzero(stranded).tolist():
+                if np.isfinite(self.costs.costs_to(batch[column].pickup)[fleet_vertices]).any():
+                    stranded[column] = False  # A busy robot can get there; it may take the job later
+        if stranded.any():
+            # No robot can get to these pickups; re-queueing them would only retry every wave
+            for column in np.flatnonzero(stranded).tolist():
+                self._fail(batch[column], tick, "its pickup %d is unreachable from every robot",
+                           batch[column].pickup)
+            batch = [job for job, lost in zip(batch, stranded.tolist()) if not lost]
+            if not batch:
+                return {}
+            cost, reachable = cost[:, ~stranded], reachable[:, ~stranded]
+        if self.chargers:
+            needed = self.chargers.charge_needed(free, [(job.pickup, job.drop) for job in batch])
+            affordable = needed <= np.array([robot.battery for robot in free])[:, None]
+            # Robots too low for every job on offer would otherwise sit idle until they run low
+            recharge = ~affordable.any(axis=1) & (needed <= 1.0).any(axis=1)
+            self.chargers.charge_soon([free[row].id for row in np.flatnonzero(recharge)])
+            reachable &= affordable
+        # Unreachable pairs get a cost above any real assignment so they are only used as a last resort
+        penalty = (cost[reachable].max() + 1.0) * len(batch) if reachable.any() else 1.0
+        pairs = min_cost_assignment(np.where(reachable, cost, penalty))
+
+        matched: Dict[int, Job] = {}
+        for row, column in pairs:
+            if reachable[row, column]:
+                matched[free[row].id] = batch[column]
+        matched_ids = {job.id for job in matched.values()}
+        for job in batch:
+            if job.id not in matched_ids:
+                self._push(job)
+        return matched
+
+    def _travel_costs(self, free: List[Robot], pickups: List[int]) -> np.ndarray:
+        """robots x pickups travel cost matrix for the assignment, inf where a pickup cannot be reached.
+
+        Each robot gets one forward search that stops at its MATCH_CANDIDATES
+        cheapest pickups, which are costed exactly. Its other pairs are
+        estimated as the straight-line cost times the median detour of the
+        exact pairs, and no less than the robot's search radius. Pickups no
+        search reached are costed from a full (cached) reverse table.
+        """
+        vertices = [robot.current_vertex_id for robot in free]
+        distinct = list(dict.fromkeys(pickups))
+        column_of = {pickup: column for column, pickup in enumerate(distinct)}
+        straight = self.planner.cost_lower_bounds(vertices, distinct)
+        cost = np.full(straight.shape, np.nan)  # nan until costed
+        radius = np.zeros(len(vertices))
+        candidates = min(MATCH_CANDIDATES, len(distinct))
+        for row, vertex_id in enumerate(vertices):
+            nearest = self.planner.costs_from(vertex_id, distinct, candidates)
+            if len(nearest) < candidates:
+                cost[row] = np.inf  # The search ran out of graph: the other pickups are unreachable
+            else:
+                radius[row] = max(nearest.values())
+            cost[row, [column_of[pickup] for pickup in nearest]] = list(nearest.values())
+
+        found = np.isfinite(cost)
+        measured = found & (straight > 0)
+        detour = float(np.median(cost[measured] / straight[measured])) if measured.any() else 1.0
+        unknown = np.isnan(cost)
+        cost[unknown] = np.maximum(straight * detour, radius[:, None])[unknown]
+        for column in np.flatnonzero(~found.any(axis=0)).tolist():
+            cost[:, column] = self.costs.costs_to(distinct[column])[vertices]
+        return cost[:, [column_of[pickup] for pickup in pickups]]
+
+    def _drop_out_of_range(self, batch: List[Job], tick: int) -> List[Job]:
+        """Fail jobs that even a fully charged robot at the pickup could not finish"""
+        trip = self.chargers.trip_charge([(job.pickup, job.drop) for job in batch])
+        kept = []
+        for job, charge in zip(batch, trip.tolist()):
+            if charge <= 1.0:
+                kept.append(job)
+                continue
+            self._fail(job, tick, "it is beyond battery range")
+        return kept
+
+    def _fail(self, job: Job, tick: int, reason: str, *args):
+        """Fail a job taken off the queue before any robot was assigned to it"""
+        del self.jobs[job.id]
+        job.state, job.completed_tick = "failed", tick
+        self.failed += 1
+        self.logger.log("Job %d failed: " + reason, job.id, *args, level=LogLevel.WARNING)
+
+    def metrics(self) -> Dict[str, float]:
+        """Queue sizes, job outcomes and queue latency (submission to assignment) over the last LATENCY_WINDOW jobs"""
+        stats = {
+            "submitted": self.submitted,
+            "queued": len(self._queue),
+            "in_progress": len(self.active),
+            "completed": self.completed,
+            "failed": self.failed,
+            "late": self.late,
+            "waves": self.waves,
+            "mean_wave_ms": 1000.0 * self.wave_seconds / self.waves if self.waves else 0.0,
+        }
+        for name, samples, scale in (("latency_ticks", self.latency_ticks, 1.0),
+                                     ("latency_ms", self.latency_seconds, 1000.0)):
+            if samples.count:
+                summary = samples.summary(scale)
+                stats.update({f"{name}_{key}": summary[key] for key in ("mean", "p50", "p95", "max")})
+        return stats
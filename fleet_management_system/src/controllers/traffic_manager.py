@@ -1,113 +1,556 @@
 from typing import Dict, List, Optional, Set, Tuple
 from ..models.nav_graph import NavigationGraph, Lane
 from ..models.robot import Robot,RobotStatus
-from ..utils.logger import FleetLogger
-from queue import Queue
+from ..utils.logger import FleetLogger, LogLevel
+from ..utils.event_log import EventLogWriter, EventType
+from ..utils.metrics import Metrics
+from ..utils.checkpoint import sparse_dict
+from .reservation_table import ReservationTable
+from .mapf_planner import BatchPlanner
+from .deadlock_detector import DeadlockDetector, DeadlockRecord
+from .route_repair import RouteRepairer
+from collections import deque
 
 class TrafficManager:
-    def __init__(self, nav_graph: NavigationGraph):
+    # Ticks a waiting robot holds its current route after a failed space-time re-plan
+    REPLAN_BACKOFF_TICKS = 5
+    # Ticks a robot waits behind a parked robot before routing around it
+    PARKED_DETOUR_TICKS = 5
+    # Congestion each robot driving along a lane or queued to enter it adds (a multiple of free-flow travel time)
+    CONGESTION_WEIGHT = 0.5
+    # Furthest a robot backs off from a deadlock that keeps re-forming, looking for a vertex off the others' routes
+    RETREAT_HOPS = 6
+
+    def __init__(self, nav_graph: NavigationGraph, event_log: Optional[EventLogWriter] = None):
         self.nav_graph = nav_graph
-        self.lane_queues: Dict[Tuple[int, int], Queue[int]] = {}  # (v1, v2) -> queue of robot IDs
-        self.occupied_vertices: Set[int] = set()
         self.logger = FleetLogger()
+        self.event_log = event_log
+        self.reservations = ReservationTable(nav_graph)
+        self.batch_planner = BatchPlanner(self.reservations)
+        self.current_tick = 0
+        self.schedule_start: Dict[int, int] = {}  # robot id -> tick at which it stood on path[0]
+        self._replan_not_before: Dict[int, int] = {}
+        self.deadlocks = DeadlockDetector()
+        self.priorities: Dict[int, int] = {}  # robot id -> priority; lower gives way first in a deadlock
+        # In continuous motion robots hold both ends of the lane they travel and hops
+        # take varying numbers of ticks, so tick reservations are only a planning aid
+        self.continuous = False
+        self.route_repair = RouteRepairer(nav_graph)
+        self._travelling: Dict[int, Lane] = {}  # robot id -> lane it is driving along (continuous motion)
+        self._congestion: Dict[Tuple[int, int], float] = {}  # lane key -> congestion last set on the graph
+        # Set by the simulation engine; counts waits, deadlocks, lane grants and plans
+        self.metrics = Metrics()
+        self.initialize_occupancy_maps()
 
     def initialize_occupancy_maps(self):
         """Initialize occupancy tracking for all vertices and lanes"""
-        self.vertex_occupancy = {v.id: None for v in self.nav_graph.vertices}
-        self.lane_occupancy = {}
+        self.vertex_occupancy: Dict[int, Optional[int]] = {v.id: None for v in self.nav_graph.vertices}
+        self.lane_occupancy: Dict[Tuple[int, int], Optional[int]] = {}
+
+    def register_robot(self, robot: Robot, tick: int):
+        """Start tracking a newly spawned robot; it holds its vertex until given a task"""
+        self.vertex_occupancy[robot.current_vertex_id] = robot.id
+        self.reservations.park(robot.id, robot.current_vertex_id, tick)
+
+    def checkpoint_state(self) -> Dict:
+        """Copies of the robots' schedules, priorities and deadlock history.
+
+        Occupancy, reservations and congestion follow from the robots'
+        positions and routes, so restore_state() rebuilds them.
+        """
+        return {
+            "current_tick": self.current_tick,
+            "deadlocks": self.deadlocks.checkpoint_state(),
+            "schedule_start": sparse_dict(self.schedule_start),
+            "replan_not_before": sparse_dict(self._replan_not_before),
+            "priorities": sparse_dict(self.priorities),
+        }
+
+    def restore_state(self, state: Dict, robots: List[Robot], travelling: Dict[int, int]):
+        """Restore a checkpoint_state() for already restored robots.
+
+        Each robot takes its vertex back and reserves the rest of its route
+        on its original schedule (or parks). travelling maps robots driving
+        along a lane (continuous motion) to the vertex they are heading for.
+        """
+        self.current_tick = state["current_tick"]
+        for name, table in (("schedule_start", self.schedule_start), ("replan_not_before", self._replan_not_before),
+                            ("priorities", self.priorities)):
+            keys, values = state[name]
+            table.update(zip(keys.tolist(), values.tolist()))
+        self.deadlocks.restore_state(state["deadlocks"])
+
+        for robot in robots:
+            self.vertex_occupancy[robot.current_vertex_id] = robot.id
+            task, start = robot.task, self.schedule_start.get(robot.id)
+            if task and start is not None:
+                index = task.current_path_index
+                self.reservations.reserve_path(robot.id, task.path[index:], start + index)
+            else:
+                self.reservations.park(robot.id, robot.current_vertex_id, self.current_tick)
+        for robot_id, next_vertex in travelling.items():
+            robot = robots[robot_id]
+            self.vertex_occupancy[next_vertex] = robot_id
+            lane = self.nav_graph.get_lane_between(robot.current_vertex_id, next_vertex)
+            if lane is not None:
+                lane.occupied_by = robot_id
+                self._travelling[robot_id] = lane
+
+    def plan_routes(self, requests: List[Tuple[Robot, int]], tick: int) -> Dict[int, List[int]]:
+        """Plan and reserve conflict-free timed routes for (robot, destination) pairs.
+
+        Paths have one vertex per tick (waits repeat a vertex). When no
+        space-time route exists for a robot (e.g. parked robots block every
+        corridor) its plain shortest path is reserved instead, so robots
+        planned later still steer around it, and conflicts are left to the
+        runtime collision checks. Unreachable destinations map to [].
+        """
+        self.metrics.count("plans", len(requests))
+        with self.metrics.timer("planning"):
+            paths = self.batch_planner.plan(
+                [(robot.id, robot.current_vertex_id, destination_id) for robot, destination_id in requests], tick)
+        for robot, destination_id in requests:
+            self.schedule_start[robot.id] = tick
+            if robot.id in paths:
+                continue
+            path = self.nav_graph.find_shortest_path(robot.current_vertex_id, destination_id)
+            self._replan_not_before[robot.id] = tick + self.REPLAN_BACKOFF_TICKS
+            self.metrics.count("plan_fallbacks")
+            if path:
+                self.reservations.reserve_path(robot.id, path, tick)
+            else:
+                self.reservations.park(robot.id, robot.current_vertex_id, tick)
+            paths[robot.id] = path
+        return paths
+
+    def plan_route(self, robot: Robot, destination_id: int, tick: int) -> List[int]:
+        """Plan and reserve a conflict-free timed route for one robot"""
+        return self.plan_routes([(robot, destination_id)], tick)[robot.id]
+
+    def reserve_route(self, robot: Robot, path: List[int], tick: int):
+        """Reserve an externally planned path as-is, starting at `tick`"""
+        self.reservations.release_robot(robot.id)
+        self.reservations.reserve_path(robot.id, path, tick)
+        self.schedule_start[robot.id] = tick
+
+    def on_robot_moved(self, robot: Robot, from_vertex: int, tick: int):
+        """Incrementally update occupancy after a robot advanced during `tick`"""
+        lane = self._travelling.pop(robot.id, None)
+        if lane is not None and lane.occupied_by == robot.id:
+            lane.occupied_by = None
+        if from_vertex != robot.current_vertex_id:
+            if not self.continuous:  # Continuous robots were granted the lane when they departed
+                self.metrics.count("lane_grants")
+            if self.vertex_occupancy.get(from_vertex) == robot.id:
+                self.vertex_occupancy[from_vertex] = None
+            self.vertex_occupancy[robot.current_vertex_id] = robot.id
+        self.reservations.release_until(robot.id, tick + 1)
+
+    def close(self):
+        """Detach from the graph and clear the congestion and lane occupancy set on its shared lanes"""
+        self.route_repair.close()
+        for v1, v2 in self._congestion:
+            self.nav_graph.set_lane_congestion(v1, v2, 0.0)
+        self._congestion = {}
+        for robot_id, lane in self._travelling.items():
+            if lane.occupied_by == robot_id:
+                lane.occupied_by = None
+
+    def on_task_ended(self, robot_id: int):
+        """A robot's task was completed or replaced: its route repair search no longer applies"""
+        self.route_repair.forget(robot_id)
+
+    def on_robot_stranded(self, robot: Robot):
+        """A robot stopped for good: drop the rest of its route and hold the vertex it stands on"""
+        self.on_task_ended(robot.id)
+        self.reservations.release_robot(robot.id)
+        self.reservations.park(robot.id, robot.current_vertex_id, self.current_tick)
+
+    def on_robot_departed(self, robot: Robot, next_vertex: int):
+        """Claim the vertex a robot starts travelling to; it keeps its current vertex until arrival"""
+        self.metrics.count("lane_grants")
+        self.vertex_occupancy[next_vertex] = robot.id
+        lane = self.nav_graph.get_lane_between(robot.current_vertex_id, next_vertex)
+        if lane is not None:
+            lane.occupied_by = robot.id
+            self._travelling[robot.id] = lane
+
+    def on_robot_blocked(self, robot: Robot, next_vertex: int, tick: int):
+        """Put a robot that could not advance during `tick` into WAITING and record who it waits on"""
+        if self.event_log:
+            self.event_log.record(EventType.WAIT, robot.id, robot.current_vertex_id, next_vertex)
+        robot.set_waiting()
+        self.metrics.count("waits")
+        record = self.deadlocks.set_waiting_on(robot.id, self.find_blocker(robot.id, next_vertex), tick)
+        if record:
+            self.metrics.count("deadlocks")
+            self.logger.log("Deadlock detected between robots %s", list(record.robots), level=LogLevel.WARNING)
+
+    def set_priority(self, robot_id: int, priority: int):
+        self.priorities[robot_id] = priority
+
+    def is_on_schedule(self, robot: Robot) -> bool:
+        if self.continuous:
+            return True
+        start = self.schedule_start.get(robot.id)
+        return bool(robot.task) and start is not None and \
+            start + robot.task.current_path_index == self.current_tick
+
+    def _replan_delayed(self, robot: Robot):
+        """Re-plan the rest of a delayed robot's route from where it stands now"""
+        if self._replan_not_before.get(robot.id, 0) > self.current_tick:
+            return
+        path = self.plan_route(robot, robot.task.destination_id, self.current_tick)
+        if path:
+            robot.task.path = path
+            robot.task.current_path_index = 0
 
-    def initialize_lane_queues(self):
-        """Initialize queues for all lanes"""
-        for lane in self.nav_graph.lanes:
-            key = self._get_lane_key(lane.start, lane.end)
-            self.lane_queues[key] = Queue()
-    
     def _get_lane_key(self, v1: int, v2: int) -> Tuple[int, int]:
         """Get consistent key for a lane regardless of vertex order"""
         return (min(v1, v2), max(v1, v2))
     
-    def request_lane_access(self, robot: Robot, next_vertex_id: int) -> bool:
-        """Request access to a lane, returns True if granted"""
-        current_vertex = robot.current_vertex_id
-        lane_key = self._get_lane_key(current_vertex, next_vertex_id)
-        
-        if lane_key not in self.lane_queues:
-            self.lane_queues[lane_key] = Queue()
-        
-        # Check if lane is available
-        if self.lane_queues[lane_key].empty() and next_vertex_id not in self.occupied_vertices:
-            self.lane_queues[lane_key].put(robot.id)
-            self.occupied_vertices.add(next_vertex_id)
-            self.logger.log(f"Robot {robot.id} granted access to lane {current_vertex}-{next_vertex_id}")
-            return True
-        else:
-            robot.set_waiting()
-            self.lane_queues[lane_key].put(robot.id)
-            self.logger.log(f"Robot {robot.id} queued for lane {current_vertex}-{next_vertex_id}")
-            return False
-    
-    def release_lane(self, robot: Robot, next_vertex_id: int):
-        """Release lane after crossing"""
-        current_vertex = robot.current_vertex_id
-        lane_key = self._get_lane_key(current_vertex, next_vertex_id)
-        
-        if lane_key in self.lane_queues and not self.lane_queues[lane_key].empty():
-            # Check if this robot is at the front of the queue
-            if self.lane_queues[lane_key].queue[0] == robot.id:
-                self.lane_queues[lane_key].get()
-                self.occupied_vertices.discard(next_vertex_id)
-                self.logger.log(f"Robot {robot.id} released lane {current_vertex}-{next_vertex_id}")
-                
-                # Notify next robot in queue
-                if not self.lane_queues[lane_key].empty():
-                    next_robot_id = self.lane_queues[lane_key].queue[0]
-                    self.logger.log(f"Robot {next_robot_id} can now proceed on lane {current_vertex}-{next_vertex_id}")
-                    return next_robot_id
-        return None
-    
     def check_collision(self, robot_id: int, next_vertex: int) -> bool:
         """
         Check if moving to next_vertex would cause a collision
         Returns True if collision would occur, False otherwise
         """
         robot = self.fleet_manager.get_robot(robot_id)
+        if robot and self._lane_closed(robot, next_vertex):
+            return True
+        return self.find_blocker(robot_id, next_vertex) is not None
+
+    def _lane_closed(self, robot: Robot, next_vertex: int) -> bool:
+        """True if the lane to next_vertex was closed after the robot's route was planned"""
+        return next_vertex != robot.current_vertex_id and \
+            not self.nav_graph.is_traversable(robot.current_vertex_id, next_vertex)
+
+    def find_blocker(self, robot_id: int, next_vertex: int) -> Optional[int]:
+        """Id of the robot that keeps robot_id from moving to next_vertex, if any"""
+        robot = self.fleet_manager.get_robot(robot_id)
         if not robot:
-            return False
+            return None
             
         current_vertex = robot.current_vertex_id
         
         # Check if target vertex is occupied by another robot
-        if next_vertex in self.vertex_occupancy and self.vertex_occupancy[next_vertex] not in [None, robot_id]:
-            return True
-            
-        # Check if lane is occupied (bidirectional check)
-        lane1 = (current_vertex, next_vertex)
-        lane2 = (next_vertex, current_vertex)
-        
-        if (lane1 in self.lane_occupancy and self.lane_occupancy[lane1] not in [None, robot_id]) or \
-           (lane2 in self.lane_occupancy and self.lane_occupancy[lane2] not in [None, robot_id]):
-            return True
+        occupant = self.vertex_occupancy.get(next_vertex)
+        if occupant not in (None, robot_id):
+            return occupant
+
+        # A head-on swap along the lane shows up as another robot's lane reservation
+        if next_vertex != current_vertex and not self.continuous:
+            return self.reservations.lane_conflict(
+                current_vertex, next_vertex, self.current_tick, self.current_tick + 1, robot_id)
             
-        return False
+        return None
 
-    def manage_traffic(self,fleet_manager):
-        """Update occupancy maps and manage robot movements"""
+    def manage_traffic(self, fleet_manager, tick: Optional[int] = None):
+        """Resume or re-plan waiting robots; occupancy is maintained incrementally"""
         self.fleet_manager = fleet_manager  # Store reference to fleet manager
-        robots = fleet_manager.get_all_robots()
-        self.initialize_occupancy_maps()
-        
-        for robot in fleet_manager.get_all_robots():
-            self.vertex_occupancy[robot.current_vertex_id] = robot.id
+        if tick is not None:
+            self.current_tick = tick
+
+        waiting = fleet_manager.robots_with_status(RobotStatus.WAITING)
+        self.update_congestion(waiting)
+        self.repair_routes()
+
+        # Deadlocks detected while robots were blocked on the previous tick
+        unresolved = {id(record): record for record in self.deadlocks.active.values() if record.victim is None}
+        for record in unresolved.values():
+            self._resolve_deadlock(record)
             
-        # Process waiting robots first
-        for robot in [r for r in fleet_manager.get_all_robots() if r.status == RobotStatus.WAITING]:
+        for robot in fleet_manager.robots_with_status(RobotStatus.WAITING):
+            # A waiting robot has fallen behind its reserved timeline
+            if not self._get_past_parked(robot) and not self.is_on_schedule(robot):
+                self._replan_delayed(robot)
             next_vertex = robot.get_next_vertex()
-            if next_vertex and not self.check_collision(robot.id, next_vertex):
+            # Without a next vertex the robot is already at its destination
+            blocker = None if next_vertex is None else self.find_blocker(robot.id, next_vertex)
+            if next_vertex is not None and self._lane_closed(robot, next_vertex):
+                continue  # No way around the closure; wait for it to reopen
+            if blocker is None:
                 robot.resume_moving()
-                
-        # Then process moving robots
-        for robot in [r for r in fleet_manager.get_all_robots() if r.status == RobotStatus.MOVING]:
+                self.deadlocks.clear(robot.id, self.current_tick)
+                if self.event_log:
+                    self.event_log.record(EventType.RESUME, robot.id, robot.current_vertex_id, next_vertex)
+            else:
+                record = self.deadlocks.set_waiting_on(robot.id, blocker, self.current_tick)
+                if record:
+                    self.metrics.count("deadlocks")
+                    self.logger.log("Deadlock detected between robots %s", list(record.robots),
+                                    level=LogLevel.WARNING)
+
+    def update_congestion(self, waiting: List[Robot]):
+        """Set lane congestion on the graph from the robots driving along each lane or queued to enter it"""
+        load: Dict[Tuple[int, int], int] = {}
+        for lane in self._travelling.values():
+            key = self._get_lane_key(lane.start, lane.end)
+            load[key] = load.get(key, 0) + 1
+        for robot in waiting:
             next_vertex = robot.get_next_vertex()
-            if next_vertex:
-                lane = (robot.current_vertex_id, next_vertex)
-                self.lane_occupancy[lane] = robot.id
\ No newline at end of file
+            if next_vertex is not None and next_vertex != robot.current_vertex_id:
+                key = self._get_lane_key(robot.current_vertex_id, next_vertex)
+                load[key] = load.get(key, 0) + 1
+        congestion = {key: self.CONGESTION_WEIGHT * count for key, count in load.items()}
+        for key in self._congestion.keys() | congestion.keys():
+            if congestion.get(key, 0.0) != self._congestion.get(key, 0.0):
+                self.nav_graph.set_lane_congestion(key[0], key[1], congestion.get(key, 0.0))
+        self._congestion = congestion
+
+    def repair_routes(self) -> int:
+        """Re-route robots after lanes closed or reopened; returns how many got a new route.
+
+        Robots whose remaining route crosses a closed lane are re-routed, as
+        are robots with an earlier repair that may gain from a lane reopening.
+        Routes come from each robot's incremental search (RouteRepairer), so
+        only the changed lanes are re-examined. A robot with no way around a
+        closure keeps its route and waits at the closed lane until it reopens.
+        """
+        closed, opened = self.route_repair.take_toggled_lanes()
+        if not closed and not opened:
+            return 0
+        repaired = 0
+        for robot in self.fleet_manager.robots_with_status(RobotStatus.MOVING, RobotStatus.WAITING):
+            task = robot.task
+            if not task:
+                continue
+            # A robot driving along a lane finishes it whatever happens to the rest of its route
+            travelling = robot.id in self._travelling
+            remaining = task.path[task.current_path_index + travelling:]
+            if not remaining:
+                continue
+            search = self.route_repair.searches.get(robot.id)
+            may_gain = bool(opened) and search is not None and search.goal == task.destination_id
+            if not may_gain and not any(self._get_lane_key(v1, v2) in closed
+                                        for v1, v2 in zip(remaining, remaining[1:])):
+                continue
+            path = self.route_repair.route(robot.id, remaining[0], task.destination_id)
+            if not path:
+                self.metrics.count("repair_failures")
+                self.logger.log("Robot %d has no route to %d while lanes are closed; waiting",
+                                robot.id, task.destination_id, level=LogLevel.WARNING)
+                continue
+            if path == [v for i, v in enumerate(remaining) if i == 0 or v != remaining[i - 1]]:
+                continue  # Same route, less its planned waits
+            if travelling:
+                path = [robot.current_vertex_id] + path
+            task.path = path
+            task.current_path_index = 0
+            self.reserve_route(robot, path, self.current_tick)
+            self._replan_not_before[robot.id] = self.current_tick + self.REPLAN_BACKOFF_TICKS
+            repaired += 1
+        self.metrics.count("route_repairs", repaired)
+        self.logger.log("Re-routed %d robots after %d lanes closed and %d reopened", repaired, len(closed), len(opened))
+        return repaired
+
+    def _get_past_parked(self, robot: Robot) -> bool:
+        """Get a waiting robot past a robot that has no task left and will not clear the way.
+
+        The waiting robot routes around it if it can; otherwise the parked
+        robot (unless it is charging or stranded) is sent to the nearest free
+        vertex off the waiting robot's path.
+        Returns True if either happened.
+        """
+        blocker_id = self.deadlocks.waits_for.get(robot.id)
+        if blocker_id is None:
+            return False
+        blocker = self.fleet_manager.get_robot(blocker_id)
+        if blocker.status not in (RobotStatus.IDLE, RobotStatus.TASK_COMPLETE, RobotStatus.CHARGING,
+                                  RobotStatus.STRANDED):
+            return False
+        if self.current_tick - self.deadlocks.waiting_since[robot.id] < self.PARKED_DETOUR_TICKS:
+            return False
+        # Avoid every parked robot, otherwise the detour may just lead to the next one
+        store = self.fleet_manager.store
+        parked = set(store.vertex[store.ids_with_status(RobotStatus.IDLE.value, RobotStatus.TASK_COMPLETE.value,
+                                                        RobotStatus.CHARGING.value,
+                                                        RobotStatus.STRANDED.value)].tolist())
+        path = self._detour(robot, parked)
+        if path:
+            robot.task.path = path
+            robot.task.current_path_index = 0
+            self.reserve_route(robot, path, self.current_tick)
+            self.logger.log("Robot %d routed around parked robot %d", robot.id, blocker_id)
+            return True
+        if blocker.status == RobotStatus.CHARGING:
+            return False  # Charging robots stay plugged in until they are full
+        if blocker.status == RobotStatus.STRANDED:
+            return False  # Cannot move at all
+
+        if self.move_aside(blocker, set(robot.task.path[robot.task.current_path_index:])):
+            self.logger.log("Parked robot %d moves aside for robot %d", blocker_id, robot.id)
+            return True
+        return False
+
+    def move_aside(self, robot: Robot, keep_clear: Set[int]) -> bool:
+        """Send a parked robot to the nearest free vertex outside keep_clear; False if there is none.
+
+        Other parked robots in the way are pushed along ahead of it, like a
+        train, so a corridor or ring lined with parked robots can still be
+        cleared. Every robot that moves ends up outside keep_clear.
+        """
+        aside = self._path_aside(robot, keep_clear)
+        if len(aside) < 2:
+            return False
+        # Indices along the path of the robots that have to move, the given robot first
+        stops = [0] + [i for i, v in enumerate(aside) if i and self.vertex_occupancy.get(v) is not None]
+        targets = [len(aside) - 1]
+        for index in reversed(stops[:-1]):
+            target = targets[-1] - 1
+            while target >= index and aside[target] in keep_clear:
+                target -= 1
+            if target < index:
+                return False
+            targets.append(target)
+        for index, target in zip(stops, reversed(targets)):
+            if target > index:
+                mover = self.vertex_occupancy[aside[index]] if index else robot.id
+                self.fleet_manager.assign_navigation_task(mover, aside[target], aside[index:target + 1])
+        return True
+
+    def _path_aside(self, robot: Robot, keep_clear: Set[int]) -> List[int]:
+        """Shortest path to the nearest free vertex outside keep_clear, passing only free vertices
+        and vertices of parked robots that can be pushed ahead"""
+        start = robot.current_vertex_id
+        store = self.fleet_manager.store
+        pushable = set(store.vertex[store.ids_with_status(RobotStatus.IDLE.value,
+                                                          RobotStatus.TASK_COMPLETE.value)].tolist())
+        previous: Dict[int, Optional[int]] = {start: None}
+        frontier = deque([start])
+        while frontier:
+            current = frontier.popleft()
+            if current not in keep_clear and (current == start or self.vertex_occupancy.get(current) is None):
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            for neighbor in self.nav_graph.get_neighbor_ids(current):
+                if neighbor not in previous and self.nav_graph.is_traversable(current, neighbor) and \
+                        (self.vertex_occupancy.get(neighbor) is None or neighbor in pushable):
+                    previous[neighbor] = current
+                    frontier.append(neighbor)
+        return []
+
+    def _resolve_deadlock(self, record: DeadlockRecord):
+        """Let the lowest-priority robot on the cycle give way, by a detour or by backing off.
+
+        When the same deadlock re-forms, the next robot in line gives way
+        instead, and a robot backing off retreats further, so the same robot
+        is not sent back and forth forever. If no robot on the cycle can
+        move, one queued behind it backs off to make room.
+        """
+        # Lowest priority first; among equals the most recently spawned robot gives way
+        candidates = sorted(record.robots, key=lambda robot_id: (self.priorities.get(robot_id, 0), -robot_id))
+        first = record.attempts % len(candidates)
+        for robot_id in candidates[first:] + candidates[:first]:
+            robot = self.fleet_manager.get_robot(robot_id)
+            if not robot or not robot.task:
+                continue
+            others = {self.fleet_manager.get_robot(other).current_vertex_id
+                      for other in record.robots if other != robot_id}
+            resolution = "reroute"
+            path = self._detour(robot, others)
+            if not path:
+                resolution = "backoff"
+                path = self._back_off(robot, record)
+            if not path:
+                continue
+            robot.task.path = path
+            robot.task.current_path_index = 0
+            self.reserve_route(robot, path, self.current_tick)
+            self._replan_not_before[robot.id] = self.current_tick + self.REPLAN_BACKOFF_TICKS
+            record.victim = robot_id
+            record.resolution = resolution
+            record.attempts += 1
+            self.metrics.count(f"deadlocks_resolved_{resolution}")
+            self.logger.log("Deadlock between robots %s: robot %d gives way (%s, attempt %d)", list(record.robots),
+                            robot_id, resolution, record.attempts, level=LogLevel.WARNING)
+            return
+        # Nobody on the cycle can move; a robot queued behind it backs off to make room, and the cycle is
+        # resolved on a later tick
+        for waiter_id, blocker_id in list(self.deadlocks.waits_for.items()):
+            waiter = self.fleet_manager.get_robot(waiter_id)
+            if blocker_id not in record.robots or waiter_id in record.robots or not waiter or not waiter.task:
+                continue
+            path = self._back_off(waiter, record)
+            if path:
+                waiter.task.path = path
+                waiter.task.current_path_index = 0
+                self.reserve_route(waiter, path, self.current_tick)
+                self._replan_not_before[waiter_id] = self.current_tick + self.REPLAN_BACKOFF_TICKS
+                self.metrics.count("deadlock_make_room")
+                self.logger.log("Deadlock between robots %s: robot %d backs off to make room", list(record.robots),
+                                waiter_id, level=LogLevel.WARNING)
+                return
+
+    def _detour(self, robot: Robot, avoid: Set[int]) -> List[int]:
+        """Shortest route to the robot's destination that avoids the given vertices.
+
+        The first hop must also be free right now, otherwise the detour only
+        makes the robot wait on someone else and the jam re-forms.
+        """
+        current_vertex = robot.current_vertex_id
+        avoid = avoid | {v for v in self.nav_graph.get_neighbor_ids(current_vertex)
+                         if self.vertex_occupancy.get(v) not in (None, robot.id)}
+        if robot.task.destination_id in avoid:
+            return []
+        return self.nav_graph.get_planner().plan(current_vertex, robot.task.destination_id, avoid)
+
+    def _back_off(self, robot: Robot, record: DeadlockRecord) -> List[int]:
+        """Step aside to a free neighbouring vertex, then head for the destination from there.
+
+        A deadlock that re-formed after an earlier back-off sends the robot
+        up to RETREAT_HOPS vertices away, to a vertex off the other robots'
+        routes, where it waits until they have gone past.
+        """
+        current_vertex = robot.current_vertex_id
+        # Vertices the other robots on the cycle still have to pass through
+        in_the_way = set()
+        for other_id in record.robots:
+            other = self.fleet_manager.get_robot(other_id)
+            if other_id != robot.id and other.task:
+                in_the_way.update(other.task.path[other.task.current_path_index:])
+
+        free = [v for v in self.nav_graph.get_neighbor_ids(current_vertex)
+                if self.vertex_occupancy.get(v) is None and self.nav_graph.is_traversable(current_vertex, v)]
+        if record.attempts and all(v in in_the_way for v in free):
+            retreat = self._retreat(current_vertex, in_the_way)
+            onward = self.nav_graph.find_shortest_path(retreat[-1], robot.task.destination_id) if retreat else []
+            if onward:
+                # Wait at the refuge for as long as the retreat took, so the others have gone past on return
+                return retreat + [retreat[-1]] * (len(retreat) - 1) + onward[1:]
+        for refuge in sorted(free, key=lambda v: (v in in_the_way, v)):
+            onward = self.nav_graph.find_shortest_path(refuge, robot.task.destination_id)
+            if onward:
+                return [current_vertex] + onward
+        return []
+
+    def _retreat(self, start: int, in_the_way: Set[int]) -> List[int]:
+        """Shortest path over free vertices to the nearest one outside in_the_way, at most RETREAT_HOPS long"""
+        previous: Dict[int, Optional[int]] = {start: None}
+        frontier = deque([(start, 0)])
+        while frontier:
+            current, hops = frontier.popleft()
+            if current != start and current not in in_the_way:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = previous[current]
+                return path[::-1]
+            if hops == self.RETREAT_HOPS:
+                continue
+            for neighbor in self.nav_graph.get_neighbor_ids(current):
+                if neighbor not in previous and self.vertex_occupancy.get(neighbor) is None and \
+                        self.nav_graph.is_traversable(current, neighbor):
+                    previous[neighbor] = current
+                    frontier.append((neighbor, hops + 1))
+        return []
+
+    def deadlock_report(self) -> List[Dict]:
+        """Recent deadlocks with the robots involved and how many ticks each lasted"""
+        return self.deadlocks.report()
+
+    def deadlock_summary(self) -> Dict[str, float]:
+        """How many deadlocks were seen and resolved over the whole run, and how long they lasted"""
+        return self.deadlocks.summary()
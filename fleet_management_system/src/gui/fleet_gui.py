@@ -1,33 +1,56 @@
 import tkinter as tk
 from tkinter import messagebox
 import math
+import time
+import traceback
+from typing import Dict, Optional, Tuple
 from src.models.nav_graph import NavigationGraph
-from src.controllers.fleet_manager import FleetManager
-from src.controllers.traffic_manager import TrafficManager
-from src.models.robot import Robot, RobotStatus, Task
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.robot import Robot, RobotStatus, Task, robot_color
+from src.utils.spatial_index import SpatialGrid
+from src.utils.logger import FleetLogger, LogLevel
+
+# Pixels per graph unit at zoom level 1, and the on-screen radius of vertices and robots
+BASE_SCALE_FACTOR = 50
+VERTEX_RADIUS = 10
+# Clicks within this many pixels of a robot or vertex pick it
+CLICK_RADIUS = 10
 
 class FleetGUI(tk.Tk):
-    def __init__(self, nav_graph_file: str, level: str = "level1"):
+    def __init__(self, nav_graph_file: str, level: str = "level1", event_log_file: Optional[str] = None,
+                 motion: str = "continuous", append_event_log: bool = False):
         super().__init__()
         self.title("Fleet Management System")
         self.geometry("1200x800")
         
-        # Core system components
+        # Core system components - the engine advances the simulation, the GUI only renders the robots that changed
         self.nav_graph = NavigationGraph(nav_graph_file, level)
-        self.fleet_manager = FleetManager(self.nav_graph)
-        self.traffic_manager = TrafficManager(self.nav_graph)
+        self.engine = SimulationEngine(self.nav_graph, event_log_file=event_log_file, motion=motion,
+                                       append_event_log=append_event_log)
+        self.last_step_time: Optional[float] = None
+        self.logger = FleetLogger()
+        self.fleet_manager = self.engine.fleet_manager
+        self.traffic_manager = self.engine.traffic_manager
         self.spawn_mode = False 
-        self.traffic_manager.initialize_lane_queues()
-        self.traffic_manager.initialize_occupancy_maps()
 
         # Visualization parameters - adjusted for the new graph coordinates
-        self.scale_factor = 50
+        self.scale_factor = BASE_SCALE_FACTOR
         self.offset_x = 200
         self.offset_y = 300
         
         # UI state
         self.selected_robot = None
         self.highlighted_vertex = None
+
+        # Persistent canvas items: robot id -> (body, status label), and the fleet version they show
+        self.robot_items: Dict[int, Tuple[int, int]] = {}
+        self.fleet_version = 0  # Only robots changed after this version are redrawn (engine.changes_since)
+        self.path_robot_id: Optional[int] = None  # Robot whose planned path is on the canvas
+
+        # Robot positions (world coordinates) as of the last rendered tick, for picking
+        self.robot_index = SpatialGrid(cell_size=self.nav_graph.spatial_index.cell_size)
+        # Vertex id -> canvas position, valid until the next zoom
+        self.vertex_screen: Dict[int, Tuple[float, float]] = {}
         
         # Create UI
         self.create_widgets()
@@ -98,30 +121,17 @@ class FleetGUI(tk.Tk):
 
     def handle_click(self, event):
         """Handle mouse clicks on the canvas"""
-        x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+        x, y = self.screen_to_world(self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+        radius = CLICK_RADIUS / self.scale_factor
         
         # Check for clicks on robots first
-        for robot in self.fleet_manager.get_all_robots():
-            v = self.nav_graph.get_vertex_by_id(robot.current_vertex_id)
-            rx = v.x * self.scale_factor + self.offset_x
-            ry = -v.y * self.scale_factor + self.offset_y
-            if (x-rx)**2 + (y-ry)**2 <= 100:  # Within click radius
-                self.select_robot(robot.id)
-                return
+        robot_id = self.robot_index.nearest(x, y, radius)
+        if robot_id is not None:
+            self.select_robot(robot_id)
+            return
         
         # Then check for vertex clicks
-        closest_vertex = None
-        min_dist = float('inf')
-        
-        for vertex in self.nav_graph.vertices:
-            vx = vertex.x * self.scale_factor + self.offset_x
-            vy = -vertex.y * self.scale_factor + self.offset_y
-            dist = (x-vx)**2 + (y-vy)**2
-            
-            if dist < 100 and dist < min_dist:  # Within click radius and closest
-                min_dist = dist
-                closest_vertex = vertex.id
-        
+        closest_vertex = self.nav_graph.nearest_vertex(x, y, radius)
         if closest_vertex is not None:
             self.handle_vertex_click(closest_vertex)
             
@@ -130,7 +140,6 @@ class FleetGUI(tk.Tk):
         self.spawn_mode = False  # Exit spawn mode if active
         self.selected_robot = self.fleet_manager.get_robot(robot_id)
         self.status_var.set(f"Selected Robot {robot_id} - Click destination vertex (Esc to cancel)")
-        self.draw_environment()
 
     def handle_vertex_click(self, vertex_id):
         """Handle vertex click based on current state"""
@@ -156,20 +165,19 @@ class FleetGUI(tk.Tk):
                 messagebox.showwarning("Invalid Task", "Robot is already at this vertex")
                 return False
             
-            # Get path from navigation graph
-            path = self.nav_graph.find_shortest_path(start_id, destination_id)
-            if not path:
+            # Check reachability on the navigation graph
+            if not self.nav_graph.find_shortest_path(start_id, destination_id):
                 messagebox.showerror("No Path", f"No valid path from {start_id} to {destination_id}")
                 return False
             
-            # Assign task with path
-            if self.fleet_manager.assign_navigation_task(
+            # The engine plans a reserved, conflict-free timed route
+            if self.engine.assign_task(
                 robot_id=self.selected_robot.id,
-                destination_id=destination_id,
-                path=path
+                destination_id=destination_id
             ):
                 self.status_var.set(f"Robot {self.selected_robot.id} moving to {destination_id}")
-                self.visualize_path(path, self.selected_robot.color)
+                self.visualize_path(self.selected_robot.task.path, self.selected_robot.color)
+                self.path_robot_id = self.selected_robot.id
                 return True
             else:
                 messagebox.showerror("Assignment Failed", "Could not assign task")
@@ -180,27 +188,25 @@ class FleetGUI(tk.Tk):
             return False
         finally:
             self.selected_robot = None
-            self.draw_environment()
+            self.refresh_robots()
 
     def spawn_robot_at_vertex(self, vertex_id):
         """Spawn new robot at vertex"""
-        robot = self.fleet_manager.spawn_robot(vertex_id)
+        robot = self.engine.spawn_robot(vertex_id)
         vertex_name = self.nav_graph.get_vertex_by_id(vertex_id).name or f"Vertex {vertex_id}"
         self.status_var.set(f"Spawned Robot {robot.id} at {vertex_name}")
-        self.draw_environment()
+        self.refresh_robots()
 
     def visualize_path(self, path, color):
         """Draw the planned path on canvas"""
         print(f"[VISUALIZING PATH] {path} in {color}")
-        self.canvas.delete("path")
+        self.canvas.delete("path", "arrow")
     
         for i in range(len(path)-1):
-            v1 = self.nav_graph.get_vertex_by_id(path[i])
-            v2 = self.nav_graph.get_vertex_by_id(path[i+1])
-            x1 = v1.x * self.scale_factor + self.offset_x
-            y1 = -v1.y * self.scale_factor + self.offset_y
-            x2 = v2.x * self.scale_factor + self.offset_x
-            y2 = -v2.y * self.scale_factor + self.offset_y
+            if path[i] == path[i+1]:
+                continue  # Wait step
+            x1, y1 = self.vertex_to_screen(path[i])
+            x2, y2 = self.vertex_to_screen(path[i+1])
             
             # Thick path line
             self.canvas.create_line(
@@ -212,6 +218,8 @@ class FleetGUI(tk.Tk):
             
             # Arrowhead at end
             self.draw_arrow(x1, y1, x2, y2, color)
+        # Keep robots on top of the path overlay
+        self.canvas.tag_raise("robot")
 
           
     def process_vertex_click(self, vertex_id):
@@ -226,7 +234,7 @@ class FleetGUI(tk.Tk):
                 )
                 return
                 
-            if self.fleet_manager.assign_navigation_task(
+            if self.engine.assign_task(
                 self.selected_robot.id, vertex_id, path
             ):
                 self.status_var.set(
@@ -241,23 +249,30 @@ class FleetGUI(tk.Tk):
                 )
         else:
             # Spawn new robot
-            robot = self.fleet_manager.spawn_robot(vertex_id)
+            robot = self.engine.spawn_robot(vertex_id)
             self.status_var.set(
                 f"Spawned Robot {robot.id} at {self.nav_graph.get_vertex_by_id(vertex_id).name or vertex_id}"
             )
-        self.draw_environment()
+        self.refresh_robots()
 
     def clear_selection(self):
         """Reset all selections and modes"""
         self.selected_robot = None
         self.spawn_mode = False
         self.status_var.set("Selection cleared. Ready for commands")
-        self.draw_environment() 
 
     def zoom(self, factor):
+        """Scale every canvas item in place about the canvas origin"""
         self.scale_factor *= factor
-        self.draw_environment()
+        self.offset_x *= factor
+        self.offset_y *= factor
+        self.vertex_screen.clear()
+        self.canvas.scale("all", 0, 0, factor, factor)
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+
+    @property
+    def zoom_level(self) -> float:
+        return self.scale_factor / BASE_SCALE_FACTOR
     
     def on_mousewheel(self, event):
         # Zoom with mouse wheel
@@ -266,82 +281,103 @@ class FleetGUI(tk.Tk):
         elif event.num == 4 or event.delta > 0:
             self.zoom(1.1)
     
+    def world_to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        """Canvas coordinates of a point in graph (world) coordinates"""
+        return x * self.scale_factor + self.offset_x, -y * self.scale_factor + self.offset_y
+
+    def screen_to_world(self, x: float, y: float) -> Tuple[float, float]:
+        """Graph (world) coordinates of a canvas point"""
+        return (x - self.offset_x) / self.scale_factor, -(y - self.offset_y) / self.scale_factor
+
+    def vertex_to_screen(self, vertex_id: int) -> Tuple[float, float]:
+        """Canvas position of a vertex, cached until the next zoom"""
+        position = self.vertex_screen.get(vertex_id)
+        if position is None:
+            vertex = self.nav_graph.get_vertex_by_id(vertex_id)
+            position = self.vertex_screen[vertex_id] = self.world_to_screen(vertex.x, vertex.y)
+        return position
+
     def draw_environment(self):
-        """Redraw the entire environment with error handling"""
+        """Redraw the entire environment: static layers, then robots"""
         try:
-            # Clear canvas safely
             self.canvas.delete("all")
-            
-            # Draw lanes
-            for lane in self.nav_graph.lanes:
-                try:
-                    start = self.nav_graph.get_vertex_by_id(lane.start)
-                    end = self.nav_graph.get_vertex_by_id(lane.end)
-                    
-                    x1 = start.x * self.scale_factor + self.offset_x
-                    y1 = -start.y * self.scale_factor + self.offset_y
-                    x2 = end.x * self.scale_factor + self.offset_x
-                    y2 = -end.y * self.scale_factor + self.offset_y
-                    
-                    self.canvas.create_line(x1, y1, x2, y2, 
-                                        fill="gray", width=2, tags="lane")
-                except Exception as e:
-                    print(f"Error drawing lane {lane.start}-{lane.end}: {e}")
-            
-            # Draw vertices
-            for vertex in self.nav_graph.vertices:
-                try:
-                    x = vertex.x * self.scale_factor + self.offset_x
-                    y = -vertex.y * self.scale_factor + self.offset_y
-                    
-                    color = "green" if vertex.is_charger else "white"
-                    self.canvas.create_oval(
-                        x-10, y-10, x+10, y+10,
-                        fill=color, outline="black", width=2,
-                        tags=f"vertex_{vertex.id}"
-                    )
-                    
-                    if vertex.name:
-                        self.canvas.create_text(
-                            x, y-20,
-                            text=vertex.name,
-                            font=("Arial", 8),
-                            tags=f"label_{vertex.id}"
-                        )    
-                except Exception as e:
-                    print(f"Error drawing vertex {vertex.id}: {e}")
+            self.robot_items.clear()
+            self.fleet_version = 0
+            self.draw_static_layers()
+            self.update_robots()
+        except Exception as e:
+            print(f"Fatal error in draw_environment: {e}")
+            self.status_var.set(f"Drawing error: {str(e)}")
 
-            for robot in self.fleet_manager.get_all_robots():
-                vertex = self.nav_graph.get_vertex_by_id(robot.current_vertex_id)
-                x = vertex.x * self.scale_factor + self.offset_x
-                y = -vertex.y * self.scale_factor + self.offset_y
-                
-                # Draw robot with status-based appearance
-                outline = "red" if robot.status == RobotStatus.WAITING else "black"
-                width = 3 if robot.status == RobotStatus.WAITING else 2
-                
+    def draw_static_layers(self):
+        """Draw lanes, vertices and labels; they are only redrawn by draw_environment"""
+        radius = VERTEX_RADIUS * self.zoom_level
+        for v1, v2 in self.nav_graph.get_edges():
+            try:
+                x1, y1 = self.vertex_to_screen(v1)
+                x2, y2 = self.vertex_to_screen(v2)
+                self.canvas.create_line(x1, y1, x2, y2,
+                                        fill="gray", width=2, tags=("static", "lane"))
+            except Exception as e:
+                print(f"Error drawing lane {v1}-{v2}: {e}")
+
+        for vertex in self.nav_graph.vertices:
+            try:
+                x, y = self.vertex_to_screen(vertex.id)
+                color = "green" if vertex.is_charger else "white"
                 self.canvas.create_oval(
-                    x-10, y-10, x+10, y+10,
-                    fill=robot.color,
-                    outline=outline,
-                    width=width,
-                    tags=f"robot_{robot.id}"
+                    x-radius, y-radius, x+radius, y+radius,
+                    fill=color, outline="black", width=2,
+                    tags=("static", "vertex", f"vertex_{vertex.id}")
                 )
-                
-                # Add status text below robot
-                status_text = f"R{robot.id}: {robot.get_status_description()}"
-                self.canvas.create_text(
-                    x, y+25,
-                    text=status_text,
-                    font=("Arial", 7),
-                    fill="black",
-                    tags=f"robot_status_{robot.id}"
+
+                if vertex.name:
+                    self.canvas.create_text(
+                        x, y-2*radius,
+                        text=vertex.name,
+                        font=("Arial", 8),
+                        tags=("static", "label", f"label_{vertex.id}")
+                    )
+            except Exception as e:
+                print(f"Error drawing vertex {vertex.id}: {e}")
+
+    def update_robots(self):
+        """Move or restyle only the robot items whose state changed since the last call"""
+        radius = VERTEX_RADIUS * self.zoom_level
+        delta = self.engine.changes_since(self.fleet_version)
+        self.fleet_version = delta.version
+        for robot in delta.rows():
+            self.robot_index.insert(robot.id, robot.x, robot.y)
+            x, y = self.world_to_screen(robot.x, robot.y)
+            # Draw robot with status-based appearance
+            outline = "red" if robot.status == RobotStatus.WAITING else "black"
+            width = 3 if robot.status == RobotStatus.WAITING else 2
+            status_text = f"R{robot.id}: {robot.status_text}"
+
+            items = self.robot_items.get(robot.id)
+            if items is None:
+                body = self.canvas.create_oval(
+                    x-radius, y-radius, x+radius, y+radius,
+                    fill=robot_color(robot.id), outline=outline, width=width,
+                    tags=("robot", f"robot_{robot.id}")
                 )
-            
-        except Exception as e:
-            print(f"Fatal error in draw_environment: {e}")
-            self.status_var.set(f"Drawing error: {str(e)}")
-        
+                # Status text below robot
+                label = self.canvas.create_text(
+                    x, y+2.5*radius, text=status_text, font=("Arial", 7), fill="black",
+                    tags=("robot", f"robot_status_{robot.id}")
+                )
+                self.robot_items[robot.id] = (body, label)
+            else:
+                body, label = items
+                self.canvas.coords(body, x-radius, y-radius, x+radius, y+radius)
+                self.canvas.itemconfig(body, outline=outline, width=width)
+                self.canvas.coords(label, x, y+2.5*radius)
+                self.canvas.itemconfig(label, text=status_text)
+
+            if robot.id == self.path_robot_id and robot.status == RobotStatus.TASK_COMPLETE:
+                self.canvas.delete("path", "arrow")
+                self.path_robot_id = None
+
     def draw_arrow(self, x1: float, y1: float, x2: float, y2: float, color: str):
             """Draw an arrowhead at the end of a lane"""
             arrow_size = 10
@@ -374,21 +410,16 @@ class FleetGUI(tk.Tk):
     
     def show_occupancy_warning(self, robot_id: int, blocked_vertex: int):
         """Show visual warning about occupancy conflict"""
-        robot = self.fleet_manager.get_robot(robot_id)
-        if not robot:
-            return
-            
-        vertex = self.nav_graph.get_vertex_by_id(blocked_vertex)
-        if not vertex:
+        if not 0 <= blocked_vertex < len(self.nav_graph.vertices):
             return
 
         # Visual indicator on the vertex
-        x = vertex.x * self.scale_factor + self.offset_x
-        y = -vertex.y * self.scale_factor + self.offset_y
+        x, y = self.vertex_to_screen(blocked_vertex)
+        radius = 1.5 * VERTEX_RADIUS * self.zoom_level
         
         # Draw warning circle
         self.canvas.create_oval(
-            x-15, y-15, x+15, y+15,
+            x-radius, y-radius, x+radius, y+radius,
             outline="red", width=3, dash=(5,2),
             tags="occupancy_warning"
         )
@@ -407,29 +438,32 @@ class FleetGUI(tk.Tk):
         # Flash the warning for 2 seconds
         self.after(2000, lambda: self.canvas.delete("occupancy_warning"))
 
+    def refresh_robots(self):
+        """Show robot changes made between ticks (spawns, new tasks) right away"""
+        self.update_robots()
+
     def update_simulation(self):
         try:
-            # Update traffic manager first
-            self.traffic_manager.manage_traffic(self.fleet_manager)
-            
-            # Process each robot
-            for robot in self.fleet_manager.get_all_robots():
-                if robot.status == RobotStatus.MOVING:
-                    next_vertex = robot.get_next_vertex()
-                    if next_vertex is None:
-                        continue  # Robot has reached destination
-                        
-                    if self.traffic_manager.check_collision(robot.id, next_vertex):
-                        robot.set_waiting()
-                        self.show_occupancy_warning(robot.id, next_vertex)
-                    else:
-                        # Only update position if no collision
-                        self.fleet_manager.update_robot_position(robot.id)
-            
-            # Redraw environment
-            self.draw_environment()
-            self.after(200, self.update_simulation)
+            # Advance by the wall-clock time since the last tick, so motion keeps
+            # real speed when Tk is late; long stalls are capped to a few ticks
+            now = time.perf_counter()
+            dt = self.engine.tick_interval if self.last_step_time is None else \
+                min(now - self.last_step_time, 4 * self.engine.tick_interval)
+            self.last_step_time = now
+            self.engine.step(dt, end_tick=False)
+
+            # Rendering counts towards the tick it shows
+            with self.engine.metrics.timer("render"):
+                for robot_id, blocked_vertex in self.engine.conflicts:
+                    self.show_occupancy_warning(robot_id, blocked_vertex)
+
+                # Only robots change from tick to tick
+                self.update_robots()
+            self.engine.metrics.end_tick()
+            self.after(int(self.engine.tick_interval * 1000), self.update_simulation)
             
         except Exception as e:
-            print(f"Simulation error: {e}")
-            self.status_var.set(f"Simulation error: {str(e)}")
\ No newline at end of file
+            self.engine.metrics.count("tick_errors")
+            self.logger.log("Simulation stopped at tick %d: %s\n%s", self.engine.tick, e, traceback.format_exc(),
+                            level=LogLevel.ERROR)
+            self.status_var.set(f"Simulation error: {str(e)}")
@@ -1,24 +1,173 @@
 import sys
 import os
+import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-import sys
-from src.gui.fleet_gui import FleetGUI
 import argparse
 
+def run_headless(args):
+    """Run a scenario without Tkinter and print a short summary"""
+    from src.models.nav_graph import NavigationGraph
+    from src.controllers.simulation_engine import SimulationEngine, load_scenario_file
+    from src.models.robot import RobotStatus
+    from src.utils.checkpoint import read_checkpoint
+    from src.utils.logger import FleetLogger, LogLevel, shutdown_loggers
+
+    FleetLogger.default_level = LogLevel[args.log_level or 'INFO']
+    scenario = load_scenario_file(args.scenario) if args.scenario else {}
+    checkpoint = read_checkpoint(args.restore) if args.restore else None
+    nav_graph = NavigationGraph(scenario.get('graph', args.graph), scenario.get('level', args.level))
+    engine = SimulationEngine(nav_graph, event_log_file=args.event_log, append_event_log=args.append_event_log,
+                              motion=args.motion or (checkpoint or scenario).get('motion', 'discrete'))
+    if checkpoint:
+        engine.restore_state(checkpoint)
+        print(f"Restored {len(engine.fleet_manager.robots)} robots at tick {engine.tick} from {args.restore}")
+    if args.battery_range and not engine.chargers:
+        engine.enable_batteries(args.battery_range)
+    if args.metrics or args.metrics_port is not None:
+        engine.enable_metrics(args.metrics_port)
+        if engine.metrics_server:
+            print(f"Serving metrics at {engine.metrics_server.url}")
+    if args.gateway_port is not None:
+        host, port = engine.enable_gateway(args.gateway_port).address
+        print(f"Fleet gateway listening on {host}:{port} (Ctrl+C to stop)")
+    if args.checkpoint:
+        engine.enable_checkpoints(args.checkpoint, args.checkpoint_every)
+    if not checkpoint:
+        engine.load_scenario(scenario)
+
+    ticks = args.ticks
+    if ticks is None and scenario.get('ticks') is not None:
+        ticks = max(scenario['ticks'] - engine.tick, 0)  # A scenario's tick count covers the run being resumed
+    started = time.perf_counter()
+    if engine.gateway:
+        # Clients may spawn robots and assign work at any time, so keep ticking in real time until interrupted
+        try:
+            engine.run(ticks=ticks, rate_hz=args.rate or 1.0 / engine.tick_interval)
+        except KeyboardInterrupt:
+            pass
+        executed = engine.tick
+    elif ticks is None:
+        executed = engine.run(ticks=args.max_ticks, rate_hz=args.rate, until_idle=True)
+    else:
+        executed = engine.run(ticks=ticks, rate_hz=args.rate)
+    elapsed = time.perf_counter() - started
+    engine.close()
+    shutdown_loggers()
+
+    robots = engine.fleet_manager.get_all_robots()
+    completed = sum(1 for r in robots if r.status == RobotStatus.TASK_COMPLETE)
+    rate = executed / elapsed if elapsed > 0 else float('inf')
+    print(f"Ran {executed} ticks in {elapsed:.3f}s ({rate:.0f} ticks/s); "
+          f"{completed}/{len(robots)} robots completed their task")
+    deadlocks = engine.traffic_manager.deadlock_summary()
+    if deadlocks['resolved']:
+        print(f"Resolved {deadlocks['resolved']} deadlocks, lasting {deadlocks['mean_duration']:.1f} ticks on average "
+              f"(longest {deadlocks['longest']})")
+    if engine.chargers:
+        charging = engine.chargers.metrics()
+        print(f"Chargers: {charging['sessions']} sessions on {charging['chargers']} chargers, "
+              f"{charging['utilization']:.0%} busy, {charging['mean_queue_length']:.1f} robots queued on average, "
+              f"wait p95 {charging['wait_ticks_p95']:.0f} ticks; {charging['ran_flat']} robots ran flat")
+    jobs = engine.dispatcher.metrics()
+    if jobs['submitted']:
+        print(f"Jobs: {jobs['completed']}/{jobs['submitted']} done ({jobs['late']} late, {jobs['failed']} failed, "
+              f"{jobs['queued']} queued); queue latency p50 {jobs.get('latency_ticks_p50', 0):.0f} / "
+              f"p95 {jobs.get('latency_ticks_p95', 0):.0f} ticks")
+    if engine.metrics.enabled:
+        print_metrics(engine.metrics.snapshot())
+
+def print_metrics(snapshot):
+    """Per-tick phase timings and event counters of a headless run"""
+    print(f"{'phase':<16}{'ticks':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  ms per tick it ran in")
+    for phase, timing in sorted(snapshot['phases_ms'].items(), key=lambda item: -item[1].get('mean', 0)):
+        print(f"{phase:<16}{timing['count']:>7}" + "".join(f"{timing.get(key, 0):>9.3f}" for key in ('mean', 'p50', 'p95', 'p99', 'max')))
+    if snapshot['counters']:
+        print("Events: " + ", ".join(f"{name} {value}" for name, value in sorted(snapshot['counters'].items())))
+
+def print_route(args):
+    """Plan a route between two level:vertex stops of a multi-level graph and print its legs"""
+    from src.models.building import Building
+
+    building = Building(args.graph)
+    stops = []
+    for stop in args.route:
+        level, _, vertex_id = stop.rpartition(':')
+        stops.append((level or args.level, int(vertex_id)))
+    (start_level, start_id), (end_level, end_id) = stops
+    legs = building.find_route(start_level, start_id, end_level, end_id)
+    if not legs:
+        print(f"No route from {args.route[0]} to {args.route[1]}")
+    for leg in legs:
+        via = f" (lift {leg.lift})" if leg.lift else ""
+        print(f"{leg.level}{via}: {' -> '.join(map(str, leg.path))}")
+    print(f"Levels built: {', '.join(building.loaded_levels)} of {len(building.level_names)}")
+    building.close()
+
 def main():
     parser = argparse.ArgumentParser(description='Fleet Management System')
     parser.add_argument('--graph', default='data/nav_graph.json', help='Path to navigation graph JSON file')
     parser.add_argument('--level', default='level1', help='Level to load from the navigation graph')
+    parser.add_argument('--headless', action='store_true', help='Run the simulation without the GUI')
+    parser.add_argument('--scenario', help='Scenario JSON file for headless mode')
+    parser.add_argument('--ticks', type=int, help='Ticks to simulate in headless mode (default: until idle, at most --max-ticks)')
+    parser.add_argument('--max-ticks', type=int, default=100000, help='Upper bound on headless ticks when running until idle')
+    parser.add_argument('--rate', type=float, help='Headless tick rate in Hz (default: as fast as possible)')
+    parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                        help='Minimum log level (default: DEBUG with the GUI, INFO headless)')
+    parser.add_argument('--motion', choices=['discrete', 'continuous'],
+                        help='Robot motion model (default: continuous with the GUI, discrete headless '
+                             'unless the scenario sets "motion")')
+    parser.add_argument('--battery-range', type=float,
+                        help='Simulate batteries: world units a full charge covers (headless; scenarios may set "battery")')
+    parser.add_argument('--checkpoint',
+                        help='Periodically checkpoint the fleet state to this file, in the background')
+    parser.add_argument('--checkpoint-every', type=int, default=100, help='Ticks between checkpoints (default: 100)')
+    parser.add_argument('--restore',
+                        help='Resume from a checkpoint file instead of spawning the scenario\'s robots')
+    parser.add_argument('--route', nargs=2, metavar=('FROM', 'TO'),
+                        help='Print the route between two level:vertex stops (e.g. level1:13 level2:7) and exit')
+    parser.add_argument('--event-log', help='Record a binary event log for replay (python -m src.utils.replay)')
+    parser.add_argument('--append-event-log', action='store_true',
+                        help='Add this run to an existing --event-log file instead of refusing to overwrite it')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Time tick phases and count traffic events (headless runs print a summary)')
+    parser.add_argument('--metrics-port', type=int,
+                        help='Serve metrics on localhost at /metrics (Prometheus) and /metrics.json; implies --metrics')
+    parser.add_argument('--gateway-port', type=int,
+                        help='Accept JSON-lines robot and WMS clients on this localhost TCP port (0 picks a free one)')
     args = parser.parse_args()
     
     try:
-        app = FleetGUI(args.graph, args.level)
+        if args.route:
+            print_route(args)
+            return
+        if args.headless:
+            run_headless(args)
+            return
+        # Imported lazily so headless runs work on machines without Tk
+        from src.gui.fleet_gui import FleetGUI
+        from src.utils.checkpoint import read_checkpoint
+        from src.utils.logger import FleetLogger, LogLevel
+        if args.log_level:
+            FleetLogger.default_level = LogLevel[args.log_level]
+        checkpoint = read_checkpoint(args.restore) if args.restore else None
+        app = FleetGUI(args.graph, args.level, event_log_file=args.event_log, append_event_log=args.append_event_log,
+                       motion=args.motion or (checkpoint['motion'] if checkpoint else 'continuous'))
+        if checkpoint:
+            app.engine.restore_state(checkpoint)
+        if args.checkpoint:
+            app.engine.enable_checkpoints(args.checkpoint, args.checkpoint_every)
+        if args.metrics or args.metrics_port is not None:
+            app.engine.enable_metrics(args.metrics_port)
+        if args.gateway_port is not None:
+            app.engine.enable_gateway(args.gateway_port)
         app.mainloop()
+        app.engine.close()
     except Exception as e:
         print(f"Error starting application: {e}")
         sys.exit(1)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
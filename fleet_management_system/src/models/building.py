@@ -0,0 +1,169 @@
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from ..utils.cost_tables import CostTableCache
+from ..utils.compiled_graph import CompiledGraph
+from ..utils.graph_file import NavGraphFile
+from ..utils.helpers import gc_paused
+from .nav_graph import NavigationGraph
+
+# Lift ride time per floor travelled when a lift does not set "seconds_per_level"
+LIFT_SECONDS_PER_LEVEL = 5.0
+
+Stop = Tuple[str, int]  # (level name, vertex id on that level)
+
+
+@dataclass
+class Lift:
+    name: str
+    stops: Dict[str, int]  # level name -> vertex id of the lift door on that level
+    seconds_per_level: float = LIFT_SECONDS_PER_LEVEL
+
+
+@dataclass
+class RouteLeg:
+    """Part of a cross-level route driven on one level"""
+    level: str
+    path: List[int]
+    lift: Optional[str] = None  # Lift ridden to reach this level, None for the first leg
+
+
+class Building:
+    """All levels of a navigation graph file, built lazily and linked by lifts.
+
+    Only the file's top-level layout is read on construction; a level's
+    NavigationGraph is built the first time level() asks for it and can be
+    dropped again with unload_level(). Lifts are declared at the top level
+    of the file:
+
+        "lifts": {"lift_a": {"stops": {"level1": 4, "level2": 0}, "seconds_per_level": 5}}
+
+    find_route() plans across levels by travel time, riding lifts where
+    needed, and only builds the levels the search reaches.
+    """
+
+    def __init__(self, json_file: str, route_cache_size: int = 4096):
+        self.graph_file = NavGraphFile(json_file)
+        self.compiled = CompiledGraph.open_fresh(json_file)  # Levels are read from the binary cache when fresh
+        self.name: str = self.graph_file.read('building_name', '')
+        self.level_names: List[str] = list(self.graph_file.levels)
+        self.route_cache_size = route_cache_size
+        self.lifts: Dict[str, Lift] = {}
+        self._lifts_at: Dict[Stop, List[Lift]] = {}
+        for name, spec in self.graph_file.read('lifts', {}).items():
+            lift = Lift(name, dict(spec['stops']), spec.get('seconds_per_level', LIFT_SECONDS_PER_LEVEL))
+            for level in lift.stops:
+                if level not in self.graph_file.levels:
+                    raise ValueError(f"Lift '{name}' stops at unknown level '{level}'")
+            self.lifts[name] = lift
+            for stop in lift.stops.items():
+                self._lifts_at.setdefault(stop, []).append(lift)
+        self._graphs: Dict[str, NavigationGraph] = {}
+        self._travel_times: Dict[str, CostTableCache] = {}
+
+    def close(self):
+        self.graph_file.close()
+        if self.compiled is not None:
+            self.compiled.close()
+
+    def level(self, name: str) -> NavigationGraph:
+        """The NavigationGraph of one level, built on first use"""
+        graph = self._graphs.get(name)
+        if graph is None:
+            with gc_paused():
+                if self.compiled is not None and name in self.compiled.levels:
+                    graph = NavigationGraph(None, name, self.route_cache_size)
+                    graph.load_compiled(self.compiled.level(name))
+                else:
+                    graph = NavigationGraph.from_level_data(self.graph_file.read_level(name), name,
+                                                            self.route_cache_size)
+            for lift in self.lifts.values():
+                vertex_id = lift.stops.get(name)
+                if vertex_id is not None and vertex_id not in graph.adjacency:
+                    raise ValueError(f"Lift '{lift.name}' stops at unknown vertex {vertex_id} on level '{name}'")
+            self._graphs[name] = graph
+            self._travel_times[name] = CostTableCache(graph.get_planner("time", "dijkstra"))
+        return graph
+
+    @property
+    def loaded_levels(self) -> List[str]:
+        return [name for name in self.level_names if name in self._graphs]
+
+    def unload_level(self, name: str):
+        """Drop a built level; it is rebuilt from the file if used again"""
+        self._graphs.pop(name, None)
+        self._travel_times.pop(name, None)
+
+    def lift_stops(self, level: str) -> List[Tuple[str, int]]:
+        """(lift name, vertex id) of every lift door on a level"""
+        return [(lift.name, lift.stops[level]) for lift in self.lifts.values() if level in lift.stops]
+
+    def _ride_time(self, lift: Lift, from_level: str, to_level: str) -> float:
+        floors = abs(self.level_names.index(from_level) - self.level_names.index(to_level))
+        return lift.seconds_per_level * floors
+
+    def find_route(self, start_level: str, start_id: int, end_level: str, end_id: int) -> List[RouteLeg]:
+        """Fastest route between vertices on any two levels as one leg per level driven, [] if none.
+
+        Dijkstra over lift doors only: driving between two vertices of a
+        level costs its travel time (read from cached reverse-Dijkstra
+        tables), riding a lift costs seconds_per_level per floor.
+        """
+        start, goal = (start_level, start_id), (end_level, end_id)
+        for level, vertex_id in (start, goal):
+            if vertex_id not in self.level(level).adjacency:
+                raise ValueError(f"Unknown vertex {vertex_id} on level '{level}'")
+        costs: Dict[Stop, float] = {start: 0.0}
+        previous: Dict[Stop, Optional[Stop]] = {start: None}
+        ridden: Dict[Stop, Optional[str]] = {start: None}  # Lift taken to arrive at a stop
+        closed = set()
+        heap = [(0.0, start)]
+
+        while heap:
+            cost_so_far, stop = heapq.heappop(heap)
+            if stop in closed:
+                continue
+            closed.add(stop)
+            if stop == goal:
+                break
+            level, vertex_id = stop
+            self.level(level)
+            moves = []
+            targets = [door for _, door in self.lift_stops(level)]
+            if level == end_level:
+                targets.append(end_id)
+            for target in targets:
+                drive = float(self._travel_times[level].costs_to(target)[vertex_id])
+                if target != vertex_id and math.isfinite(drive):
+                    moves.append(((level, target), drive, None))
+            for lift in self._lifts_at.get(stop, ()):
+                for other_level, door in lift.stops.items():
+                    if other_level != level:
+                        moves.append(((other_level, door), self._ride_time(lift, level, other_level), lift.name))
+            for next_stop, cost, lift_name in moves:
+                new_cost = cost_so_far + cost
+                if new_cost < costs.get(next_stop, math.inf):
+                    costs[next_stop] = new_cost
+                    previous[next_stop] = stop
+                    ridden[next_stop] = lift_name
+                    heapq.heappush(heap, (new_cost, next_stop))
+
+        if goal not in closed:
+            return []
+        stops = []
+        current: Optional[Stop] = goal
+        while current is not None:
+            stops.append(current)
+            current = previous[current]
+        stops.reverse()
+
+        legs = [RouteLeg(start_level, [start_id])]
+        for stop in stops[1:]:
+            level, vertex_id = stop
+            if ridden[stop] is not None:
+                legs.append(RouteLeg(level, [vertex_id], ridden[stop]))
+            else:
+                leg = legs[-1]
+                leg.path.extend(self.level(level).find_shortest_path(leg.path[-1], vertex_id)[1:])
+        return legs
@@ -0,0 +1,149 @@
+import struct
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from .fleet_store import FleetStore, NO_VERTEX
+from .robot import RobotStatus, status_description
+
+DELTA_MAGIC = b"FLTD"
+DELTA_FORMAT_VERSION = 1
+DELTA_HEADER = struct.Struct("<4sHxxQQII")  # magic, format version, since, version, tick, robot count
+# Packed per-robot columns, in order; each column is contiguous so decoding is a few frombuffer() calls
+DELTA_COLUMNS = (("ids", np.int32), ("vertex", np.int32), ("next_vertex", np.int32), ("destination", np.int32),
+                 ("battery", np.float32), ("x", np.float32), ("y", np.float32), ("status", np.int8))
+
+
+class RobotRow(NamedTuple):
+    """One robot's state as carried by a FleetDelta"""
+    id: int
+    vertex_id: int
+    status: RobotStatus
+    next_vertex_id: Optional[int]
+    destination_id: Optional[int]
+    battery: float
+    x: float
+    y: float
+
+    @property
+    def status_text(self) -> str:
+        return status_description(self.status, self.next_vertex_id, self.battery)
+
+
+class FleetDelta:
+    """State of the robots that changed between two versions of the fleet, as parallel arrays.
+
+    encode() packs it into DELTA_HEADER followed by each column of
+    DELTA_COLUMNS (about 30 bytes per robot); decode() reverses that.
+    """
+
+    def __init__(self, since: int, version: int, tick: int, ids: np.ndarray, vertex: np.ndarray,
+                 next_vertex: np.ndarray, destination: np.ndarray, battery: np.ndarray, x: np.ndarray,
+                 y: np.ndarray, status: np.ndarray):
+        self.since = since
+        self.version = version
+        self.tick = tick
+        self.ids = ids
+        self.vertex = vertex
+        self.next_vertex = next_vertex
+        self.destination = destination
+        self.battery = battery
+        self.x = x
+        self.y = y
+        self.status = status
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self) -> Iterator[RobotRow]:
+        columns = [getattr(self, name).tolist() for name, _ in DELTA_COLUMNS]
+        for robot_id, vertex, next_vertex, destination, battery, x, y, status in zip(*columns):
+            yield RobotRow(robot_id, vertex, RobotStatus(status), None if next_vertex == NO_VERTEX else next_vertex,
+                           None if destination == NO_VERTEX else destination, battery, x, y)
+
+    def encode(self) -> bytes:
+        parts = [DELTA_HEADER.pack(DELTA_MAGIC, DELTA_FORMAT_VERSION, self.since, self.version, self.tick, len(self))]
+        parts += [np.ascontiguousarray(getattr(self, name), dtype=dtype).tobytes() for name, dtype in DELTA_COLUMNS]
+        return b"".join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes) -> "FleetDelta":
+        magic, format_version, since, version, tick, count = DELTA_HEADER.unpack_from(data)
+        if magic != DELTA_MAGIC:
+            raise ValueError("Not a fleet delta")
+        if format_version != DELTA_FORMAT_VERSION:
+            raise ValueError(f"Unsupported fleet delta format version {format_version}")
+        columns = {}
+        offset = DELTA_HEADER.size
+        for name, dtype in DELTA_COLUMNS:
+            columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += count * np.dtype(dtype).itemsize
+        return cls(since, version, tick, **columns)
+
+    @classmethod
+    def from_rows(cls, since: int, version: int, tick: int, rows: List[RobotRow]) -> "FleetDelta":
+        def column(values, dtype):
+            return np.array(values, dtype=dtype)
+        return cls(since, version, tick,
+                   column([row.id for row in rows], np.int32),
+                   column([row.vertex_id for row in rows], np.int32),
+                   column([NO_VERTEX if row.next_vertex_id is None else row.next_vertex_id for row in rows], np.int32),
+                   column([NO_VERTEX if row.destination_id is None else row.destination_id for row in rows], np.int32),
+                   column([row.battery for row in rows], np.float32),
+                   column([row.x for row in rows], np.float32),
+                   column([row.y for row in rows], np.float32),
+                   column([row.status.value for row in rows], np.int8))
+
+
+class FleetChangeTracker:
+    """Versions the observable state of every robot in a FleetStore.
+
+    update() compares the store's columns (vertex, status, next vertex,
+    destination, charge in whole percent) and the robots' positions with
+    the last values it saw, all vectorized, and stamps the robots that
+    differ with a new version. changes_since(v) then gathers only the robots
+    stamped after v, so consumers do work in proportion to what moved.
+    """
+
+    def __init__(self, store: FleetStore, positions: Callable[[], Tuple[np.ndarray, np.ndarray]]):
+        self.store = store
+        self.positions = positions  # World (x, y) of every robot, indexed by id
+        self.version = 0
+        self.changed_at = np.zeros(store.count, dtype=np.int64)  # Version each robot last changed in
+        self._last: List[np.ndarray] = []
+        self._seen = 0  # Robots covered by _last
+
+    def _columns(self, count: int) -> List[np.ndarray]:
+        store = self.store
+        x, y = self.positions()
+        return [store.vertex[:count], store.status[:count], store.next_vertex[:count], store.destination[:count],
+                np.rint(store.battery[:count] * 100).astype(np.int16), x[:count], y[:count]]
+
+    def update(self) -> int:
+        """Stamp robots whose state changed since the last update; returns the current version"""
+        count = self.store.count
+        columns = self._columns(count)
+        seen = self._seen
+        changed = np.zeros(count, dtype=bool)
+        changed[seen:] = True  # Spawned since the last update
+        for column, last in zip(columns, self._last):
+            changed[:seen] |= column[:seen] != last
+        if changed.any():
+            self.version += 1
+            if len(self.changed_at) < count:
+                grown = np.zeros(max(count, 2 * len(self.changed_at)), dtype=np.int64)
+                grown[:len(self.changed_at)] = self.changed_at
+                self.changed_at = grown
+            self.changed_at[:count][changed] = self.version
+            self._last = [column.copy() for column in columns]
+            self._seen = count
+        return self.version
+
+    def changes_since(self, version: int, tick: int = 0) -> FleetDelta:
+        """Robots that changed after `version` (0 gives every robot), as of the store's current state"""
+        current = self.update()
+        if not self._last:  # No robots yet
+            return FleetDelta.from_rows(version, current, tick, [])
+        ids = np.flatnonzero(self.changed_at[:self._seen] > version)
+        vertex, status, next_vertex, destination, _, x, y = self._last
+        return FleetDelta(version, current, tick, ids.astype(np.int32), vertex[ids], next_vertex[ids],
+                          destination[ids], self.store.battery[ids].astype(np.float32), x[ids].astype(np.float32),
+                          y[ids].astype(np.float32), status[ids])
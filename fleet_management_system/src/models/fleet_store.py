@@ -0,0 +1,138 @@
+from collections import deque
+from typing import Deque, Dict, List, Sequence
+import numpy as np
+
+NO_VERTEX = -1
+# Only the most recent entries of a robot's text log are kept
+ROBOT_LOG_LIMIT = 100
+
+
+class FleetStore:
+    """Struct-of-arrays state of every robot in the fleet.
+
+    Row i holds robot i: current vertex, status code, destination, where its
+    path lives in the shared `paths` buffer, how far along it the robot is,
+    (derived from those) its next vertex, and its battery charge. Robot objects are thin views
+    over one row, so a large fleet costs a few arrays rather than millions of
+    Python objects, and status queries are vectorized masks.
+    """
+
+    def __init__(self, capacity: int = 64, path_capacity: int = 1024):
+        self.count = 0
+        self.vertex = np.full(capacity, NO_VERTEX, dtype=np.int32)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.destination = np.full(capacity, NO_VERTEX, dtype=np.int32)
+        self.path_offset = np.zeros(capacity, dtype=np.int64)
+        self.path_length = np.zeros(capacity, dtype=np.int32)
+        self.path_index = np.zeros(capacity, dtype=np.int32)
+        self.next_vertex = np.full(capacity, NO_VERTEX, dtype=np.int32)
+        self.battery = np.ones(capacity, dtype=np.float64)  # State of charge, 0 (empty) to 1 (full)
+        # Every robot's path, back to back; replaced paths are garbage until compaction
+        self.paths = np.zeros(path_capacity, dtype=np.int32)
+        self.paths_used = 0
+        self.paths_garbage = 0
+        self.logs: Dict[int, Deque[str]] = {}  # Created on a robot's first log entry
+
+    _COLUMNS = (("vertex", NO_VERTEX), ("status", 0), ("destination", NO_VERTEX), ("path_offset", 0),
+                ("path_length", 0), ("path_index", 0), ("next_vertex", NO_VERTEX), ("battery", 1.0))
+
+    def add(self, vertex_id: int, status_code: int) -> int:
+        """Append a row for a new robot and return its id"""
+        robot_id = self.count
+        if robot_id == len(self.vertex):
+            capacity = 2 * len(self.vertex)
+            for name, fill in self._COLUMNS:
+                old = getattr(self, name)
+                new = np.full(capacity, fill, dtype=old.dtype)
+                new[:len(old)] = old
+                setattr(self, name, new)
+        self.count += 1
+        self.vertex[robot_id] = vertex_id
+        self.status[robot_id] = status_code
+        return robot_id
+
+    def set_path(self, robot_id: int, destination_id: int, path: Sequence[int]):
+        """Store a new path for a robot, starting at its first vertex"""
+        self.paths_garbage += int(self.path_length[robot_id])
+        self.path_length[robot_id] = 0  # Already garbage, so compaction must not keep it
+        length = len(path)
+        if self.paths_used + length > len(self.paths):
+            self._make_room(length)
+        offset = self.paths_used
+        self.paths[offset:offset + length] = path
+        self.paths_used += length
+        self.path_offset[robot_id] = offset
+        self.path_length[robot_id] = length
+        self.destination[robot_id] = destination_id
+        self.set_path_index(robot_id, 0)
+
+    def _make_room(self, length: int):
+        live = self.paths_used - self.paths_garbage
+        if self.paths_garbage >= live:
+            self._compact()
+        needed = self.paths_used + length
+        if needed > len(self.paths):
+            grown = np.zeros(max(needed, 2 * len(self.paths)), dtype=np.int32)
+            grown[:self.paths_used] = self.paths[:self.paths_used]
+            self.paths = grown
+
+    def _compact(self):
+        """Copy live paths to the front of the buffer, dropping replaced ones"""
+        n = self.count
+        order = np.argsort(self.path_offset[:n], kind="stable")
+        write = 0
+        for robot_id in order.tolist():
+            length = int(self.path_length[robot_id])
+            if not length:
+                continue
+            read = int(self.path_offset[robot_id])
+            # Live paths are visited in buffer order, so the copy never overwrites unread data
+            self.paths[write:write + length] = self.paths[read:read + length]
+            self.path_offset[robot_id] = write
+            write += length
+        self.paths_used = write
+        self.paths_garbage = 0
+
+    def path(self, robot_id: int) -> List[int]:
+        offset = int(self.path_offset[robot_id])
+        return self.paths[offset:offset + int(self.path_length[robot_id])].tolist()
+
+    def set_path_index(self, robot_id: int, index: int):
+        self.path_index[robot_id] = index
+        if index < self.path_length[robot_id] - 1:
+            self.next_vertex[robot_id] = self.paths[self.path_offset[robot_id] + index + 1]
+        else:
+            self.next_vertex[robot_id] = NO_VERTEX
+
+    def ids_with_status(self, *status_codes: int) -> np.ndarray:
+        """Ids of robots whose status is any of the given codes, in id order"""
+        return np.flatnonzero(np.isin(self.status[:self.count], status_codes))
+
+    def checkpoint_state(self) -> Dict:
+        """Copies of every robot's row and of the path buffer (text logs are not kept)"""
+        n = self.count
+        state = {name: getattr(self, name)[:n].copy() for name, _ in self._COLUMNS}
+        state.update(count=n, paths=self.paths[:self.paths_used].copy(), paths_garbage=self.paths_garbage)
+        return state
+
+    def restore_state(self, state: Dict):
+        """Replace every row with those of a checkpoint_state()"""
+        n = state["count"]
+        capacity = max(n, 64)
+        for name, fill in self._COLUMNS:
+            column = np.full(capacity, fill, dtype=getattr(self, name).dtype)
+            column[:n] = state[name]
+            setattr(self, name, column)
+        paths = state["paths"]
+        self.paths = np.zeros(max(len(paths), 1024), dtype=np.int32)
+        self.paths[:len(paths)] = paths
+        self.paths_used = len(paths)
+        self.paths_garbage = state["paths_garbage"]
+        self.count = n
+        self.logs = {}
+
+    def log(self, robot_id: int) -> Deque[str]:
+        entries = self.logs.get(robot_id)
+        if entries is None:
+            entries = self.logs[robot_id] = deque(maxlen=ROBOT_LOG_LIMIT)
+        return entries
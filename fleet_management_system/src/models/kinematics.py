@@ -0,0 +1,169 @@
+import math
+from typing import Dict, List, Tuple
+import numpy as np
+from .nav_graph import NavigationGraph
+from ..utils.path_planner import DEFAULT_SPEED
+
+NO_VERTEX = -1
+# Robots closer than this (world units) may not move any closer to each other
+MIN_SEPARATION = 0.4
+# Progress this close to 1 counts as arrived (repeated float steps rarely sum to exactly 1)
+ARRIVAL_TOLERANCE = 1e-9
+
+
+class FleetKinematics:
+    """Continuous robot positions along lanes, one array slot per robot.
+
+    A robot either stands on a vertex (to_vertex == NO_VERTEX) or travels
+    from from_vertex to to_vertex with `progress` in [0, 1]. Its speed is its
+    own maximum, capped by the lane's speed limit. advance() moves every
+    travelling robot in one vectorized update.
+    """
+
+    def __init__(self, nav_graph: NavigationGraph, capacity: int = 64):
+        self.nav_graph = nav_graph
+        self.vertex_x = np.array([v.x for v in nav_graph.vertices], dtype=np.float64)
+        self.vertex_y = np.array([v.y for v in nav_graph.vertices], dtype=np.float64)
+        self.count = 0
+        self.from_vertex = np.full(capacity, NO_VERTEX, dtype=np.int32)
+        self.to_vertex = np.full(capacity, NO_VERTEX, dtype=np.int32)
+        self.progress = np.zeros(capacity, dtype=np.float64)
+        self.length = np.ones(capacity, dtype=np.float64)
+        self.speed = np.zeros(capacity, dtype=np.float64)
+        self.max_speed = np.zeros(capacity, dtype=np.float64)
+
+    _COLUMNS = (("from_vertex", NO_VERTEX), ("to_vertex", NO_VERTEX), ("progress", 0.0),
+                ("length", 1.0), ("speed", 0.0), ("max_speed", 0.0))
+
+    def _grow(self, minimum: int):
+        capacity = max(minimum, 2 * len(self.from_vertex))
+        for name, fill in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add_robot(self, robot_id: int, vertex_id: int, max_speed: float = DEFAULT_SPEED):
+        """Robot ids are used as array slots, so they must be small consecutive integers"""
+        if robot_id >= len(self.from_vertex):
+            self._grow(robot_id + 1)
+        self.count = max(self.count, robot_id + 1)
+        self.from_vertex[robot_id] = vertex_id
+        self.to_vertex[robot_id] = NO_VERTEX
+        self.progress[robot_id] = 0.0
+        self.max_speed[robot_id] = max_speed
+
+    def checkpoint_state(self) -> Dict:
+        n = self.count
+        state = {name: getattr(self, name)[:n].copy() for name, _ in self._COLUMNS}
+        state["count"] = n
+        return state
+
+    def restore_state(self, state: Dict):
+        self.count = 0
+        self._grow(state["count"])
+        for name, _ in self._COLUMNS:
+            getattr(self, name)[:state["count"]] = state[name]
+        self.count = state["count"]
+
+    def is_travelling(self, robot_id: int) -> bool:
+        return robot_id < self.count and self.to_vertex[robot_id] != NO_VERTEX
+
+    def depart(self, robot_id: int, from_vertex: int, to_vertex: int):
+        """Start moving a robot along the lane from_vertex -> to_vertex"""
+        start = self.nav_graph.get_vertex_by_id(from_vertex)
+        end = self.nav_graph.get_vertex_by_id(to_vertex)
+        lane = self.nav_graph.get_lane_between(from_vertex, to_vertex)
+        speed = self.max_speed[robot_id]
+        if lane and lane.speed_limit > 0:
+            speed = min(speed, lane.speed_limit)
+        self.from_vertex[robot_id] = from_vertex
+        self.to_vertex[robot_id] = to_vertex
+        self.progress[robot_id] = 0.0
+        # Zero-length lanes are crossed within a single update
+        self.length[robot_id] = max(math.hypot(end.x - start.x, end.y - start.y), 1e-9)
+        self.speed[robot_id] = speed
+
+    def arrive(self, robot_id: int):
+        """The robot now stands on the vertex it was travelling to"""
+        self.from_vertex[robot_id] = self.to_vertex[robot_id]
+        self.to_vertex[robot_id] = NO_VERTEX
+        self.progress[robot_id] = 0.0
+
+    def positions(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Interpolated world (x, y) of every robot slot"""
+        n = self.count
+        start = self.from_vertex[:n]
+        travelling = self.to_vertex[:n] != NO_VERTEX
+        end = np.where(travelling, self.to_vertex[:n], start)
+        t = self.progress[:n]
+        x = self.vertex_x[start] + (self.vertex_x[end] - self.vertex_x[start]) * t
+        y = self.vertex_y[start] + (self.vertex_y[end] - self.vertex_y[start]) * t
+        return x, y
+
+    def position(self, robot_id: int) -> Tuple[float, float]:
+        start = self.from_vertex[robot_id]
+        end = self.to_vertex[robot_id]
+        if end == NO_VERTEX:
+            return float(self.vertex_x[start]), float(self.vertex_y[start])
+        t = self.progress[robot_id]
+        return (float(self.vertex_x[start] + (self.vertex_x[end] - self.vertex_x[start]) * t),
+                float(self.vertex_y[start] + (self.vertex_y[end] - self.vertex_y[start]) * t))
+
+    def advance(self, dt: float) -> List[int]:
+        """Move every travelling robot forward by dt seconds; returns the robots that arrived.
+
+        A robot whose step would bring it within MIN_SEPARATION of another
+        robot, and closer than it already was, holds its position instead.
+        """
+        n = self.count
+        travelling = np.flatnonzero(self.to_vertex[:n] != NO_VERTEX)
+        if not len(travelling):
+            return []
+        old_x, old_y = self.positions()
+        old_progress = self.progress[travelling].copy()
+        self.progress[travelling] = np.minimum(
+            old_progress + self.speed[travelling] * dt / self.length[travelling], 1.0)
+        new_x, new_y = self.positions()
+
+        held = self._too_close(travelling, old_x, old_y, new_x, new_y)
+        if held:
+            held_slots = np.array(held, dtype=np.int64)
+            self.progress[held_slots] = old_progress[np.searchsorted(travelling, held_slots)]
+
+        arrived = travelling[self.progress[travelling] >= 1.0 - ARRIVAL_TOLERANCE]
+        return arrived.tolist()
+
+    def _too_close(self, moved: np.ndarray, old_x: np.ndarray, old_y: np.ndarray,
+                   new_x: np.ndarray, new_y: np.ndarray) -> List[int]:
+        """Moved robots that would close in on another robot below MIN_SEPARATION.
+
+        When two moving robots close in on each other only the higher id
+        yields, so at least one of them keeps going.
+        """
+        # Bucket robots into cells one separation wide; only neighbouring cells can be too close
+        cell_x = np.floor(new_x / MIN_SEPARATION).astype(np.int64)
+        cell_y = np.floor(new_y / MIN_SEPARATION).astype(np.int64)
+        min_x, min_y = cell_x.min(), cell_y.min()
+        width = cell_y.max() - min_y + 3  # Room for the cells either side of the occupied ones
+        keys = (cell_x - min_x + 1) * width + (cell_y - min_y + 1)
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+
+        # Every (moved robot, robot in one of its 9 neighbouring cells) pair
+        offsets = np.array([dx * width + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+        targets = (keys[moved][:, None] + offsets).ravel()
+        first = np.searchsorted(sorted_keys, targets, side='left')
+        counts = np.searchsorted(sorted_keys, targets, side='right') - first
+        slot = np.repeat(np.repeat(moved, len(offsets)), counts)
+        within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        other = order[np.repeat(first, counts) + within]
+
+        is_moved = np.zeros(len(keys), dtype=bool)
+        is_moved[moved] = True
+        candidate = (other != slot) & ~(is_moved[other] & (other > slot))
+        slot, other = slot[candidate], other[candidate]
+        new_distance = (new_x[slot] - new_x[other]) ** 2 + (new_y[slot] - new_y[other]) ** 2
+        old_distance = (old_x[slot] - old_x[other]) ** 2 + (old_y[slot] - old_y[other]) ** 2
+        closes_in = (new_distance < MIN_SEPARATION * MIN_SEPARATION) & (new_distance < old_distance)
+        return np.unique(slot[closes_in]).tolist()
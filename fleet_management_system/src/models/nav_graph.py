@@ -1,6 +1,11 @@
-import json
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Set, Tuple, Optional
 from dataclasses import dataclass
+from ..utils.compiled_graph import CHARGER_FLAG, CompiledGraph, CompiledLevel
+from ..utils.graph_file import NavGraphFile
+from ..utils.helpers import gc_paused
+from ..utils.path_planner import PathPlanner
+from ..utils.route_cache import RouteCache
+from ..utils.spatial_index import SpatialGrid
 
 @dataclass
 class Vertex:
@@ -16,86 +21,311 @@ class Lane:
     end: int
     speed_limit: int
     occupied_by: Optional[int] = None  # Robot ID if occupied
+    blocked: bool = False
+    congestion: float = 0.0  # Extra travel time as a multiple of the free-flow time, set from observed traffic
+
+# Called with the (start, end) pairs of changed lanes and whether any of them opened, closed, appeared or vanished
+LaneChangeCallback = Callable[[List[Tuple[int, int]], bool], None]
 
 class NavigationGraph:
-    def __init__(self, json_file: str, level: str = "level1"):
+    # All-pairs next-hop tables are only built for maps up to this size
+    ALL_PAIRS_MAX_VERTICES = 2000
+
+    def __init__(self, json_file: Optional[str], level: str = "level1", route_cache_size: int = 4096):
         self.vertices: List[Vertex] = []
         self.lanes: List[Lane] = []
         self.level = level
-        self.load_from_json(json_file)
-        
+        # Lookup indexes, built once on load and kept in sync by add_lane/remove_lane
+        self.adjacency: Dict[int, List[int]] = {}  # vertex -> neighbour ids (either direction)
+        self.lane_index: Dict[Tuple[int, int], Lane] = {}  # (start, end) -> Lane
+        self.spatial_index = SpatialGrid()  # Vertex positions in world coordinates
+        self.version = 0  # Bumped on every structural change so planners can drop stale weights
+        self._planners: Dict[Tuple[str, str], PathPlanner] = {}
+        self.route_cache = RouteCache(route_cache_size)
+        self._next_hops: Dict[str, Dict[int, Dict[int, int]]] = {}  # cost model -> src -> dst -> hop
+        self._all_pairs_models: Set[str] = set()  # Cost models precompute_all_pairs() was asked for
+        self._lane_listeners: List[LaneChangeCallback] = []
+        if json_file is not None:
+            self.load_from_json(json_file)
+
+    @classmethod
+    def from_level_data(cls, level_data: Dict, level: str, route_cache_size: int = 4096) -> "NavigationGraph":
+        """Build a graph from an already decoded {"vertices", "lanes"} level object"""
+        graph = cls(None, level, route_cache_size)
+        graph.load_level_data(level_data)
+        return graph
+
     def load_from_json(self, json_file: str):
-        with open(json_file, 'r') as f:
-            data = json.load(f)
-            level_data = data['levels'][self.level]
-            
-            # Load vertices
-            for idx, vertex_data in enumerate(level_data['vertices']):
-                x, y, attributes = vertex_data
-                name = attributes.get('name', f'V{idx}')
-                is_charger = attributes.get('is_charger', False)
-                self.vertices.append(Vertex(idx, x, y, name, is_charger))
-            
-            # Load lanes
-            for lane_data in level_data['lanes']:
-                start, end, attributes = lane_data
-                speed_limit = attributes.get('speed_limit', 0)
-                self.lanes.append(Lane(start, end, speed_limit))
+        """Load this graph's level from the fresh binary cache if there is one, else from the JSON.
+
+        Other levels in the file are skipped without being decoded.
+        """
+        compiled = CompiledGraph.open_fresh(json_file)
+        with gc_paused():
+            if compiled is not None:
+                try:
+                    if self.level in compiled.levels:
+                        self.load_compiled(compiled.level(self.level))
+                        return
+                finally:
+                    compiled.close()
+            with NavGraphFile(json_file) as graph_file:
+                self.load_level_data(graph_file.read_level(self.level))
+
+    def load_compiled(self, level: CompiledLevel):
+        """Load a level from the binary cache, taking adjacency straight from its CSR arrays.
+
+        The arrays are copied into the usual Vertex/Lane objects, so the cache saves
+        parsing time rather than memory and the mapping can be closed afterwards.
+        Speed limits come back exactly as the JSON gave them, so a cached load
+        plans the same routes as a JSON load.
+        """
+        xs, ys, flags = level.x.tolist(), level.y.tolist(), level.flags.tolist()
+        self.vertices = [Vertex(idx, xs[idx], ys[idx], name, bool(flags[idx] & CHARGER_FLAG))
+                         for idx, name in enumerate(level.vertex_names())]
+        starts, ends = level.lane_start.tolist(), level.lane_end.tolist()
+        self.lanes = [Lane(start, end, speed_limit)
+                      for start, end, speed_limit in zip(starts, ends, level.speed_limits())]
+        self.adjacency = level.neighbor_lists()
+        self.lane_index = dict(zip(zip(starts, ends), self.lanes))
+        self.spatial_index = SpatialGrid.from_arrays(level.x, level.y)
+        self._on_graph_changed()
+
+    def load_level_data(self, level_data: Dict):
+        # Load vertices
+        for idx, vertex_data in enumerate(level_data['vertices']):
+            x, y, attributes = vertex_data
+            name = attributes.get('name', f'V{idx}')
+            is_charger = attributes.get('is_charger', False)
+            self.vertices.append(Vertex(idx, x, y, name, is_charger))
+
+        # Load lanes
+        for lane_data in level_data['lanes']:
+            start, end, attributes = lane_data
+            speed_limit = attributes.get('speed_limit', 0)
+            self.lanes.append(Lane(start, end, speed_limit))
+
+        self._build_indexes()
+        self._on_graph_changed()
+
+    def _on_graph_changed(self):
+        """Invalidate planner weights, cached routes and next-hop tables (rebuilt on next use)"""
+        self.version += 1
+        self.route_cache.invalidate()
+        self._next_hops.clear()
+
+    def on_lanes_changed(self, callback: LaneChangeCallback):
+        """Register a callback told about every runtime lane change (incremental planners use it)"""
+        self._lane_listeners.append(callback)
+
+    def remove_lane_listener(self, callback: LaneChangeCallback):
+        """Stop telling a callback registered with on_lanes_changed() about lane changes"""
+        if callback in self._lane_listeners:
+            self._lane_listeners.remove(callback)
+
+    def _notify_lanes_changed(self, lanes: List[Tuple[int, int]], traversability_changed: bool):
+        for callback in self._lane_listeners:
+            callback(lanes, traversability_changed)
+
+    def _build_indexes(self):
+        """Build adjacency lists, the lane hash index and the vertex spatial index"""
+        self.adjacency = {vertex.id: [] for vertex in self.vertices}
+        self.lane_index = {}
+        for lane in self.lanes:
+            self._index_lane(lane)
+        self.spatial_index = SpatialGrid((vertex.id, vertex.x, vertex.y) for vertex in self.vertices)
+
+    def _index_lane(self, lane: Lane):
+        self.lane_index[(lane.start, lane.end)] = lane
+        start_neighbors = self.adjacency.setdefault(lane.start, [])
+        if lane.end not in start_neighbors:
+            start_neighbors.append(lane.end)
+        end_neighbors = self.adjacency.setdefault(lane.end, [])
+        if lane.start not in end_neighbors:
+            end_neighbors.append(lane.start)
+
+    def _unindex_lane(self, lane: Lane):
+        del self.lane_index[(lane.start, lane.end)]
+        # Paired lanes (a->b and b->a) share one adjacency entry; keep it while either exists
+        if (lane.end, lane.start) not in self.lane_index:
+            self.adjacency[lane.start].remove(lane.end)
+            self.adjacency[lane.end].remove(lane.start)
+
+    def add_lane(self, start: int, end: int, speed_limit: int = 0) -> Lane:
+        """Add a lane at runtime, keeping the lookup indexes consistent"""
+        if start not in self.adjacency or end not in self.adjacency:
+            raise ValueError(f"Lane {start}-{end} references an unknown vertex")
+        existing = self.lane_index.get((start, end))
+        if existing:
+            return existing
+        lane = Lane(start, end, speed_limit)
+        self.lanes.append(lane)
+        self._index_lane(lane)
+        self._on_graph_changed()
+        self._notify_lanes_changed([(start, end)], True)
+        return lane
+
+    def remove_lane(self, start: int, end: int) -> Optional[Lane]:
+        """Remove the directed lane start->end, returns the removed lane if it existed"""
+        lane = self.lane_index.get((start, end))
+        if not lane:
+            return None
+        self.lanes.remove(lane)
+        self._unindex_lane(lane)
+        self._on_graph_changed()
+        self._notify_lanes_changed([(start, end)], True)
+        return lane
+
+    def set_lane_speed_limit(self, start: int, end: int, speed_limit: int) -> bool:
+        """Change a lane's speed limit; edit lanes through here so cached routes stay valid"""
+        lane = self.lane_index.get((start, end))
+        if not lane:
+            return False
+        if lane.speed_limit != speed_limit:
+            lane.speed_limit = speed_limit
+            self._on_graph_changed()
+            self._notify_lanes_changed([(start, end)], False)
+        return True
+
+    def set_lane_blocked(self, v1_id: int, v2_id: int, blocked: bool = True) -> bool:
+        """Block or reopen the lanes between two vertices, in both directions, for planning.
+
+        Planners treat a vertex pair as traversable if either of its lanes is
+        open, so a single direction cannot be closed on its own.
+        """
+        found = False
+        changed = []
+        for key in ((v1_id, v2_id), (v2_id, v1_id)):
+            lane = self.lane_index.get(key)
+            if lane is None:
+                continue
+            found = True
+            if lane.blocked != blocked:
+                lane.blocked = blocked
+                changed.append(key)
+        if changed:
+            self._on_graph_changed()
+            self._notify_lanes_changed(changed, True)
+        return found
+
+    def set_lane_congestion(self, v1_id: int, v2_id: int, congestion: float) -> bool:
+        """Set the congestion of the lanes between two vertices, in both directions.
+
+        Congestion only weights incremental planning (congested_travel_time_cost);
+        the graph version is left alone, so cached routes and static planner
+        weights stay valid while traffic ebbs and flows.
+        """
+        found = False
+        changed = []
+        for key in ((v1_id, v2_id), (v2_id, v1_id)):
+            lane = self.lane_index.get(key)
+            if lane is None:
+                continue
+            found = True
+            if lane.congestion != congestion:
+                lane.congestion = congestion
+                changed.append(key)
+        if changed:
+            self._notify_lanes_changed(changed, False)
+        return found
     
     def get_vertex_by_id(self, vertex_id: int) -> Vertex:
         return self.vertices[vertex_id]
+
+    def nearest_vertex(self, x: float, y: float, radius: float) -> Optional[int]:
+        """Id of the vertex closest to world point (x, y) within radius, or None"""
+        return self.spatial_index.nearest(x, y, radius)
+
+    def vertices_within(self, x: float, y: float, radius: float) -> List[int]:
+        """Ids of vertices within radius of world point (x, y), nearest first"""
+        return [vertex_id for _, vertex_id in self.spatial_index.within(x, y, radius)]
+
+    def get_neighbor_ids(self, vertex_id: int) -> List[int]:
+        """Ids of vertices connected to vertex_id by a lane in either direction"""
+        return self.adjacency.get(vertex_id, [])
     
     def get_adjacent_vertices(self, vertex_id: int) -> List[Vertex]:
-        adjacent = []
-        for lane in self.lanes:
-            if lane.start == vertex_id:
-                adjacent.append(self.vertices[lane.end])
-            elif lane.end == vertex_id:
-                adjacent.append(self.vertices[lane.start])
-        return adjacent
+        return [self.vertices[neighbor_id] for neighbor_id in self.get_neighbor_ids(vertex_id)]
+
+    def get_edges(self) -> List[Tuple[int, int]]:
+        """Undirected vertex pairs with at least one lane, each pair reported once"""
+        return [(v1, v2) for v1, neighbors in self.adjacency.items() for v2 in neighbors if v1 < v2]
+
+    def get_lane(self, start: int, end: int) -> Optional[Lane]:
+        """Directed lane lookup"""
+        return self.lane_index.get((start, end))
+
+    def has_lane(self, v1_id: int, v2_id: int) -> bool:
+        return (v1_id, v2_id) in self.lane_index or (v2_id, v1_id) in self.lane_index
     
     def get_lane_between(self, v1_id: int, v2_id: int) -> Optional[Lane]:
-        for lane in self.lanes:
-            if (lane.start == v1_id and lane.end == v2_id) or (lane.start == v2_id and lane.end == v1_id):
-                return lane
-        return None
+        lane = self.lane_index.get((v1_id, v2_id))
+        if lane is None:
+            lane = self.lane_index.get((v2_id, v1_id))
+        return lane
+
+    def is_traversable(self, v1_id: int, v2_id: int) -> bool:
+        """True if an unblocked lane connects the two vertices"""
+        for key in ((v1_id, v2_id), (v2_id, v1_id)):
+            lane = self.lane_index.get(key)
+            if lane and not lane.blocked:
+                return True
+        return False
     
-    def find_shortest_path(self, start_id: int, end_id: int) -> List[int]:
-        """Find shortest path using Dijkstra's algorithm with fixed weights"""
-        # Initialize data structures
-        distances = {vertex.id: float('inf') for vertex in self.vertices}
-        previous = {vertex.id: None for vertex in self.vertices}
-        distances[start_id] = 0
-        unvisited = set(vertex.id for vertex in self.vertices)
-        
-        while unvisited:
-            current = min(unvisited, key=lambda v: distances[v])
-            unvisited.remove(current)
-            
-            # Early exit if we reach the destination
-            if current == end_id:
-                break
-                
-            # Explore neighbors
-            for neighbor in self.get_adjacent_vertices(current):
-                if neighbor.id in unvisited:
-                    # Fixed weight - treat all edges equally since speed limits are 0
-                    weight = 1  # Constant weight for all edges
-                    new_distance = distances[current] + weight
-                    
-                    if new_distance < distances[neighbor.id]:
-                        distances[neighbor.id] = new_distance
-                        previous[neighbor.id] = current
-        
-        # Reconstruct path if one exists
-        path = []
-        current = end_id
-        
-        if previous[current] is None and current != start_id:
-            return path  # No path exists
-        
-        while current is not None:
-            path.insert(0, current)
-            current = previous[current]
-        
-        return path
\ No newline at end of file
+    def get_planner(self, cost_model: str = "time", algorithm: str = "astar") -> PathPlanner:
+        """Shared planner instance for a cost model ("distance", "time" or "hops")"""
+        key = (cost_model, algorithm)
+        if key not in self._planners:
+            self._planners[key] = PathPlanner(self, cost_model, algorithm)
+        return self._planners[key]
+
+    def precompute_all_pairs(self, cost_model: str = "time") -> bool:
+        """Build a next-hop table for every vertex pair (small maps only).
+
+        The table is rebuilt by the first find_shortest_path() after a graph
+        change, so several changes in a row cost one rebuild. Returns False
+        if the map is larger than ALL_PAIRS_MAX_VERTICES.
+        """
+        if len(self.vertices) > self.ALL_PAIRS_MAX_VERTICES:
+            return False
+        self._all_pairs_models.add(cost_model)
+        planner = self.get_planner(cost_model, "dijkstra")
+        self._next_hops[cost_model] = {
+            vertex.id: planner.first_hops_from(vertex.id) for vertex in self.vertices
+        }
+        return True
+
+    def _path_from_next_hops(self, table: Dict[int, Dict[int, int]], start_id: int, end_id: int) -> List[int]:
+        if start_id not in table:
+            return []
+        path = [start_id]
+        current = start_id
+        while current != end_id:
+            current = table[current].get(end_id)
+            if current is None:
+                return []
+            path.append(current)
+        return path
+
+    def find_shortest_path(self, start_id: int, end_id: int, cost_model: str = "time",
+                           algorithm: str = "astar") -> List[int]:
+        """Find the lowest-cost path using a binary-heap Dijkstra or A* planner.
+
+        The default cost is travel time from lane lengths and speed limits.
+        Routes are served from the all-pairs table or the LRU route cache when possible.
+        """
+        table = self._next_hops.get(cost_model)
+        if table is None and cost_model in self._all_pairs_models and self.precompute_all_pairs(cost_model):
+            table = self._next_hops[cost_model]
+        if table is not None:
+            return self._path_from_next_hops(table, start_id, end_id)
+
+        key = (start_id, end_id, cost_model)
+        path = self.route_cache.get(key)
+        if path is None:
+            path = self.get_planner(cost_model, algorithm).plan(start_id, end_id)
+            self.route_cache.put(key, path)
+        return path
+
+    def route_cache_stats(self) -> Dict[str, float]:
+        return self.route_cache.stats()
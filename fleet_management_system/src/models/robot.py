@@ -1,7 +1,7 @@
 from enum import Enum, auto
-from typing import List, Optional
-from dataclasses import dataclass
+from typing import Deque, List, Optional
 import time
+from .fleet_store import FleetStore, NO_VERTEX
 
 class RobotStatus(Enum):
     IDLE = auto()
@@ -9,36 +9,106 @@ class RobotStatus(Enum):
     WAITING = auto()
     CHARGING = auto()
     TASK_COMPLETE = auto()
+    STRANDED = auto()  # Battery ran flat; the robot stays where it stopped
+
+# Robot colours by id, cycled
+ROBOT_COLORS = ('#FF0000', '#00FF00', '#0000FF', '#FFFF00', '#FF00FF',
+                '#00FFFF', '#FFA500', '#A52A2A', '#800080', '#008000')
+
+def robot_color(robot_id: int) -> str:
+    return ROBOT_COLORS[robot_id % len(ROBOT_COLORS)]
+
+def status_description(status: RobotStatus, next_vertex: Optional[int], battery: float) -> str:
+    """Human-readable status of a robot, from its state alone"""
+    if status == RobotStatus.WAITING:
+        return f"WAITING to move to {next_vertex}"
+    if status == RobotStatus.CHARGING:
+        return f"CHARGING ({battery:.0%})"
+    if status == RobotStatus.STRANDED:
+        return "STRANDED (battery flat)"
+    return status.name
 
-@dataclass
 class Task:
-    destination_id: int
-    path: List[int]
-    current_path_index: int = 0
+    """View of a robot's current task inside the FleetStore"""
+    __slots__ = ("_store", "_robot_id")
+
+    def __init__(self, store: FleetStore, robot_id: int):
+        self._store = store
+        self._robot_id = robot_id
+
+    @property
+    def destination_id(self) -> int:
+        return int(self._store.destination[self._robot_id])
+
+    @property
+    def path(self) -> List[int]:
+        return self._store.path(self._robot_id)
+
+    @path.setter
+    def path(self, path: List[int]):
+        self._store.set_path(self._robot_id, self.destination_id, path)
+
+    @property
+    def current_path_index(self) -> int:
+        return int(self._store.path_index[self._robot_id])
+
+    @current_path_index.setter
+    def current_path_index(self, index: int):
+        self._store.set_path_index(self._robot_id, index)
 
 class Robot:
-    def __init__(self, robot_id: int, start_vertex_id: int):
+    """Thin view over one robot's row in a FleetStore"""
+    __slots__ = ("id", "_store")
+
+    def __init__(self, store: FleetStore, robot_id: int):
         self.id = robot_id
-        self.current_vertex_id = start_vertex_id
-        self.status = RobotStatus.IDLE
-        self.task: Optional[Task] = None
-        self.color = self._generate_color(robot_id)
-        self.log = []
+        self._store = store
+
+    @property
+    def current_vertex_id(self) -> int:
+        return int(self._store.vertex[self.id])
+
+    @current_vertex_id.setter
+    def current_vertex_id(self, vertex_id: int):
+        self._store.vertex[self.id] = vertex_id
+
+    @property
+    def status(self) -> RobotStatus:
+        return RobotStatus(int(self._store.status[self.id]))
+
+    @status.setter
+    def status(self, status: RobotStatus):
+        self._store.status[self.id] = status.value
+
+    @property
+    def battery(self) -> float:
+        return float(self._store.battery[self.id])
+
+    @battery.setter
+    def battery(self, charge: float):
+        self._store.battery[self.id] = charge
+
+    @property
+    def task(self) -> Optional[Task]:
+        if self._store.destination[self.id] == NO_VERTEX:
+            return None
+        return Task(self._store, self.id)
+
+    @property
+    def color(self) -> str:
+        return self._generate_color(self.id)
+
+    @property
+    def log(self) -> Deque[str]:
+        return self._store.log(self.id)
         
     def _generate_color(self, robot_id: int) -> str:
         """Generate a unique color based on robot ID"""
-        colors = [
-            '#FF0000', '#00FF00', '#0000FF', '#FFFF00', '#FF00FF',
-            '#00FFFF', '#FFA500', '#A52A2A', '#800080', '#008000'
-        ]
-        return colors[robot_id % len(colors)]
+        return robot_color(robot_id)
     
     def assign_task(self, destination_id, path):
         """Assign a navigation task to this robot"""
-        print(f"\n[ROBOT {self.id}] New task assigned:")
-        print(f"Destination: {destination_id}")
-        print(f"Full path: {path}")
-        self.task = Task(destination_id, path)
+        self._store.set_path(self.id, destination_id, path)
         self.status = RobotStatus.MOVING
         self.log.append(f"Assigned task to {destination_id} via {path}")
         
@@ -69,16 +139,12 @@ class Robot:
     
     def get_status_description(self) -> str:
         """Get human-readable status"""
-        if self.status == RobotStatus.WAITING:
-            next_vertex = self.get_next_vertex()
-            return f"WAITING to move to {next_vertex}"
-        return self.status.name
+        return status_description(self.status, self.get_next_vertex(), self.battery)
     
     def get_next_vertex(self) -> Optional[int]:
         """Get the next vertex in the robot's path"""
-        if not self.task or self.task.current_path_index >= len(self.task.path) - 1:
-            return None
-        return self.task.path[self.task.current_path_index + 1]
+        next_vertex = self._store.next_vertex[self.id]
+        return None if next_vertex == NO_VERTEX else int(next_vertex)
     
     def get_current_lane(self) -> Optional[tuple[int, int]]:
         next_vertex = self.get_next_vertex()
@@ -0,0 +1,53 @@
+from typing import List, Tuple
+import numpy as np
+
+
+def min_cost_assignment(cost: np.ndarray) -> List[Tuple[int, int]]:
+    """Match rows to distinct columns with the lowest total cost (Hungarian method).
+
+    Uses shortest augmenting paths with dual potentials, O(rows^2 * columns),
+    with the inner column scans vectorized. Every row is matched when there
+    are at least as many columns as rows, otherwise every column is. Costs
+    must be finite. Returns (row, column) pairs sorted by row.
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    if cost.size == 0:
+        return []
+    if cost.shape[0] > cost.shape[1]:
+        return sorted((row, column) for column, row in min_cost_assignment(cost.T))
+
+    rows, columns = cost.shape
+    # Index 0 is a virtual column; rows are 1-based in `match` so 0 means unmatched
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    match = np.zeros(columns + 1, dtype=np.int64)  # column -> row matched to it
+    way = np.zeros(columns + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        match[0] = row
+        current = 0
+        min_reduced = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while True:
+            used[current] = True
+            matched_row = match[current]
+            free = np.flatnonzero(~used)
+            reduced = cost[matched_row - 1, free - 1] - u[matched_row] - v[free]
+            improved = reduced < min_reduced[free]
+            min_reduced[free[improved]] = reduced[improved]
+            way[free[improved]] = current
+            best = free[np.argmin(min_reduced[free])]
+            delta = min_reduced[best]
+            visited = np.flatnonzero(used)
+            u[match[visited]] += delta
+            v[visited] -= delta
+            min_reduced[free] -= delta
+            current = best
+            if match[current] == 0:
+                break
+        # Flip the augmenting path back to the virtual column
+        while current:
+            previous = way[current]
+            match[current] = match[previous]
+            current = previous
+
+    return sorted((int(match[column]) - 1, column - 1) for column in range(1, columns + 1) if match[column])
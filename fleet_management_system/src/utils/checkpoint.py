@@ -0,0 +1,149 @@
+"""Binary checkpoints of the fleet state, written on a background thread.
+
+A checkpoint is a nested dictionary of JSON values and NumPy arrays (see
+SimulationEngine.checkpoint_state()). On disk the arrays are stored raw and
+8-byte aligned after a JSON metadata block that records where each one is,
+so writing and reading cost little more than copying the arrays.
+"""
+import json
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from .logger import FleetLogger, LogLevel
+
+MAGIC = b"FLEETCKP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHxxIq")  # magic, format version, metadata size, tick
+ALIGNMENT = 8
+ARRAY_KEY = "__array__"  # Metadata stand-in for an array: {"__array__": [offset, count, dtype]}
+
+
+def _pack(value, chunks: List[bytes], offset: List[int]):
+    """Replace the arrays inside value with metadata stand-ins, appending their bytes to chunks"""
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value).tobytes()
+        entry = {ARRAY_KEY: [offset[0], len(value), value.dtype.str]}
+        padding = -len(data) % ALIGNMENT
+        chunks.append(data + b"\0" * padding)
+        offset[0] += len(data) + padding
+        return entry
+    if isinstance(value, dict):
+        return {key: _pack(item, chunks, offset) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack(item, chunks, offset) for item in value]
+    return value
+
+
+def _unpack(value, data: bytes, start: int):
+    if isinstance(value, dict):
+        if ARRAY_KEY in value:
+            offset, count, dtype = value[ARRAY_KEY]
+            return np.frombuffer(data, dtype=np.dtype(dtype), count=count, offset=start + offset)
+        return {key: _unpack(item, data, start) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_unpack(item, data, start) for item in value]
+    return value
+
+
+def write_checkpoint(state: Dict, path: str) -> int:
+    """Write a checkpoint atomically (a crash mid-write leaves the previous one in place); returns its size"""
+    chunks: List[bytes] = []
+    metadata = json.dumps(_pack(state, chunks, [0])).encode('utf-8')
+    metadata += b" " * (-(HEADER.size + len(metadata)) % ALIGNMENT)
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    temporary = path + ".tmp"
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), state.get("tick", 0)))
+        f.write(metadata)
+        for chunk in chunks:
+            f.write(chunk)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return HEADER.size + len(metadata) + sum(len(chunk) for chunk in chunks)
+
+
+def read_checkpoint(path: str) -> Dict:
+    """The state written by write_checkpoint(); arrays are read-only views over the file's bytes"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is not a fleet checkpoint (truncated header)")
+    magic, version, metadata_size, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} fleet checkpoint")
+    metadata = json.loads(data[HEADER.size:HEADER.size + metadata_size])
+    return _unpack(metadata, data, HEADER.size + metadata_size)
+
+
+class CheckpointWriter:
+    """Writes checkpoints to one file on a background thread.
+
+    The tick loop hands over a state it has already copied and carries on;
+    encoding and the disk write happen here. If a checkpoint is still being
+    written when the next one arrives, the newer one replaces any checkpoint
+    still waiting, so a slow disk costs freshness rather than tick time.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.written = 0
+        self.skipped = 0  # Superseded before they were written
+        self.last_tick: Optional[int] = None  # Tick of the newest checkpoint on disk
+        self.last_size = 0
+        self.last_error: Optional[Exception] = None
+        self.logger = FleetLogger()
+        self._pending: Optional[Dict] = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="FleetCheckpointWriter", daemon=True)
+        self._thread.start()
+
+    def submit(self, state: Dict):
+        with self._condition:
+            if self._pending is not None:
+                self.skipped += 1
+            self._pending = state
+            self._condition.notify()
+
+    def _next(self) -> Optional[Dict]:
+        with self._condition:
+            while self._pending is None and not self._closed:
+                self._condition.wait()
+            state, self._pending = self._pending, None
+            return state
+
+    def _run(self):
+        while True:
+            state = self._next()
+            if state is None:
+                return
+            try:
+                self.last_size = write_checkpoint(state, self.path)
+                self.last_tick = state.get("tick")
+                self.written += 1
+            except OSError as e:
+                self.last_error = e
+                self.logger.log("Checkpoint to %s failed: %s", self.path, e, level=LogLevel.ERROR)
+
+    def stats(self) -> Dict[str, Optional[int]]:
+        return {"written": self.written, "skipped": self.skipped, "last_tick": self.last_tick,
+                "last_size": self.last_size}
+
+    def close(self):
+        """Write the checkpoint still waiting, if any, and stop the thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+def sparse_dict(values: Dict[int, int], dtype=np.int64) -> Tuple[np.ndarray, np.ndarray]:
+    """(keys, values) arrays of an int -> int dictionary"""
+    count = len(values)
+    return (np.fromiter(values.keys(), dtype=np.int64, count=count),
+            np.fromiter(values.values(), dtype=dtype, count=count))
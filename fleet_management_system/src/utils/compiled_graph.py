@@ -0,0 +1,218 @@
+"""Compile a navigation graph JSON file into a memory-mappable binary cache.
+
+Usage (from fleet_management_system/): python -m src.utils.compiled_graph data/nav_graph.json
+
+The cache is written next to the JSON file (nav_graph.json -> nav_graph.navbin)
+and NavigationGraph uses it automatically while it is fresh, i.e. while the
+JSON file keeps the size and modification time recorded in the cache.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from .graph_file import NavGraphFile
+from .helpers import gc_paused
+
+MAGIC = b"FLEETNAV"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sHxxIqq")  # magic, format version, metadata size, source size, source mtime (ns)
+ALIGNMENT = 8
+CACHE_EXTENSION = ".navbin"
+CHARGER_FLAG = 1
+INTEGER_SPEED_FLAG = 1  # Lane flag: the JSON gave the speed limit as an integer
+
+# Per-level arrays in file order
+ARRAY_DTYPES = {
+    "x": np.float64,
+    "y": np.float64,
+    "flags": np.uint8,  # CHARGER_FLAG
+    "name_offsets": np.int64,  # names[name_offsets[i]:name_offsets[i + 1]] is vertex i's UTF-8 name
+    "names": np.uint8,
+    "lane_start": np.int32,
+    "lane_end": np.int32,
+    "speed_limit": np.float64,
+    "lane_flags": np.uint8,  # INTEGER_SPEED_FLAG
+    "neighbor_offsets": np.int64,  # CSR adjacency: neighbors of v are neighbors[offsets[v]:offsets[v + 1]]
+    "neighbors": np.int32,
+}
+
+
+@dataclass
+class CompiledLevel:
+    """Read-only NumPy views of one level's arrays inside the memory-mapped cache"""
+    name: str
+    x: np.ndarray
+    y: np.ndarray
+    flags: np.ndarray
+    name_offsets: np.ndarray
+    names: np.ndarray
+    lane_start: np.ndarray
+    lane_end: np.ndarray
+    speed_limit: np.ndarray
+    lane_flags: np.ndarray
+    neighbor_offsets: np.ndarray
+    neighbors: np.ndarray
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.x)
+
+    def vertex_names(self) -> List[str]:
+        blob = self.names.tobytes()
+        offsets = self.name_offsets.tolist()
+        return [blob[offsets[i]:offsets[i + 1]].decode('utf-8') for i in range(len(offsets) - 1)]
+
+    def speed_limits(self) -> List[float]:
+        """Lane speed limits as the JSON gave them, ints where it had integers"""
+        flags = self.lane_flags.tolist()
+        return [int(speed) if flags[i] & INTEGER_SPEED_FLAG else speed
+                for i, speed in enumerate(self.speed_limit.tolist())]
+
+    def neighbor_lists(self) -> Dict[int, List[int]]:
+        offsets = self.neighbor_offsets.tolist()
+        neighbors = self.neighbors.tolist()
+        return {vertex_id: neighbors[offsets[vertex_id]:offsets[vertex_id + 1]]
+                for vertex_id in range(len(offsets) - 1)}
+
+
+def cache_path(json_file: str) -> str:
+    return os.path.splitext(json_file)[0] + CACHE_EXTENSION
+
+
+def _source_stamp(json_file: str):
+    stat = os.stat(json_file)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _level_arrays(graph) -> Dict[str, np.ndarray]:
+    names = [vertex.name.encode('utf-8') for vertex in graph.vertices]
+    name_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(name) for name in names], out=name_offsets[1:])
+    neighbor_lists = [graph.adjacency[vertex.id] for vertex in graph.vertices]
+    neighbor_offsets = np.zeros(len(neighbor_lists) + 1, dtype=np.int64)
+    np.cumsum([len(neighbors) for neighbors in neighbor_lists], out=neighbor_offsets[1:])
+    return {
+        "x": np.array([vertex.x for vertex in graph.vertices]),
+        "y": np.array([vertex.y for vertex in graph.vertices]),
+        "flags": np.array([CHARGER_FLAG if vertex.is_charger else 0 for vertex in graph.vertices]),
+        "name_offsets": name_offsets,
+        "names": np.frombuffer(b"".join(names), dtype=np.uint8),
+        "lane_start": np.array([lane.start for lane in graph.lanes]),
+        "lane_end": np.array([lane.end for lane in graph.lanes]),
+        "speed_limit": np.array([lane.speed_limit for lane in graph.lanes], dtype=np.float64),
+        "lane_flags": np.array([INTEGER_SPEED_FLAG if isinstance(lane.speed_limit, int) else 0
+                                for lane in graph.lanes]),
+        "neighbor_offsets": neighbor_offsets,
+        "neighbors": np.array([v for neighbors in neighbor_lists for v in neighbors]),
+    }
+
+
+def compile_graph(json_file: str, output_file: Optional[str] = None) -> str:
+    """Write the binary cache of every level in json_file; returns its path.
+
+    Levels are built one at a time through NavigationGraph, so the cached
+    adjacency order (and with it planner tie-breaking) matches a JSON load.
+    """
+    from ..models.nav_graph import NavigationGraph
+
+    output_file = output_file or cache_path(json_file)
+    source_size, source_mtime = _source_stamp(json_file)
+    levels: Dict[str, Dict] = {}
+    chunks: List[bytes] = []
+    offset = 0
+    with NavGraphFile(json_file) as graph_file, gc_paused():
+        for level in graph_file.levels:
+            graph = NavigationGraph.from_level_data(graph_file.read_level(level), level)
+            arrays = {}
+            for key, array in _level_arrays(graph).items():
+                data = np.ascontiguousarray(array, dtype=ARRAY_DTYPES[key]).tobytes()
+                arrays[key] = [offset, len(data) // np.dtype(ARRAY_DTYPES[key]).itemsize]
+                padding = -len(data) % ALIGNMENT
+                chunks.append(data + b"\0" * padding)
+                offset += len(data) + padding
+            levels[level] = arrays
+    metadata = json.dumps({"levels": levels}).encode('utf-8')
+    metadata += b" " * (-(HEADER.size + len(metadata)) % ALIGNMENT)
+
+    temporary = output_file + ".tmp"
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata), source_size, source_mtime))
+        f.write(metadata)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temporary, output_file)
+    return output_file
+
+
+class CompiledGraph:
+    """Memory-mapped binary cache written by compile_graph(); level arrays are zero-copy views"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not a compiled navigation graph (truncated header)")
+            magic, version, metadata_size, self.source_size, self.source_mtime = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} compiled navigation graph")
+            self._levels: Dict[str, Dict[str, List[int]]] = json.loads(f.read(metadata_size))["levels"]
+            self._data_start = HEADER.size + metadata_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def open_fresh(cls, json_file: str) -> Optional["CompiledGraph"]:
+        """The cache next to json_file if it exists and matches the file's size and mtime, else None"""
+        path = cache_path(json_file)
+        if not os.path.exists(path):
+            return None
+        try:
+            compiled = cls(path)
+        except ValueError:
+            return None
+        if (compiled.source_size, compiled.source_mtime) != _source_stamp(json_file):
+            compiled.close()
+            return None
+        return compiled
+
+    @property
+    def levels(self) -> List[str]:
+        return list(self._levels)
+
+    def level(self, name: str) -> CompiledLevel:
+        if name not in self._levels:
+            raise ValueError(f"Level '{name}' not found in {self.path}, expected one of {self.levels}")
+        views = {
+            key: np.frombuffer(self._mmap, dtype=ARRAY_DTYPES[key], count=count, offset=self._data_start + offset)
+            for key, (offset, count) in self._levels[name].items()
+        }
+        return CompiledLevel(name, **views)
+
+    def close(self):
+        """Unmap the cache, or leave that to the last level() view still in use when it is collected"""
+        if self._mmap is None:
+            return
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass  # Views from level() still export the buffer; the mapping is released with them
+        self._mmap = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile a navigation graph JSON file into a binary cache')
+    parser.add_argument('graph', help='Navigation graph JSON file')
+    parser.add_argument('--output', help=f'Cache file to write (default: next to the JSON file, {CACHE_EXTENSION})')
+    args = parser.parse_args()
+    started = time.perf_counter()
+    output = compile_graph(args.graph, args.output)
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes) in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
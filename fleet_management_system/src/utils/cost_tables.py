@@ -0,0 +1,36 @@
+from collections import OrderedDict
+from typing import Optional, TYPE_CHECKING
+import numpy as np
+
+if TYPE_CHECKING:
+    from .path_planner import PathPlanner
+
+
+class CostTableCache:
+    """LRU cache of planner cost-to-target arrays, one float per vertex each.
+
+    Entry v of costs_to(t) is the planner cost from vertex v to t (inf when
+    unreachable), so costs from many robots are read with one fancy index.
+    Cleared whenever the graph version changes.
+    """
+
+    def __init__(self, planner: "PathPlanner", max_size: int = 128):
+        self.planner = planner
+        self.max_size = max_size
+        self._tables: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._version: Optional[int] = None
+
+    def costs_to(self, target_id: int) -> np.ndarray:
+        nav_graph = self.planner.nav_graph
+        if self._version != nav_graph.version:
+            self._tables.clear()
+            self._version = nav_graph.version
+        costs = self._tables.get(target_id)
+        if costs is not None:
+            self._tables.move_to_end(target_id)
+            return costs
+        costs = self.planner.costs_to(target_id)
+        self._tables[target_id] = costs
+        if len(self._tables) > self.max_size:
+            self._tables.popitem(last=False)
+        return costs
@@ -0,0 +1,204 @@
+import mmap
+import os
+import struct
+from enum import IntEnum
+from typing import Iterator, List, NamedTuple, Optional
+import numpy as np
+
+class EventType(IntEnum):
+    SPAWN = 1
+    ASSIGN = 2          # vertex_a = start, vertex_b = destination
+    MOVE = 3            # vertex_a = from, vertex_b = to
+    WAIT = 4            # vertex_a = current, vertex_b = blocked next vertex
+    RESUME = 5
+    LANE_GRANT = 6      # vertex_a/vertex_b = lane endpoints
+    LANE_RELEASE = 7
+    TASK_COMPLETE = 8
+    RUN_START = 9       # First record of a run appended to an existing log; robot_id is -1
+    STRANDED = 10       # Battery ran flat; vertex_a = where the robot stopped
+
+MAGIC = b"FLEETEVT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHH")          # magic, format version, record size
+RECORD = struct.Struct("<IiBxxxii")      # tick, robot_id, event type, vertex_a, vertex_b
+NO_VERTEX = -1
+# Only the event type is needed to find run boundaries without unpacking every record
+RECORD_DTYPE = np.dtype({"names": ["tick", "type"], "formats": ["<u4", "u1"], "offsets": [0, 8],
+                         "itemsize": RECORD.size})
+
+class Event(NamedTuple):
+    tick: int
+    robot_id: int
+    event_type: EventType
+    vertex_a: int
+    vertex_b: int
+
+class EventLogWriter:
+    """Append-only writer of fixed-width binary event records.
+
+    Records are packed into an in-memory buffer and written in large
+    chunks; `tick` is set by the simulation engine at the start of each step.
+    An existing log is only written to when `append` is set: the new run then
+    starts with a RUN_START record, because its ticks restart and readers
+    must treat it as a separate tick-ordered run.
+    """
+
+    def __init__(self, path: str, buffer_records: int = 4096, append: bool = False):
+        self.path = path
+        self.tick = 0
+        self._buffer = bytearray()
+        self._flush_at = buffer_records * RECORD.size
+        log_dir = os.path.dirname(path)
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            if not append:
+                raise FileExistsError(f"{path} already holds an event log; append to it or choose another file")
+            _read_header(path)
+            _drop_partial_record(path)
+        self._file = open(path, 'ab')
+        if is_new:
+            self._file.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size))
+        else:
+            self.record(EventType.RUN_START, -1)
+
+    def record(self, event_type: EventType, robot_id: int,
+               vertex_a: Optional[int] = None, vertex_b: Optional[int] = None):
+        self._buffer += RECORD.pack(
+            self.tick,
+            robot_id,
+            event_type,
+            NO_VERTEX if vertex_a is None else vertex_a,
+            NO_VERTEX if vertex_b is None else vertex_b,
+        )
+        if len(self._buffer) >= self._flush_at:
+            self.flush()
+
+    def flush(self):
+        if self._buffer and self._file:
+            self._file.write(self._buffer)
+            self._file.flush()
+            self._buffer = bytearray()
+
+    def close(self):
+        if self._file:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+def _read_header(path: str):
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path} is not a fleet event log (truncated header)")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} fleet event log")
+
+def _drop_partial_record(path: str):
+    """Cut off a record left half-written by a crash so appended records stay aligned"""
+    size = os.path.getsize(path)
+    partial = (size - HEADER.size) % RECORD.size
+    if partial:
+        with open(path, 'r+b') as f:
+            f.truncate(size - partial)
+
+class EventLogReader:
+    """Memory-mapped random access over one run of an event log written by EventLogWriter.
+
+    A log holds one run per simulation that wrote to it. Ticks are ordered
+    within a run but restart in the next one, so the reader exposes a single
+    run at a time (the last, unless `run` is given); indices are relative to it.
+    """
+
+    def __init__(self, path: str, run: int = -1):
+        _read_header(path)
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.path.getsize(path)
+        # A trailing partial record (e.g. crash mid-write) is ignored
+        self._total = (size - HEADER.size) // RECORD.size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._total else None
+        self.run_starts: List[int] = [0]
+        if self._total:
+            types = np.frombuffer(self._mmap, dtype=RECORD_DTYPE, count=self._total, offset=HEADER.size)["type"]
+            self.run_starts += [int(i) for i in np.flatnonzero(types == EventType.RUN_START) if i > 0]
+            del types  # The mmap cannot be closed while an array still views it
+        try:
+            self.select_run(run)
+        except IndexError:
+            self.close()
+            raise
+
+    @property
+    def runs(self) -> int:
+        return len(self.run_starts)
+
+    def select_run(self, run: int):
+        """Restrict indices, tick searches and iteration to one run (negative counts from the last)"""
+        if run < 0:
+            run += len(self.run_starts)
+        if not 0 <= run < len(self.run_starts):
+            raise IndexError(f"event log has {len(self.run_starts)} runs, not run {run}")
+        self.run = run
+        self._base = self.run_starts[run]
+        end = self.run_starts[run + 1] if run + 1 < len(self.run_starts) else self._total
+        self._count = end - self._base
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> Event:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return self._unpack(RECORD.unpack_from(self._mmap, HEADER.size + (self._base + index) * RECORD.size))
+
+    @staticmethod
+    def _unpack(fields) -> Event:
+        tick, robot_id, event_type, vertex_a, vertex_b = fields
+        return Event(tick, robot_id, EventType(event_type), vertex_a, vertex_b)
+
+    def tick_at(self, index: int) -> int:
+        return struct.unpack_from("<I", self._mmap, HEADER.size + (self._base + index) * RECORD.size)[0]
+
+    def index_after_tick(self, tick: int) -> int:
+        """Index of the first record with a tick greater than `tick` (records are tick-ordered)"""
+        low, high = 0, self._count
+        while low < high:
+            mid = (low + high) // 2
+            if self.tick_at(mid) <= tick:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def iter_events(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Event]:
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return
+        first = HEADER.size + self._base * RECORD.size
+        view = memoryview(self._mmap)[first + start * RECORD.size:first + stop * RECORD.size]
+        try:
+            for fields in RECORD.iter_unpack(view):
+                yield self._unpack(fields)
+        finally:
+            view.release()
+
+    @property
+    def last_tick(self) -> int:
+        return self.tick_at(self._count - 1) if self._count else 0
+
+    def close(self):
+        if self._mmap:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,166 @@
+import json
+import mmap
+import re
+from typing import Any, Dict, Tuple
+import numpy as np
+
+_WHITESPACE = re.compile(rb'[ \t\r\n]*')
+_STRING = re.compile(rb'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_SCALAR = re.compile(rb'[^,\]}\s]+')
+# Whole strings match with an empty group; brackets are captured
+_TOKENS = re.compile(rb'"(?:[^"\\]|\\.)*"|([\[\]{}])', re.DOTALL)
+# Strings once escaped quotes and backslashes are removed
+_PLAIN_STRING = re.compile(rb'"[^"]*"')
+_NOT_STRUCTURE = bytes(set(range(256)) - set(b'[]{}"'))
+_DEPTH_CHANGE = np.zeros(256, dtype=np.int64)
+_DEPTH_CHANGE[list(b'[{')] = 1
+_DEPTH_CHANGE[list(b']}')] = -1
+SCAN_CHUNK_BYTES = 1 << 20
+
+Span = Tuple[int, int]
+
+
+def _brackets(chunk: bytes) -> bytes:
+    """The brackets of a chunk outside strings, plus a quote if a string runs past its end"""
+    structure = chunk.replace(b'\\\\', b'').replace(b'\\"', b'').translate(None, _NOT_STRUCTURE)
+    return _PLAIN_STRING.sub(b'', structure)
+
+
+class NavGraphFile:
+    """Byte-range index of a navigation graph JSON file, decoded one section at a time.
+
+    The file is memory-mapped and scanned once for the position of every
+    top-level key and of every level under "levels", skipping over values
+    without decoding them. read() and read_level() then json-decode only
+    the requested slice, so a multi-floor site never has to be held in
+    memory as one document.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+        self.sections = self._object_spans(0, "top level")
+        self.levels: Dict[str, Span] = {}
+        if 'levels' in self.sections:
+            self.levels = self._object_spans(self.sections['levels'][0], "levels")
+
+    def __enter__(self) -> "NavGraphFile":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._file:
+            self._data.close()
+            self._file.close()
+            self._file = None
+
+    def read(self, key: str, default: Any = None) -> Any:
+        """Decode one top-level value"""
+        span = self.sections.get(key)
+        return self._decode(span) if span else default
+
+    def read_level(self, level: str) -> Dict:
+        """Decode one level's {"vertices", "lanes"} object"""
+        if level not in self.levels:
+            raise ValueError(f"Level '{level}' not found in {self.path}, expected one of {list(self.levels)}")
+        return self._decode(self.levels[level])
+
+    def _decode(self, span: Span) -> Any:
+        start, end = span
+        return json.loads(self._data[start:end])
+
+    def _error(self, message: str, position: int) -> ValueError:
+        return ValueError(f"{self.path}: {message} at byte {position}")
+
+    def _skip_whitespace(self, position: int) -> int:
+        return _WHITESPACE.match(self._data, position).end()
+
+    def _object_spans(self, position: int, where: str) -> Dict[str, Span]:
+        """Key -> (start, end) byte range of each value of the object starting at position"""
+        data = self._data
+        position = self._skip_whitespace(position)
+        if data[position:position + 1] != b'{':
+            raise self._error(f"expected an object for {where}", position)
+        spans: Dict[str, Span] = {}
+        position = self._skip_whitespace(position + 1)
+        if data[position:position + 1] == b'}':
+            return spans
+        while True:
+            key = _STRING.match(data, position)
+            if not key:
+                raise self._error(f"expected a key in {where}", position)
+            position = self._skip_whitespace(key.end())
+            if data[position:position + 1] != b':':
+                raise self._error("expected ':'", position)
+            start = self._skip_whitespace(position + 1)
+            end = self._skip_value(start)
+            spans[json.loads(key.group())] = (start, end)
+            position = self._skip_whitespace(end)
+            separator = data[position:position + 1]
+            if separator == b'}':
+                return spans
+            if separator != b',':
+                raise self._error(f"expected ',' or '}}' in {where}", position)
+            position = self._skip_whitespace(position + 1)
+
+    def _skip_value(self, position: int) -> int:
+        """Offset just past the JSON value starting at position"""
+        data = self._data
+        first = data[position:position + 1]
+        if first == b'"':
+            match = _STRING.match(data, position)
+        elif first in (b'{', b'['):
+            return self._skip_container(position)
+        else:
+            match = _SCALAR.match(data, position)
+        if not match:
+            raise self._error("expected a value", position)
+        return match.end()
+
+    def _skip_container(self, position: int) -> int:
+        """Offset just past the array or object starting at position.
+
+        Each chunk is reduced to its brackets outside strings with
+        bytes.translate() and one regex substitution, and the running
+        bracket depth is a NumPy cumulative sum; only the chunk that closes
+        the container is walked token by token.
+        """
+        data = self._data
+        depth = 1
+        position += 1
+        size = SCAN_CHUNK_BYTES
+        while position < len(data):
+            end = min(position + size, len(data))
+            chunk = data[position:end]
+            brackets = _brackets(chunk)
+            while b'"' in brackets and end < len(data):
+                # A string runs past the chunk: end the chunk where it opens (the last quote in
+                # the chunk, unless that quote is escaped inside the string; then look again)
+                cut = chunk.rfind(b'"')
+                if cut == 0:
+                    break
+                end = position + cut
+                chunk = data[position:end]
+                brackets = _brackets(chunk)
+            if b'"' in brackets and end < len(data):
+                size *= 2  # A single string longer than the chunk
+                continue
+            depths = depth + np.cumsum(_DEPTH_CHANGE[np.frombuffer(brackets, dtype=np.uint8)])
+            if len(depths) and depths.min() <= 0:
+                for token in _TOKENS.finditer(chunk):
+                    bracket = token.group(1)
+                    if bracket:
+                        depth += 1 if bracket in b'[{' else -1
+                        if depth == 0:
+                            return position + token.end()
+            if len(depths):
+                depth = int(depths[-1])
+            position = end
+        raise self._error("unterminated value", position)
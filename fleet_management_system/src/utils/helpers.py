@@ -1,7 +1,11 @@
-from typing import List, Optional
-from ..models.nav_graph import NavigationGraph
+import gc
+from contextlib import contextmanager
+from typing import List, Optional, TYPE_CHECKING
 
-def validate_nav_graph(nav_graph: NavigationGraph) -> bool:
+if TYPE_CHECKING:
+    from ..models.nav_graph import NavigationGraph
+
+def validate_nav_graph(nav_graph: "NavigationGraph") -> bool:
     """Validate the navigation graph structure"""
     if not nav_graph.vertices:
         return False
@@ -16,4 +20,15 @@ def validate_nav_graph(nav_graph: NavigationGraph) -> bool:
 
 def calculate_distance(v1: tuple, v2: tuple) -> float:
     """Calculate Euclidean distance between two points"""
-    return ((v1[0] - v2[0])**2 + (v1[1] - v2[1])**2)**0.5
\ No newline at end of file
+    return ((v1[0] - v2[0])**2 + (v1[1] - v2[1])**2)**0.5
+
+@contextmanager
+def gc_paused():
+    """Suspend the cyclic garbage collector while building many acyclic objects (e.g. loading a map)"""
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
@@ -0,0 +1,126 @@
+import heapq
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Key = Tuple[float, float]
+
+
+class DStarLite:
+    """Incremental shortest path from a moving start to a fixed goal (D* Lite, Koenig & Likhachev).
+
+    The search runs backwards from the goal, so g(v) is the cost from v to
+    the goal. When edge costs change only the vertices whose cost-to-goal is
+    affected are expanded again, and moving the start keeps earlier work
+    valid (the key modifier km keeps queued priorities consistent).
+    edges(v) gives {neighbour: cost} of the traversable edges leaving v (the
+    graph is undirected, though the two directions may cost differently) and
+    is read live; tell the search about changed edges with edges_changed()
+    before the next compute_shortest_path().
+    """
+
+    def __init__(self, start: int, goal: int, edges: Callable[[int], Dict[int, float]],
+                 heuristic: Callable[[int, int], float]):
+        self.start = start
+        self.goal = goal
+        self.edges = edges
+        self.heuristic = heuristic  # Admissible estimate of the cost between two vertices
+        self.km = 0.0
+        self.g: Dict[int, float] = {}
+        self.rhs: Dict[int, float] = {goal: 0.0}
+        self.expansions = 0
+        self._heap: List[Tuple[float, float, int]] = []
+        self._queued: Dict[int, Key] = {}  # Current key of every queued vertex; other heap entries are stale
+        self._push(goal)
+
+    def _key(self, vertex: int) -> Key:
+        best = min(self.g.get(vertex, math.inf), self.rhs.get(vertex, math.inf))
+        return best + self.heuristic(self.start, vertex) + self.km, best
+
+    def _push(self, vertex: int):
+        key = self._key(vertex)
+        self._queued[vertex] = key
+        heapq.heappush(self._heap, (key[0], key[1], vertex))
+
+    def _top(self) -> Tuple[Key, Optional[int]]:
+        heap = self._heap
+        while heap:
+            k1, k2, vertex = heap[0]
+            if self._queued.get(vertex) == (k1, k2):
+                return (k1, k2), vertex
+            heapq.heappop(heap)
+        return (math.inf, math.inf), None
+
+    def _update_vertex(self, vertex: int):
+        if vertex != self.goal:
+            g = self.g
+            best = math.inf
+            for neighbor, cost in self.edges(vertex).items():
+                total = cost + g.get(neighbor, math.inf)
+                if total < best:
+                    best = total
+            self.rhs[vertex] = best
+        if self.g.get(vertex, math.inf) != self.rhs.get(vertex, math.inf):
+            self._push(vertex)
+        else:
+            self._queued.pop(vertex, None)
+
+    def move_to(self, start: int):
+        """The robot moved; later keys are raised by how far the start moved"""
+        if start != self.start:
+            self.km += self.heuristic(self.start, start)
+            self.start = start
+
+    def edges_changed(self, edges: Iterable[Tuple[int, int]]):
+        """Re-evaluate both ends of every edge whose cost or existence changed"""
+        for v1, v2 in edges:
+            self._update_vertex(v1)
+            self._update_vertex(v2)
+
+    def compute_shortest_path(self):
+        start, g, rhs, heap, queued = self.start, self.g, self.rhs, self._heap, self._queued
+        heuristic, inf = self.heuristic, math.inf
+        while heap:
+            k1, k2, vertex = heap[0]
+            if queued.get(vertex) != (k1, k2):
+                heapq.heappop(heap)  # Stale entry
+                continue
+            g_start, rhs_start = g.get(start, inf), rhs.get(start, inf)
+            if g_start == rhs_start and (k1, k2) >= (g_start + self.km, g_start):
+                return
+            g_old, rhs_vertex = g.get(vertex, inf), rhs.get(vertex, inf)
+            best = min(g_old, rhs_vertex)
+            new_key = (best + heuristic(start, vertex) + self.km, best)
+            if (k1, k2) < new_key:
+                self._push(vertex)
+                continue
+            heapq.heappop(heap)
+            del queued[vertex]
+            self.expansions += 1
+            if g_old > rhs_vertex:
+                g[vertex] = rhs_vertex
+            else:
+                g[vertex] = inf
+                self._update_vertex(vertex)
+            for neighbor in self.edges(vertex):
+                self._update_vertex(neighbor)
+
+    def path(self) -> List[int]:
+        """Cheapest path from the start to the goal under the current costs, [] if there is none"""
+        if self.g.get(self.start, math.inf) == math.inf and self.start != self.goal:
+            return []
+        path = [self.start]
+        seen = {self.start}
+        current = self.start
+        g = self.g
+        while current != self.goal:
+            best, best_cost = None, math.inf
+            for neighbor, cost in self.edges(current).items():
+                total = cost + g.get(neighbor, math.inf)
+                if total < best_cost:
+                    best, best_cost = neighbor, total
+            if best is None or best in seen:
+                return []
+            path.append(best)
+            seen.add(best)
+            current = best
+        return path
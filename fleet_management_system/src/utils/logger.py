@@ -1,16 +1,236 @@
+import atexit
+import os
+import queue
+import threading
 import time
+import warnings
 from datetime import datetime
-from typing import Optional
-import os
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+class LogLevel(IntEnum):
+    DEBUG = 10
+    INFO = 20
+    WARNING = 30
+    ERROR = 40
+
+# (timestamp, message, args, print_to_console)
+LogRecord = Tuple[float, str, tuple, bool]
+
+class _LogWriter(threading.Thread):
+    """Background thread draining queued records to one log file in batches.
+
+    Shared by every FleetLogger pointing at the same file so rotation and
+    appends never race each other.
+    """
+
+    def __init__(self, log_file: str, buffer_size: int, batch_size: int,
+                 flush_interval: float, max_bytes: int, backup_count: int):
+        super().__init__(name=f"FleetLogWriter[{log_file}]", daemon=True)
+        self.log_file = log_file
+        self.records: "queue.Queue[Optional[LogRecord]]" = queue.Queue(maxsize=buffer_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.dropped = 0
+        self.file_lock = threading.Lock()
+        self._file = None
+        self._closed = False
+
+    @property
+    def options(self) -> Dict[str, float]:
+        """The keyword arguments this writer was created with, less the file"""
+        return {"buffer_size": self.records.maxsize, "batch_size": self.batch_size,
+                "flush_interval": self.flush_interval, "max_bytes": self.max_bytes,
+                "backup_count": self.backup_count}
+
+    def enqueue(self, record: LogRecord) -> bool:
+        if self._closed:
+            self.dropped += 1
+            return False
+        try:
+            self.records.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            if batch:
+                self._write_batch(batch)
+
+    def _next_batch(self) -> Optional[List[LogRecord]]:
+        """Block up to flush_interval for the first record, then take what is queued"""
+        batch: List[LogRecord] = []
+        try:
+            record = self.records.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return batch
+        while True:
+            if record is None:
+                self.records.task_done()
+                if batch:
+                    self._write_batch(batch)
+                self._close_file()
+                return None
+            batch.append(record)
+            if len(batch) >= self.batch_size:
+                return batch
+            try:
+                record = self.records.get_nowait()
+            except queue.Empty:
+                return batch
+
+    def _write_batch(self, batch: List[LogRecord]):
+        lines = []
+        for timestamp, message, args, print_to_console in batch:
+            if args:
+                try:
+                    message = message % args
+                except (TypeError, ValueError):
+                    message = f"{message} {args}"
+            stamp = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            entry = f"[{stamp}] {message}"
+            if print_to_console:
+                print(entry)
+            lines.append(entry)
+
+        with self.file_lock:
+            try:
+                self._write_lines(lines)
+            except IOError as e:
+                print(f"Failed to write to log file: {e}")
+        for _ in batch:
+            self.records.task_done()
+
+    def _write_lines(self, lines: List[str]):
+        """Append lines, rotating first whenever the next chunk would exceed max_bytes"""
+        handle = self._open_file()
+        chunk: List[str] = []
+        size = handle.tell()
+        for line in lines:
+            line_size = len(line) + 1
+            if self.max_bytes and size + line_size > self.max_bytes and size > 0:
+                if chunk:
+                    handle.write("\n".join(chunk) + "\n")
+                    chunk = []
+                self._rotate()
+                handle = self._open_file()
+                size = 0
+            chunk.append(line)
+            size += line_size
+        if chunk:
+            handle.write("\n".join(chunk) + "\n")
+        handle.flush()
+
+    def _open_file(self):
+        if self._file is None:
+            self._file = open(self.log_file, 'a', encoding='utf-8')
+        return self._file
+
+    def _close_file(self):
+        with self.file_lock:
+            self._close_file_unlocked()
+
+    def _close_file_unlocked(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        """Shift fleet_logs.txt -> .1 -> .2 ... dropping the oldest backup"""
+        self._file.close()
+        self._file = None
+        if self.backup_count <= 0:
+            os.remove(self.log_file)
+            return
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.log_file}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_file}.{index + 1}")
+        os.replace(self.log_file, f"{self.log_file}.1")
+
+    def truncate(self):
+        with self.file_lock:
+            self._close_file_unlocked()
+            with open(self.log_file, 'w', encoding='utf-8') as f:
+                f.write("")
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        if not self._closed:
+            self.records.join()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.records.put(None)
+        self.join(timeout=5)
+
+
+_writers: Dict[str, _LogWriter] = {}
+_writers_lock = threading.Lock()
+
+def _get_writer(log_file: str, **options) -> _LogWriter:
+    key = os.path.abspath(log_file)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or writer._closed:
+            writer = _LogWriter(log_file, **options)
+            writer.start()
+            _writers[key] = writer
+            return writer
+    ignored = {name: value for name, value in options.items() if writer.options[name] != value}
+    if ignored:
+        current = {name: writer.options[name] for name in ignored}
+        warnings.warn(f"Log file {log_file} is already written with {current}; ignoring {ignored}",
+                      RuntimeWarning, stacklevel=3)
+    return writer
+
+@atexit.register
+def shutdown_loggers():
+    """Flush and close every background writer (runs automatically at exit)"""
+    with _writers_lock:
+        writers = list(_writers.values())
+        _writers.clear()
+    for writer in writers:
+        writer.close()
 
 class FleetLogger:
-    def __init__(self, log_file: Optional[str] = None):
+    # Level used by loggers created without an explicit one; main.py adjusts it per run mode
+    default_level = LogLevel.DEBUG
+    # Metrics that time log calls under the "logging" phase; set by SimulationEngine.enable_metrics()
+    metrics = None
+
+    def __init__(self, log_file: Optional[str] = None, level: Optional[LogLevel] = None,
+                 buffer_size: int = 10000, batch_size: int = 512, flush_interval: float = 0.5,
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3):
         """
         Initialize the logger with an optional log file path.
-        If no path is provided, defaults to 'logs/fleet_logs.txt'
+        If no path is provided, defaults to 'logs/fleet_logs.txt'.
+        Records are queued and written by a background thread; when the
+        buffer of `buffer_size` records is full new records are dropped
+        rather than blocking the caller. The file rotates at `max_bytes`.
+        Loggers on the same file share one writer, which keeps the options
+        of the first; later loggers asking for others get a RuntimeWarning.
         """
         self.log_file = log_file if log_file else self._get_default_log_path()
+        self.level = level
         self._ensure_log_directory_exists()
+        self._writer = _get_writer(
+            self.log_file,
+            buffer_size=buffer_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_bytes=max_bytes,
+            backup_count=backup_count,
+        )
         
     def _get_default_log_path(self) -> str:
         return os.path.join("logs", "fleet_logs.txt")
@@ -19,22 +239,35 @@ class FleetLogger:
         log_dir = os.path.dirname(self.log_file)
         if log_dir and not os.path.exists(log_dir):
             os.makedirs(log_dir)
+
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        return level >= (self.level if self.level is not None else FleetLogger.default_level)
     
-    def log(self, message: str, print_to_console: bool = True):
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        log_entry = f"[{timestamp}] {message}"
-        
-        if print_to_console:
-            print(log_entry)
-        
-        self._write_to_file(log_entry)
-    
-    def _write_to_file(self, message: str):
-        try:
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(message + "\n")
-        except IOError as e:
-            print(f"Failed to write to log file: {e}")
+    def log(self, message: str, *args, print_to_console: bool = True, level: LogLevel = LogLevel.INFO):
+        """Queue a log entry without blocking.
+
+        `message % args` is only evaluated by the writer thread, and not at
+        all when `level` is filtered out.
+        """
+        if not self.is_enabled_for(level):
+            return
+        metrics = FleetLogger.metrics
+        if metrics is None:
+            self._writer.enqueue((time.time(), message, args, print_to_console))
+            return
+        started = time.perf_counter()
+        self._writer.enqueue((time.time(), message, args, print_to_console))
+        metrics.add_time("logging", time.perf_counter() - started)
+
+    def debug(self, message: str, *args):
+        self.log(message, *args, level=LogLevel.DEBUG)
+
+    @property
+    def dropped_records(self) -> int:
+        return self._writer.dropped
+
+    def flush(self):
+        self._writer.flush()
     
     def log_robot_event(self, robot_id: int, event: str, details: str = ""):
         self.log(f"Robot {robot_id} {event}. {details}".strip())
@@ -44,8 +277,8 @@ class FleetLogger:
     
     def clear_logs(self):
         try:
-            with open(self.log_file, 'w', encoding='utf-8') as f:
-                f.write("")
-            self.log("Logs cleared by user request", False)
+            self._writer.flush()
+            self._writer.truncate()
+            self.log("Logs cleared by user request", print_to_console=False)
         except IOError as e:
-            print(f"Failed to clear log file: {e}")
\ No newline at end of file
+            print(f"Failed to clear log file: {e}")
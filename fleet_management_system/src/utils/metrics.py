@@ -0,0 +1,225 @@
+"""Per-tick phase timers and event counters for the simulation loop.
+
+Timings are summed per phase over a tick and kept in rolling histograms of
+the last `window` ticks; counters are lifetime totals. Metrics.snapshot()
+returns both in-process, and MetricsServer serves them on a local port:
+
+    GET /metrics        Prometheus text exposition format
+    GET /metrics.json   the snapshot as JSON
+
+Metrics are disabled by default: timer() then hands back a shared no-op
+context manager, count() returns at once, and timed() leaves the wrapped
+function untouched, so the instrumentation costs close to nothing.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict
+import numpy as np
+
+# Phases the engine and GUI time; phases may nest (planning runs inside dispatch and manage_traffic)
+PHASES = ("tick", "dispatch", "planning", "manage_traffic", "movement", "collision_check", "publish",
+          "logging", "render")
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _PhaseTimer:
+    __slots__ = ("metrics", "phase", "started")
+
+    def __init__(self, metrics: "Metrics", phase: str):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.add_time(self.phase, time.perf_counter() - self.started)
+        return False
+
+
+class RollingHistogram:
+    """The last `window` samples in a ring buffer, plus lifetime count and sum"""
+
+    def __init__(self, window: int):
+        self.samples = np.zeros(window)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value: float):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+        self.total += value
+
+    def summary(self, scale: float = 1.0) -> Dict[str, float]:
+        """Lifetime count and mean, and percentiles and max of the window, multiplied by scale"""
+        if not self.count:
+            return {"count": 0}
+        window = self.samples[:min(self.count, len(self.samples))] * scale
+        result = {"count": self.count, "mean": self.total * scale / self.count}
+        for quantile, value in zip(QUANTILES, np.quantile(window, QUANTILES)):
+            result[f"p{quantile * 100:g}"] = float(value)
+        result["max"] = float(window.max())
+        return result
+
+
+class Metrics:
+    """Per-phase tick timings and event counters of one simulation.
+
+    Components time work with `with metrics.timer("phase"):` or
+    add_time(), and count events with count(); the engine calls end_tick()
+    once per tick to move the per-tick phase totals into the histograms.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1024):
+        self.enabled = enabled
+        self.window = window
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.ticks = 0
+        self.started = time.time()
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, phase: str):
+        """Context manager adding the time spent inside it to `phase` for this tick"""
+        return _PhaseTimer(self, phase) if self.enabled else _NULL_TIMER
+
+    def timed(self, phase: str, func: Callable) -> Callable:
+        """func wrapped to add each call's duration to `phase`; func itself when disabled"""
+        if not self.enabled:
+            return func
+        add_time = self.add_time
+        perf_counter = time.perf_counter
+
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_time(phase, perf_counter() - started)
+        return wrapper
+
+    def add_time(self, phase: str, seconds: float):
+        if self.enabled:
+            self._pending[phase] = self._pending.get(phase, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def end_tick(self):
+        """Record this tick's phase totals in the rolling histograms"""
+        if not self.enabled:
+            return
+        pending, self._pending = self._pending, {}
+        with self._lock:
+            for phase, seconds in pending.items():
+                histogram = self.histograms.get(phase)
+                if histogram is None:
+                    histogram = self.histograms[phase] = RollingHistogram(self.window)
+                histogram.add(seconds)
+            self.ticks += 1
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self._pending = {}
+            self.ticks = 0
+            self.started = time.time()
+
+    def snapshot(self) -> Dict:
+        """Counters and per-phase tick timings in milliseconds (count, mean, p50, p95, p99, max)"""
+        with self._lock:
+            phases = {phase: histogram.summary(1000.0) for phase, histogram in self.histograms.items()}
+            return {
+                "enabled": self.enabled,
+                "uptime_s": time.time() - self.started,
+                "ticks": self.ticks,
+                "counters": dict(self.counters),
+                "phases_ms": phases,
+            }
+
+    def prometheus_text(self) -> str:
+        """The snapshot in Prometheus text exposition format (phase timings in seconds)"""
+        with self._lock:
+            summaries = {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+            counters = dict(self.counters)
+            ticks = self.ticks
+        lines = ["# HELP fleet_ticks_total Simulation ticks recorded",
+                 "# TYPE fleet_ticks_total counter",
+                 f"fleet_ticks_total {ticks}",
+                 "# HELP fleet_events_total Simulation events by kind",
+                 "# TYPE fleet_events_total counter"]
+        lines += [f'fleet_events_total{{event="{name}"}} {value}' for name, value in sorted(counters.items())]
+        lines += ["# HELP fleet_phase_seconds Time spent per tick in each phase (recent ticks)",
+                  "# TYPE fleet_phase_seconds summary"]
+        for phase, summary in sorted(summaries.items()):
+            if not summary["count"]:
+                continue
+            for quantile in QUANTILES:
+                lines.append(f'fleet_phase_seconds{{phase="{phase}",quantile="{quantile:g}"}} '
+                             f'{summary[f"p{quantile * 100:g}"]:.9f}')
+            lines.append(f'fleet_phase_seconds_sum{{phase="{phase}"}} {summary["mean"] * summary["count"]:.9f}')
+            lines.append(f'fleet_phase_seconds_count{{phase="{phase}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves a Metrics object over HTTP on a background thread, bound to localhost by default"""
+
+    def __init__(self, metrics: Metrics, port: int = 9100, host: str = "127.0.0.1"):
+        self.metrics = metrics
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, name="FleetMetricsServer", daemon=True)
+        self.thread.start()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _handler_class(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == "/metrics":
+                    body = metrics.prometheus_text().encode('utf-8')
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode('utf-8')
+                    content_type = "application/json"
+                else:
+                    self.send_error(404, "Try /metrics or /metrics.json")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the console
+
+        return Handler
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,331 @@
+import heapq
+import math
+from typing import Callable, Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+import numpy as np
+from .helpers import calculate_distance
+
+if TYPE_CHECKING:
+    from ..models.nav_graph import NavigationGraph
+
+# Speed assumed for lanes whose speed_limit is unset (0 in the bundled maps)
+DEFAULT_SPEED = 1.0
+
+EdgeCost = Callable[["NavigationGraph", int, int], float]
+Csr = Tuple[List[int], List[int], List[float]]  # offsets, neighbour ids, edge weights
+
+
+def _vertex_distance(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    v1 = nav_graph.get_vertex_by_id(v1_id)
+    v2 = nav_graph.get_vertex_by_id(v2_id)
+    return calculate_distance((v1.x, v1.y), (v2.x, v2.y))
+
+
+def lane_speed(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    """Speed allowed on the lane between two vertices, falling back to DEFAULT_SPEED"""
+    lane = nav_graph.get_lane_between(v1_id, v2_id)
+    if lane and lane.speed_limit > 0:
+        return float(lane.speed_limit)
+    return DEFAULT_SPEED
+
+
+def distance_cost(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    return _vertex_distance(nav_graph, v1_id, v2_id)
+
+
+def travel_time_cost(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    return _vertex_distance(nav_graph, v1_id, v2_id) / lane_speed(nav_graph, v1_id, v2_id)
+
+
+def hop_cost(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    return 1.0
+
+
+def congested_travel_time_cost(nav_graph: "NavigationGraph", v1_id: int, v2_id: int) -> float:
+    """Travel time stretched by the lane's congestion; infinite across a blocked lane.
+
+    Read live on every call, so it is only meant for incremental planners that
+    are told which lanes changed; PathPlanner caches weights per graph version.
+    """
+    lane = nav_graph.get_lane_between(v1_id, v2_id)
+    if lane is None or not nav_graph.is_traversable(v1_id, v2_id):
+        return math.inf
+    return travel_time_cost(nav_graph, v1_id, v2_id) * (1.0 + lane.congestion)
+
+
+COST_MODELS: Dict[str, EdgeCost] = {
+    "distance": distance_cost,
+    "time": travel_time_cost,
+    "hops": hop_cost,
+}
+
+
+class PathPlanner:
+    """Binary-heap Dijkstra / A* over a NavigationGraph with a pluggable edge cost.
+
+    Edge weights are computed once per graph version into a flat (CSR)
+    adjacency: the edges leaving vertex v are entries offsets[v] to
+    offsets[v + 1] of the targets and weights lists. Searches keep their
+    state in lists indexed by vertex id rather than dictionaries.
+    """
+
+    ALGORITHMS = ("dijkstra", "astar")
+
+    def __init__(self, nav_graph: "NavigationGraph", cost_model: str = "time", algorithm: str = "astar"):
+        if cost_model not in COST_MODELS:
+            raise ValueError(f"Unknown cost model '{cost_model}', expected one of {list(COST_MODELS)}")
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"Unknown algorithm '{algorithm}', expected one of {list(self.ALGORITHMS)}")
+        self.nav_graph = nav_graph
+        self.cost_model = cost_model
+        self.algorithm = algorithm
+        self.edge_cost = COST_MODELS[cost_model]
+        self._offsets: List[int] = [0]
+        self._targets: List[int] = []
+        self._weights: List[float] = []
+        self._reverse_edges: Optional[Csr] = None  # Built on first costs_to() call
+        self._xs = np.zeros(0)
+        self._ys = np.zeros(0)
+        self._heuristic_scale = 0.0
+        self._graph_version: Optional[int] = None
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self._offsets) - 1
+
+    def _refresh(self):
+        """Rebuild the flat weighted adjacency if the graph changed since the last query"""
+        if self._graph_version == self.nav_graph.version:
+            return
+        graph = self.nav_graph
+        offsets, targets, weights = [0], [], []
+        for v1 in range(len(graph.vertices)):
+            for v2 in graph.get_neighbor_ids(v1):
+                if graph.is_traversable(v1, v2):
+                    targets.append(v2)
+                    weights.append(self.edge_cost(graph, v1, v2))
+            offsets.append(len(targets))
+        self._offsets, self._targets, self._weights = offsets, targets, weights
+        self._xs = np.array([v.x for v in graph.vertices], dtype=np.float64)
+        self._ys = np.array([v.y for v in graph.vertices], dtype=np.float64)
+        self._reverse_edges = None
+        self._heuristic_scale = self._compute_heuristic_scale()
+        self._graph_version = graph.version
+
+    def _compute_heuristic_scale(self) -> float:
+        """Factor turning straight-line distance into an admissible cost estimate"""
+        if self.cost_model == "distance":
+            return 1.0
+        if self.cost_model == "time":
+            speeds = [lane.speed_limit for lane in self.nav_graph.lanes if lane.speed_limit > 0]
+            return 1.0 / max(speeds + [DEFAULT_SPEED])
+        # Hop count: every edge covers at most the longest lane length
+        longest = max(
+            (_vertex_distance(self.nav_graph, v1, v2) for v1, v2 in self.nav_graph.get_edges()),
+            default=0.0,
+        )
+        return 1.0 / longest if longest > 0 else 0.0
+
+    def plan(self, start_id: int, end_id: int, avoid: Optional[Set[int]] = None) -> List[int]:
+        """Lowest-cost path from start_id to end_id, empty if unreachable.
+
+        Vertices in `avoid` are never entered (used to route around robots).
+        """
+        self._refresh()
+        n = self.vertex_count
+        if not (0 <= start_id < n and 0 <= end_id < n):
+            return []
+        if start_id == end_id:
+            return [start_id]
+
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        if self.algorithm == "astar" and self._heuristic_scale > 0.0:
+            # One vectorized pass for the whole map beats a hypot() per push on all but the shortest routes
+            estimates = (np.hypot(self._xs - self._xs[end_id], self._ys - self._ys[end_id])
+                         * self._heuristic_scale).tolist()
+        else:
+            estimates = [0.0] * n
+        blocked = bytearray(n)  # Settled or avoided
+        if avoid:
+            for vertex_id in avoid:
+                if 0 <= vertex_id < n:
+                    blocked[vertex_id] = 1
+        distances = [math.inf] * n
+        distances[start_id] = 0.0
+        previous = [-1] * n
+        push, pop = heapq.heappush, heapq.heappop
+        # Entries are (f, h, vertex): ties on f go to the vertex closest to the goal
+        heap = [(0.0, 0.0, start_id)]
+
+        while heap:
+            _, _, current = pop(heap)
+            if current == end_id:
+                return self._reconstruct(previous, end_id)
+            if blocked[current] and current != start_id:
+                continue
+            blocked[current] = 1
+            current_distance = distances[current]
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[edge]
+                if blocked[neighbor]:
+                    continue
+                new_distance = current_distance + weights[edge]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    previous[neighbor] = current
+                    estimate = estimates[neighbor]
+                    push(heap, (new_distance + estimate, estimate, neighbor))
+
+        return []
+
+    def first_hops_from(self, source_id: int) -> Dict[int, int]:
+        """Full Dijkstra from source_id, mapping each reachable vertex to the first hop towards it"""
+        self._refresh()
+        n = self.vertex_count
+        if not 0 <= source_id < n:
+            return {}
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        distances = [math.inf] * n
+        distances[source_id] = 0.0
+        first_hop: Dict[int, int] = {}
+        closed = bytearray(n)
+        heap = [(0.0, source_id)]
+
+        while heap:
+            current_distance, current = heapq.heappop(heap)
+            if closed[current]:
+                continue
+            closed[current] = 1
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[edge]
+                if closed[neighbor]:
+                    continue
+                new_distance = current_distance + weights[edge]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    first_hop[neighbor] = neighbor if current == source_id else first_hop[current]
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        return first_hop
+
+    def costs_from(self, source_id: int, target_ids: List[int], limit: Optional[int] = None) -> Dict[int, float]:
+        """Cost from source_id to the `limit` cheapest-to-reach of target_ids (all of them by default).
+
+        A forward Dijkstra that stops once that many targets are settled.
+        Fewer are returned only when the rest are unreachable.
+        """
+        self._refresh()
+        n = self.vertex_count
+        wanted = {target_id for target_id in target_ids if 0 <= target_id < n}
+        if not 0 <= source_id < n or not wanted:
+            return {}
+        limit = len(wanted) if limit is None else min(limit, len(wanted))
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        distances = [math.inf] * n
+        distances[source_id] = 0.0
+        found: Dict[int, float] = {}
+        heap = [(0.0, source_id)]
+
+        while heap:
+            current_distance, current = heapq.heappop(heap)
+            if current_distance > distances[current]:
+                continue
+            if current in wanted:
+                found[current] = current_distance
+                if len(found) == limit:
+                    break
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = targets[edge]
+                new_distance = current_distance + weights[edge]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        return found
+
+    def cost_lower_bounds(self, source_ids: List[int], target_ids: List[int]) -> np.ndarray:
+        """Straight-line estimates (the A* heuristic) of the cost from each source to each target"""
+        self._refresh()
+        sources = np.asarray(source_ids, dtype=np.int64)
+        targets = np.asarray(target_ids, dtype=np.int64)
+        return np.hypot(self._xs[sources][:, None] - self._xs[targets][None, :],
+                        self._ys[sources][:, None] - self._ys[targets][None, :]) * self._heuristic_scale
+
+    def _reverse(self) -> Csr:
+        """The flat adjacency with every edge turned around"""
+        if self._reverse_edges is None:
+            n = self.vertex_count
+            sources = np.repeat(np.arange(n), np.diff(self._offsets))
+            targets = np.array(self._targets, dtype=np.int64)
+            order = np.argsort(targets, kind="stable")
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(targets, minlength=n), out=offsets[1:])
+            self._reverse_edges = (offsets.tolist(), sources[order].tolist(),
+                                   np.array(self._weights, dtype=np.float64)[order].tolist())
+        return self._reverse_edges
+
+    def costs_to(self, target_id: int) -> np.ndarray:
+        """Cost of the cheapest path from every vertex to target_id, inf where none (reverse Dijkstra)"""
+        self._refresh()
+        n = self.vertex_count
+        if not 0 <= target_id < n:
+            return np.full(n, np.inf)
+        offsets, sources, weights = self._reverse()
+        distances = [math.inf] * n
+        distances[target_id] = 0.0
+        heap = [(0.0, target_id)]
+
+        while heap:
+            current_distance, current = heapq.heappop(heap)
+            if current_distance > distances[current]:
+                continue
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = sources[edge]
+                new_distance = current_distance + weights[edge]
+                if new_distance < distances[neighbor]:
+                    distances[neighbor] = new_distance
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        return np.array(distances)
+
+    def nearest_targets(self, target_ids: List[int], k: int = 1) -> Dict[int, List[Tuple[float, int]]]:
+        """The k cheapest-to-reach targets from every vertex as (cost, target), nearest first.
+
+        One multi-source Dijkstra over the reversed graph, seeded with every
+        target; each vertex is settled at most once per target and at most k
+        times in total.
+        """
+        self._refresh()
+        offsets, sources, weights = self._reverse()
+        n = self.vertex_count
+        nearest: Dict[int, List[Tuple[float, int]]] = {}
+        settled = set()  # (vertex, target)
+        heap = [(0.0, target_id, target_id) for target_id in target_ids if 0 <= target_id < n]
+        heapq.heapify(heap)
+
+        while heap:
+            cost, current, target_id = heapq.heappop(heap)
+            found = nearest.setdefault(current, [])
+            if len(found) >= k or (current, target_id) in settled:
+                continue
+            settled.add((current, target_id))
+            found.append((cost, target_id))
+            for edge in range(offsets[current], offsets[current + 1]):
+                neighbor = sources[edge]
+                if (neighbor, target_id) not in settled and len(nearest.get(neighbor, ())) < k:
+                    heapq.heappush(heap, (cost + weights[edge], neighbor, target_id))
+
+        return nearest
+
+    @staticmethod
+    def _reconstruct(previous: List[int], end_id: int) -> List[int]:
+        path = []
+        current = end_id
+        while current != -1:
+            path.append(current)
+            current = previous[current]
+        path.reverse()
+        return path
+
+    def path_cost(self, path: List[int]) -> float:
+        """Total cost of a path under this planner's cost model"""
+        return sum(self.edge_cost(self.nav_graph, path[i], path[i + 1]) for i in range(len(path) - 1))
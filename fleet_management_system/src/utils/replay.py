@@ -0,0 +1,76 @@
+"""Rebuild fleet state from a binary event log.
+
+Usage (from fleet_management_system/): python -m src.utils.replay logs/events.bin --tick 120 [--run 0]
+"""
+import argparse
+from dataclasses import dataclass
+from typing import Dict, Optional
+from ..models.robot import RobotStatus
+from .event_log import EventLogReader, EventType
+
+@dataclass
+class ReplayedRobot:
+    id: int
+    vertex_id: int
+    status: RobotStatus = RobotStatus.IDLE
+    destination_id: Optional[int] = None
+    blocked_vertex_id: Optional[int] = None
+    moves: int = 0
+    waits: int = 0
+
+def replay_state(reader: EventLogReader, tick: int) -> Dict[int, ReplayedRobot]:
+    """Rebuild every robot's state as it was at the end of `tick` in the reader's run"""
+    robots: Dict[int, ReplayedRobot] = {}
+    stop = reader.index_after_tick(tick)
+    for event in reader.iter_events(0, stop):
+        if event.event_type == EventType.RUN_START:
+            robots.clear()
+            continue
+        if event.event_type == EventType.SPAWN:
+            robots[event.robot_id] = ReplayedRobot(event.robot_id, event.vertex_a)
+            continue
+        robot = robots.get(event.robot_id)
+        if robot is None:
+            continue
+        if event.event_type == EventType.ASSIGN:
+            robot.destination_id = event.vertex_b
+            robot.status = RobotStatus.MOVING
+            robot.blocked_vertex_id = None
+        elif event.event_type == EventType.MOVE:
+            robot.vertex_id = event.vertex_b
+            robot.moves += 1
+        elif event.event_type == EventType.WAIT:
+            robot.status = RobotStatus.WAITING
+            robot.blocked_vertex_id = event.vertex_b
+            robot.waits += 1
+        elif event.event_type == EventType.RESUME:
+            robot.status = RobotStatus.MOVING
+            robot.blocked_vertex_id = None
+        elif event.event_type == EventType.TASK_COMPLETE:
+            robot.status = RobotStatus.TASK_COMPLETE
+        elif event.event_type == EventType.STRANDED:
+            robot.status = RobotStatus.STRANDED
+    return robots
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild fleet state from a binary event log')
+    parser.add_argument('event_log', help='Event log written with --event-log')
+    parser.add_argument('--tick', type=int, help='Tick to reconstruct (default: last recorded tick)')
+    parser.add_argument('--run', type=int, default=-1,
+                        help='Run to replay when several simulations appended to the log (default: the last)')
+    args = parser.parse_args()
+
+    with EventLogReader(args.event_log, run=args.run) as reader:
+        tick = args.tick if args.tick is not None else reader.last_tick
+        robots = replay_state(reader, tick)
+        print(f"Run {reader.run + 1} of {reader.runs}: {len(reader)} events, last tick {reader.last_tick}; "
+              f"state at tick {tick}:")
+        for robot in sorted(robots.values(), key=lambda r: r.id):
+            status = robot.status.name
+            if robot.status == RobotStatus.WAITING:
+                status += f" for {robot.blocked_vertex_id}"
+            print(f"  Robot {robot.id}: vertex {robot.vertex_id}, {status}, "
+                  f"destination {robot.destination_id}, {robot.moves} moves, {robot.waits} waits")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+
+class RouteCache:
+    """Bounded LRU cache of planned routes with hit/miss counters"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._routes: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[List[int]]:
+        route = self._routes.get(key)
+        if route is None:
+            self.misses += 1
+            return None
+        self._routes.move_to_end(key)
+        self.hits += 1
+        return list(route)
+
+    def put(self, key: Hashable, route: List[int]):
+        if self.max_size <= 0:
+            return
+        self._routes[key] = list(route)
+        self._routes.move_to_end(key)
+        while len(self._routes) > self.max_size:
+            self._routes.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Drop every cached route, e.g. after the graph changed"""
+        if self._routes:
+            self._routes.clear()
+        self.invalidations += 1
+
+    def reset_stats(self):
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._routes),
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
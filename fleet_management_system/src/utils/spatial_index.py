@@ -0,0 +1,106 @@
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+# (item id, x, y)
+IndexedPoint = Tuple[int, float, float]
+
+
+class SpatialGrid:
+    """Uniform grid over 2D points for nearest-within-radius queries.
+
+    Points are bucketed into square cells; a query only visits the cells
+    overlapping its radius, so picking costs O(points per cell) regardless
+    of the total number of points. By default the cell size is chosen so
+    that cells hold about one point on average.
+    """
+
+    def __init__(self, points: Iterable[IndexedPoint] = (), cell_size: Optional[float] = None):
+        points = list(points)
+        self.cell_size = cell_size if cell_size else self._auto_cell_size(points)
+        self.cells: Dict[Tuple[int, int], List[IndexedPoint]] = {}
+        self.positions: Dict[int, Tuple[float, float]] = {}
+        for item_id, x, y in points:
+            self.insert(item_id, x, y)
+
+    @classmethod
+    def from_arrays(cls, xs: np.ndarray, ys: np.ndarray) -> "SpatialGrid":
+        """Index points 0..n-1 given as coordinate arrays, computing their cells in one vectorized pass"""
+        grid = cls()
+        if len(xs) >= 2:
+            grid.cell_size = cls._cell_size_for(float(xs.max() - xs.min()), float(ys.max() - ys.min()), len(xs))
+        x_list, y_list = xs.tolist(), ys.tolist()
+        grid.positions = dict(zip(range(len(x_list)), zip(x_list, y_list)))
+        cells = zip(np.floor(xs / grid.cell_size).astype(np.int64).tolist(),
+                    np.floor(ys / grid.cell_size).astype(np.int64).tolist())
+        for item_id, (cell, x, y) in enumerate(zip(cells, x_list, y_list)):
+            grid.cells.setdefault(cell, []).append((item_id, x, y))
+        return grid
+
+    @staticmethod
+    def _auto_cell_size(points: List[IndexedPoint]) -> float:
+        if len(points) < 2:
+            return 1.0
+        xs = [x for _, x, _ in points]
+        ys = [y for _, _, y in points]
+        return SpatialGrid._cell_size_for(max(xs) - min(xs), max(ys) - min(ys), len(points))
+
+    @staticmethod
+    def _cell_size_for(width: float, height: float, count: int) -> float:
+        area = width * height
+        if area <= 0:
+            # Collinear points: spread them along the longer side instead
+            return max(width, height) / count or 1.0
+        return math.sqrt(area / count)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, item_id: int, x: float, y: float):
+        if item_id in self.positions:
+            self.remove(item_id)
+        self.positions[item_id] = (x, y)
+        self.cells.setdefault(self._cell(x, y), []).append((item_id, x, y))
+
+    def remove(self, item_id: int):
+        position = self.positions.pop(item_id, None)
+        if position is None:
+            return
+        key = self._cell(*position)
+        bucket = [point for point in self.cells[key] if point[0] != item_id]
+        if bucket:
+            self.cells[key] = bucket
+        else:
+            del self.cells[key]
+
+    def clear(self):
+        self.cells.clear()
+        self.positions.clear()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def within(self, x: float, y: float, radius: float) -> List[Tuple[float, int]]:
+        """(squared distance, id) of every point within radius of (x, y), nearest first"""
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+        radius_sq = radius * radius
+        found = []
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(self.cells):
+            # Query larger than the occupied area: scanning the buckets is cheaper
+            buckets = self.cells.values()
+        else:
+            buckets = (self.cells.get((cx, cy), ())
+                       for cx in range(min_cx, max_cx + 1) for cy in range(min_cy, max_cy + 1))
+        for bucket in buckets:
+            for item_id, px, py in bucket:
+                distance_sq = (px - x) ** 2 + (py - y) ** 2
+                if distance_sq <= radius_sq:
+                    found.append((distance_sq, item_id))
+        found.sort()
+        return found
+
+    def nearest(self, x: float, y: float, radius: float) -> Optional[int]:
+        """Id of the closest point within radius of (x, y), or None"""
+        found = self.within(x, y, radius)
+        return found[0][1] if found else None
@@ -0,0 +1,227 @@
+"""Run a grid of headless simulations in parallel and aggregate the results.
+
+Usage (from fleet_management_system/): python -m src.utils.sweep data/sweeps/capacity.json --workers 8
+
+A sweep file names the graph and a parameter grid; every combination is run
+`repeats` times with different seeds:
+
+    {"graph": "data/nav_graph.json", "level": "level1", "max_ticks": 2000, "repeats": 3,
+     "grid": {"robots": [2, 4, 8], "layout": ["random", "clustered"], "jobs": [20],
+              "job_interval": [0, 5], "motion": ["discrete"], "battery_range": [null, 60]}}
+
+The graph is compiled once into its binary cache (see compiled_graph) and
+every worker process memory-maps that file, so it is neither re-parsed nor
+pickled per run; each worker builds its NavigationGraph once and reuses it.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import numpy as np
+from .compiled_graph import CompiledGraph, compile_graph
+
+LAYOUTS = ("random", "clustered")
+# Parameters of a run and their defaults when the grid does not vary them
+DEFAULT_PARAMETERS = {"robots": 4, "layout": "random", "jobs": 20, "job_interval": 0, "motion": "discrete",
+                      "battery_range": None}
+# Run statistics averaged over repeats in the report
+REPORTED = ("ticks", "jobs_completed", "jobs_per_100_ticks", "wait_fraction", "latency_ticks_p50",
+            "latency_ticks_p95", "waits", "deadlocks", "cpu_seconds")
+
+_graph = None  # This worker's NavigationGraph, built once by _init_worker
+
+
+def expand_grid(grid: Dict[str, List], repeats: int, seed: int) -> List[Dict]:
+    """One parameter dictionary per combination of grid values and repeat"""
+    unknown = set(grid) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters {sorted(unknown)}, expected {list(DEFAULT_PARAMETERS)}")
+    names = list(grid)
+    runs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        for repeat in range(repeats):
+            runs.append({**DEFAULT_PARAMETERS, **dict(zip(names, values)), "repeat": repeat, "seed": seed + repeat,
+                         "run": len(runs)})
+    return runs
+
+
+def _spawn_vertices(graph, count: int, layout: str, rng: random.Random) -> List[int]:
+    vertex_count = len(graph.vertices)
+    if count > vertex_count:
+        raise ValueError(f"Cannot spawn {count} robots on {vertex_count} vertices")
+    if layout == "random":
+        return rng.sample(range(vertex_count), count)
+    if layout == "clustered":
+        # Breadth-first from a random vertex, so the fleet starts packed into one area
+        start = rng.randrange(vertex_count)
+        order, seen, queue = [], {start}, deque([start])
+        while queue and len(order) < count:
+            vertex_id = queue.popleft()
+            order.append(vertex_id)
+            for neighbor in graph.get_neighbor_ids(vertex_id):
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+        return order + rng.sample([v for v in range(vertex_count) if v not in seen], count - len(order))
+    raise ValueError(f"Unknown layout '{layout}', expected one of {LAYOUTS}")
+
+
+def build_scenario(graph, params: Dict) -> Dict:
+    """Scenario dictionary (as read by SimulationEngine.load_scenario) for one run's parameters"""
+    rng = random.Random(f"{params['seed']}:{params['robots']}:{params['layout']}:{params['jobs']}")
+    vertex_count = len(graph.vertices)
+    scenario = {"robots": [{"spawn": v} for v in _spawn_vertices(graph, params['robots'], params['layout'], rng)]}
+    scenario["jobs"] = [{"tick": index * params['job_interval'], "pickup": pickup, "drop": drop}
+                        for index, (pickup, drop) in
+                        enumerate(rng.sample(range(vertex_count), 2) for _ in range(params['jobs']))]
+    if params['battery_range']:
+        scenario["battery"] = {"range": params['battery_range']}
+    return scenario
+
+
+def _init_worker(graph_file: str, level: str):
+    """Build this worker's graph once; robots print every assignment, which is kept off the console"""
+    global _graph
+    from ..models.nav_graph import NavigationGraph
+    from .logger import FleetLogger, LogLevel
+
+    FleetLogger.default_level = LogLevel.ERROR
+    sys.stdout = open(os.devnull, 'w')
+    _graph = NavigationGraph(graph_file, level)
+
+
+def run_one(params: Dict, max_ticks: int) -> Dict:
+    """Simulate one parameter set on this worker's graph until idle or max_ticks"""
+    from ..controllers.simulation_engine import SimulationEngine
+    from ..models.robot import RobotStatus
+
+    started = time.process_time()
+    engine = SimulationEngine(_graph, motion=params['motion'])
+    metrics = engine.enable_metrics()
+    engine.load_scenario(build_scenario(_graph, params))
+    fleet = engine.fleet_manager
+    wait_ticks = 0
+    while engine.tick < max_ticks and not engine.is_idle():
+        engine.step()
+        wait_ticks += fleet.count_with_status(RobotStatus.WAITING)
+    engine.close()
+
+    jobs = engine.dispatcher.metrics()
+    robot_ticks = engine.tick * params['robots']
+    return {
+        **params,
+        "ticks": engine.tick,
+        "finished": engine.is_idle(),
+        "jobs_completed": jobs['completed'],
+        "jobs_failed": jobs['failed'],
+        "jobs_per_100_ticks": 100.0 * jobs['completed'] / engine.tick if engine.tick else 0.0,
+        "wait_fraction": wait_ticks / robot_ticks if robot_ticks else 0.0,
+        "latency_ticks_p50": jobs.get('latency_ticks_p50', 0.0),
+        "latency_ticks_p95": jobs.get('latency_ticks_p95', 0.0),
+        "waits": metrics.counters.get('waits', 0),
+        "deadlocks": metrics.counters.get('deadlocks', 0),
+        "cpu_seconds": time.process_time() - started,
+    }
+
+
+def aggregate(results: List[Dict], varied: List[str]) -> List[Dict]:
+    """Mean (and for throughput the spread) of every reported statistic per parameter combination"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for result in results:
+        groups.setdefault(tuple(result[name] for name in varied), []).append(result)
+    summary = []
+    for key, runs in sorted(groups.items(), key=lambda item: [str(v) for v in item[0]]):
+        row = dict(zip(varied, key))
+        row["runs"] = len(runs)
+        row["unfinished"] = sum(not run['finished'] for run in runs)
+        for name in REPORTED:
+            row[name] = float(np.mean([run[name] for run in runs]))
+        row["jobs_per_100_ticks_std"] = float(np.std([run['jobs_per_100_ticks'] for run in runs]))
+        summary.append(row)
+    return summary
+
+
+def ensure_compiled(graph_file: str) -> bool:
+    """Compile graph_file's binary cache unless a fresh one exists; False if it cannot be written"""
+    compiled = CompiledGraph.open_fresh(graph_file)
+    if compiled is not None:
+        compiled.close()
+        return True
+    try:
+        compile_graph(graph_file)
+        return True
+    except OSError:
+        return False
+
+
+def run_sweep(spec: Dict, workers: Optional[int] = None, seed: int = 0) -> Dict:
+    graph_file, level = spec['graph'], spec.get('level', 'level1')
+    max_ticks = spec.get('max_ticks', 2000)
+    grid = {name: values if isinstance(values, list) else [values] for name, values in spec['grid'].items()}
+    runs = expand_grid(grid, spec.get('repeats', 1), seed)
+    if not ensure_compiled(graph_file):
+        print(f"Could not write a binary cache next to {graph_file}; every worker parses the JSON")
+    workers = workers or os.cpu_count() or 1
+
+    started = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(runs)), initializer=_init_worker,
+                             initargs=(graph_file, level)) as executor:
+        futures = [executor.submit(run_one, params, max_ticks) for params in runs]
+        for done, future in enumerate(as_completed(futures), 1):
+            results.append(future.result())
+            print(f"\r{done}/{len(runs)} runs", end="", flush=True)
+    print()
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda result: result['run'])
+    return {
+        "meta": {"graph": graph_file, "level": level, "max_ticks": max_ticks, "workers": workers, "seed": seed,
+                 "runs": len(runs), "wall_seconds": elapsed,
+                 "cpu_seconds": sum(result['cpu_seconds'] for result in results)},
+        "summary": aggregate(results, [name for name in grid if len(grid[name]) > 1] or list(grid)),
+        "runs": results,
+    }
+
+
+def print_summary(report: Dict):
+    summary = report["summary"]
+    if not summary:
+        return
+    keys = [key for key in summary[0] if key not in REPORTED and key not in ("runs", "jobs_per_100_ticks_std")]
+    header = "".join(f"{key:>14}" for key in keys)
+    print(f"{header}{'jobs/100t':>11}{'wait %':>8}{'lat p50':>9}{'lat p95':>9}{'deadlocks':>10}{'ticks':>8}")
+    for row in summary:
+        values = "".join(f"{str(row[key]):>14}" for key in keys)
+        print(f"{values}{row['jobs_per_100_ticks']:>11.2f}{row['wait_fraction']:>8.1%}"
+              f"{row['latency_ticks_p50']:>9.1f}{row['latency_ticks_p95']:>9.1f}{row['deadlocks']:>10.1f}"
+              f"{row['ticks']:>8.0f}")
+    meta = report["meta"]
+    print(f"{meta['runs']} runs in {meta['wall_seconds']:.1f}s on {meta['workers']} workers "
+          f"({meta['cpu_seconds'] / meta['wall_seconds']:.1f} CPU seconds of simulation per second)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a parameter grid of headless simulations in parallel')
+    parser.add_argument('sweep', help='Sweep JSON file (graph, level, max_ticks, repeats, grid)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the first repeat')
+    parser.add_argument('--output', help='Write the full report (summary and every run) as JSON')
+    args = parser.parse_args()
+    with open(args.sweep) as f:
+        spec = json.load(f)
+    report = run_sweep(spec, args.workers, args.seed)
+    print_summary(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,12 @@
+import os
+import sys
+import pytest
+
+# Tests import the application as `src.…` and `benchmarks.…`, like `python -m benchmarks.run` does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def _log_to_tmp_path(tmp_path, monkeypatch):
+    """FleetLogger writes to logs/ under the working directory; keep that out of the source tree"""
+    monkeypatch.chdir(tmp_path)
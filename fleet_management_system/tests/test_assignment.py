@@ -0,0 +1,33 @@
+import itertools
+import numpy as np
+import pytest
+from src.utils.assignment import min_cost_assignment
+
+
+def brute_force_cost(cost: np.ndarray) -> float:
+    """Lowest total cost over every way of matching the shorter side to distinct members of the longer"""
+    if cost.shape[0] > cost.shape[1]:
+        cost = cost.T
+    rows, columns = cost.shape
+    return min(cost[range(rows), list(chosen)].sum() for chosen in itertools.permutations(range(columns), rows))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_hungarian_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    for rows in range(1, 6):
+        for columns in range(1, 6):
+            if seed % 2:
+                cost = rng.uniform(0.0, 100.0, size=(rows, columns))
+            else:  # Small integer costs give plenty of ties
+                cost = rng.integers(0, 10, size=(rows, columns)).astype(np.float64)
+            pairs = min_cost_assignment(cost)
+            assert len(pairs) == min(rows, columns)
+            assert pairs == sorted(pairs)
+            assert len({row for row, _ in pairs}) == len(pairs) == len({column for _, column in pairs})
+            total = sum(cost[row, column] for row, column in pairs)
+            assert total == pytest.approx(brute_force_cost(cost))
+
+
+def test_empty_cost_matrix():
+    assert min_cost_assignment(np.zeros((0, 3))) == []
@@ -0,0 +1,55 @@
+import json
+import pytest
+from src.models.building import Building, RouteLeg
+
+
+def corridor():
+    """Vertices 0-1-2 one unit apart, so each lane takes a second at the default speed"""
+    lanes = [[a, b, {"speed_limit": 0}] for a, b in ((0, 1), (1, 2))]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return {"vertices": [[float(x), 0.0, {}] for x in range(3)], "lanes": lanes}
+
+
+@pytest.fixture
+def three_floors(tmp_path):
+    def build(slow_lift_seconds: float) -> Building:
+        document = {
+            "building_name": "test_site",
+            "levels": {"level1": corridor(), "level2": corridor(), "level3": corridor(),
+                       "basement": {"vertices": [[0.0, 0.0, {}]], "lanes": []}},
+            "lifts": {"main": {"stops": {"level1": 2, "level2": 0, "level3": 0}, "seconds_per_level": 5},
+                      "slow": {"stops": {"level1": 0, "level3": 2}, "seconds_per_level": slow_lift_seconds}},
+        }
+        path = tmp_path / "site.json"
+        path.write_text(json.dumps(document), encoding='utf-8')
+        return Building(str(path))
+
+    return build
+
+
+@pytest.mark.parametrize("slow_lift_seconds, expected", [
+    (8, [RouteLeg("level1", [0, 1, 2]), RouteLeg("level3", [0, 1, 2], "main")]),  # 2 + 10 + 2 < 16
+    (6, [RouteLeg("level1", [0]), RouteLeg("level3", [2], "slow")]),  # 12 < 14
+])
+def test_route_takes_the_fastest_lift(three_floors, slow_lift_seconds, expected):
+    building = three_floors(slow_lift_seconds)
+    assert building.find_route("level1", 0, "level3", 2) == expected
+    building.close()
+
+
+def test_search_only_builds_the_levels_it_reaches(three_floors):
+    building = three_floors(6)
+    assert building.loaded_levels == []
+    route = building.find_route("level1", 0, "level2", 2)
+    assert route == [RouteLeg("level1", [0, 1, 2]), RouteLeg("level2", [0, 1, 2], "main")]
+    assert building.loaded_levels == ["level1", "level2"]  # Level 3 is queued at 12s but the goal is 9s away
+    building.close()
+
+
+def test_same_level_and_unreachable_routes(three_floors):
+    building = three_floors(6)
+    assert building.find_route("level2", 2, "level2", 0) == [RouteLeg("level2", [2, 1, 0])]
+    assert building.find_route("level1", 0, "basement", 0) == []
+    with pytest.raises(ValueError, match="Unknown vertex 7"):
+        building.find_route("level1", 7, "level2", 0)
+    building.close()
@@ -0,0 +1,36 @@
+import numpy as np
+from benchmarks.generators import build_graph
+from src.controllers.charger_scheduler import ChargerScheduler
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.robot import RobotStatus
+
+
+def test_low_robot_drives_to_a_charger_and_its_wait_is_recorded():
+    engine = SimulationEngine(build_graph("grid", 100))
+    chargers = engine.enable_batteries(200.0)
+    robot = engine.spawn_robot(5)
+    robot.battery = 0.2
+    engine.run(ticks=30)
+    assert robot.status == RobotStatus.CHARGING and robot.current_vertex_id in chargers.chargers
+    metrics = chargers.metrics()
+    assert metrics["sessions"] == 1 and metrics["wait_ticks_mean"] == list(chargers.wait_ticks)[0] > 0
+    engine.close()
+
+
+def test_wait_sample_is_bounded_but_the_mean_covers_every_session(monkeypatch):
+    monkeypatch.setattr(ChargerScheduler, "WAIT_SAMPLE_LIMIT", 10)
+    engine = SimulationEngine(build_graph("grid", 100))
+    chargers = engine.enable_batteries(200.0)
+    robot = engine.spawn_robot(0)
+    for tick in range(100):
+        chargers.requested_tick[robot.id] = 0
+        chargers._plug_in(robot, tick)
+    assert list(chargers.wait_ticks) == list(range(90, 100))
+    metrics = chargers.metrics()
+    assert metrics["sessions"] == 100 and metrics["wait_ticks_mean"] == 49.5
+    assert metrics["wait_ticks_p95"] == np.percentile(range(90, 100), 95)
+
+    restored = ChargerScheduler(engine.fleet_manager)
+    restored.restore_state(chargers.checkpoint_state())
+    assert restored.metrics()["wait_ticks_mean"] == 49.5 and not restored.wait_ticks
+    engine.close()
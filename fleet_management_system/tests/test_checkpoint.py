@@ -0,0 +1,86 @@
+import random
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.robot import RobotStatus
+from src.utils.checkpoint import read_checkpoint, write_checkpoint
+from src.utils.event_log import EventLogReader
+from src.utils.replay import replay_state
+
+TICKS = 240
+CHECKPOINT_TICK = 90
+
+
+def scenario(vertex_count: int, robots: int, seed: int = 3):
+    rng = random.Random(seed)
+    return {
+        "robots": [{"spawn": vertex} for vertex in rng.sample(range(vertex_count), robots)],
+        "jobs": [{"tick": rng.randrange(TICKS // 2), "pickup": rng.randrange(vertex_count),
+                  "drop": rng.randrange(vertex_count)} for _ in range(4 * robots)],
+        "lanes": [{"tick": 10, "lane": [0, 1], "blocked": True},
+                  {"tick": TICKS - 40, "lane": [0, 1], "blocked": False}],
+        "battery": {"range": 60.0},
+    }
+
+
+def fleet_state(engine: SimulationEngine):
+    store = engine.fleet_manager.store
+    return (engine.tick, store.vertex[:store.count].tolist(), store.status[:store.count].tolist(),
+            store.battery[:store.count].copy(), engine.dispatcher.completed, engine.dispatcher.failed)
+
+
+@pytest.mark.parametrize("motion", ["discrete", "continuous"])
+def test_restored_engine_continues_tick_for_tick(motion, tmp_path):
+    path = str(tmp_path / "fleet.ckpt")
+    original = SimulationEngine(build_graph("grid", 225), motion=motion)
+    original.load_scenario(scenario(len(original.nav_graph.vertices), 30))
+    expected = []
+    while original.tick < TICKS:
+        if original.tick == CHECKPOINT_TICK:
+            write_checkpoint(original.checkpoint_state(), path)
+        original.step()
+        if original.tick > CHECKPOINT_TICK:
+            expected.append(fleet_state(original))
+
+    restored = SimulationEngine(build_graph("grid", 225), motion=motion)
+    restored.restore_state(read_checkpoint(path))
+    assert restored.tick == CHECKPOINT_TICK
+    while restored.tick < TICKS:
+        restored.step()
+        tick, vertices, statuses, battery, completed, failed = expected[restored.tick - CHECKPOINT_TICK - 1]
+        state = fleet_state(restored)
+        assert state[0] == tick
+        assert state[1] == vertices, f"robots diverged at tick {tick}"
+        assert state[2] == statuses
+        assert np.allclose(state[3], battery)
+        assert state[4:] == (completed, failed)
+    assert expected[-1][4] > 0  # The run got far enough to finish jobs after the checkpoint
+    original.close()
+    restored.close()
+
+
+def test_event_log_of_a_restored_run_replays_on_its_own(tmp_path):
+    original = SimulationEngine(build_graph("grid", 225))
+    original.load_scenario(scenario(len(original.nav_graph.vertices), 30))
+    original.run(ticks=30)  # Robots are on jobs: moving, waiting and done
+    state = original.checkpoint_state()
+    original.close()
+
+    events = str(tmp_path / "events.bin")
+    restored = SimulationEngine(build_graph("grid", 225), event_log_file=events)
+    restored.restore_state(state)
+    restored.run(ticks=5)
+    restored.event_log.flush()
+    robots = restored.fleet_manager.get_all_robots()
+    with EventLogReader(events) as reader:
+        replayed = replay_state(reader, restored.tick)
+    assert sorted(replayed) == [robot.id for robot in robots]
+    assert [replayed[robot.id].vertex_id for robot in robots] == [robot.current_vertex_id for robot in robots]
+    on_task = [robot for robot in robots
+               if robot.status in (RobotStatus.MOVING, RobotStatus.WAITING, RobotStatus.TASK_COMPLETE)]
+    assert any(robot.status == RobotStatus.MOVING for robot in on_task)
+    for robot in on_task:
+        assert replayed[robot.id].status == robot.status
+        assert replayed[robot.id].destination_id == robot.task.destination_id
+    restored.close()
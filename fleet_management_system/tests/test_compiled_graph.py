@@ -0,0 +1,43 @@
+import json
+import os
+from src.models.nav_graph import NavigationGraph
+from src.utils.compiled_graph import CompiledGraph, compile_graph
+
+
+def write_graph(path: str):
+    """Two equally long routes from 0 to 3; only the fractional speed limits make 0-2-3 the faster"""
+    level = {
+        "vertices": [[0.0, 0.0, {"name": "A"}], [1.0, 1.0, {}], [1.0, -1.0, {"is_charger": True}], [2.0, 0.0, {}]],
+        "lanes": [[0, 1, {"speed_limit": 1}], [1, 3, {"speed_limit": 1}],
+                  [0, 2, {"speed_limit": 1.5}], [2, 3, {"speed_limit": 1.5}], [3, 0, {}]],
+    }
+    with open(path, 'w') as f:
+        json.dump({"levels": {"level1": level}}, f)
+
+
+def test_cached_load_matches_json_load(tmp_path):
+    path = str(tmp_path / "site.json")
+    write_graph(path)
+    from_json = NavigationGraph(path)
+    compile_graph(path)
+    compiled = CompiledGraph.open_fresh(path)
+    assert compiled is not None
+    compiled.close()
+    from_cache = NavigationGraph(path)
+
+    assert from_cache.vertices == from_json.vertices
+    assert [(lane.start, lane.end, lane.speed_limit, type(lane.speed_limit)) for lane in from_cache.lanes] == \
+           [(lane.start, lane.end, lane.speed_limit, type(lane.speed_limit)) for lane in from_json.lanes]
+    assert from_cache.adjacency == from_json.adjacency
+    assert from_json.find_shortest_path(0, 3) == [0, 2, 3]
+    assert from_cache.find_shortest_path(0, 3) == [0, 2, 3]
+
+
+def test_stale_cache_is_ignored(tmp_path):
+    path = str(tmp_path / "site.json")
+    write_graph(path)
+    compile_graph(path)
+    with open(path, 'a') as f:
+        f.write("\n")
+    assert CompiledGraph.open_fresh(path) is None
+    assert os.path.exists(str(tmp_path / "site.navbin"))
@@ -0,0 +1,132 @@
+from typing import List, Tuple
+from src.controllers.deadlock_detector import DeadlockDetector, DeadlockRecord
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.nav_graph import NavigationGraph
+
+
+def two_way_graph(coordinates: List[Tuple[float, float]], edges: List[Tuple[int, int]]) -> NavigationGraph:
+    lanes = [[a, b, {}] for a, b in edges] + [[b, a, {}] for a, b in edges]
+    return NavigationGraph.from_level_data({"vertices": [[x, y, {}] for x, y in coordinates], "lanes": lanes},
+                                           "level1")
+
+
+def corridor_with_sidings() -> NavigationGraph:
+    """Corridor 0-1-2-3 with a siding off 1 (vertex 4) and one off 2 (vertex 5)"""
+    return two_way_graph([(0, 0), (1, 0), (2, 0), (3, 0), (1, 1), (2, 1)], [(0, 1), (1, 2), (2, 3), (1, 4), (2, 5)])
+
+
+def triangle_with_hub() -> NavigationGraph:
+    return two_way_graph([(0, 0), (2, 0), (1, 2), (1, 0.7)], [(0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3)])
+
+
+def engine_with_routes(graph: NavigationGraph, routes: List[List[int]]) -> SimulationEngine:
+    """Robots spawned on their routes' first vertices and sent along them as given, without re-planning"""
+    engine = SimulationEngine(graph)
+    for route in routes:
+        robot = engine.spawn_robot(route[0])
+        engine.assign_task(robot.id, route[-1], route)
+    return engine
+
+
+def test_detector_finds_a_swap_and_times_it():
+    detector = DeadlockDetector()
+    assert detector.set_waiting_on(1, 2, 5) is None
+    record = detector.set_waiting_on(2, 1, 5)
+    assert record is not None and record.robots == (2, 1)
+    assert detector.active == {1: record, 2: record}
+    detector.clear(1, 8)
+    assert record.resolved_tick == 8 and record.duration == 3
+    assert not detector.active
+    assert detector.summary() == {"detected": 1, "resolved": 1, "mean_duration": 3.0, "longest": 3}
+
+
+def test_detector_finds_a_three_robot_cycle_once():
+    detector = DeadlockDetector()
+    assert detector.set_waiting_on(1, 2, 0) is None
+    assert detector.set_waiting_on(2, 3, 0) is None
+    assert detector.set_waiting_on(4, 1, 0) is None  # Queued behind the cycle, not part of it
+    record = detector.set_waiting_on(3, 1, 1)
+    assert record is not None and record.robots == (3, 1, 2)
+    assert detector.set_waiting_on(5, 3, 2) is None
+    assert detector.detected == 1 and 4 not in detector.active
+
+
+def test_cycle_that_reforms_soon_reopens_its_record():
+    detector = DeadlockDetector()
+    detector.set_waiting_on(1, 2, 0)
+    record = detector.set_waiting_on(2, 1, 0)
+    record.victim, record.attempts = 2, 1
+    detector.clear(2, 3)
+
+    detector.set_waiting_on(2, 1, 3 + DeadlockDetector.REOPEN_TICKS)  # Robot 1 still waits on robot 2
+    assert detector.detected == 1 and detector.resolved == 0
+    assert detector.active[1] is record and record.resolved_tick is None
+    assert record.victim is None and record.attempts == 1  # Open for the resolver again, one attempt in
+
+    detector.clear(2, 20)
+    detector.set_waiting_on(2, 1, 21 + DeadlockDetector.REOPEN_TICKS)
+    assert detector.detected == 2 and detector.active[1] is not record  # Too late: a new deadlock
+
+
+def test_history_is_bounded_but_totals_are_not(monkeypatch):
+    monkeypatch.setattr(DeadlockDetector, "HISTORY_LIMIT", 5)
+    detector = DeadlockDetector()
+    for index in range(8):
+        a, b = 2 * index, 2 * index + 1
+        detector.set_waiting_on(a, b, index)
+        detector.set_waiting_on(b, a, index)
+        detector.clear(a, index + 1)
+    assert len(detector.report()) == 5
+    assert detector.summary()["detected"] == 8 and detector.summary()["resolved"] == 8
+
+
+def test_head_on_swap_in_a_corridor_is_resolved():
+    engine = engine_with_routes(corridor_with_sidings(), [[0, 1, 2, 3], [3, 2, 1, 0]])
+    engine.run(ticks=30, until_idle=True)
+    assert [robot.current_vertex_id for robot in engine.fleet_manager.get_all_robots()] == [3, 0]
+    report = engine.traffic_manager.deadlock_report()
+    assert [entry["robots"] for entry in report] == [[1, 0]]
+    assert report[0]["resolved_tick"] is not None and report[0]["resolution"] in ("reroute", "backoff")
+    engine.close()
+
+
+def test_three_robot_cycle_is_resolved():
+    engine = engine_with_routes(triangle_with_hub(), [[0, 1], [1, 2], [2, 0]])
+    engine.run(ticks=30, until_idle=True)
+    assert [robot.current_vertex_id for robot in engine.fleet_manager.get_all_robots()] == [1, 2, 0]
+    report = engine.traffic_manager.deadlock_report()
+    assert len(report) == 1 and sorted(report[0]["robots"]) == [0, 1, 2]
+    assert report[0]["resolved_tick"] is not None
+    engine.close()
+
+
+def test_reformed_deadlock_makes_the_next_robot_give_way():
+    engine = engine_with_routes(corridor_with_sidings(), [[0, 1, 2, 3], [3, 2, 1, 0]])
+    engine.step()
+    engine.step()  # The robots meet between vertices 1 and 2
+    traffic = engine.traffic_manager
+    record = traffic.deadlocks.active[0]
+    traffic._resolve_deadlock(record)
+    first = record.victim
+    record.victim = None  # As when the detector reopens the record
+    traffic._resolve_deadlock(record)
+    assert {first, record.victim} == {0, 1}
+    assert record.attempts == 2
+    engine.close()
+
+
+def test_backing_off_again_retreats_off_the_other_robots_route():
+    # Robot 0 at vertex 2 is headed for 3; robot 1 at 3 is headed down the corridor and into branch 4
+    graph = two_way_graph([(0, 0), (1, 0), (2, 0), (3, 0), (-1, 1), (-1, -1)],
+                          [(0, 1), (1, 2), (2, 3), (0, 4), (0, 5)])
+    engine = engine_with_routes(graph, [[2, 3], [3, 2, 1, 0, 4]])
+    traffic = engine.traffic_manager
+    traffic.fleet_manager = engine.fleet_manager
+    robot = engine.fleet_manager.get_robot(0)
+    record = DeadlockRecord((0, 1), 0)
+    assert traffic._back_off(robot, record)[:2] == [2, 1]  # First time: the nearest free vertex
+    record.attempts = 1
+    path = traffic._back_off(robot, record)
+    assert path[:4] == [2, 1, 0, 5]  # Again: clear of robot 1's route, then wait and come back
+    assert path[4:7] == [5, 5, 5] and path[-1] == 3
+    engine.close()
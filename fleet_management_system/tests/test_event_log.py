@@ -0,0 +1,77 @@
+import random
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.utils.event_log import RECORD, Event, EventLogReader, EventLogWriter, EventType
+from src.utils.replay import replay_state
+
+
+def write_run(path: str, events, append: bool = False, buffer_records: int = 4096):
+    writer = EventLogWriter(path, buffer_records=buffer_records, append=append)
+    for tick, robot_id, event_type, vertex_a, vertex_b in events:
+        writer.tick = tick
+        writer.record(event_type, robot_id, vertex_a, vertex_b)
+    writer.close()
+
+
+def random_events(seed: int, count: int):
+    rng = random.Random(seed)
+    tick, events = 0, []
+    for _ in range(count):
+        tick += rng.random() < 0.3
+        events.append(Event(tick, rng.randrange(50), rng.choice([EventType.MOVE, EventType.WAIT, EventType.ASSIGN]),
+                            rng.randrange(1000), rng.randrange(1000)))
+    return events
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / "events.bin")
+    events = random_events(0, 5000)
+    write_run(path, events, buffer_records=64)  # Several flushes
+    with EventLogReader(path) as reader:
+        assert reader.runs == 1
+        assert list(reader.iter_events()) == events
+        assert reader[0] == events[0] and reader[-1] == events[-1]
+        assert reader.last_tick == events[-1].tick
+        for tick in (-1, 0, events[len(events) // 2].tick, events[-1].tick):
+            assert reader.index_after_tick(tick) == sum(1 for event in events if event.tick <= tick)
+
+
+def test_appended_runs_are_read_separately(tmp_path):
+    path = str(tmp_path / "events.bin")
+    first, second = random_events(1, 300), random_events(2, 200)
+    write_run(path, first)
+    with pytest.raises(FileExistsError):
+        EventLogWriter(path)
+    with open(path, 'ab') as f:
+        f.write(b"\0" * (RECORD.size // 2))  # A record cut short by a crash
+    write_run(path, second, append=True)
+
+    with EventLogReader(path, run=0) as reader:
+        assert reader.runs == 2
+        assert list(reader.iter_events()) == first
+        reader.select_run(1)
+        appended = list(reader.iter_events())
+    assert appended[0].event_type == EventType.RUN_START and appended[0].robot_id == -1
+    assert appended[1:] == second
+    with pytest.raises(IndexError):
+        EventLogReader(path, run=2)
+
+
+def test_replay_rebuilds_the_final_fleet_state(tmp_path):
+    path = str(tmp_path / "events.bin")
+    engine = SimulationEngine(build_graph("grid", 100), event_log_file=path)
+    rng = random.Random(4)
+    vertex_count = len(engine.nav_graph.vertices)
+    engine.load_scenario({"robots": [{"spawn": vertex} for vertex in rng.sample(range(vertex_count), 8)],
+                          "jobs": [{"pickup": rng.randrange(vertex_count), "drop": rng.randrange(vertex_count)}
+                                   for _ in range(12)]})
+    engine.run(ticks=80)
+    engine.close()
+
+    with EventLogReader(path) as reader:
+        robots = replay_state(reader, reader.last_tick)
+    assert any(robot.moves for robot in robots.values())
+    assert sorted(robots) == [robot.id for robot in engine.fleet_manager.get_all_robots()]
+    for robot in engine.fleet_manager.get_all_robots():
+        assert robots[robot.id].vertex_id == robot.current_vertex_id
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.fleet_delta import DELTA_HEADER, FleetDelta, RobotRow
+from src.models.robot import RobotStatus
+
+
+def sample_rows():
+    return [RobotRow(0, 3, RobotStatus.IDLE, None, None, 1.0, 0.0, -2.5),
+            RobotRow(7, 12, RobotStatus.MOVING, 13, 40, 0.25, 1.5, 3.0),
+            RobotRow(2**31 - 1, 0, RobotStatus.CHARGING, None, 5, 0.5, -1e3, 1e3)]
+
+
+def test_rows_survive_encode_and_decode():
+    delta = FleetDelta.from_rows(4, 9, 120, sample_rows())
+    data = delta.encode()
+    assert len(data) == DELTA_HEADER.size + 29 * len(delta)
+    decoded = FleetDelta.decode(data)
+    assert (decoded.since, decoded.version, decoded.tick, len(decoded)) == (4, 9, 120, 3)
+    assert list(decoded.rows()) == sample_rows()  # Sample values are exact in float32
+    assert FleetDelta.decode(FleetDelta.from_rows(0, 0, 0, []).encode()).ids.tolist() == []
+
+
+def test_engine_changes_survive_encode_and_decode():
+    engine = SimulationEngine(build_graph("grid", 100))
+    for vertex_id in range(0, 50, 5):
+        engine.spawn_robot(vertex_id)
+    first = engine.changes_since(0)
+    engine.assign_task(3, 99)
+    engine.run(ticks=3)
+    delta = engine.changes_since(first.version)
+    assert 0 < len(delta) < len(first)
+    for original in (first, delta):
+        rows = list(FleetDelta.decode(original.encode()).rows())
+        expected = list(original.rows())
+        assert [row._replace(battery=0, x=0, y=0) for row in rows] == \
+            [row._replace(battery=0, x=0, y=0) for row in expected]
+        assert np.allclose([row[5:] for row in rows], [row[5:] for row in expected])
+    engine.close()
+
+
+def test_foreign_data_is_rejected():
+    data = FleetDelta.from_rows(0, 1, 1, sample_rows()).encode()
+    with pytest.raises(ValueError, match="Not a fleet delta"):
+        FleetDelta.decode(b"XXXX" + data[4:])
+    with pytest.raises(ValueError, match="Unsupported fleet delta format version 9"):
+        FleetDelta.decode(data[:4] + (9).to_bytes(2, 'little') + data[6:])
+
@@ -0,0 +1,59 @@
+import random
+from benchmarks.generators import build_graph
+from src.controllers.fleet_manager import FleetManager
+from src.models.fleet_store import NO_VERTEX, FleetStore
+from src.models.robot import Robot, RobotStatus
+
+
+def test_rows_survive_growth_and_new_rows_get_defaults():
+    store = FleetStore(capacity=2)
+    for vertex_id in range(9):
+        store.add(vertex_id, RobotStatus.IDLE.value)
+        store.battery[vertex_id] = 0.5
+    assert store.count == 9 and len(store.vertex) >= 9
+    assert store.vertex[:9].tolist() == list(range(9))
+    assert store.battery[:9].tolist() == [0.5] * 9
+    assert store.destination[:9].tolist() == [NO_VERTEX] * 9 and store.next_vertex[:9].tolist() == [NO_VERTEX] * 9
+    assert store.battery[9:].tolist() == [1.0] * (len(store.battery) - 9)
+
+
+def test_views_follow_paths_through_compaction():
+    rng = random.Random(0)
+    store = FleetStore(capacity=4, path_capacity=32)
+    robots = [Robot(store, store.add(0, RobotStatus.IDLE.value)) for _ in range(10)]
+    expected = {}
+    compactions = 0
+    for _ in range(500):
+        robot = rng.choice(robots)
+        path = [rng.randrange(100) for _ in range(rng.randrange(1, 12))]
+        garbage = store.paths_garbage
+        robot.assign_task(path[-1], path)
+        if store.paths_garbage < garbage:
+            compactions += 1
+        if len(path) > 2 and rng.random() < 0.5:
+            robot.task.current_path_index = 1
+        expected[robot.id] = (path, robot.task.current_path_index)
+        for robot_id, (path, index) in expected.items():
+            view = robots[robot_id]
+            assert view.task.path == path and view.task.destination_id == path[-1]
+            assert view.task.current_path_index == index
+            assert view.get_next_vertex() == (path[index + 1] if index + 1 < len(path) else None)
+    assert compactions > 0
+    assert store.paths_used - store.paths_garbage == sum(len(path) for path, _ in expected.values())
+    assert len(store.paths) <= 4 * 10 * 11  # Replaced paths are reclaimed rather than piling up
+
+
+def test_status_masks_match_the_robot_views():
+    graph = build_graph("grid", 100)
+    fleet = FleetManager(graph)
+    rng = random.Random(1)
+    statuses = list(RobotStatus)
+    for vertex_id in range(40):
+        fleet.spawn_robot(vertex_id).status = rng.choice(statuses)
+    robots = fleet.get_all_robots()
+    for chosen in ([RobotStatus.MOVING], [RobotStatus.WAITING, RobotStatus.CHARGING], statuses, []):
+        matching = [robot for robot in robots if robot.status in chosen]
+        assert fleet.robots_with_status(*chosen) == matching
+        assert fleet.count_with_status(*chosen) == len(matching)
+        assert fleet.store.ids_with_status(*(status.value for status in chosen)).tolist() == \
+            [robot.id for robot in matching]
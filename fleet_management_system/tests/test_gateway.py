@@ -0,0 +1,134 @@
+import base64
+import json
+import socket
+from typing import Dict, List
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.fleet_delta import FleetDelta
+
+
+class Client:
+    """Blocking JSON-lines client for a gateway on the loopback interface"""
+
+    def __init__(self, address):
+        self.socket = socket.create_connection(address, timeout=5)
+        self.lines = self.socket.makefile('rb')
+        self.next_id = 0
+
+    def send(self, **request) -> int:
+        self.next_id += 1
+        self.socket.sendall(json.dumps({"id": self.next_id, **request}).encode('utf-8') + b"\n")
+        return self.next_id
+
+    def receive(self) -> Dict:
+        return json.loads(self.lines.readline())
+
+    def receive_reply(self, request_id: int, updates: List[Dict] = None) -> Dict:
+        """The reply to a request; state and delta messages on the way are appended to updates"""
+        while True:
+            message = self.receive()
+            if message.get("id") == request_id:
+                return message
+            assert "type" in message, f"reply to another request: {message}"
+            if updates is not None:
+                updates.append(message)
+
+    def sync(self):
+        """Wait until the gateway has read everything sent so far (a status reply follows it)"""
+        self.receive_reply(self.send(op="status"))
+
+    def close(self):
+        self.lines.close()
+        self.socket.close()
+
+
+@pytest.fixture
+def gateway_engine():
+    engine = SimulationEngine(build_graph("grid", 25))
+    engine.enable_gateway(port=0)
+    yield engine
+    engine.close()
+
+
+def test_commands_apply_on_the_next_tick_and_subscribers_get_deltas(gateway_engine):
+    engine = gateway_engine
+    client = Client(engine.gateway.address)
+    subscribe = client.send(op="subscribe")
+    assert client.receive() == {"id": subscribe, "ok": True, "result": {"tick": 0, "version": 0}}
+    assert client.receive() == {"type": "state", "tick": 0, "version": 0, "robots": []}
+
+    spawns = [client.send(op="spawn", vertex=vertex) for vertex in (0, 24)]
+    client.sync()
+    assert engine.fleet_manager.get_all_robots() == []  # Queued, not applied
+    engine.step()
+    updates = []
+    assert [client.receive_reply(request, updates)["result"] for request in spawns] == [{"robot": 0}, {"robot": 1}]
+    while not updates:
+        updates.append(client.receive())
+    assert updates[0]["type"] == "delta"
+    assert [(robot["id"], robot["vertex"]) for robot in updates[0]["robots"]] == [(0, 0), (1, 24)]
+
+    assign = client.send(op="assign", robot=0, destination=4)
+    client.sync()
+    tick = engine.tick
+    engine.step()
+    assert client.receive_reply(assign) == {"id": assign, "ok": True, "result": {"tick": tick}}
+    engine.run(ticks=20, until_idle=True)
+    status = client.receive_reply(client.send(op="status", robot=0))["result"]
+    assert status["tick"] == engine.tick and status["robot"]["vertex"] == 4
+    client.close()
+
+
+@pytest.mark.parametrize("request_fields, error", [
+    ({"op": "spawn"}, "Missing field 'vertex'"),
+    ({"op": "spawn", "vertex": "3"}, "Field 'vertex' must be an integer, got '3'"),
+    ({"op": "spawn", "vertex": True}, "Field 'vertex' must be an integer, got True"),
+    ({"op": "spawn", "vertex": 25}, "Unknown vertex 25"),
+    ({"op": "assign", "robot": 0}, "Missing field 'destination'"),
+    ({"op": "job", "pickup": 1, "drop": 2, "priority": 1.5}, "Field 'priority' must be an integer, got 1.5"),
+    ({"op": "status", "robot": 9}, "Unknown robot 9"),
+    ({"op": "subscribe", "encoding": "xml"}, "Unknown encoding 'xml', expected 'json' or 'packed'"),
+    ({"op": "launch"}, "Unknown op 'launch'"),
+])
+def test_malformed_requests_are_refused_without_a_tick(gateway_engine, request_fields, error):
+    client = Client(gateway_engine.gateway.address)
+    request = client.send(**request_fields)
+    reply = client.receive()
+    assert reply["id"] == request and reply["ok"] is False and reply["error"].startswith(error)
+    assert not gateway_engine.gateway._commands
+    client.close()
+
+
+def test_bad_lines_and_command_errors_keep_the_connection_open(gateway_engine):
+    client = Client(gateway_engine.gateway.address)
+    client.socket.sendall(b"not json\n[1, 2]\n")
+    assert client.receive()["error"].startswith("Bad request")
+    assert client.receive()["error"] == "Bad request: expected a JSON object"
+    spawn, again, assign = (client.send(op="spawn", vertex=3), client.send(op="spawn", vertex=3),
+                            client.send(op="assign", robot=5, destination=4))
+    client.sync()
+    gateway_engine.step()
+    assert client.receive_reply(spawn)["ok"] is True
+    assert client.receive_reply(again)["error"] == "Vertex 3 is occupied by robot 0"
+    assert client.receive_reply(assign)["error"] == "Unknown robot 5"
+    client.close()
+
+
+def test_packed_subscription_carries_the_same_robots_as_json():
+    engine = SimulationEngine(build_graph("grid", 25))
+    engine.enable_gateway(port=0)
+    for vertex_id in (0, 6, 12):
+        engine.spawn_robot(vertex_id)
+    engine.step()
+    clients = [Client(engine.gateway.address) for _ in range(2)]
+    for client, encoding in zip(clients, ("json", "packed")):
+        client.receive_reply(client.send(op="subscribe", encoding=encoding))
+    states = [client.receive() for client in clients]
+    rows = list(FleetDelta.decode(base64.b64decode(states[1]["data"])).rows())
+    assert [robot["id"] for robot in states[0]["robots"]] == [row.id for row in rows] == [0, 1, 2]
+    assert [robot["vertex"] for robot in states[0]["robots"]] == [row.vertex_id for row in rows]
+    assert states[0]["version"] == states[1]["version"]
+    for client in clients:
+        client.close()
+    engine.close()
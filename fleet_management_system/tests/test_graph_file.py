@@ -0,0 +1,68 @@
+import json
+import random
+import pytest
+from src.utils import graph_file
+from src.utils.graph_file import NavGraphFile
+
+TRICKY_NAMES = ['plain', 'a]b', '}{', '[[[', 'quote " inside', 'ends in backslash \\', '\\"]', '\\\\', '"}]"']
+
+
+def random_document(seed: int):
+    rng = random.Random(seed)
+
+    def level():
+        vertices = [[rng.uniform(-9, 9), rng.uniform(-9, 9), {"name": rng.choice(TRICKY_NAMES)}]
+                    for _ in range(rng.randrange(1, 12))]
+        lanes = [[rng.randrange(len(vertices)), rng.randrange(len(vertices)), {"speed_limit": rng.choice([0, 1.5])}]
+                 for _ in range(rng.randrange(0, 12))]
+        return {"vertices": vertices, "lanes": lanes}
+
+    return {"building_name": rng.choice(TRICKY_NAMES),
+            "levels": {f"{rng.choice(TRICKY_NAMES)} {index}": level() for index in range(rng.randrange(1, 5))},
+            "lifts": {},
+            "notes": [rng.choice(TRICKY_NAMES), {"nested": [[], {}]}, None, True, -1.5e3]}
+
+
+def write(tmp_path, text: str) -> str:
+    path = tmp_path / "graph.json"
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize("seed", range(5))
+def test_sections_and_levels_decode_like_the_whole_document(tmp_path, monkeypatch, chunk_bytes, seed):
+    """Strings holding brackets, quotes and backslashes land on every chunk boundary across the sizes"""
+    monkeypatch.setattr(graph_file, "SCAN_CHUNK_BYTES", chunk_bytes)
+    document = random_document(seed)
+    path = write(tmp_path, json.dumps(document, indent=seed % 3 or None))
+    with NavGraphFile(path) as nav_file:
+        assert list(nav_file.sections) == list(document)
+        for key, value in document.items():
+            assert nav_file.read(key) == value
+        assert list(nav_file.levels) == list(document["levels"])
+        for name, level in document["levels"].items():
+            assert nav_file.read_level(name) == level
+
+
+def test_string_longer_than_a_chunk(tmp_path, monkeypatch):
+    monkeypatch.setattr(graph_file, "SCAN_CHUNK_BYTES", 4)
+    document = {"levels": {"level1": {"vertices": [[0, 0, {"name": "[" * 50 + '\\"' * 20}]], "lanes": []}},
+                "after": 1}
+    with NavGraphFile(write(tmp_path, json.dumps(document))) as nav_file:
+        assert nav_file.read_level("level1") == document["levels"]["level1"]
+        assert nav_file.read("after") == 1
+
+
+def test_missing_keys_and_levels(tmp_path):
+    with NavGraphFile(write(tmp_path, '{"levels": {}}')) as nav_file:
+        assert nav_file.read("lifts", {}) == {}
+        with pytest.raises(ValueError, match="Level 'level1' not found"):
+            nav_file.read_level("level1")
+
+
+@pytest.mark.parametrize("text", ['', '[]', '{"levels": {"level1": {"vertices": [[0, 0, {}]}', '{"a" 1}',
+                                  '{"a": "]"'])
+def test_malformed_files_are_rejected(tmp_path, text):
+    with pytest.raises(ValueError):
+        NavGraphFile(write(tmp_path, text)).close()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.kinematics import MIN_SEPARATION, NO_VERTEX, FleetKinematics
+from src.models.nav_graph import NavigationGraph
+
+
+def straight_graph(speed_limit=1) -> NavigationGraph:
+    """0 -- 1 -- 2 along the x axis, four units apart"""
+    vertices = [[0.0, 0.0, {}], [4.0, 0.0, {}], [8.0, 0.0, {}]]
+    lanes = [[0, 1, {"speed_limit": speed_limit}], [1, 2, {"speed_limit": speed_limit}]]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return NavigationGraph.from_level_data({"vertices": vertices, "lanes": lanes}, "level1")
+
+
+def test_positions_interpolate_along_the_lane_at_the_capped_speed():
+    kinematics = FleetKinematics(straight_graph(speed_limit=1))
+    kinematics.add_robot(0, 0, max_speed=2.0)
+    kinematics.add_robot(1, 2, max_speed=0.5)
+    kinematics.depart(0, 0, 1)  # Capped by the lane to 1 unit/s
+    kinematics.depart(1, 2, 1)  # Its own maximum is lower
+    assert kinematics.advance(1.0) == []
+    assert kinematics.position(0) == pytest.approx((1.0, 0.0))
+    assert kinematics.position(1) == pytest.approx((7.5, 0.0))
+    x, y = kinematics.positions()
+    assert np.allclose(x, [1.0, 7.5]) and np.allclose(y, 0.0)
+
+    assert kinematics.advance(3.0) == [0]
+    kinematics.arrive(0)
+    assert not kinematics.is_travelling(0) and kinematics.is_travelling(1)
+    assert kinematics.position(0) == (4.0, 0.0)
+    assert kinematics.to_vertex[0] == NO_VERTEX and kinematics.from_vertex[0] == 1
+
+
+def test_faster_robot_holds_behind_a_slower_one():
+    kinematics = FleetKinematics(straight_graph(speed_limit=0))
+    kinematics.add_robot(0, 1, max_speed=0.1)
+    kinematics.add_robot(1, 0, max_speed=2.0)
+    kinematics.depart(0, 1, 2)
+    kinematics.depart(1, 0, 1)
+    distances = []
+    for _ in range(20):
+        kinematics.advance(0.25)
+        distances.append(kinematics.position(0)[0] - kinematics.position(1)[0])
+    assert min(distances) >= MIN_SEPARATION - 1e-9
+    assert distances[-1] < 1.0  # It caught up and now follows at about the minimum separation
+
+
+def brute_force_too_close(moved, old_x, old_y, new_x, new_y):
+    held = set()
+    moved_set = set(moved.tolist())
+    for slot in moved.tolist():
+        for other in range(len(new_x)):
+            if other == slot or (other in moved_set and other > slot):
+                continue
+            new_distance = (new_x[slot] - new_x[other]) ** 2 + (new_y[slot] - new_y[other]) ** 2
+            old_distance = (old_x[slot] - old_x[other]) ** 2 + (old_y[slot] - old_y[other]) ** 2
+            if new_distance < MIN_SEPARATION ** 2 and new_distance < old_distance:
+                held.add(slot)
+    return sorted(held)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_grid_spacing_check_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    count = int(rng.integers(2, 200))
+    old_x, old_y = rng.uniform(-3.0, 3.0, count), rng.uniform(-3.0, 3.0, count)
+    moved = np.sort(rng.choice(count, size=int(rng.integers(1, count + 1)), replace=False))
+    new_x, new_y = old_x.copy(), old_y.copy()
+    new_x[moved] += rng.normal(0.0, 0.2, len(moved))
+    new_y[moved] += rng.normal(0.0, 0.2, len(moved))
+    kinematics = FleetKinematics(straight_graph())
+    assert kinematics._too_close(moved, old_x, old_y, new_x, new_y) == \
+        brute_force_too_close(moved, old_x, old_y, new_x, new_y)
+
+
+def test_explicit_path_for_a_travelling_robot_is_kept():
+    engine = SimulationEngine(straight_graph(), motion="continuous")
+    robot = engine.spawn_robot(0)
+    engine.assign_task(robot.id, 1, [0, 1])
+    engine.step(dt=0.5)
+    assert engine.kinematics.is_travelling(robot.id)
+    engine.assign_task(robot.id, 2, [1, 2])  # Applies once the robot stands on vertex 1
+    engine.run(ticks=100, until_idle=True)
+    assert robot.current_vertex_id == 2
+    assert robot.task.path == [1, 2]
+    engine.close()
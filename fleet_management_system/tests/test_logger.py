@@ -0,0 +1,102 @@
+import os
+import time
+import warnings
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.utils.logger import FleetLogger, LogLevel, _LogWriter
+
+
+def read_lines(path: str):
+    with open(path, encoding='utf-8') as f:
+        return [line.split("] ", 1)[1] for line in f.read().splitlines()]
+
+
+def test_records_are_written_in_order_in_batches(tmp_path, monkeypatch):
+    batches = []
+    write_batch = _LogWriter._write_batch
+    monkeypatch.setattr(_LogWriter, "_write_batch", lambda writer, batch: (batches.append(len(batch)),
+                                                                           write_batch(writer, batch)))
+    path = str(tmp_path / "fleet.log")
+    logger = FleetLogger(path, batch_size=100)
+    with logger._writer.file_lock:  # Stall the writer so records pile up behind its first batch
+        for index in range(1000):
+            logger.log("record %d", index, print_to_console=False)
+    logger.flush()
+    assert read_lines(path) == [f"record {index}" for index in range(1000)]
+    assert max(batches) == 100
+    assert len(batches) <= 1000 // 100 + 1
+    logger._writer.close()
+
+
+def test_full_buffer_drops_records_instead_of_blocking(tmp_path):
+    path = str(tmp_path / "fleet.log")
+    logger = FleetLogger(path, buffer_size=10, batch_size=5)
+    with logger._writer.file_lock:
+        started = time.perf_counter()
+        for index in range(100):
+            logger.log("record %d", index, print_to_console=False)
+        assert time.perf_counter() - started < 1.0
+        assert logger.dropped_records >= 100 - 10 - 5  # At most the buffer and one batch got through
+    logger.flush()
+    written = read_lines(path)
+    assert len(written) + logger.dropped_records == 100
+    assert written == [f"record {index}" for index in range(len(written))]
+    logger._writer.close()
+
+
+def test_filtered_levels_are_not_queued(tmp_path):
+    path = str(tmp_path / "fleet.log")
+    logger = FleetLogger(path, level=LogLevel.INFO)
+    logger.debug("hidden %d", 1)
+    logger.log("shown %d", 2, print_to_console=False)
+    logger.flush()
+    assert read_lines(path) == ["shown 2"]
+    logger._writer.close()
+
+
+def test_log_file_rotates_and_keeps_the_newest_backups(tmp_path):
+    path = str(tmp_path / "fleet.log")
+    logger = FleetLogger(path, max_bytes=1000, backup_count=2, batch_size=7)
+    for index in range(200):
+        logger.log("record %03d", index, print_to_console=False)
+    logger.flush()
+    files = [f"{path}.2", f"{path}.1", path]
+    assert all(os.path.getsize(name) <= 1000 for name in files)
+    assert not os.path.exists(f"{path}.3")
+    kept = [line for name in files for line in read_lines(name)]
+    assert kept == [f"record {index:03d}" for index in range(200 - len(kept), 200)]
+    logger._writer.close()
+
+
+def test_loggers_sharing_a_file_warn_about_ignored_options(tmp_path):
+    path = str(tmp_path / "fleet.log")
+    first = FleetLogger(path, batch_size=50)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        same = FleetLogger(path, level=LogLevel.ERROR, batch_size=50)  # Only writer options count
+    assert same._writer is first._writer
+    with pytest.warns(RuntimeWarning, match=r"already written with \{'batch_size': 50\}; "
+                                            r"ignoring \{'batch_size': 10\}") as caught:
+        other = FleetLogger(path, batch_size=10)
+    assert caught[0].filename == __file__  # Points at the caller, not the logger module
+    assert other._writer is first._writer and first._writer.batch_size == 50
+    first._writer.close()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        reopened = FleetLogger(path, batch_size=10)  # A closed writer is replaced, options and all
+    assert reopened._writer.batch_size == 10
+    reopened._writer.close()
+
+
+def test_dispatch_wave_keeps_assignments_off_stdout(monkeypatch, capsys):
+    monkeypatch.setattr(FleetLogger, "default_level", LogLevel.INFO)
+    engine = SimulationEngine(build_graph("grid", 100))
+    engine.load_scenario({"robots": [{"spawn": vertex} for vertex in range(0, 40, 4)],
+                          "jobs": [{"pickup": vertex, "drop": 99 - vertex} for vertex in range(0, 60, 6)]})
+    engine.run(ticks=5)
+    engine.fleet_manager.logger.flush()
+    assert engine.dispatcher.metrics()["in_progress"] > 0
+    output = capsys.readouterr().out
+    assert "Assigned" not in output and "New task assigned" not in output
+    engine.close()
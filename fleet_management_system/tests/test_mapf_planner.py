@@ -0,0 +1,100 @@
+import random
+from typing import Dict, List
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.mapf_planner import BatchPlanner
+from src.controllers.reservation_table import ReservationTable
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.nav_graph import NavigationGraph
+
+
+def assert_conflict_free(paths: Dict[int, List[int]]):
+    """No shared vertex, no swap along a lane and no rotation around a cycle, at any step"""
+    def position(path: List[int], step: int) -> int:
+        return path[min(step, len(path) - 1)]
+
+    for step in range(max(len(path) for path in paths.values())):
+        here = {robot_id: position(path, step) for robot_id, path in paths.items()}
+        there = {robot_id: position(path, step + 1) for robot_id, path in paths.items()}
+        assert len(set(here.values())) == len(here), f"two robots share a vertex at step {step}"
+        occupant = {vertex: robot_id for robot_id, vertex in here.items()}
+        for robot_id in paths:
+            # Walk the robots each one follows into the vertex they are leaving
+            follower, followed = robot_id, set()
+            while here[follower] != there[follower] and there[follower] in occupant:
+                follower = occupant[there[follower]]
+                assert follower != robot_id, f"robots swap or rotate at step {step}"
+                if follower in followed:
+                    break
+                followed.add(follower)
+
+
+def wave(graph: NavigationGraph, robots: int, seed: int):
+    rng = random.Random(seed)
+    vertex_count = len(graph.vertices)
+    starts = rng.sample(range(vertex_count), robots)
+    goals = rng.sample(range(vertex_count), robots)
+    return [(robot_id, start, goal) for robot_id, (start, goal) in enumerate(zip(starts, goals))]
+
+
+@pytest.mark.parametrize("robots, method", [(6, "cbs"), (40, "prioritized")])
+@pytest.mark.parametrize("seed", range(3))
+def test_planned_wave_is_conflict_free(robots, method, seed):
+    graph = build_graph("grid", 100, seed)
+    planner = BatchPlanner(ReservationTable(graph))
+    requests = wave(graph, robots, seed)
+    paths = planner.plan(requests, 0)
+    assert planner.last_method == method
+    assert len(paths) >= robots // 2
+    for robot_id, start, goal in requests:
+        if robot_id in paths:
+            path = paths[robot_id]
+            assert path[0] == start and path[-1] == goal
+            assert all(v1 == v2 or graph.is_traversable(v1, v2) for v1, v2 in zip(path, path[1:]))
+    assert_conflict_free(paths)
+
+
+def triangle_with_hub() -> NavigationGraph:
+    """A triangle 0-1-2 whose corners also connect to a hub, vertex 3"""
+    vertices = [[0.0, 0.0, {}], [2.0, 0.0, {}], [1.0, 2.0, {}], [1.0, 0.7, {}]]
+    lanes = [[a, b, {}] for a, b in ((0, 1), (1, 2), (2, 0), (0, 3), (1, 3), (2, 3))]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return NavigationGraph.from_level_data({"vertices": vertices, "lanes": lanes}, "level1")
+
+
+def aisle_with_siding() -> NavigationGraph:
+    """A line 0-1-2-3-4-5-6, dead-ended at 0, with a siding 7 off vertex 4"""
+    vertices = [[float(x), 0.0, {}] for x in range(7)] + [[4.0, 1.0, {}]]
+    lanes = [[a, a + 1, {}] for a in range(6)] + [[4, 7, {}]]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return NavigationGraph.from_level_data({"vertices": vertices, "lanes": lanes}, "level1")
+
+
+@pytest.mark.parametrize("priority_retries, planned", [(0, [1]), (1, [0, 1])])
+def test_robots_that_do_not_fit_are_retried_first(priority_retries, planned):
+    """Robot 1 has the longer trip, so it goes first, and walks down the aisle robot 0 has no time to leave"""
+    planner = BatchPlanner(ReservationTable(aisle_with_siding()), cbs_max_agents=0,
+                           priority_retries=priority_retries)
+    paths = planner.plan([(0, 1, 5), (1, 6, 0)], 0)
+    assert sorted(paths) == planned
+    assert_conflict_free(paths)
+    assert [robot_id for robot_id in (0, 1) if planner.reservations._by_robot.get(robot_id)] == planned
+
+
+@pytest.mark.parametrize("cbs_max_agents", [8, 1])
+def test_no_rotation_around_a_cycle(cbs_max_agents):
+    """Rotating the three robots one corner in a single tick is shortest, but robots cannot follow in a ring"""
+    planner = BatchPlanner(ReservationTable(triangle_with_hub()), cbs_max_agents=cbs_max_agents)
+    paths = planner.plan([(0, 0, 1), (1, 1, 2), (2, 2, 0)], 0)
+    assert sorted(paths) == [0, 1, 2]
+    assert_conflict_free(paths)
+
+
+def test_engine_carries_out_a_rotation_wave():
+    engine = SimulationEngine(triangle_with_hub())
+    engine.load_scenario({"robots": [{"spawn": 0, "destination": 1}, {"spawn": 1, "destination": 2},
+                                     {"spawn": 2, "destination": 0}]})
+    engine.run(ticks=10, until_idle=True)
+    assert [robot.current_vertex_id for robot in engine.fleet_manager.get_all_robots()] == [1, 2, 0]
+    assert engine.traffic_manager.deadlocks.detected == 0
+    engine.close()
@@ -0,0 +1,160 @@
+import json
+import urllib.error
+import urllib.request
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.utils.logger import FleetLogger
+from src.utils.metrics import Metrics, MetricsServer, RollingHistogram
+
+
+def fetch(url: str):
+    """(status, content type, body) of a GET request"""
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            return response.status, response.headers["Content-Type"], response.read().decode('utf-8')
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers["Content-Type"], error.read().decode('utf-8')
+
+
+def test_histogram_keeps_the_last_window_and_the_lifetime_mean():
+    histogram = RollingHistogram(4)
+    assert histogram.summary() == {"count": 0}
+    for value in range(1, 11):  # The ring wraps around twice
+        histogram.add(float(value))
+    assert sorted(histogram.samples.tolist()) == [7.0, 8.0, 9.0, 10.0]
+    summary = histogram.summary()
+    assert summary["count"] == 10 and summary["mean"] == 5.5  # All-time, not just the window
+    assert summary["max"] == 10.0
+    for quantile in (50, 95, 99):
+        assert summary[f"p{quantile}"] == pytest.approx(np.percentile([7, 8, 9, 10], quantile))
+
+
+def test_partly_filled_histogram_ignores_the_empty_slots():
+    histogram = RollingHistogram(100)
+    for value in (0.002, 0.004, 0.003):
+        histogram.add(value)
+    summary = histogram.summary(1000.0)
+    assert summary == pytest.approx({"count": 3, "mean": 3.0, "p50": 3.0, "p95": 3.9, "p99": 3.98, "max": 4.0})
+
+
+def test_phase_timers_sum_within_a_tick(monkeypatch):
+    clock = iter([10.0, 10.5, 11.0, 11.25, 20.0, 22.0])
+    monkeypatch.setattr("src.utils.metrics.time.perf_counter", lambda: next(clock))
+    metrics = Metrics(enabled=True)
+    for _ in range(2):
+        with metrics.timer("movement"):
+            pass
+    metrics.add_time("dispatch", 0.1)
+    metrics.end_tick()
+    with metrics.timer("movement"):
+        pass
+    metrics.end_tick()
+    phases = metrics.snapshot()["phases_ms"]
+    assert metrics.ticks == 2
+    assert phases["movement"] == pytest.approx({"count": 2, "mean": 1375.0, "p50": 1375.0, "p95": 1937.5,
+                                                "p99": 1987.5, "max": 2000.0})
+    assert phases["dispatch"]["count"] == 1 and phases["dispatch"]["mean"] == pytest.approx(100.0)
+
+
+def test_timed_functions_add_their_duration_and_still_raise():
+    metrics = Metrics(enabled=True)
+
+    def fail():
+        raise KeyError("boom")
+
+    assert metrics.timed("planning", lambda a, b=1: a + b)(2, b=3) == 5
+    with pytest.raises(KeyError):
+        metrics.timed("planning", fail)()
+    metrics.end_tick()
+    assert metrics.histograms["planning"].count == 1 and metrics.histograms["planning"].total >= 0
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics()
+    assert metrics.timer("tick") is metrics.timer("movement")  # One shared no-op timer
+    with metrics.timer("tick"):
+        pass
+
+    def work():
+        return 1
+
+    assert metrics.timed("planning", work) is work
+    metrics.add_time("dispatch", 1.0)
+    metrics.count("waits", 3)
+    metrics.end_tick()
+    snapshot = metrics.snapshot()
+    assert (snapshot["enabled"], snapshot["ticks"], snapshot["counters"], snapshot["phases_ms"]) == (False, 0, {}, {})
+
+
+def test_counters_and_reset():
+    metrics = Metrics(enabled=True)
+    metrics.count("waits")
+    metrics.count("waits", 2)
+    metrics.count("route_repairs", 0)
+    metrics.add_time("tick", 0.01)
+    metrics.end_tick()
+    assert metrics.snapshot()["counters"] == {"waits": 3, "route_repairs": 0}
+    metrics.add_time("tick", 0.01)  # Left open when reset
+    metrics.reset()
+    metrics.end_tick()
+    snapshot = metrics.snapshot()
+    assert snapshot["counters"] == {} and snapshot["phases_ms"] == {} and snapshot["ticks"] == 1
+
+
+def test_prometheus_text():
+    metrics = Metrics(enabled=True)
+    metrics.count("waits", 2)
+    metrics.add_time("tick", 0.002)
+    metrics.end_tick()
+    metrics.add_time("tick", 0.004)
+    metrics.end_tick()
+    lines = metrics.prometheus_text().splitlines()
+    assert "fleet_ticks_total 2" in lines and 'fleet_events_total{event="waits"} 2' in lines
+    assert 'fleet_phase_seconds{phase="tick",quantile="0.5"} 0.003000000' in lines
+    assert 'fleet_phase_seconds_sum{phase="tick"} 0.006000000' in lines
+    assert 'fleet_phase_seconds_count{phase="tick"} 2' in lines
+    assert all(line.startswith("#") or line.startswith("fleet_") for line in lines)
+
+
+def test_server_serves_text_json_and_404():
+    metrics = Metrics(enabled=True)
+    metrics.count("deadlocks")
+    metrics.add_time("tick", 0.001)
+    metrics.end_tick()
+    server = MetricsServer(metrics, port=0)
+    try:
+        assert server.url.startswith("http://127.0.0.1:") and server.url.endswith("/metrics")
+        status, content_type, body = fetch(server.url)
+        assert status == 200 and content_type.startswith("text/plain") and body == metrics.prometheus_text()
+        status, content_type, body = fetch(server.url + ".json?pretty=1")
+        assert status == 200 and content_type == "application/json"
+        snapshot = json.loads(body)
+        assert snapshot["counters"] == {"deadlocks": 1} and snapshot["phases_ms"]["tick"]["count"] == 1
+        assert fetch(server.url[:-len("/metrics")] + "/other")[0] == 404
+    finally:
+        server.close()
+    server.thread.join(5)
+    assert not server.thread.is_alive()
+
+
+def test_engine_metrics_time_ticks_and_stop_with_the_engine():
+    engine = SimulationEngine(build_graph("grid", 100))
+    assert not engine.metrics.enabled
+    metrics = engine.enable_metrics(port=0)
+    assert FleetLogger.metrics is metrics
+    for vertex_id in (0, 9, 90):
+        engine.spawn_robot(vertex_id)
+    engine.assign_task(0, 99)
+    engine.run(ticks=20)
+    _, _, body = fetch(engine.metrics_server.url + ".json")
+    snapshot = json.loads(body)
+    assert snapshot["ticks"] == 20 and snapshot["phases_ms"]["tick"]["count"] == 20
+    assert {"dispatch", "manage_traffic", "movement"} <= set(snapshot["phases_ms"])
+    assert snapshot["counters"]["plans"] >= 1
+    server = engine.metrics_server
+    engine.close()
+    assert engine.metrics_server is None and FleetLogger.metrics is None
+    with pytest.raises(OSError):
+        fetch(server.url)
@@ -0,0 +1,127 @@
+import math
+import random
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.models.nav_graph import NavigationGraph
+from src.utils.path_planner import COST_MODELS, PathPlanner
+
+
+def assert_valid_route(graph: NavigationGraph, path, start: int, end: int):
+    assert path[0] == start and path[-1] == end
+    assert all(graph.is_traversable(v1, v2) for v1, v2 in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("cost_model", list(COST_MODELS))
+@pytest.mark.parametrize("kind", ["grid", "warehouse", "rgg"])
+def test_astar_and_dijkstra_agree(kind, cost_model):
+    graph = build_graph(kind, 400, 1)
+    astar = PathPlanner(graph, cost_model, "astar")
+    dijkstra = PathPlanner(graph, cost_model, "dijkstra")
+    rng = random.Random(2)
+    for _ in range(40):
+        start, end = rng.randrange(len(graph.vertices)), rng.randrange(len(graph.vertices))
+        fast, reference = astar.plan(start, end), dijkstra.plan(start, end)
+        assert_valid_route(graph, fast, start, end)
+        assert math.isclose(astar.path_cost(fast), dijkstra.path_cost(reference), abs_tol=1e-9)
+        assert math.isclose(dijkstra.path_cost(reference), dijkstra.costs_to(end)[start], abs_tol=1e-9)
+
+
+def test_routes_avoid_blocked_lanes():
+    graph = build_graph("grid", 100)
+    planner = graph.get_planner()
+    rng = random.Random(3)
+    edges = graph.get_edges()
+    for v1, v2 in rng.sample(edges, len(edges) // 4):
+        graph.set_lane_blocked(v1, v2)
+    costs = planner.costs_to(99)
+    for start in range(100):
+        path = planner.plan(start, 99)
+        if not path:
+            assert math.isinf(costs[start])
+            continue
+        assert_valid_route(graph, path, start, 99)
+        assert math.isclose(planner.path_cost(path), costs[start], abs_tol=1e-9)
+
+
+def test_avoided_vertices_are_never_entered():
+    graph = build_graph("grid", 25)  # 5 x 5
+    planner = graph.get_planner("hops")
+    assert planner.plan(0, 4) == [0, 1, 2, 3, 4]
+    detour = planner.plan(0, 4, avoid={2})
+    assert_valid_route(graph, detour, 0, 4)
+    assert 2 not in detour and len(detour) == 7
+    assert planner.plan(0, 4, avoid={1, 5}) == []  # Walled in
+    assert planner.plan(0, 4, avoid={4}) == []
+    assert planner.plan(0, 4) == [0, 1, 2, 3, 4]  # Nothing of the last search is left behind
+
+
+def test_unreachable_and_unknown_targets():
+    lanes = [[0, 1, {}], [1, 0, {}], [2, 3, {}], [3, 2, {}]]
+    graph = NavigationGraph.from_level_data(
+        {"vertices": [[0.0, 0.0, {}], [1.0, 0.0, {}], [5.0, 0.0, {}], [6.0, 0.0, {}]], "lanes": lanes}, "level1")
+    for algorithm in PathPlanner.ALGORITHMS:
+        planner = graph.get_planner("time", algorithm)
+        assert planner.plan(0, 3) == []
+        assert planner.plan(0, 9) == [] and planner.plan(-1, 0) == []
+        assert planner.plan(2, 2) == [2]
+    assert graph.get_planner().costs_to(1).tolist() == [1.0, 0.0, math.inf, math.inf]
+    assert graph.get_planner().first_hops_from(0) == {1: 1}
+
+
+def test_one_way_lanes_are_routable_both_ways():
+    """A vertex pair with a lane in either direction is traversable, as NavigationGraph.is_traversable says"""
+    graph = NavigationGraph.from_level_data(
+        {"vertices": [[0.0, 0.0, {}], [1.0, 0.0, {}], [2.0, 0.0, {}]], "lanes": [[0, 1, {}], [2, 1, {}]]}, "level1")
+    assert graph.get_planner().plan(0, 2) == [0, 1, 2]
+    assert graph.get_planner().plan(2, 0) == [2, 1, 0]
+
+
+def test_graph_changes_drop_the_cached_weights():
+    graph = build_graph("grid", 25)
+    planner = graph.get_planner("time", "dijkstra")
+    assert planner.plan(0, 2) == [0, 1, 2]
+    version = graph.version
+
+    graph.set_lane_blocked(1, 2)
+    assert graph.version > version
+    detour = planner.plan(0, 2)
+    assert_valid_route(graph, detour, 0, 2)
+    assert (1, 2) not in list(zip(detour, detour[1:]))
+
+    graph.set_lane_blocked(1, 2, False)
+    assert planner.plan(0, 2) == [0, 1, 2]
+    before = planner.costs_to(2)[0]
+    graph.set_lane_speed_limit(0, 1, 4)
+    graph.set_lane_speed_limit(1, 0, 4)
+    assert planner.costs_to(2)[0] == pytest.approx(before - 0.75)
+    graph.remove_lane(1, 2)
+    graph.remove_lane(2, 1)
+    detour = planner.plan(0, 2)
+    assert detour[:2] == [0, 1] and detour[2] != 2  # Still takes the fast lane, then goes around
+
+
+@pytest.mark.parametrize("k", [1, 3])
+def test_nearest_targets_match_reverse_searches(k):
+    graph = build_graph("rgg", 300, 4)
+    planner = graph.get_planner("distance", "dijkstra")
+    targets = [0, 50, 120, 250]
+    nearest = planner.nearest_targets(targets, k)
+    tables = np.array([planner.costs_to(target) for target in targets])
+    for vertex_id in range(len(graph.vertices)):
+        expected = sorted((cost, target) for cost, target in zip(tables[:, vertex_id].tolist(), targets)
+                          if math.isfinite(cost))[:k]
+        found = nearest.get(vertex_id, [])
+        assert [target for _, target in found] == [target for _, target in expected]
+        assert np.allclose([cost for cost, _ in found], [cost for cost, _ in expected])
+
+
+def test_costs_from_stops_at_the_nearest_targets():
+    graph = build_graph("warehouse", 400, 5)
+    planner = graph.get_planner("time", "dijkstra")
+    targets = list(range(3, len(graph.vertices), 11))
+    exact = {target: planner.costs_to(target)[0] for target in targets}
+    assert planner.costs_from(0, targets) == pytest.approx({t: c for t, c in exact.items() if math.isfinite(c)})
+    nearest = planner.costs_from(0, targets, 5)
+    assert sorted(nearest.values()) == pytest.approx(sorted(exact.values())[:5])
+    assert planner.costs_from(0, [-1, 10**6]) == {} and planner.costs_from(-1, targets) == {}
@@ -0,0 +1,84 @@
+import random
+from benchmarks.generators import build_graph
+from src.controllers.reservation_table import INFINITY, ReservationTable
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.nav_graph import NavigationGraph
+
+
+def cross_graph() -> NavigationGraph:
+    """Vertex 1 is a crossing: 0-1-2 runs west to east and 3-1-4 north to south"""
+    vertices = [[0.0, 0.0, {}], [1.0, 0.0, {}], [2.0, 0.0, {}], [1.0, 1.0, {}], [1.0, -1.0, {}]]
+    lanes = [[a, b, {}] for a, b in ((0, 1), (1, 2), (3, 1), (1, 4))]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return NavigationGraph.from_level_data({"vertices": vertices, "lanes": lanes}, "level1")
+
+
+def test_reserved_path_holds_vertices_lanes_and_goal():
+    table = ReservationTable(cross_graph())
+    table.reserve_path(1, [0, 1, 1, 2], 5)
+
+    assert table.vertex_conflict(0, 5, 6, robot_id=2) == 1
+    assert table.vertex_conflict(0, 6, 7, robot_id=2) is None
+    assert table.vertex_conflict(1, 6, 8, robot_id=2) == 1
+    assert table.lane_conflict(1, 0, 5, 6, robot_id=2) == 1  # Lanes are held in both directions
+    assert table.lane_conflict(0, 1, 6, 7, robot_id=2) is None
+    assert table.lane_conflict(1, 2, 7, 8, robot_id=2) == 1
+    assert table.vertex_conflict(2, 1000, INFINITY, robot_id=2) == 1  # Parked on its goal
+    assert table.vertex_conflict(0, 5, 6, robot_id=1) is None  # A robot never conflicts with itself
+
+
+def test_release_drops_expired_then_all_reservations():
+    table = ReservationTable(cross_graph())
+    table.reserve_path(1, [0, 1, 1, 2], 5)
+    table.park(2, 4, 0)
+    assert table.reservation_count() == 7
+
+    table.release_until(1, 7)  # The robot has stood on vertex 1 since tick 6
+    assert table.vertex_conflict(0, 5, 6, robot_id=2) is None
+    assert table.lane_conflict(0, 1, 5, 6, robot_id=2) is None
+    assert table.vertex_conflict(1, 7, 8, robot_id=2) == 1
+    assert table.reservation_count() == 4
+
+    table.release_robot(1)
+    assert table.reservation_count() == 1
+    assert list(table.vertex_slots) == [4] and not table.lane_slots
+
+
+def test_plan_waits_for_a_reserved_crossing():
+    table = ReservationTable(cross_graph())
+    table.reserve_path(1, [3, 1, 4], 0)
+    path = table.plan(2, 0, 2, 0)
+    assert path[0] == 0 and path[-1] == 2
+    assert len(path) > 3  # Waits somewhere rather than entering the crossing at tick 1
+    for t, (vertex, next_vertex) in enumerate(zip(path, path[1:])):
+        assert table.vertex_conflict(next_vertex, t + 1, t + 2, robot_id=2) is None
+        if vertex != next_vertex:
+            assert table.lane_conflict(vertex, next_vertex, t, t + 1, robot_id=2) is None
+
+
+def test_plan_waits_past_the_default_horizon_for_the_goal_to_clear():
+    table = ReservationTable(cross_graph())
+    table.reserve_path(1, [3] * 50 + [1, 2, 1, 4], 0)  # Passes through vertex 2 at tick 51
+    path = table.plan(2, 0, 2, 0)
+    assert path[0] == 0 and path[-1] == 2 and len(path) - 1 > 51
+    assert table.plan(2, 0, 2, 0, max_duration=40) == []
+
+
+def test_reservations_follow_robots_as_they_move():
+    engine = SimulationEngine(build_graph("grid", 100))
+    rng = random.Random(1)
+    vertex_count = len(engine.nav_graph.vertices)
+    engine.load_scenario({"robots": [{"spawn": vertex, "destination": rng.randrange(vertex_count)}
+                                     for vertex in rng.sample(range(vertex_count), 10)]})
+    table = engine.traffic_manager.reservations
+    robots = engine.fleet_manager.get_all_robots()
+    for _ in range(60):
+        engine.step()
+        tick = engine.tick
+        slots = list(table.vertex_slots.values()) + list(table.lane_slots.values())
+        assert all(reservation.end >= tick for reservations in slots for reservation in reservations)
+        for robot in robots:
+            assert table.vertex_conflict(robot.current_vertex_id, tick, tick + 1, robot_id=-1) == robot.id
+    assert engine.is_idle()
+    assert table.reservation_count() == len(robots)  # Each robot parked on its destination
+    engine.close()
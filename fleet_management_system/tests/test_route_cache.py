@@ -0,0 +1,85 @@
+import math
+import random
+import pytest
+from benchmarks.generators import build_graph
+from src.models.nav_graph import NavigationGraph
+from src.utils.route_cache import RouteCache
+
+
+def test_counters_track_hits_misses_evictions_and_invalidations():
+    cache = RouteCache(2)
+    assert cache.get((0, 1)) is None
+    cache.put((0, 1), [0, 1])
+    cache.put((1, 2), [1, 2])
+    route = cache.get((0, 1))
+    route.append(99)  # Callers get a copy
+    assert cache.get((0, 1)) == [0, 1]
+    cache.put((2, 3), [2, 3])  # Evicts (1, 2), the least recently used
+    assert cache.get((1, 2)) is None and len(cache) == 2
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5, "size": 2, "max_size": 2,
+                             "evictions": 1, "invalidations": 0}
+    cache.invalidate()
+    assert len(cache) == 0 and cache.get((2, 3)) is None and cache.invalidations == 1
+    cache.reset_stats()
+    assert cache.stats()["hits"] == cache.stats()["misses"] == cache.stats()["invalidations"] == 0
+
+
+def test_zero_size_cache_stores_nothing():
+    cache = RouteCache(0)
+    cache.put((0, 1), [0, 1])
+    assert cache.get((0, 1)) is None and len(cache) == 0 and cache.evictions == 0
+
+
+def test_graph_changes_invalidate_cached_routes():
+    graph = build_graph("grid", 25)
+    graph.route_cache.reset_stats()
+    assert graph.find_shortest_path(0, 2) == [0, 1, 2]
+    assert graph.find_shortest_path(0, 2) == [0, 1, 2]
+    assert (graph.route_cache.misses, graph.route_cache.hits) == (1, 1)
+    graph.set_lane_blocked(1, 2)
+    assert graph.route_cache.invalidations == 1 and len(graph.route_cache) == 0
+    assert graph.find_shortest_path(0, 2) != [0, 1, 2]
+    assert graph.route_cache.misses == 2
+    graph.set_lane_congestion(0, 1, 2.0)  # Does not change planned routes, so the cache is kept
+    assert graph.route_cache.invalidations == 1
+
+
+def assert_matches_planner(graph: NavigationGraph, pairs, cost_model: str = "time"):
+    planner = graph.get_planner(cost_model, "dijkstra")
+    for start, end in pairs:
+        route = graph.find_shortest_path(start, end, cost_model)
+        expected = planner.plan(start, end)
+        if not expected:
+            assert route == []
+            continue
+        assert route[0] == start and route[-1] == end
+        assert all(graph.is_traversable(v1, v2) for v1, v2 in zip(route, route[1:]))
+        assert math.isclose(planner.path_cost(route), planner.path_cost(expected), abs_tol=1e-9)
+
+
+@pytest.mark.parametrize("kind", ["grid", "warehouse", "rgg"])
+def test_next_hop_routes_match_planner_routes(kind):
+    graph = build_graph(kind, 200, 2)
+    assert graph.precompute_all_pairs("time")
+    rng = random.Random(5)
+    count = len(graph.vertices)
+    pairs = [(rng.randrange(count), rng.randrange(count)) for _ in range(200)]
+    graph.route_cache.reset_stats()
+    assert_matches_planner(graph, pairs)
+    assert graph.route_cache.misses == 0  # Served from the next-hop table
+
+    edges = graph.get_edges()
+    for v1, v2 in rng.sample(edges, len(edges) // 5):
+        graph.set_lane_blocked(v1, v2)
+    assert "time" not in graph._next_hops
+    assert_matches_planner(graph, pairs)  # Rebuilt for the changed graph on first use
+    assert "time" in graph._next_hops and graph.route_cache.misses == 0
+
+
+def test_large_maps_get_no_next_hop_table(monkeypatch):
+    graph = build_graph("grid", 100)
+    monkeypatch.setattr(NavigationGraph, "ALL_PAIRS_MAX_VERTICES", 50)
+    assert not graph.precompute_all_pairs("time")
+    graph.route_cache.reset_stats()
+    assert_matches_planner(graph, [(0, 99), (99, 0)])
+    assert graph.route_cache.misses == 2 and not graph._next_hops
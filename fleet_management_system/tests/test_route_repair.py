@@ -0,0 +1,51 @@
+import math
+import random
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.route_repair import RouteRepairer
+from src.utils.path_planner import PathPlanner
+
+
+@pytest.mark.parametrize("kind", ["grid", "warehouse", "rgg"])
+@pytest.mark.parametrize("seed", range(3))
+def test_repaired_routes_match_dijkstra_as_lanes_close_and_reopen(kind, seed):
+    rng = random.Random(seed)
+    graph = build_graph(kind, 300, seed)
+    repairer = RouteRepairer(graph)
+    dijkstra = PathPlanner(graph, cost_model="time", algorithm="dijkstra")
+    edges = graph.get_edges()
+    vertex_count = len(graph.vertices)
+    robots = {robot_id: (rng.randrange(vertex_count), rng.randrange(vertex_count)) for robot_id in range(5)}
+
+    for _ in range(30):
+        graph.set_lane_blocked(*rng.choice(edges), rng.random() < 0.6)
+        for robot_id, (start, goal) in robots.items():
+            repaired = repairer.route(robot_id, start, goal)
+            expected = dijkstra.plan(start, goal)
+            if not expected:
+                assert not repaired
+                continue
+            assert repaired[0] == start and repaired[-1] == goal
+            assert all(graph.is_traversable(v1, v2) for v1, v2 in zip(repaired, repaired[1:]))
+            assert math.isclose(dijkstra.path_cost(repaired), dijkstra.path_cost(expected), abs_tol=1e-9)
+            if len(repaired) > 1:
+                # The robot moves along its route before the next repair
+                robots[robot_id] = (repaired[min(len(repaired) - 1, rng.randrange(1, 3))], goal)
+    repairer.close()
+
+
+def test_lane_changes_report_every_direction_that_changed():
+    graph = build_graph("grid", 25)
+    changes = []
+    graph.on_lanes_changed(lambda lanes, traversability_changed: changes.append((lanes, traversability_changed)))
+    assert graph.set_lane_blocked(1, 0)
+    assert graph.set_lane_blocked(0, 1)  # Already closed: nothing to report
+    assert graph.set_lane_congestion(5, 6, 2.0)
+    assert not graph.set_lane_blocked(0, 24)
+    assert changes == [([(1, 0), (0, 1)], True), ([(5, 6), (6, 5)], False)]
+    assert not graph.is_traversable(0, 1)
+
+    graph.remove_lane(6, 5)
+    changes.clear()
+    assert graph.set_lane_blocked(6, 5)  # Only the lane from 5 to 6 is left
+    assert changes == [([(5, 6)], True)]
@@ -0,0 +1,48 @@
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.nav_graph import NavigationGraph
+
+
+def corridor() -> NavigationGraph:
+    lanes = [[a, b, {}] for a, b in ((0, 1), (1, 2), (2, 3))]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    return NavigationGraph.from_level_data({"vertices": [[float(x), 0.0, {}] for x in range(4)], "lanes": lanes},
+                                           "level1")
+
+
+def test_scenario_loaded_mid_run_starts_its_past_ticks_now():
+    engine = SimulationEngine(build_graph("grid", 100))
+    engine.run(ticks=10)
+    engine.load_scenario({"robots": [{"spawn": 0, "destination": 9}, {"spawn": 90}],
+                          "tasks": [{"tick": 3, "robot": 1, "destination": 99}]})
+    engine.run(ticks=200, until_idle=True)
+    assert [robot.current_vertex_id for robot in engine.fleet_manager.get_all_robots()] == [9, 99]
+    engine.close()
+
+
+def test_pending_lane_change_keeps_the_engine_running():
+    engine = SimulationEngine(corridor())
+    engine.load_scenario({"robots": [{"spawn": 0}],
+                          "lanes": [{"tick": 0, "lane": [1, 2]}, {"tick": 20, "lane": [1, 2], "blocked": False}]})
+    assert not engine.is_idle()
+    engine.run(ticks=100, until_idle=True)
+    assert engine.tick == 21 and engine.is_idle()
+    assert engine.nav_graph.is_traversable(1, 2)
+    engine.close()
+
+
+@pytest.mark.parametrize("scenario, error", [
+    ({"robots": [{"spawn": 0}, {"spawn": 400}]}, "Scenario names unknown vertex 400"),
+    ({"robots": [{"spawn": 0, "destination": -1}]}, "Scenario names unknown vertex -1"),
+    ({"robots": [{"spawn": 0}], "tasks": [{"robot": 0, "destination": 100}]}, "Scenario names unknown vertex 100"),
+    ({"robots": [{"spawn": 0}], "tasks": [{"robot": 1, "destination": 5}]}, "Scenario task names unknown robot 1"),
+    ({"robots": [{"spawn": 0}], "jobs": [{"pickup": 3, "drop": 999}]}, "Scenario names unknown vertex 999"),
+    ({"robots": [{"spawn": 0}], "lanes": [{"tick": 4, "lane": [0, 99]}]}, "Scenario names unknown lane 0-99"),
+])
+def test_bad_scenarios_are_refused_before_anything_loads(scenario, error):
+    engine = SimulationEngine(build_graph("grid", 100))
+    with pytest.raises(ValueError, match=error):
+        engine.load_scenario(scenario)
+    assert not engine.fleet_manager.robots and engine.is_idle()
+    engine.close()
@@ -0,0 +1,110 @@
+import random
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.models.nav_graph import NavigationGraph
+from src.utils.spatial_index import SpatialGrid
+
+
+def brute_force(points, x: float, y: float, radius: float):
+    """What SpatialGrid.within should return, by checking every point"""
+    return sorted(((px - x) ** 2 + (py - y) ** 2, item_id) for item_id, px, py in points
+                  if (px - x) ** 2 + (py - y) ** 2 <= radius * radius)
+
+
+def test_nearest_picks_across_cell_boundaries():
+    grid = SpatialGrid([(0, 0.9, 0.5), (1, 1.0, 0.5), (2, 2.0, 2.0), (3, -0.05, 0.5)], cell_size=1.0)
+    assert grid.nearest(1.0, 0.5, 0.5) == 1  # On the boundary itself
+    assert grid.nearest(0.96, 0.5, 0.5) == 1  # Closest point is in the next cell over
+    assert grid.nearest(0.94, 0.5, 0.5) == 0
+    assert grid.nearest(0.02, 0.5, 0.5) == 3  # ... and in the cell at negative coordinates
+    assert grid.nearest(1.99, 1.99, 0.1) == 2  # Diagonal neighbour cell
+    assert grid.nearest(1.5, 1.5, 0.1) is None
+
+
+@pytest.mark.parametrize("kind", ["grid", "warehouse", "rgg"])
+def test_graph_vertex_picking_matches_brute_force(kind):
+    graph = build_graph(kind, 300, 6)
+    points = [(vertex.id, vertex.x, vertex.y) for vertex in graph.vertices]
+    rng = random.Random(7)
+    cell_size = graph.spatial_index.cell_size
+    queries = [(rng.uniform(-2, 45), rng.uniform(-2, 22)) for _ in range(100)]
+    # Right on, and just either side of, cell boundaries
+    queries += [(cell_size * k + offset, cell_size * k) for k in range(5) for offset in (-1e-9, 0.0, 1e-9)]
+    for x, y in queries:
+        for radius in (0.3, cell_size, 5.0):
+            expected = brute_force(points, x, y, radius)
+            assert graph.spatial_index.within(x, y, radius) == expected
+            assert graph.nearest_vertex(x, y, radius) == (expected[0][1] if expected else None)
+
+
+def test_within_is_sorted_and_includes_points_on_the_radius():
+    grid = SpatialGrid([(0, 3.0, 4.0), (1, 1.0, 0.0), (2, 0.0, 2.0), (3, 10.0, 10.0)])
+    assert grid.within(0.0, 0.0, 5.0) == [(1.0, 1), (4.0, 2), (25.0, 0)]
+    assert grid.within(0.0, 0.0, 4.99) == [(1.0, 1), (4.0, 2)]
+    assert grid.within(0.0, 0.0, 100.0)[-1] == (200.0, 3)  # Wider than the map: scans every bucket
+    assert grid.within(20.0, 20.0, 1.0) == []
+
+
+def test_radius_queries_follow_inserts_and_removals():
+    rng = random.Random(8)
+    points = {item_id: (rng.uniform(0, 20), rng.uniform(0, 20)) for item_id in range(200)}
+    grid = SpatialGrid(cell_size=1.5)
+    for item_id, (x, y) in points.items():
+        grid.insert(item_id, x, y)
+    for item_id in range(0, 200, 3):
+        points[item_id] = (rng.uniform(0, 20), rng.uniform(0, 20))  # Moved
+        grid.insert(item_id, *points[item_id])
+    for item_id in range(1, 200, 5):
+        del points[item_id]
+        grid.remove(item_id)
+    grid.remove(999)  # Unknown ids are ignored
+    assert len(grid) == len(points)
+    flat = [(item_id, x, y) for item_id, (x, y) in points.items()]
+    for _ in range(50):
+        x, y, radius = rng.uniform(0, 20), rng.uniform(0, 20), rng.uniform(0.1, 6)
+        assert grid.within(x, y, radius) == brute_force(flat, x, y, radius)
+
+
+def test_vectorized_and_incremental_construction_agree():
+    rng = random.Random(9)
+    xs, ys = np.array([rng.uniform(-5, 5) for _ in range(100)]), np.array([rng.uniform(-5, 5) for _ in range(100)])
+    fast = SpatialGrid.from_arrays(xs, ys)
+    slow = SpatialGrid(zip(range(100), xs.tolist(), ys.tolist()))
+    assert fast.cell_size == pytest.approx(slow.cell_size)
+    for _ in range(30):
+        x, y = rng.uniform(-6, 6), rng.uniform(-6, 6)
+        assert fast.within(x, y, 2.0) == slow.within(x, y, 2.0)
+
+
+@pytest.mark.parametrize("grid", [SpatialGrid(), SpatialGrid.from_arrays(np.array([]), np.array([]))])
+def test_empty_grid_finds_nothing(grid):
+    assert len(grid) == 0 and grid.cell_size == 1.0
+    assert grid.nearest(0.0, 0.0, 10.0) is None and grid.within(0.0, 0.0, 1e6) == []
+
+
+@pytest.mark.parametrize("grid", [SpatialGrid([(7, 2.0, 3.0)]),
+                                  SpatialGrid.from_arrays(np.array([2.0]), np.array([3.0]))])
+def test_one_point_grid(grid):
+    item_id = 7 if 7 in grid.positions else 0
+    assert grid.cell_size == 1.0
+    assert grid.nearest(2.0, 3.0, 0.0) == item_id
+    assert grid.nearest(2.5, 3.0, 0.5) == item_id and grid.nearest(2.5, 3.0, 0.49) is None
+    grid.remove(item_id)
+    assert grid.nearest(2.0, 3.0, 1.0) is None and not grid.cells
+
+
+def test_collinear_points_get_a_usable_cell_size():
+    grid = SpatialGrid((item_id, float(item_id), 0.0) for item_id in range(10))
+    assert grid.cell_size == pytest.approx(0.9)
+    assert grid.nearest(4.4, 0.0, 1.0) == 4
+    assert SpatialGrid([(0, 1.0, 1.0), (1, 1.0, 1.0)]).cell_size == 1.0  # All on one spot
+
+
+@pytest.mark.parametrize("vertices", [[], [[4.0, 4.0, {}]]])
+def test_graphs_with_no_or_one_vertex(vertices):
+    graph = NavigationGraph.from_level_data({"vertices": vertices, "lanes": []}, "level1")
+    expected = 0 if vertices else None
+    assert graph.nearest_vertex(4.0, 4.0, 1.0) == expected
+    assert graph.vertices_within(4.0, 4.0, 1.0) == ([0] if vertices else [])
+    assert graph.nearest_vertex(6.0, 4.0, 1.0) is None
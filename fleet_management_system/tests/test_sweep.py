@@ -0,0 +1,84 @@
+import itertools
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers.simulation_engine import SimulationEngine
+from src.utils import sweep
+from src.utils.sweep import DEFAULT_PARAMETERS, REPORTED, aggregate, build_scenario, expand_grid
+
+
+def test_grid_expands_to_every_combination_times_repeats():
+    grid = {"robots": [2, 4, 8], "layout": ["random", "clustered"], "battery_range": [None, 60]}
+    runs = expand_grid(grid, 3, 10)
+    assert len(runs) == 3 * 2 * 2 * 3
+    assert [run["run"] for run in runs] == list(range(len(runs)))
+    combinations = {(run["robots"], run["layout"], run["battery_range"]) for run in runs}
+    assert combinations == set(itertools.product(*grid.values()))
+    for run in runs:
+        assert run["seed"] == 10 + run["repeat"]  # Repeat k gets the same seed in every combination
+        assert (run["jobs"], run["job_interval"], run["motion"]) == (20, 0, "discrete")  # Defaults fill the rest
+        assert set(run) == set(DEFAULT_PARAMETERS) | {"repeat", "seed", "run"}
+    assert expand_grid(grid, 3, 10) == runs
+
+
+def test_grid_of_nothing_is_one_default_run_per_repeat():
+    assert expand_grid({}, 2, 0) == [{**DEFAULT_PARAMETERS, "repeat": 0, "seed": 0, "run": 0},
+                                     {**DEFAULT_PARAMETERS, "repeat": 1, "seed": 1, "run": 1}]
+    assert expand_grid({"robots": []}, 2, 0) == []
+
+
+def test_unknown_grid_parameters_are_refused():
+    with pytest.raises(ValueError, match=r"Unknown sweep parameters \['speed'\]"):
+        expand_grid({"robots": [2], "speed": [1, 2]}, 1, 0)
+
+
+@pytest.mark.parametrize("layout", ["random", "clustered"])
+@pytest.mark.parametrize("battery_range", [None, 60])
+def test_scenarios_load_into_the_engine(layout, battery_range):
+    graph = build_graph("grid", 100)
+    params = {**DEFAULT_PARAMETERS, "robots": 6, "layout": layout, "jobs": 5, "job_interval": 3,
+              "battery_range": battery_range, "seed": 4}
+    scenario = build_scenario(graph, params)
+    assert scenario == build_scenario(graph, params)  # Same seed, same scenario
+    spawns = [robot["spawn"] for robot in scenario["robots"]]
+    assert len(set(spawns)) == 6
+    assert [job["tick"] for job in scenario["jobs"]] == [0, 3, 6, 9, 12]
+    assert all(job["pickup"] != job["drop"] for job in scenario["jobs"])
+    assert ("battery" in scenario) == bool(battery_range)
+
+    engine = SimulationEngine(graph)
+    engine.load_scenario(scenario)
+    assert [robot.current_vertex_id for robot in engine.fleet_manager.get_all_robots()] == spawns
+    assert (engine.chargers is not None) == bool(battery_range)
+    engine.run(ticks=2000, until_idle=True)
+    assert engine.dispatcher.metrics()["completed"] + engine.dispatcher.metrics()["failed"] == 5
+    engine.close()
+
+
+def test_clustered_fleets_start_packed_together():
+    graph = build_graph("grid", 400)  # 20 x 20
+    params = {**DEFAULT_PARAMETERS, "robots": 9, "layout": "clustered", "seed": 1}
+    spawns = {robot["spawn"] for robot in build_scenario(graph, params)["robots"]}
+    assert all(any(neighbor in spawns for neighbor in graph.get_neighbor_ids(v)) for v in spawns)
+    seeds = [build_scenario(graph, {**params, "seed": seed})["robots"] for seed in range(3)]
+    assert seeds[0] != seeds[1] != seeds[2]
+
+
+@pytest.mark.parametrize("params, error", [
+    ({"robots": 26}, "Cannot spawn 26 robots on 25 vertices"),
+    ({"layout": "ring"}, "Unknown layout 'ring'"),
+])
+def test_impossible_scenarios_are_refused(params, error):
+    with pytest.raises(ValueError, match=error):
+        build_scenario(build_graph("grid", 25), {**DEFAULT_PARAMETERS, "seed": 0, **params})
+
+
+def test_runs_report_their_statistics_and_aggregate_over_repeats(monkeypatch):
+    monkeypatch.setattr(sweep, "_graph", build_graph("grid", 100))
+    runs = expand_grid({"robots": [2, 4], "jobs": [6]}, 2, 0)
+    results = [sweep.run_one(params, 1000) for params in runs]
+    for result in results:
+        assert result["finished"] and result["jobs_completed"] + result["jobs_failed"] == 6
+        assert set(REPORTED) <= set(result)
+    summary = aggregate(results, ["robots"])
+    assert [(row["robots"], row["runs"], row["unfinished"]) for row in summary] == [(2, 2, 0), (4, 2, 0)]
+    assert summary[0]["ticks"] == pytest.approx((results[0]["ticks"] + results[1]["ticks"]) / 2)
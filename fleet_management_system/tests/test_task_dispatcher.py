@@ -0,0 +1,133 @@
+import math
+import numpy as np
+import pytest
+from benchmarks.generators import build_graph
+from src.controllers import task_dispatcher
+from src.controllers.simulation_engine import SimulationEngine
+from src.models.nav_graph import NavigationGraph
+
+
+def two_corridors() -> NavigationGraph:
+    """Vertices 0-1-2 and 3-4, with no lane between the two corridors"""
+    lanes = [[a, b, {}] for a, b in ((0, 1), (1, 2), (3, 4))]
+    lanes += [[b, a, attributes] for a, b, attributes in lanes]
+    vertices = [[0.0, 0.0, {}], [1.0, 0.0, {}], [2.0, 0.0, {}], [10.0, 0.0, {}], [11.0, 0.0, {}]]
+    return NavigationGraph.from_level_data({"vertices": vertices, "lanes": lanes}, "level1")
+
+
+def test_jobs_go_by_priority_then_deadline_then_arrival():
+    engine = SimulationEngine(build_graph("grid", 25))
+    engine.spawn_robot(12)
+    specs = [{"pickup": 6, "drop": 7},
+             {"pickup": 8, "drop": 7, "priority": 1, "deadline": 500},
+             {"pickup": 16, "drop": 17, "priority": 1, "deadline": 300},
+             {"pickup": 18, "drop": 17, "priority": 1, "deadline": 300},
+             {"pickup": 6, "drop": 11, "deadline": 400},
+             {"pickup": 8, "drop": 13}]
+    jobs = engine.dispatcher.submit_many(specs)
+    engine.run(ticks=2000, until_idle=True)
+    assert all(job.state == "done" for job in jobs)
+    order = [job.id for job in sorted(jobs, key=lambda job: job.assigned_tick)]
+    assert order == [2, 3, 1, 4, 0, 5]
+    engine.close()
+
+
+def test_job_goes_to_pickup_then_drop_then_done():
+    engine = SimulationEngine(build_graph("grid", 25))
+    robot = engine.spawn_robot(0)
+    job = engine.submit_job(4, 24)
+    states = [job.state]
+    for _ in range(100):
+        vertex_id = robot.current_vertex_id
+        engine.step()
+        if job.state != states[-1]:
+            states.append(job.state)
+            assert vertex_id == {"to_pickup": 0, "to_drop": 4, "done": 24}[job.state]  # Where the robot was
+        if job.state == "done":
+            break
+    assert states == ["queued", "to_pickup", "to_drop", "done"]
+    assert robot.current_vertex_id == 24 and job.robot_id == robot.id and not job.late
+    metrics = engine.dispatcher.metrics()
+    assert (metrics["completed"], metrics["in_progress"], metrics["queued"]) == (1, 0, 0)
+    engine.close()
+
+
+def test_unreachable_pickups_and_drops_fail_the_job():
+    engine = SimulationEngine(two_corridors())
+    robot = engine.spawn_robot(0)
+    stranded = engine.submit_job(3, 4)  # No robot can get to the pickup
+    cut_off = engine.submit_job(2, 4)  # Pickup fine, but the drop is across the gap
+    engine.run(ticks=50, until_idle=True)
+    assert stranded.state == "failed" and stranded.robot_id is None
+    assert cut_off.state == "failed" and robot.current_vertex_id == 2
+    metrics = engine.dispatcher.metrics()
+    assert (metrics["failed"], metrics["completed"]) == (2, 0) and not engine.dispatcher.has_work()
+    engine.close()
+
+
+def test_pickup_only_a_busy_robot_can_reach_waits_for_it():
+    engine = SimulationEngine(two_corridors())
+    engine.spawn_robot(0)
+    busy = engine.spawn_robot(3)
+    engine.assign_task(busy.id, 4)
+    job = engine.submit_job(3, 4)
+    engine.dispatcher.dispatch(engine.tick)
+    assert job.state == "queued"
+    engine.run(ticks=50, until_idle=True)
+    assert job.state == "done" and job.robot_id == busy.id
+    engine.close()
+
+
+def test_jobs_beyond_battery_range_fail_before_assignment():
+    engine = SimulationEngine(build_graph("grid", 100))  # The only charger is vertex 0
+    engine.enable_batteries(20.0)
+    robot = engine.spawn_robot(11)
+    far = engine.submit_job(9, 99)  # 9 to the drop and 18 back to the charger is more than a full charge
+    near = engine.submit_job(2, 1)
+    engine.run(ticks=200, until_idle=True)
+    assert far.state == "failed" and far.robot_id is None
+    assert near.state == "done" and near.robot_id == robot.id
+    engine.close()
+
+
+def test_metrics_report_queue_latency():
+    engine = SimulationEngine(build_graph("grid", 25))
+    engine.spawn_robot(0)
+    metrics = engine.dispatcher.metrics()
+    assert metrics["waves"] == 0 and metrics["mean_wave_ms"] == 0.0
+    assert not any(key.startswith("latency") for key in metrics)
+
+    jobs = [engine.submit_job(4, 24), engine.submit_job(20, 0)]
+    engine.run(ticks=200, until_idle=True)
+    waits = [job.assigned_tick - job.submitted_tick for job in jobs]
+    assert waits[0] == 0 and waits[1] > 0
+    metrics = engine.dispatcher.metrics()
+    assert metrics["completed"] == 2 and metrics["waves"] > 0 and metrics["mean_wave_ms"] > 0
+    assert metrics["latency_ticks_mean"] == pytest.approx(sum(waits) / 2)
+    assert metrics["latency_ticks_max"] == max(waits)
+    assert metrics["latency_ticks_p50"] <= metrics["latency_ticks_p95"] <= metrics["latency_ticks_max"]
+    assert 0 <= metrics["latency_ms_p50"] <= metrics["latency_ms_max"]
+    engine.close()
+
+
+@pytest.mark.parametrize("kind", ["grid", "warehouse", "rgg"])
+def test_travel_costs_are_exact_near_each_robot_and_estimated_beyond(monkeypatch, kind):
+    monkeypatch.setattr(task_dispatcher, "MATCH_CANDIDATES", 4)
+    graph = build_graph(kind, 400, 3)
+    engine = SimulationEngine(graph)
+    count = len(graph.vertices)
+    robots = [engine.spawn_robot(vertex_id) for vertex_id in range(0, count, 23)]
+    pickups = list(range(5, count, 17)) + [5]  # One pickup twice
+    dispatcher = engine.dispatcher
+    cost = dispatcher._travel_costs(robots, pickups)
+    exact = np.column_stack([dispatcher.planner.costs_to(pickup)[[robot.current_vertex_id for robot in robots]]
+                             for pickup in pickups])
+    assert cost.shape == exact.shape and np.array_equal(cost[:, 0], cost[:, -1])
+    assert np.isfinite(cost[np.isfinite(exact)]).all() and np.isinf(exact[np.isinf(cost)]).all()
+    for row in range(len(robots)):
+        reachable = np.sort(exact[row, :-1][np.isfinite(exact[row, :-1])])
+        radius = reachable[3] if len(reachable) >= 4 else math.inf
+        known = exact[row] < radius
+        assert np.allclose(cost[row, known], exact[row, known])  # Closer than the 4th nearest pickup: exact
+        assert np.all(cost[row, ~known] >= radius - 1e-9)  # Beyond: estimated, but no less than the search radius
+    engine.close()